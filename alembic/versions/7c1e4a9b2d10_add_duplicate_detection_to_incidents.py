@@ -0,0 +1,27 @@
+"""add_duplicate_detection_to_incidents"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7c1e4a9b2d10'
+down_revision = '4159004c8d22'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('Incidents', sa.Column('parent_incident_id', sa.Integer(), nullable=True))
+    op.add_column('Incidents', sa.Column('duplicate_score', sa.Float(), nullable=True))
+    op.create_foreign_key(
+        'fk_incidents_parent_incident_id', 'Incidents', 'Incidents',
+        ['parent_incident_id'], ['incident_id'],
+    )
+    op.create_index(op.f('ix_Incidents_parent_incident_id'), 'Incidents', ['parent_incident_id'], unique=False)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_Incidents_parent_incident_id'), table_name='Incidents')
+    op.drop_constraint('fk_incidents_parent_incident_id', 'Incidents', type_='foreignkey')
+    op.drop_column('Incidents', 'duplicate_score')
+    op.drop_column('Incidents', 'parent_incident_id')
@@ -0,0 +1,56 @@
+"""add_metrics_summary_tables"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9a3f6d2e8b41'
+down_revision = '7c1e4a9b2d10'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'user_metrics_summary',
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('total_incidents_created', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('total_incidents_resolved', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('total_incidents_assigned', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('average_resolution_time_hours', sa.Float(), nullable=True),
+        sa.Column('incidents_by_status', sa.JSON(), nullable=False),
+        sa.Column('top_incident_types', sa.JSON(), nullable=False),
+        sa.Column('total_comments_made', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('total_files_uploaded', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('is_stale', sa.Boolean(), nullable=False, server_default=sa.false()),
+        sa.Column('refreshed_at', sa.DateTime(), server_default=sa.text('now()'), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['Users.user_id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('user_id'),
+    )
+    op.create_index(op.f('ix_user_metrics_summary_is_stale'), 'user_metrics_summary', ['is_stale'], unique=False)
+
+    op.create_table(
+        'category_metrics_summary',
+        sa.Column('incident_category_id', sa.Integer(), nullable=False),
+        sa.Column('total_incidents', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('open_incidents', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('resolved_incidents', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('average_resolution_time_hours', sa.Float(), nullable=True),
+        sa.Column('incidents_by_status', sa.JSON(), nullable=False),
+        sa.Column('is_stale', sa.Boolean(), nullable=False, server_default=sa.false()),
+        sa.Column('refreshed_at', sa.DateTime(), server_default=sa.text('now()'), nullable=True),
+        sa.ForeignKeyConstraint(
+            ['incident_category_id'], ['IncidentCategories.incident_category_id'], ondelete='CASCADE'
+        ),
+        sa.PrimaryKeyConstraint('incident_category_id'),
+    )
+    op.create_index(
+        op.f('ix_category_metrics_summary_is_stale'), 'category_metrics_summary', ['is_stale'], unique=False
+    )
+
+
+def downgrade():
+    op.drop_index(op.f('ix_category_metrics_summary_is_stale'), table_name='category_metrics_summary')
+    op.drop_table('category_metrics_summary')
+    op.drop_index(op.f('ix_user_metrics_summary_is_stale'), table_name='user_metrics_summary')
+    op.drop_table('user_metrics_summary')
@@ -0,0 +1,29 @@
+"""add_evidence_blobs_table"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a3f9c2d7e5b1'
+down_revision = 'e6b2c9d4a8f1'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'EvidenceBlobs',
+        sa.Column('sha256', sa.String(length=64), nullable=False),
+        sa.Column('file_path', sa.String(length=512), nullable=False),
+        sa.Column('file_size_bytes', sa.Integer(), nullable=False),
+        sa.Column('ref_count', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), server_default=sa.text('now()'), nullable=True),
+        sa.PrimaryKeyConstraint('sha256'),
+    )
+    # Las evidencias existentes conservan su ruta original; solo las nuevas se deduplican
+    op.create_index(op.f('ix_EvidenceFiles_file_hash'), 'EvidenceFiles', ['file_hash'], unique=False)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_EvidenceFiles_file_hash'), table_name='EvidenceFiles')
+    op.drop_table('EvidenceBlobs')
@@ -0,0 +1,19 @@
+"""add_user_indexes_to_incidents"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'b5d2c8e1f7a3'
+down_revision = '9a3f6d2e8b41'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index(op.f('ix_Incidents_reported_by_id'), 'Incidents', ['reported_by_id'], unique=False)
+    op.create_index(op.f('ix_Incidents_assigned_to_id'), 'Incidents', ['assigned_to_id'], unique=False)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_Incidents_assigned_to_id'), table_name='Incidents')
+    op.drop_index(op.f('ix_Incidents_reported_by_id'), table_name='Incidents')
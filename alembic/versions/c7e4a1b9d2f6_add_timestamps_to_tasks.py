@@ -0,0 +1,23 @@
+"""add_timestamps_to_tasks"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c7e4a1b9d2f6'
+down_revision = 'a3f9c2d7e5b1'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Las tareas existentes toman la fecha de la migración y caducan con la retención normal
+    op.add_column('tasks', sa.Column('created_at', sa.DateTime(), server_default=sa.text('now()'), nullable=True))
+    op.add_column('tasks', sa.Column('updated_at', sa.DateTime(), server_default=sa.text('now()'), nullable=True))
+    op.create_index(op.f('ix_tasks_updated_at'), 'tasks', ['updated_at'], unique=False)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_tasks_updated_at'), table_name='tasks')
+    op.drop_column('tasks', 'updated_at')
+    op.drop_column('tasks', 'created_at')
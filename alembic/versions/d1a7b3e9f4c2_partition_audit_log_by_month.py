@@ -0,0 +1,123 @@
+"""partition_audit_log_by_month
+
+Convierte `audit_log` en una tabla particionada por rango mensual sobre
+`timestamp` (solo PostgreSQL). Se crea una partición por cada mes con datos,
+los tres meses siguientes y una partición DEFAULT; las siguientes las crea el
+job de retención (`manage.py archive_audit_logs`).
+"""
+from datetime import date, datetime
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd1a7b3e9f4c2'
+down_revision = 'c8e4f1a6d2b9'
+branch_labels = None
+depends_on = None
+
+COLUMNS = "id, user_id, action, resource_type, resource_id, details, ip_address, user_agent, \"timestamp\", success"
+INDEXED_COLUMNS = ['action', 'id', 'resource_id', 'resource_type', 'timestamp', 'user_id']
+MONTHS_AHEAD = 3
+
+
+def _add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _create_indexes(table: str) -> None:
+    for column in INDEXED_COLUMNS:
+        op.create_index(op.f(f'ix_{table}_{column}'), table, [column], unique=False)
+
+
+def _create_protection_trigger() -> None:
+    op.execute("""
+    CREATE TRIGGER protect_audit_log_trigger
+    BEFORE UPDATE OR DELETE ON audit_log
+    FOR EACH ROW EXECUTE FUNCTION prevent_audit_log_modification();
+    """)
+
+
+def upgrade():
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql':
+        return
+
+    op.execute("DROP TRIGGER IF EXISTS protect_audit_log_trigger ON audit_log")
+    op.execute("ALTER TABLE audit_log RENAME TO audit_log_legacy")
+    for column in INDEXED_COLUMNS:
+        op.execute(f"ALTER INDEX IF EXISTS ix_audit_log_{column} RENAME TO ix_audit_log_legacy_{column}")
+
+    # La clave primaria de una tabla particionada debe incluir la clave de partición
+    op.execute("""
+    CREATE TABLE audit_log (
+        id INTEGER NOT NULL DEFAULT nextval('audit_log_id_seq'),
+        user_id INTEGER REFERENCES "Users" (user_id),
+        action VARCHAR(100) NOT NULL,
+        resource_type VARCHAR(50) NOT NULL,
+        resource_id INTEGER,
+        details JSON,
+        ip_address VARCHAR(45),
+        user_agent TEXT,
+        "timestamp" TIMESTAMP WITHOUT TIME ZONE NOT NULL DEFAULT now(),
+        success BOOLEAN,
+        PRIMARY KEY (id, "timestamp")
+    ) PARTITION BY RANGE ("timestamp")
+    """)
+
+    oldest = bind.execute(sa.text('SELECT min("timestamp") FROM audit_log_legacy')).scalar()
+    today = datetime.utcnow().date().replace(day=1)
+    month = (oldest.date().replace(day=1) if oldest else today)
+    while month <= _add_months(today, MONTHS_AHEAD):
+        next_month = _add_months(month, 1)
+        op.execute(
+            f"CREATE TABLE audit_log_p{month:%Y_%m} PARTITION OF audit_log "
+            f"FOR VALUES FROM ('{month.isoformat()}') TO ('{next_month.isoformat()}')"
+        )
+        month = next_month
+    op.execute("CREATE TABLE audit_log_default PARTITION OF audit_log DEFAULT")
+
+    op.execute(
+        f"INSERT INTO audit_log ({COLUMNS}) "
+        f"SELECT id, user_id, action, resource_type, resource_id, details, ip_address, user_agent, "
+        f"COALESCE(\"timestamp\", now()), success FROM audit_log_legacy"
+    )
+    op.execute("ALTER SEQUENCE audit_log_id_seq OWNED BY audit_log.id")
+    op.execute("DROP TABLE audit_log_legacy")
+
+    _create_indexes('audit_log')
+    _create_protection_trigger()
+
+
+def downgrade():
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql':
+        return
+
+    op.execute("DROP TRIGGER IF EXISTS protect_audit_log_trigger ON audit_log")
+    op.execute("ALTER TABLE audit_log RENAME TO audit_log_partitioned")
+    for column in INDEXED_COLUMNS:
+        op.execute(f"ALTER INDEX IF EXISTS ix_audit_log_{column} RENAME TO ix_audit_log_partitioned_{column}")
+
+    op.execute("""
+    CREATE TABLE audit_log (
+        id INTEGER NOT NULL DEFAULT nextval('audit_log_id_seq') PRIMARY KEY,
+        user_id INTEGER REFERENCES "Users" (user_id),
+        action VARCHAR(100) NOT NULL,
+        resource_type VARCHAR(50) NOT NULL,
+        resource_id INTEGER,
+        details JSON,
+        ip_address VARCHAR(45),
+        user_agent TEXT,
+        "timestamp" TIMESTAMP WITHOUT TIME ZONE DEFAULT now(),
+        success BOOLEAN
+    )
+    """)
+    op.execute(f"INSERT INTO audit_log ({COLUMNS}) SELECT {COLUMNS} FROM audit_log_partitioned")
+    op.execute("ALTER SEQUENCE audit_log_id_seq OWNED BY audit_log.id")
+    op.execute("DROP TABLE audit_log_partitioned CASCADE")
+
+    _create_indexes('audit_log')
+    _create_protection_trigger()
@@ -0,0 +1,30 @@
+"""add_composite_indexes_to_audit_log"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'e6b2c9d4a8f1'
+down_revision = 'd1a7b3e9f4c2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_audit_log_user_id_timestamp', 'audit_log', ['user_id', 'timestamp'], unique=False)
+    op.create_index('ix_audit_log_action_timestamp', 'audit_log', ['action', 'timestamp'], unique=False)
+    op.create_index(
+        'ix_audit_log_resource_timestamp', 'audit_log', ['resource_type', 'resource_id', 'timestamp'], unique=False
+    )
+    # Los índices simples quedan cubiertos por el prefijo de los compuestos
+    op.drop_index(op.f('ix_audit_log_user_id'), table_name='audit_log')
+    op.drop_index(op.f('ix_audit_log_action'), table_name='audit_log')
+    op.drop_index(op.f('ix_audit_log_resource_type'), table_name='audit_log')
+
+
+def downgrade():
+    op.create_index(op.f('ix_audit_log_resource_type'), 'audit_log', ['resource_type'], unique=False)
+    op.create_index(op.f('ix_audit_log_action'), 'audit_log', ['action'], unique=False)
+    op.create_index(op.f('ix_audit_log_user_id'), 'audit_log', ['user_id'], unique=False)
+    op.drop_index('ix_audit_log_resource_timestamp', table_name='audit_log')
+    op.drop_index('ix_audit_log_action_timestamp', table_name='audit_log')
+    op.drop_index('ix_audit_log_user_id_timestamp', table_name='audit_log')
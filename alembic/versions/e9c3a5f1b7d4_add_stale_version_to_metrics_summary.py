@@ -0,0 +1,26 @@
+"""add_stale_version_to_metrics_summary"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e9c3a5f1b7d4'
+down_revision = 'c7e4a1b9d2f6'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column(
+        'user_metrics_summary',
+        sa.Column('stale_version', sa.Integer(), nullable=False, server_default='0'),
+    )
+    op.add_column(
+        'category_metrics_summary',
+        sa.Column('stale_version', sa.Integer(), nullable=False, server_default='0'),
+    )
+
+
+def downgrade():
+    op.drop_column('category_metrics_summary', 'stale_version')
+    op.drop_column('user_metrics_summary', 'stale_version')
@@ -9,15 +9,17 @@ import functools
 import inspect
 import logging
 from typing import Any, Callable, Optional, Dict, Set
-from pydantic import BaseModel
 
 from fastapi import Depends, HTTPException, Request
+from sqlalchemy import event, inspect as sa_inspect
 from sqlalchemy.orm import Session, DeclarativeMeta
 
 from incident_api.api import dependencies
+from incident_api.db.unit_of_work import in_unit_of_work, suspend_unit_of_work
 from incident_api.models.user import User, UserRole
 from incident_api.services.audit_service import AuditService
 from incident_api.services.alerting_service import alerting_service
+from incident_api.services.rate_limiting_service import enforce_rate_limit
 
 logger = logging.getLogger(__name__)
 
@@ -85,36 +87,75 @@ SENSITIVE_FIELDS: Set[str] = {
 }
 
 
-def _model_to_dict(model: Any) -> Dict[str, Any]:
-    """Convierte un modelo SQLAlchemy o Pydantic a un diccionario."""
-    if isinstance(model, BaseModel):
-        return model.model_dump()
-    if hasattr(model, '__table__'):  # Asume que es un modelo SQLAlchemy
-        return {c.name: getattr(model, c.name) for c in model.__table__.columns}
-    return {}
-
-
-def _get_diff(
-    old_dict: Dict[str, Any], new_dict: Dict[str, Any], exclude: Set[str]
-) -> Dict[str, Any]:
+def _get_tracked_resource(db: Session, get_resource_func: Callable, resource_id: Any) -> Any:
     """
-    Compara dos diccionarios y devuelve las diferencias, excluyendo campos sensibles.
+    Devuelve la instancia del recurso, reutilizando la del mapa de identidad de la sesión.
+
+    Si `get_resource_func` es un método de un objeto CRUD, se usa `Session.get`, que solo
+    consulta la base de datos cuando las dependencias del endpoint no cargaron ya el recurso.
     """
-    diff = {"old_values": {}, "new_values": {}}
-    all_keys = old_dict.keys() | new_dict.keys()
+    model = getattr(getattr(get_resource_func, "__self__", None), "model", None)
+    if model is not None:
+        return db.get(model, resource_id)
+    return get_resource_func(db, id=resource_id)
 
-    for key in all_keys:
-        if key in exclude:
-            continue
 
-        old_value = old_dict.get(key)
-        new_value = new_dict.get(key)
+class _ChangeCollector:
+    """
+    Recoge los atributos modificados de una instancia a partir de su historial en SQLAlchemy.
 
-        if old_value != new_value:
+    El historial se vacía en cada flush, por lo que se lee en `before_flush` mientras
+    el endpoint se ejecuta y una última vez al terminar. Solo se copian los atributos
+    que cambian; el valor previo de un atributo sin historial (p. ej. expirado) se toma
+    del estado ya cargado al empezar.
+    """
+
+    def __init__(self, db: Session, instance: Any):
+        self.db = db
+        self.instance = instance
+        state = sa_inspect(instance)
+        self.column_keys = [attr.key for attr in state.mapper.column_attrs]
+        # Copia superficial de los valores ya cargados; no provoca consultas
+        self.loaded_state: Dict[str, Any] = {
+            key: state.dict[key] for key in self.column_keys if key in state.dict
+        }
+        self.old_values: Dict[str, Any] = {}
+        self.new_values: Dict[str, Any] = {}
+
+    def __enter__(self) -> "_ChangeCollector":
+        event.listen(self.db, "before_flush", self._before_flush)
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        event.remove(self.db, "before_flush", self._before_flush)
+
+    def _before_flush(self, session: Session, flush_context: Any, instances: Any) -> None:
+        self.collect()
+
+    def collect(self) -> None:
+        """Acumula los cambios pendientes: el primer valor anterior y el último valor nuevo."""
+        state = sa_inspect(self.instance)
+        if state.deleted or state.detached:
+            return
+        for key in self.column_keys:
+            history = state.attrs[key].history
+            if not history.added and not history.deleted:
+                continue
+            if key not in self.old_values:
+                self.old_values[key] = history.deleted[0] if history.deleted else self.loaded_state.get(key)
+            self.new_values[key] = history.added[0] if history.added else None
+
+    def changes(self, exclude: Set[str]) -> Dict[str, Any]:
+        """Devuelve los valores anteriores y nuevos de lo modificado, sin campos sensibles ni cambios nulos."""
+        self.collect()
+        diff = {"old_values": {}, "new_values": {}}
+        for key, new_value in self.new_values.items():
+            old_value = self.old_values.get(key)
+            if key in exclude or old_value == new_value:
+                continue
             diff["old_values"][key] = old_value
             diff["new_values"][key] = new_value
-
-    return diff if diff["old_values"] or diff["new_values"] else {}
+        return diff if diff["old_values"] or diff["new_values"] else {}
 
 
 def audit_action(
@@ -133,7 +174,8 @@ def audit_action(
         resource_type (str): El tipo de recurso (e.g., 'USER').
         resource_id_param (str, optional): El nombre del parámetro que contiene el ID del recurso.
         get_resource_func (Callable, optional): Una función que, dado un `db` y un `id`,
-            devuelve el estado del recurso ANTES de la modificación.
+            devuelve el recurso a modificar. Si es un método CRUD, se reutiliza la instancia
+            ya cargada en la sesión y solo se registran los atributos que cambian.
     """
 
     def decorator(func: Callable) -> Callable:
@@ -151,20 +193,24 @@ def audit_action(
                 return await func(*args, **kwargs) if inspect.iscoroutinefunction(func) else func(*args, **kwargs)
 
             resource_id: Optional[int] = kwargs.get(resource_id_param) if resource_id_param else None
-            old_state: Optional[Dict[str, Any]] = None
+            collector: Optional[_ChangeCollector] = None
             details: Dict[str, Any] = {}
 
-            # Obtener estado "antes" si es una operación de actualización/borrado
+            # Seguir los cambios del recurso si es una operación de actualización/borrado
             if get_resource_func and resource_id:
                 try:
-                    old_resource = get_resource_func(db, id=resource_id)
-                    if old_resource:
-                        old_state = _model_to_dict(old_resource)
+                    resource = _get_tracked_resource(db, get_resource_func, resource_id)
+                    if resource is not None:
+                        collector = _ChangeCollector(db, resource)
                 except Exception as e:
                     logger.error("Failed to get old state in audit decorator: %s", e)
 
             try:
-                response = await func(*args, **kwargs) if inspect.iscoroutinefunction(func) else func(*args, **kwargs)
+                if collector:
+                    with collector:
+                        response = await func(*args, **kwargs) if inspect.iscoroutinefunction(func) else func(*args, **kwargs)
+                else:
+                    response = await func(*args, **kwargs) if inspect.iscoroutinefunction(func) else func(*args, **kwargs)
 
                 # Extraer ID de la respuesta para operaciones de CREACIÓN
                 if not resource_id:
@@ -174,15 +220,16 @@ def audit_action(
                         resource_id = getattr(response, "user_id")
 
                 # Calcular diff y comprobar alertas si es una actualización
-                if old_state:
-                    new_state = _model_to_dict(response)
-                    changes = _get_diff(old_state, new_state, exclude=SENSITIVE_FIELDS)
+                if collector:
+                    changes = collector.changes(exclude=SENSITIVE_FIELDS)
                     if changes:
                         details = {"changes": changes}
                         # Comprobar si el cambio de datos constituye una alerta de seguridad
                         if resource_type == "USER":
                             _check_for_privilege_escalation(details.get("changes", {}), resource_id, current_user)
-                            _check_for_admin_deactivation(details.get("changes", {}), old_state, resource_id, current_user)
+                            _check_for_admin_deactivation(
+                                details.get("changes", {}), collector.loaded_state, resource_id, current_user
+                            )
                     else:
                         details = {"response": "Action completed successfully (no data changed)."}
                 else:
@@ -208,17 +255,78 @@ def audit_action(
                 logger.error(
                     "Exception in audited endpoint '%s': %s", func.__name__, e, exc_info=True
                 )
-                audit_service.log_action(
-                    db=db,
-                    user_id=current_user.user_id,
-                    action=action,
-                    resource_type=resource_type,
-                    resource_id=resource_id,
-                    request=request,
-                    success=False,
-                    details=error_details,
-                )
+                # En una unidad de trabajo, descartar el trabajo parcial y confirmar solo la auditoría del fallo
+                if in_unit_of_work(db):
+                    db.rollback()
+                with suspend_unit_of_work(db):
+                    audit_service.log_action(
+                        db=db,
+                        user_id=current_user.user_id,
+                        action=action,
+                        resource_type=resource_type,
+                        resource_id=resource_id,
+                        request=request,
+                        success=False,
+                        details=error_details,
+                    )
                 raise
 
         return wrapper
     return decorator
+
+
+def rate_limit(
+    scope: str,
+    max_attempts: int,
+    window_seconds: int,
+    block_duration: int = 0,
+    key_func: Optional[Callable[[Request], str]] = None,
+    detail: str = "Demasiadas solicitudes. Intente más tarde.",
+) -> Callable:
+    """
+    Decorador para limitar la frecuencia de peticiones a un endpoint de FastAPI.
+
+    El endpoint debe declarar un parámetro `request: Request`. Si la petición excede
+    el límite, se responde 429 con la cabecera Retry-After.
+
+    Args:
+        scope (str): Nombre del límite (e.g., 'export'); separa sus contadores de los demás.
+        max_attempts (int): Número máximo de peticiones por ventana.
+        window_seconds (int): Duración de la ventana deslizante en segundos.
+        block_duration (int, optional): Segundos de bloqueo tras exceder el límite.
+        key_func (Callable, optional): Obtiene la clave de la petición (por defecto, la IP).
+        detail (str, optional): Mensaje devuelto al cliente.
+    """
+
+    def check(func: Callable, kwargs: Dict[str, Any]) -> None:
+        request: Optional[Request] = kwargs.get("request")
+        if request is None:
+            logger.error("Rate limit decorator on '%s' is missing the request.", func.__name__)
+            return
+        enforce_rate_limit(
+            request,
+            scope=scope,
+            max_attempts=max_attempts,
+            window_seconds=window_seconds,
+            block_duration=block_duration,
+            key_func=key_func,
+            detail=detail,
+        )
+
+    def decorator(func: Callable) -> Callable:
+        # Se conserva el tipo del endpoint para que FastAPI siga ejecutando los síncronos en su threadpool
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+                check(func, kwargs)
+                return await func(*args, **kwargs)
+
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            check(func, kwargs)
+            return func(*args, **kwargs)
+
+        return wrapper
+    return decorator
@@ -11,6 +11,7 @@ from incident_api import crud, schemas, models
 from incident_api.core.config import settings
 from incident_api.core.security import get_user_from_token
 from incident_api.db.database import SessionLocal
+from incident_api.db.unit_of_work import unit_of_work
 from incident_api.models import UserRole
 
 
@@ -28,6 +29,17 @@ def get_db():
         db.close()
 
 
+def get_db_unit_of_work(db: Session = Depends(get_db)):
+    """
+    Dependencia que envuelve la sesión de la petición en una unidad de trabajo.
+
+    Las operaciones CRUD solo hacen flush y se realiza un único commit al terminar
+    el endpoint; si este lanza una excepción, se revierte todo el trabajo.
+    """
+    with unit_of_work(db):
+        yield db
+
+
 async def get_current_active_user(
     request: Request, db: Session = Depends(get_db)
 ) -> models.User:
@@ -5,16 +5,18 @@ import logging
 from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from sqlalchemy.orm import Session
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 
 from incident_api.api import dependencies
 from incident_api.services import user_activity_service
 from incident_api.schemas.user_activity import UserCrossReferenceResponse
+from incident_api.schemas.metrics_summary import CategoryMetricsSummaryInDB
 from incident_api.models.user import User
 from incident_api.services.audit_service import AuditService
 from incident_api.services.rate_limiting_service import check_audit_rate_limit
 from incident_api.api.decorators import audit_action
 from incident_api.services.alerting_service import alerting_service
+from incident_api.services.metrics_service import metrics_service
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
@@ -58,3 +60,18 @@ def get_user_activity(
         )
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
+
+
+@router.get(
+    "/metrics/categories",
+    response_model=List[CategoryMetricsSummaryInDB],
+    summary="Get Materialised Metrics per Incident Category",
+    dependencies=[Depends(dependencies.get_current_audit_user), Depends(check_audit_rate_limit)],
+)
+def get_category_metrics(db: Session = Depends(dependencies.get_db)):
+    """
+    Retrieve the precomputed incident counters and resolution times for every incident category.
+
+    Only stale or missing rows are recalculated; the rest are read directly from the summary table.
+    """
+    return metrics_service.get_category_metrics(db)
@@ -3,14 +3,15 @@ API endpoints for querying audit logs.
 """
 import logging
 from datetime import datetime
-from typing import List, Optional
+from typing import List, Literal, Optional
 
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
 
 from incident_api import models, schemas
 from incident_api.api import dependencies
+from incident_api.api.decorators import audit_action
 from incident_api.services.audit_service import AuditService
 
 logger = logging.getLogger(__name__)
@@ -19,7 +20,9 @@ router = APIRouter()
 
 class AuditLogResponse(BaseModel):
     """Response model for paginated audit logs."""
-    total: int
+    total: Optional[int]
+    total_is_estimate: bool = False
+    next_cursor: Optional[str] = None
     logs: List[schemas.AuditLogInDB]
 
 
@@ -33,27 +36,79 @@ def read_audit_logs(
     db: Session = Depends(dependencies.get_db),
     current_user: models.User = Depends(dependencies.get_current_admin_user),
     user_id: Optional[int] = Query(None, description="Filter by user ID."),
-    action: Optional[str] = Query(None, description="Filter by action name (case-insensitive search)."),
-    resource_type: Optional[str] = Query(None, description="Filter by resource type (case-insensitive search)."),
+    action: Optional[List[str]] = Query(None, description="Filter by exact action name (repeat for several)."),
+    resource_type: Optional[List[str]] = Query(None, description="Filter by exact resource type (repeat for several)."),
+    resource_id: Optional[int] = Query(None, description="Filter by resource ID."),
     start_date: Optional[datetime] = Query(None, description="Filter logs from this date onwards."),
     end_date: Optional[datetime] = Query(None, description="Filter logs up to this date."),
-    skip: int = Query(0, ge=0, description="Pagination skip."),
+    cursor: Optional[str] = Query(None, description="Keyset cursor: the next_cursor of the previous page."),
+    skip: int = Query(0, ge=0, description="Pagination skip (ignored when a cursor is given)."),
     limit: int = Query(100, ge=1, le=500, description="Pagination limit."),
+    include_total: bool = Query(True, description="Compute the (capped or estimated) total."),
 ):
     """
-    Retrieve a paginated and filterable list of audit logs.
+    Retrieve a paginated and filterable list of audit logs, newest first.
+
+    Filters are exact matches so they can use the composite indexes. Pass the
+    returned `next_cursor` to get the following page; the total is exact up to
+    a cap and estimated above it (`total_is_estimate`).
 
     Requires **Administrator** privileges.
     """
     audit_service = AuditService()
-    logs, total = audit_service.get_paged_audit_logs(
-        db=db,
+    try:
+        return audit_service.get_paged_audit_logs(
+            db=db,
+            user_id=user_id,
+            actions=action,
+            resource_types=resource_type,
+            resource_id=resource_id,
+            start_date=start_date,
+            end_date=end_date,
+            cursor=cursor,
+            skip=skip,
+            limit=limit,
+            include_total=include_total,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get(
+    "/export",
+    summary="Export Audit Logs",
+    dependencies=[Depends(dependencies.get_current_admin_user)],
+)
+@audit_action(action="EXPORT_AUDIT_LOGS", resource_type="AUDIT_LOG")
+def export_audit_logs(
+    request: Request,
+    db: Session = Depends(dependencies.get_db),
+    current_user: models.User = Depends(dependencies.get_current_admin_user),
+    format: Literal["csv", "jsonl"] = Query("csv", description="Export format."),
+    gzip: bool = Query(False, description="Compress the export with gzip."),
+    user_id: Optional[int] = Query(None, description="Filter by user ID."),
+    action: Optional[List[str]] = Query(None, description="Filter by exact action name (repeat for several)."),
+    resource_type: Optional[List[str]] = Query(None, description="Filter by exact resource type (repeat for several)."),
+    resource_id: Optional[int] = Query(None, description="Filter by resource ID."),
+    start_date: Optional[datetime] = Query(None, description="Export logs from this date onwards."),
+    end_date: Optional[datetime] = Query(None, description="Export logs up to this date."),
+):
+    """
+    Stream every audit log matching the filters, oldest first, as CSV or JSON Lines.
+
+    Rows are read with a server-side cursor and written as they are fetched, so the
+    export size is not limited by server memory. The export itself is audited.
+
+    Requires **Administrator** privileges.
+    """
+    return AuditService().export_audit_logs(
+        db,
+        fmt=format,
+        compress=gzip,
         user_id=user_id,
-        action=action,
-        resource_type=resource_type,
+        actions=action,
+        resource_types=resource_type,
+        resource_id=resource_id,
         start_date=start_date,
         end_date=end_date,
-        skip=skip,
-        limit=limit,
     )
-    return {"total": total, "logs": logs}
@@ -4,12 +4,12 @@ Endpoints de la API para la gestión de incidentes de seguridad.
 
 import logging
 import uuid
-from fastapi import APIRouter, Depends, HTTPException, status, File, UploadFile, Form, BackgroundTasks, Request
+from fastapi import APIRouter, Depends, HTTPException, status, File, UploadFile, Form, BackgroundTasks, Request, Query
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import FileResponse, HTMLResponse
 from pydantic import ValidationError
 from sqlalchemy.orm import Session
-from typing import List, Optional, Dict, Any
-import os
+from typing import List, Literal, Optional, Dict, Any
 
 # Almacenamiento en memoria para los resultados de las tareas.
 # En producción, usar una solución más robusta como Redis o una tabla en la BD.
@@ -27,10 +27,17 @@ from incident_api.services.incident_creation_service import IncidentCreationServ
 from incident_api.services.incident_analysis_service import incident_analysis_service
 from incident_api.services.isirt_analysis_service import isirt_analysis_service
 from incident_api.services.dialogue_service import dialogue_service
+from incident_api.services.evidence_preview_service import PREVIEW_MEDIA_TYPE, evidence_preview_service
+from incident_api.services.file_delivery_service import file_delivery_service
 from incident_api.services.ai_settings_service import get_active_settings
 from incident_api.models import UserRole
 from incident_api.services.incident_triage_service import incident_triage_service
 from incident_api.services import report_service
+from incident_api.services.report_artifact_service import (
+    CLOSURE_EXPORT_KIND,
+    PDF_MEDIA_TYPE,
+    report_artifact_service,
+)
 
 
 router = APIRouter()
@@ -48,6 +55,7 @@ async def create_incident(
     request: Request,
     incident_data: str = Form(...),
     evidence_files: Optional[List[UploadFile]] = File(None),
+    # Sin unidad de trabajo: el servicio confirma el incidente antes de llamar al LLM
     db: Session = Depends(dependencies.get_db),
     current_user: models.User = Depends(dependencies.get_current_active_user),
     creation_service: IncidentCreationService = Depends(dependencies.get_incident_creation_service),
@@ -98,27 +106,186 @@ async def create_incident(
 def read_incidents(
     skip: int = 0,
     limit: int = 100,
+    filters: schemas.IncidentFilters = Depends(),
     db: Session = Depends(dependencies.get_db),
     irt_user: models.User = Depends(dependencies.get_current_irt_user),
 ):
     """
-    Obtiene una lista de todos los incidentes de seguridad.
+    Obtiene una lista de los incidentes de seguridad, opcionalmente filtrada.
 
     Requiere que el usuario actual sea un **Miembro IRT**, **Líder IRT** o **Administrador**.
 
     Args:
         skip (int): Número de incidentes a omitir para paginación.
         limit (int): Número máximo de incidentes a devolver.
+        filters (schemas.IncidentFilters): Filtros por estado, severidad, clasificación,
+            usuarios, grupo y rango de fechas de creación.
         db (Session): Dependencia de la sesión de la base de datos.
         irt_user (models.User): Dependencia que valida que el usuario tiene rol de IRT.
 
     Returns:
         List[schemas.IncidentInDB]: Una lista de objetos de incidentes.
     """
-    incidents = incident_service.get_all_incidents(db, skip=skip, limit=limit)
+    incidents = incident_service.get_all_incidents(db, skip=skip, limit=limit, filters=filters)
     return incidents
 
 
+@router.get(
+    "/export",
+    summary="Exportar incidentes a CSV o JSONL",
+)
+@audit_action(action="EXPORT_INCIDENTS", resource_type="INCIDENT")
+def export_incidents(
+    request: Request,
+    format: Literal["csv", "jsonl"] = Query("csv", description="Formato de exportación."),
+    gzip: bool = Query(False, description="Comprime la exportación con gzip."),
+    filters: schemas.IncidentFilters = Depends(),
+    db: Session = Depends(dependencies.get_db),
+    current_user: models.User = Depends(dependencies.get_current_irt_user),
+):
+    """
+    Exporta en streaming todos los incidentes que cumplen los filtros del listado.
+
+    Las filas se leen con un cursor de servidor y se envían a medida que se
+    obtienen, con los nombres de la clasificación, del activo, de los usuarios y
+    del grupo resueltos en la misma consulta. Para rangos muy grandes, usar
+    `POST /incidents/export/jobs`. Esta acción es auditada.
+
+    Requiere que el usuario actual sea un **Miembro IRT**, **Líder IRT** o **Administrador**.
+    """
+    return incident_service.export_incidents(db, fmt=format, compress=gzip, filters=filters)
+
+
+@router.post(
+    "/export/jobs",
+    response_model=schemas.AsyncTaskResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+    summary="Generar una exportación de incidentes en segundo plano",
+)
+@audit_action(action="EXPORT_INCIDENTS", resource_type="INCIDENT")
+def create_incident_export_job(
+    request: Request,
+    background_tasks: BackgroundTasks,
+    format: Literal["csv", "jsonl"] = Query("csv", description="Formato de exportación."),
+    gzip: bool = Query(True, description="Comprime la exportación con gzip."),
+    filters: schemas.IncidentFilters = Depends(),
+    db: Session = Depends(dependencies.get_db),
+    current_user: models.User = Depends(dependencies.get_current_irt_user),
+):
+    """
+    Inicia la generación de un archivo de exportación de incidentes.
+
+    Devuelve inmediatamente un ID de tarea. El estado se consulta en
+    `GET /incidents/export/jobs/{task_id}` y, al completarse, el archivo se
+    descarga desde `GET /incidents/export/jobs/{task_id}/download`.
+    """
+    task = incident_service.create_export_job(
+        db, fmt=format, compress=gzip, filters=filters, requested_by=current_user
+    )
+    background_tasks.add_task(
+        incident_service.run_export_job, task.task_id, fmt=format, compress=gzip, filters=filters
+    )
+    return {"task_id": task.task_id, "status": task.status}
+
+
+@router.get(
+    "/export/jobs/{task_id}",
+    response_model=schemas.AsyncTaskStatus,
+    summary="Consultar el estado de una exportación de incidentes",
+)
+def get_incident_export_job(
+    task_id: str,
+    db: Session = Depends(dependencies.get_db),
+    current_user: models.User = Depends(dependencies.get_current_irt_user),
+):
+    """
+    Consulta el estado de un trabajo de exportación.
+
+    Al completarse, `result` incluye el número de filas y el tamaño del archivo.
+    """
+    task = incident_service.get_export_job(db, task_id, current_user)
+    return {"task_id": task.task_id, "status": task.status, "result": task.result}
+
+
+@router.get(
+    "/export/jobs/{task_id}/download",
+    summary="Descargar una exportación de incidentes",
+)
+def download_incident_export(
+    task_id: str,
+    db: Session = Depends(dependencies.get_db),
+    current_user: models.User = Depends(dependencies.get_current_irt_user),
+):
+    """
+    Descarga el archivo generado por un trabajo de exportación completado.
+    """
+    path, filename, media_type = incident_service.get_export_file(db, task_id, current_user)
+    return FileResponse(path, media_type=media_type, filename=filename)
+
+
+@router.post(
+    "/reports/closure-exports",
+    response_model=schemas.AsyncTaskResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+    summary="Exportar en ZIP los informes PDF de cierre de un trimestre",
+)
+@audit_action(action="EXPORT_CLOSURE_REPORTS", resource_type="INCIDENT")
+def create_closure_report_export(
+    request: Request,
+    background_tasks: BackgroundTasks,
+    quarter: str = Query(..., pattern=r"^\d{4}-Q[1-4]$", description="Trimestre de cierre, p. ej. 2025-Q3."),
+    db: Session = Depends(dependencies.get_db),
+    current_user: models.User = Depends(dependencies.get_current_irt_user),
+):
+    """
+    Inicia la generación de un ZIP con los informes PDF de los incidentes cerrados en un trimestre.
+
+    El estado se consulta en `GET /incidents/reports/closure-exports/{task_id}` y,
+    al completarse, el archivo se descarga desde
+    `GET /incidents/reports/closure-exports/{task_id}/download`.
+    """
+    task = report_artifact_service.create_closure_export_job(db, quarter=quarter, requested_by=current_user)
+    background_tasks.add_task(report_artifact_service.run_closure_export_job, task.task_id, quarter=quarter)
+    return {"task_id": task.task_id, "status": task.status}
+
+
+@router.get(
+    "/reports/closure-exports/{task_id}",
+    response_model=schemas.AsyncTaskStatus,
+    summary="Consultar el estado de una exportación de informes de cierre",
+)
+def get_closure_report_export(
+    task_id: str,
+    db: Session = Depends(dependencies.get_db),
+    current_user: models.User = Depends(dependencies.get_current_irt_user),
+):
+    """
+    Consulta el estado de una exportación de informes de cierre.
+
+    Al completarse, `result` incluye el número de informes y el tamaño del archivo.
+    """
+    task = incident_service.get_export_job(db, task_id, current_user, kind=CLOSURE_EXPORT_KIND)
+    return {"task_id": task.task_id, "status": task.status, "result": task.result}
+
+
+@router.get(
+    "/reports/closure-exports/{task_id}/download",
+    summary="Descargar una exportación de informes de cierre",
+)
+def download_closure_report_export(
+    task_id: str,
+    db: Session = Depends(dependencies.get_db),
+    current_user: models.User = Depends(dependencies.get_current_irt_user),
+):
+    """
+    Descarga el ZIP generado por una exportación de informes de cierre completada.
+    """
+    path, filename, media_type = incident_service.get_export_file(
+        db, task_id, current_user, kind=CLOSURE_EXPORT_KIND
+    )
+    return FileResponse(path, media_type=media_type, filename=filename)
+
+
 @router.get(
     "/{incident_id}",
     response_model=schemas.IncidentInDB,
@@ -170,8 +337,9 @@ def update_incident(
     incident_id: int,
     request: Request,
     incident_update: schemas.IncidentUpdate,
+    background_tasks: BackgroundTasks,
     incident: models.Incident = Depends(dependencies.get_incident_with_permission),
-    db: Session = Depends(dependencies.get_db),
+    db: Session = Depends(dependencies.get_db_unit_of_work),
     current_user: models.User = Depends(dependencies.get_current_active_user),
 ):
     """
@@ -184,6 +352,7 @@ def update_incident(
         incident_id (int): ID del incidente a actualizar.
         request (Request): El objeto de la petición HTTP para la auditoría.
         incident_update (schemas.IncidentUpdate): Datos a actualizar.
+        background_tasks (BackgroundTasks): Genera el informe PDF si el incidente se cierra.
         incident (models.Incident): Dependencia que obtiene el incidente y valida permisos.
         db (Session): Dependencia de la sesión de la base de datos.
         current_user (models.User): Dependencia que obtiene el usuario autenticado.
@@ -191,9 +360,13 @@ def update_incident(
     Returns:
         schemas.IncidentInDB: El incidente actualizado.
     """
+    previous_status = incident.status
     updated_incident = incident_service.update_incident(
         db, incident=incident, incident_in=incident_update, user=current_user
     )
+    if updated_incident.status == models.IncidentStatus.CERRADO and previous_status != models.IncidentStatus.CERRADO:
+        # Se ejecuta tras la respuesta, cuando la unidad de trabajo ya se ha confirmado
+        background_tasks.add_task(report_artifact_service.render_closure_report, incident_id)
     return updated_incident
 
 
@@ -293,7 +466,7 @@ def add_manual_log_entry(
     log_in: schemas.ManualLogEntryCreate,
     incident: models.Incident = Depends(dependencies.get_incident_or_404),
     current_user: models.User = Depends(dependencies.get_current_irt_user),
-    db: Session = Depends(dependencies.get_db),
+    db: Session = Depends(dependencies.get_db_unit_of_work),
 ):
     """
     Añade una nueva entrada de texto a la bitácora de un incidente existente.
@@ -328,7 +501,7 @@ def deactivate_incident(
     incident_id: int,
     request: Request,
     incident: models.Incident = Depends(dependencies.get_incident_or_404),
-    db: Session = Depends(dependencies.get_db),
+    db: Session = Depends(dependencies.get_db_unit_of_work),
     current_user: models.User = Depends(dependencies.get_current_admin_user),
 ):
     """
@@ -362,7 +535,7 @@ def activate_incident(
     incident_id: int,
     request: Request,
     incident: models.Incident = Depends(dependencies.get_incident_or_404),
-    db: Session = Depends(dependencies.get_db),
+    db: Session = Depends(dependencies.get_db_unit_of_work),
     current_user: models.User = Depends(dependencies.get_current_admin_user),
 ):
     """
@@ -526,20 +699,19 @@ async def suggest_professional_assignment(
     summary="Descargar archivo de evidencia",
 )
 async def download_evidence_file(
-    incident_id: int,
+    request: Request,
     evidence_file_id: int,
+    incident: models.Incident = Depends(dependencies.get_incident_with_permission),
     db: Session = Depends(dependencies.get_db),
-    current_user: models.User = Depends(dependencies.get_current_active_user),
 ):
     """
     Descarga un archivo de evidencia específico de un incidente.
 
     Valida que el usuario tenga permisos para acceder al incidente y al archivo.
+    Admite `If-None-Match` (ETag = SHA-256 del contenido) y peticiones `Range`;
+    con `EVIDENCE_X_ACCEL_REDIRECT_PREFIX` los bytes los envía nginx.
     """
-    # Verificar que el incidente existe y el usuario tiene permisos
-    incident = dependencies.get_incident_with_permission(incident_id, current_user, db)
-
-    # Obtener el archivo de evidencia
+    # Obtener el archivo de evidencia (el incidente y los permisos los valida la dependencia)
     evidence_file = crud.evidence_file.get(db, id=evidence_file_id)
     if not evidence_file:
         raise HTTPException(
@@ -548,31 +720,60 @@ async def download_evidence_file(
         )
 
     # Verificar que el archivo pertenece al incidente
-    if evidence_file.incident_id != incident_id:
+    if evidence_file.incident_id != incident.incident_id:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="El archivo no pertenece a este incidente"
         )
 
-    # Verificar que el archivo existe en el sistema de archivos
-    if not os.path.exists(evidence_file.file_path):
+    return file_delivery_service.file_response(
+        request,
+        evidence_file.file_path,
+        media_type=evidence_file.file_type or "application/octet-stream",
+        filename=evidence_file.file_name,
+        content_hash=evidence_file.file_hash,
+    )
+
+
+@router.get(
+    "/{incident_id}/evidence/{evidence_file_id}/preview",
+    response_class=FileResponse,
+    summary="Obtener la miniatura o vista previa de una evidencia",
+)
+async def get_evidence_preview(
+    request: Request,
+    evidence_file_id: int,
+    size: Literal["thumb", "preview"] = Query("thumb", description="Miniatura para listados o vista previa para el visor."),
+    incident: models.Incident = Depends(dependencies.get_incident_with_permission),
+    db: Session = Depends(dependencies.get_db),
+):
+    """
+    Devuelve una imagen WebP reducida de una evidencia (imagen o primera página de un PDF).
+
+    Las vistas previas dependen solo del contenido, así que se sirven con caché
+    de larga duración. Si aún no se ha generado, se genera en el momento.
+    """
+    evidence_file = crud.evidence_file.get(db, id=evidence_file_id)
+    if not evidence_file or evidence_file.incident_id != incident.incident_id:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
-            detail="Archivo no encontrado en el sistema de archivos"
+            detail="Archivo de evidencia no encontrado"
         )
 
-    # Determinar el tipo de contenido basado en la extensión o tipo MIME almacenado
-    content_type = evidence_file.file_type or "application/octet-stream"
+    path = await run_in_threadpool(evidence_preview_service.ensure_asset, evidence_file, size)
+    if path is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No hay vista previa disponible para este archivo"
+        )
 
-    # Devolver el archivo con headers apropiados
-    return FileResponse(
-        path=evidence_file.file_path,
-        media_type=content_type,
-        filename=evidence_file.file_name,
-        headers={
-            "Content-Disposition": f"attachment; filename*=UTF-8''{evidence_file.file_name}",
-            "Cache-Control": "private, max-age=3600"  # Cache por 1 hora
-        }
+    return file_delivery_service.file_response(
+        request,
+        path,
+        media_type=PREVIEW_MEDIA_TYPE,
+        content_hash=f"{evidence_file.file_hash}.{size}",
+        disposition="inline",
+        cache_control=f"private, max-age={settings.EVIDENCE_PREVIEW_CACHE_MAX_AGE}, immutable",
     )
 
 
@@ -602,18 +803,42 @@ def get_incident_evidence_files(
 @router.get("/{incident_id}/report", response_class=HTMLResponse)
 async def get_incident_report(
     incident_id: int,
+    request: Request,
+    format: Literal["html", "pdf"] = Query("html", description="Formato del informe; PDF solo para incidentes cerrados."),
+    incident: models.Incident = Depends(dependencies.get_incident_with_permission),
     db: Session = Depends(dependencies.get_db),
-    current_user: models.User = Depends(dependencies.get_current_active_user),
 ):
     """
-    Genera y devuelve un informe de incidente en formato HTML.
-    """
-    incident = crud.incident.get(db, id=incident_id)
-    if not incident:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Incidente no encontrado.")
+    Devuelve el informe de un incidente en HTML o, si está cerrado, en PDF.
 
-    # TODO: Add authorization logic here
+    El PDF de un incidente cerrado se genera una vez por versión y se sirve
+    desde el almacén de informes, con un ETag igual a la versión. Ambos formatos
+    acceden a la BD y renderizan en el pool de hilos, no en el bucle de eventos.
+    """
+    if format == "pdf":
+        if incident.status != models.IncidentStatus.CERRADO:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="El informe PDF solo está disponible para incidentes cerrados.",
+            )
+        artifact = await run_in_threadpool(report_artifact_service.get_or_render_pdf, db, incident_id)
+        if artifact is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Incidente no encontrado.")
+        path, version_key = artifact
+        return file_delivery_service.file_response(
+            request,
+            path,
+            media_type=PDF_MEDIA_TYPE,
+            filename=f"{incident.ticket_id or f'incident-{incident_id}'}.pdf",
+            content_hash=version_key,
+            disposition="inline",
+            # La URL no incluye la versión: se revalida con el ETag
+            cache_control="private, no-cache",
+        )
 
-    html_content = report_service.generate_incident_report_html(incident)
+    # La consulta de versión y, si falla la caché, la carga y el render Jinja2 son bloqueantes
+    html_content = await run_in_threadpool(report_service.get_incident_report_html, db, incident_id)
+    if html_content is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Incidente no encontrado.")
 
     return HTMLResponse(content=html_content)
\ No newline at end of file
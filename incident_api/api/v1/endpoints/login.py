@@ -5,6 +5,7 @@ Endpoints de la API para la autenticación y registro de usuarios.
 import logging
 from datetime import datetime
 from fastapi import APIRouter, Depends, HTTPException, status, Request, Response
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
 
@@ -12,6 +13,7 @@ from incident_api import schemas, models
 from incident_api.api import dependencies
 from incident_api.core import security
 from incident_api.core.config import settings
+from incident_api.core.hashing import HashingPoolSaturated
 from incident_api.services import user_service
 from incident_api.services.rate_limiting_service import check_login_rate_limit
 from incident_api.services.audit_service import AuditService
@@ -54,7 +56,7 @@ def register_user(
 
 
 @router.post("/token", summary="Autenticar usuario y establecer cookie HttpOnly")
-def login_for_access_token(
+async def login_for_access_token(
     response: Response,
     request: Request,
     form_data: OAuth2PasswordRequestForm = Depends(),
@@ -63,6 +65,11 @@ def login_for_access_token(
     """
     Autentica al usuario y establece un token de acceso JWT en una cookie HttpOnly.
 
+    Es asíncrono para que la espera de bcrypt en `password_hashing_pool` no retenga
+    un hilo del servidor. El rate limiting y la auditoría acceden a la BD, a Redis
+    o al spool en disco, así que se ejecutan en el pool de hilos y no en el bucle
+    de eventos.
+
     Args:
         response (Response): Objeto de respuesta para establecer la cookie.
         request (Request): Objeto de solicitud para logging.
@@ -79,9 +86,17 @@ def login_for_access_token(
     timestamp = datetime.now().isoformat()
 
     # Verificar rate limiting antes de procesar
-    check_login_rate_limit(request)
+    await run_in_threadpool(check_login_rate_limit, request)
 
-    user = security.authenticate_user(db, form_data.username, form_data.password)
+    try:
+        user = await security.aauthenticate_user(db, form_data.username, form_data.password)
+    except HashingPoolSaturated:
+        logger.warning(f"Login rejected - IP: {client_ip}, Email: {form_data.username}, Reason: password hashing pool saturated")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="El servicio de autenticación está saturado. Inténtalo de nuevo en unos segundos.",
+            headers={"Retry-After": "1"},
+        )
 
     if not user:
         logger.warning(f"Login failed - IP: {client_ip}, Email: {form_data.username}, Reason: Invalid credentials or inactive user")
@@ -89,9 +104,11 @@ def login_for_access_token(
         # --- INICIO: Alerta y Auditoría de Fallo ---
         alerting_service.trigger_alert(
             message=f"Failed login attempt for email '{form_data.username}' from IP: {client_ip}",
-            level="error"
+            level="error",
+            key=f"failed_login:{client_ip}",
         )
-        audit_service.log_action(
+        await run_in_threadpool(
+            audit_service.log_action,
             db=db,
             request=request,
             action="LOGIN_FAILURE",
@@ -110,7 +127,8 @@ def login_for_access_token(
     logger.info(f"Login successful - IP: {client_ip}, Email: {form_data.username}, UserID: {user.user_id}, Role: {user.role}")
 
     # --- INICIO: Auditoría de Éxito ---
-    audit_service.log_action(
+    await run_in_threadpool(
+        audit_service.log_action,
         db=db,
         request=request,
         user_id=user.user_id,
@@ -148,8 +148,7 @@ def export_users(
         else:
             export_format = "json"  # default
 
-    print(f"Exporting users with filters: format={export_format}, status={status}, role={role}")
-
+    user_service = UserService()
     return user_service.export_users(db, format=export_format, status=status, role=role)
 
 
@@ -0,0 +1,124 @@
+"""
+Caché en proceso de usuarios autenticados.
+
+Evita consultar la base de datos en cada petición autenticada: tras validar el
+JWT, el usuario se busca en una caché de TTL corto indexada por
+(subject, instante de emisión del token). Se guarda una instantánea de las
+columnas del usuario, nunca la instancia ligada a una sesión, y cada petición
+obtiene su propia copia adjunta a su sesión mediante `Session.merge(load=False)`,
+sin emitir SELECT.
+
+La caché debe invalidarse cuando cambia el usuario (actualización, cambio de rol,
+activación, desactivación o eliminación). Al ser local a cada proceso, el TTL
+acota el tiempo durante el que otro worker puede servir datos desactualizados.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Set
+
+from sqlalchemy import inspect
+from sqlalchemy.orm import Session, make_transient_to_detached
+
+from incident_api import models
+from incident_api.core.config import settings
+
+
+class AuthenticatedUserCache:
+    """
+    Caché LRU con expiración por TTL para los usuarios autenticados.
+    """
+
+    def __init__(self, ttl_seconds: float, max_size: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_size = max_size
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._keys_by_user: Dict[int, Set[Hashable]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0 and self.max_size > 0
+
+    @staticmethod
+    def _snapshot(user: models.User) -> Dict[str, Any]:
+        """Copia los valores de columna del usuario (recargándolos si estaban expirados)."""
+        return {attr.key: getattr(user, attr.key) for attr in inspect(user).mapper.column_attrs}
+
+    def get(self, db: Session, key: Hashable) -> Optional[models.User]:
+        """
+        Devuelve el usuario cacheado adjunto a la sesión dada, o None si no está o expiró.
+        """
+        if not self.enabled:
+            return None
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < now:
+                if entry is not None:
+                    self._remove_unlocked(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            values = entry[2]
+
+        user = models.User(**values)
+        make_transient_to_detached(user)
+        return db.merge(user, load=False)
+
+    def set(self, key: Hashable, user: models.User) -> None:
+        """Guarda una instantánea del usuario bajo la clave dada."""
+        if not self.enabled:
+            return
+        values = self._snapshot(user)
+        with self._lock:
+            self._remove_unlocked(key)
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, user.user_id, values)
+            self._keys_by_user.setdefault(user.user_id, set()).add(key)
+            while len(self._entries) > self.max_size:
+                self._remove_unlocked(next(iter(self._entries)))
+
+    def invalidate_user(self, user_id: int) -> None:
+        """Elimina todas las entradas (de cualquier token) de un usuario."""
+        with self._lock:
+            for key in list(self._keys_by_user.get(user_id, ())):
+                self._remove_unlocked(key)
+
+    def clear(self) -> None:
+        """Vacía la caché y reinicia las estadísticas."""
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_user.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def _remove_unlocked(self, key: Hashable) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        keys = self._keys_by_user.get(entry[1])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._keys_by_user[entry[1]]
+
+    def stats(self) -> Dict[str, Any]:
+        """Devuelve el tamaño actual, los aciertos, los fallos y la tasa de aciertos."""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+            }
+
+
+authenticated_user_cache = AuthenticatedUserCache(
+    ttl_seconds=settings.AUTH_USER_CACHE_TTL_SECONDS,
+    max_size=settings.AUTH_USER_CACHE_MAX_SIZE,
+)
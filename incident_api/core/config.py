@@ -42,6 +42,16 @@ class Settings(BaseSettings):
     LOGIN_RATE_LIMIT_WINDOW_MINUTES: int = Field(
         default=5, description="Ventana de tiempo en minutos para rate limiting."
     )
+    RATE_LIMIT_BACKEND: str = Field(
+        default="memory",
+        description="Backend de los contadores de rate limiting: memory, database o redis.",
+    )
+    RATE_LIMIT_REDIS_URL: Optional[str] = Field(
+        default=None, description="URL de Redis para el backend de rate limiting 'redis'."
+    )
+    RATE_LIMIT_EVICTION_INTERVAL_SECONDS: int = Field(
+        default=60, description="Segundos entre barridos de contadores de rate limiting expirados."
+    )
 
     CORS_ORIGINS: str = Field(
         default="",
@@ -56,6 +66,40 @@ class Settings(BaseSettings):
         30, description="Tiempo de expiración de los tokens de acceso en minutos."
     )
 
+    AUTH_USER_CACHE_TTL_SECONDS: float = Field(
+        default=30,
+        description="Segundos que un usuario autenticado permanece en la caché en memoria (0 la desactiva).",
+    )
+    AUTH_USER_CACHE_MAX_SIZE: int = Field(
+        default=1024,
+        description="Número máximo de entradas de la caché de usuarios autenticados.",
+    )
+    REPORT_CACHE_TTL_SECONDS: float = Field(
+        default=600,
+        description="Segundos que un informe HTML renderizado permanece en la caché en memoria (0 la desactiva).",
+    )
+    REPORT_CACHE_MAX_SIZE: int = Field(
+        default=256,
+        description="Número máximo de informes renderizados en la caché.",
+    )
+    REPORTS_DIR: Optional[str] = Field(
+        default=None,
+        description="Directorio de los informes PDF de incidentes cerrados (por defecto, LOGS_DIR/reports).",
+    )
+    REPORT_PDF_WORKERS: int = Field(
+        default=2,
+        description="Procesos que renderizan PDF en paralelo en las exportaciones masivas de informes.",
+    )
+
+    PASSWORD_HASH_WORKERS: int = Field(
+        default=4,
+        description="Hilos dedicados al cálculo y verificación de hashes bcrypt.",
+    )
+    PASSWORD_HASH_MAX_QUEUE: int = Field(
+        default=64,
+        description="Operaciones bcrypt que pueden esperar en cola antes de rechazar nuevas peticiones.",
+    )
+
     DATABASE_URL: str = Field(
         ...,
         description="URL de conexión a la base de datos PostgreSQL.",
@@ -63,6 +107,95 @@ class Settings(BaseSettings):
 
     # Directorio de logs
     LOGS_DIR: str = "/app/logs"
+    LOG_FORMAT: str = Field(
+        default="json", description="Formato de los logs de la aplicación: json o text."
+    )
+    LOG_ASYNC: bool = Field(
+        default=True,
+        description="Escribe los logs desde un hilo en segundo plano (QueueHandler/QueueListener).",
+    )
+    LOG_QUEUE_MAX_SIZE: int = Field(
+        default=10000, description="Tamaño máximo de la cola de logs; al llenarse, se descartan registros."
+    )
+    LOG_SAMPLING: str = Field(
+        default="",
+        description="Fracción de mensajes INFO/DEBUG que se conservan por logger, p. ej. 'uvicorn.access=0.1,incident_api.main=0.5'.",
+    )
+    METRICS_ENABLED: bool = Field(
+        default=False,
+        description="Expone las métricas de la aplicación en /metrics (formato Prometheus).",
+    )
+    METRICS_TOKEN: Optional[str] = Field(
+        default=None,
+        description="Si se define, /metrics exige la cabecera 'Authorization: Bearer <token>'.",
+    )
+
+    # Escritura asíncrona de la auditoría
+    AUDIT_ASYNC_WRITES: bool = Field(
+        default=True,
+        description="Encola los registros de auditoría y los inserta por lotes en segundo plano.",
+    )
+    AUDIT_BATCH_SIZE: int = Field(
+        default=200, description="Registros de auditoría máximos por INSERT."
+    )
+    AUDIT_FLUSH_INTERVAL_MS: int = Field(
+        default=250, description="Milisegundos máximos que un registro de auditoría espera en la cola."
+    )
+    AUDIT_QUEUE_MAX_SIZE: int = Field(
+        default=10000,
+        description="Tamaño máximo de la cola de auditoría; al llenarse, los registros van al spool.",
+    )
+    AUDIT_COUNT_CAP: int = Field(
+        default=10000,
+        description="Máximo de registros que se cuentan exactamente al paginar la auditoría; por encima se estima.",
+    )
+    AUDIT_RETENTION_MONTHS: int = Field(
+        default=12,
+        description="Meses completos de auditoría que se conservan en la base de datos antes de archivarse.",
+    )
+    AUDIT_ARCHIVE_DIR: Optional[str] = Field(
+        default=None,
+        description="Directorio de los archivos JSONL comprimidos de auditoría archivada (por defecto, LOGS_DIR/audit_archive).",
+    )
+    AUDIT_SPOOL_PATH: Optional[str] = Field(
+        default=None,
+        description="Archivo local donde se guardan los registros de auditoría si la base de datos no está disponible (por defecto, LOGS_DIR/audit_spool.jsonl).",
+    )
+    AUDIT_DEAD_LETTER_PATH: Optional[str] = Field(
+        default=None,
+        description="Archivo local donde se apartan los registros de auditoría que la base de datos rechaza (por defecto, LOGS_DIR/audit_dead_letter.jsonl).",
+    )
+    EXPORTS_DIR: Optional[str] = Field(
+        default=None,
+        description="Directorio de los archivos generados por los trabajos de exportación (por defecto, LOGS_DIR/exports).",
+    )
+    EXPORT_RETENTION_DAYS: int = Field(
+        default=7,
+        description="Días que se conservan los archivos de exportación y sus tareas antes de eliminarse.",
+    )
+    ALERT_SINKS: str = Field(
+        default="file",
+        description="Destinos de las alertas de seguridad, separados por comas: file, syslog, webhook, database.",
+    )
+    ALERT_FLUSH_INTERVAL_SECONDS: float = Field(
+        default=5.0,
+        description="Segundos durante los que se agrupan las alertas repetidas antes de enviarlas.",
+    )
+    ALERT_BATCH_SIZE: int = Field(
+        default=100, description="Alertas máximas por lote enviado a cada sink."
+    )
+    ALERT_QUEUE_MAX_SIZE: int = Field(
+        default=10000, description="Tamaño máximo de la cola de alertas; al llenarse, se descartan."
+    )
+    ALERT_SYSLOG_ADDRESS: str = Field(
+        default="/dev/log", description="Socket local o 'host:puerto' UDP del sink de alertas 'syslog'."
+    )
+    ALERT_WEBHOOK_URL: Optional[str] = Field(
+        default=None, description="URL que recibe las alertas del sink 'webhook' como JSON."
+    )
+    ALERT_WEBHOOK_TIMEOUT_SECONDS: float = Field(
+        default=5.0, description="Timeout en segundos de las peticiones del sink de alertas 'webhook'."
+    )
 
     # Políticas de carga de archivos
     ALLOWED_FILE_MIME_TYPES: str = Field(
@@ -75,6 +208,55 @@ class Settings(BaseSettings):
         env="MAX_FILE_SIZE_MB",
         description="Tamaño máximo de archivo para carga en MB.",
     )
+    UPLOAD_CHUNK_SIZE_KB: int = Field(
+        default=1024,
+        description="Tamaño en KB de los trozos con los que se copian y se calcula el hash de las evidencias.",
+    )
+    UPLOAD_CONCURRENCY: int = Field(
+        default=4,
+        description="Archivos de evidencia de una misma petición que se guardan en paralelo.",
+    )
+    EVIDENCE_CACHE_MAX_AGE: int = Field(
+        default=3600,
+        description="Segundos que el navegador puede reutilizar una evidencia descargada sin revalidarla.",
+    )
+    EVIDENCE_DERIVED_DIR: Optional[str] = Field(
+        default=None,
+        description="Directorio de miniaturas y vistas previas de evidencias (por defecto, uploads/derived).",
+    )
+    EVIDENCE_THUMBNAIL_SIZE: int = Field(
+        default=256,
+        description="Lado máximo en píxeles de las miniaturas de evidencias.",
+    )
+    EVIDENCE_PREVIEW_SIZE: int = Field(
+        default=1024,
+        description="Lado máximo en píxeles de las vistas previas (imágenes y primera página de los PDF).",
+    )
+    EVIDENCE_PREVIEW_CACHE_MAX_AGE: int = Field(
+        default=31536000,
+        description="Segundos de caché de miniaturas y vistas previas (no cambian: dependen del hash del contenido).",
+    )
+    EVIDENCE_X_ACCEL_REDIRECT_PREFIX: Optional[str] = Field(
+        default=None,
+        description=(
+            "Location interna de nginx que sirve 'uploads/' (p. ej. '/_protected_uploads/'). Si se define, "
+            "la API solo autoriza la descarga y responde con X-Accel-Redirect para que nginx envíe el archivo."
+        ),
+    )
+
+    # Detección de incidentes duplicados
+    DUPLICATE_DETECTION_ENABLED: bool = Field(
+        default=True,
+        description="Activa la detección de incidentes duplicados al momento de su creación.",
+    )
+    DUPLICATE_SIMILARITY_THRESHOLD: float = Field(
+        default=0.8,
+        description="Similitud de Jaccard estimada (0-1) a partir de la cual un incidente se considera duplicado.",
+    )
+    DUPLICATE_WINDOW_DAYS: int = Field(
+        default=30,
+        description="Días hacia atrás en los que se buscan incidentes padre para la detección de duplicados.",
+    )
 
     # Primer superusuario (para inicialización)
     FIRST_SUPERUSER_EMAIL: str = Field(
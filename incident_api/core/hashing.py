@@ -1,8 +1,21 @@
 """Utilidades para el hashing y verificación de contraseñas."""
+import asyncio
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import lru_cache
+from typing import Any, Callable, Dict, Optional
+
 from passlib.context import CryptContext
 
+from incident_api.core.config import settings
+
 # Contexto para el hashing de contraseñas
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+# Contraseña imposible usada para igualar el tiempo de los logins de usuarios inexistentes.
+_DUMMY_PASSWORD = "invalid_password_for_timing_attack_mitigation"
+
+
 # Make SURE this class exists and is spelled EXACTLY like this.
 class Hasher:
     @staticmethod
@@ -18,3 +31,157 @@ class Hasher:
     def get_password_hash(password: str) -> str:
         """Genera el hash de una contraseña."""
         return pwd_context.hash(password)
+
+    @staticmethod
+    @lru_cache(maxsize=1)
+    def get_dummy_hash() -> str:
+        """
+        Devuelve el hash falso usado para mitigar ataques de temporización.
+
+        Se calcula una única vez (al arrancar la aplicación o en el primer uso).
+        """
+        return pwd_context.hash(_DUMMY_PASSWORD)
+
+
+class HashingPoolSaturated(Exception):
+    """Excepción lanzada cuando la cola del pool de hashing está llena."""
+    pass
+
+
+class PasswordHashingPool:
+    """
+    Pool de hilos acotado para el trabajo bcrypt.
+
+    Limita cuántas operaciones bcrypt se ejecutan a la vez (`max_workers`) y
+    cuántas pueden esperar en cola (`max_queue`). Cuando la cola está llena la
+    operación se rechaza de inmediato con `HashingPoolSaturated`, de modo que una
+    ráfaga de logins no acapara los hilos del servidor ni la CPU del resto de
+    endpoints.
+
+    Los endpoints asíncronos esperan con `arun`, que no ocupa ningún hilo mientras
+    la operación está en cola; `run` bloquea el hilo que llama.
+    """
+
+    def __init__(self, max_workers: int, max_queue: int):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._slots = threading.BoundedSemaphore(max_workers + max_queue)
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._active = 0
+        self._peak_queue_depth = 0
+        self.completed = 0
+        self.rejected = 0
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="password-hashing"
+                )
+            return self._executor
+
+    def _submit(self, fn: Callable[..., Any], *args: Any) -> Future:
+        """
+        Encola `fn(*args)` si hay plaza. La plaza se libera al terminar la operación (o al cancelarla).
+
+        Raises:
+            HashingPoolSaturated: Si ya hay `max_workers + max_queue` operaciones en curso.
+        """
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            raise HashingPoolSaturated("Demasiadas operaciones de hashing de contraseñas en curso.")
+
+        with self._lock:
+            self._in_flight += 1
+            self._peak_queue_depth = max(self._peak_queue_depth, self._in_flight - self._active)
+        try:
+            future = self._get_executor().submit(self._call, fn, *args)
+        except BaseException:
+            self._release(completed=False)
+            raise
+        future.add_done_callback(self._release_if_cancelled)
+        return future
+
+    def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """
+        Ejecuta `fn(*args)` en el pool y espera su resultado bloqueando el hilo actual.
+
+        Raises:
+            HashingPoolSaturated: Si ya hay `max_workers + max_queue` operaciones en curso.
+        """
+        return self._submit(fn, *args).result()
+
+    async def arun(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """
+        Ejecuta `fn(*args)` en el pool y espera su resultado sin bloquear el bucle de eventos.
+
+        Si la espera se cancela, la operación se retira de la cola; si ya había
+        empezado, termina y libera su plaza igualmente.
+
+        Raises:
+            HashingPoolSaturated: Si ya hay `max_workers + max_queue` operaciones en curso.
+        """
+        return await asyncio.wrap_future(self._submit(fn, *args))
+
+    def _call(self, fn: Callable[..., Any], *args: Any) -> Any:
+        with self._lock:
+            self._active += 1
+        try:
+            return fn(*args)
+        finally:
+            with self._lock:
+                self._active -= 1
+            # Antes de publicar el resultado: quien espera ya ve la plaza libre
+            self._release(completed=True)
+
+    def _release_if_cancelled(self, future: Future) -> None:
+        if future.cancelled():
+            self._release(completed=False)
+
+    def _release(self, completed: bool) -> None:
+        with self._lock:
+            self._in_flight -= 1
+            if completed:
+                self.completed += 1
+        self._slots.release()
+
+    def verify_password(self, plain_password: str, hashed_password: str) -> bool:
+        """Verifica una contraseña en el pool."""
+        return self.run(Hasher.verify_password, plain_password, hashed_password)
+
+    async def averify_password(self, plain_password: str, hashed_password: str) -> bool:
+        """Verifica una contraseña en el pool sin bloquear el bucle de eventos."""
+        return await self.arun(Hasher.verify_password, plain_password, hashed_password)
+
+    def get_password_hash(self, password: str) -> str:
+        """Genera el hash de una contraseña en el pool."""
+        return self.run(Hasher.get_password_hash, password)
+
+    def stats(self) -> Dict[str, int]:
+        """Devuelve la profundidad de cola, las operaciones activas y los contadores del pool."""
+        with self._lock:
+            return {
+                "max_workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "active": self._active,
+                "queue_depth": self._in_flight - self._active,
+                "peak_queue_depth": self._peak_queue_depth,
+                "completed": self.completed,
+                "rejected": self.rejected,
+            }
+
+    def shutdown(self) -> None:
+        """Detiene los hilos del pool; se recrean en el siguiente uso."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+
+password_hashing_pool = PasswordHashingPool(
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    max_queue=settings.PASSWORD_HASH_MAX_QUEUE,
+)
@@ -1,15 +1,129 @@
 """
 Configuración de logging para la aplicación.
+
+Los handlers reales (consola y archivo) no se ejecutan en el hilo que registra el
+mensaje: con `LOG_ASYNC` activo, los loggers solo tienen un `QueueHandler` y un
+`QueueListener` en segundo plano formatea y escribe los registros. Con
+`LOG_FORMAT=json` cada línea es un objeto JSON, y `LOG_SAMPLING` permite conservar
+solo una fracción de los mensajes INFO/DEBUG de los loggers más ruidosos.
 """
+import atexit
+import copy
+import itertools
+import json
 import os
 import logging
+import queue
+from datetime import datetime, timezone
 from logging.config import dictConfig
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, List, Optional
 
 from incident_api.core.config import settings
 
 # Determinar el nivel de log basado en el modo DEBUG
 LOG_LEVEL = "DEBUG" if settings.DEBUG else "INFO"
 
+# Atributos estándar de LogRecord; el resto se considera contexto añadido con `extra`
+_RESERVED_ATTRS = set(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+
+class JsonFormatter(logging.Formatter):
+    """Formatea cada registro como un objeto JSON en una sola línea."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "timestamp": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "module": record.module,
+            "function": record.funcName,
+            "line": record.lineno,
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RESERVED_ATTRS and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Conserva solo una fracción de los registros INFO/DEBUG de ciertos loggers.
+
+    Las tasas se indican por prefijo de logger (p. ej. {"uvicorn.access": 0.1}); se
+    aplica el prefijo más largo que coincida. El muestreo es determinista (uno de
+    cada N) y nunca afecta a WARNING o niveles superiores.
+    """
+
+    def __init__(self, rates: Dict[str, float]):
+        super().__init__()
+        self.rates = rates
+        self._every = {name: max(1, round(1 / rate)) if rate > 0 else 0 for name, rate in rates.items()}
+        self._counters = {name: itertools.count() for name in rates}
+        self._prefixes = sorted(rates, key=len, reverse=True)
+
+    def _match(self, name: str) -> Optional[str]:
+        for prefix in self._prefixes:
+            if name == prefix or name.startswith(prefix + "."):
+                return prefix
+        return None
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > logging.INFO:
+            return True
+        prefix = self._match(record.name)
+        if prefix is None:
+            return True
+        every = self._every[prefix]
+        if every == 0:
+            return False
+        return next(self._counters[prefix]) % every == 0
+
+
+def parse_sampling(value: str) -> Dict[str, float]:
+    """Convierte 'logger=tasa,logger=tasa' en un diccionario."""
+    rates = {}
+    for item in value.split(","):
+        if not item.strip():
+            continue
+        name, _, rate = item.partition("=")
+        rates[name.strip()] = float(rate)
+    return rates
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """
+    QueueHandler que nunca bloquea: si la cola está llena, descarta el registro y lo cuenta.
+
+    Conserva el traceback de las excepciones como texto para que el formateador
+    del listener (texto o JSON) pueda incluirlo.
+    """
+
+    def __init__(self, log_queue: "queue.Queue[logging.LogRecord]"):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
 LOGGING_CONFIG = {
     "version": 1,
     "disable_existing_loggers": False,
@@ -22,6 +136,9 @@ LOGGING_CONFIG = {
             "format": "%(asctime)s - %(name)s - %(levelname)s - [%(module)s:%(funcName)s:%(lineno)d] - %(message)s",
             "datefmt": "%Y-%m-%d %H:%M:%S",
         },
+        "json": {
+            "()": JsonFormatter,
+        },
     },
     "handlers": {
         "console": {
@@ -62,23 +179,87 @@ LOGGING_CONFIG = {
     },
 }
 
+# Loggers configurados con handlers propios en LOGGING_CONFIG (None es el root)
+_CONFIGURED_LOGGERS = ("incident_api", "uvicorn", "uvicorn.access", None)
+
+_listener: Optional[QueueListener] = None
+
+
+def _build_config(log_format: str) -> dict:
+    config = copy.deepcopy(LOGGING_CONFIG)
+    if log_format == "json":
+        for handler in config["handlers"].values():
+            handler["formatter"] = "json"
+    return config
+
+
+def _install_queue(sampling: Dict[str, float], max_queue_size: int) -> QueueListener:
+    """Sustituye los handlers de los loggers configurados por un único QueueHandler."""
+    handlers: List[logging.Handler] = []
+    for name in _CONFIGURED_LOGGERS:
+        target = logging.getLogger(name)
+        for handler in list(target.handlers):
+            if handler not in handlers:
+                handlers.append(handler)
+            target.removeHandler(handler)
 
-def setup_logging():
+    queue_handler = NonBlockingQueueHandler(queue.Queue(maxsize=max_queue_size))
+    if sampling:
+        queue_handler.addFilter(SamplingFilter(sampling))
+    for name in _CONFIGURED_LOGGERS:
+        logging.getLogger(name).addHandler(queue_handler)
+
+    listener = QueueListener(queue_handler.queue, *handlers, respect_handler_level=True)
+    listener.start()
+    return listener
+
+
+def stop_logging() -> None:
+    """Escribe los registros pendientes y detiene el listener de logging."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def setup_logging(
+    log_format: Optional[str] = None,
+    use_queue: Optional[bool] = None,
+    sampling: Optional[str] = None,
+):
     """Aplica la configuración de logging tras asegurar que el directorio exista."""
+    global _listener
+    log_format = (log_format or settings.LOG_FORMAT).lower()
+    use_queue = settings.LOG_ASYNC if use_queue is None else use_queue
+    rates = parse_sampling(settings.LOG_SAMPLING if sampling is None else sampling)
+    config = _build_config(log_format)
+
+    stop_logging()
     log_dir = settings.LOGS_DIR
     try:
         if not os.path.exists(log_dir):
             os.makedirs(log_dir)
-        dictConfig(LOGGING_CONFIG)
+        dictConfig(config)
     except (OSError, ValueError) as e:
         # Si hay problemas con el handler de archivo, usar solo consola
         print(f"Warning: Could not configure file logging: {e}. Using console logging only.")
-        console_only_config = LOGGING_CONFIG.copy()
+        console_only_config = copy.deepcopy(config)
         console_only_config["handlers"] = {
-            "console": LOGGING_CONFIG["handlers"]["console"]
+            "console": config["handlers"]["console"]
         }
         console_only_config["loggers"]["incident_api"]["handlers"] = ["console"]
         console_only_config["loggers"]["uvicorn"]["handlers"] = ["console"]
         console_only_config["loggers"]["uvicorn.access"]["handlers"] = ["console"]
         console_only_config["root"]["handlers"] = ["console"]
-        dictConfig(console_only_config)
\ No newline at end of file
+        dictConfig(console_only_config)
+
+    if use_queue:
+        _listener = _install_queue(rates, settings.LOG_QUEUE_MAX_SIZE)
+    elif rates:
+        sampler = SamplingFilter(rates)
+        for name in _CONFIGURED_LOGGERS:
+            for handler in logging.getLogger(name).handlers:
+                handler.addFilter(sampler)
+
+
+atexit.register(stop_logging)
@@ -0,0 +1,177 @@
+"""
+Métricas de la aplicación en formato de exposición de Prometheus.
+
+Las métricas se definen con `prometheus_client` en un registro propio,
+`metrics_registry`; el endpoint `/metrics` lo exporta con `generate_latest`.
+Este módulo solo añade lo que la librería no resuelve por sí sola: la etiqueta
+`route` con la plantilla de la ruta (no la URL, para no disparar la
+cardinalidad) y los collectors que se evalúan solo al exportar (p. ej. el estado
+del pool de conexiones o de las colas internas), de modo que no cuestan nada por
+petición.
+"""
+
+import logging
+from typing import Any, Callable, Dict, Iterator, Tuple
+
+from prometheus_client import CollectorRegistry, Counter, Histogram, disable_created_metrics
+from prometheus_client.core import GaugeMetricFamily
+from prometheus_client.registry import Collector
+
+logger = logging.getLogger(__name__)
+
+# Sin las series `*_created`: no las usa ningún panel y duplican cada serie
+disable_created_metrics()
+
+SLOW_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0)
+
+metrics_registry = CollectorRegistry()
+
+# --- Métricas HTTP ---
+
+http_requests_total = Counter(
+    "http_requests_total", "Peticiones HTTP completadas.", ("method", "route", "status"), registry=metrics_registry
+)
+http_request_duration_seconds = Histogram(
+    "http_request_duration_seconds",
+    "Duración de las peticiones HTTP en segundos.",
+    ("method", "route"),
+    registry=metrics_registry,
+)
+
+# --- Métricas de servicios ---
+
+llm_request_duration_seconds = Histogram(
+    "llm_request_duration_seconds",
+    "Duración de las llamadas al LLM en segundos.",
+    ("provider", "model", "outcome"),
+    buckets=SLOW_BUCKETS,
+    registry=metrics_registry,
+)
+llm_tokens_total = Counter(
+    "llm_tokens_total",
+    "Tokens consumidos en las llamadas al LLM.",
+    ("provider", "model", "type"),
+    registry=metrics_registry,
+)
+rag_retrieval_duration_seconds = Histogram(
+    "rag_retrieval_duration_seconds",
+    "Duración de la recuperación de contexto RAG en segundos.",
+    ("outcome",),
+    registry=metrics_registry,
+)
+rate_limit_rejections_total = Counter(
+    "rate_limit_rejections_total", "Peticiones rechazadas por rate limiting.", ("scope",), registry=metrics_registry
+)
+evidence_upload_duration_seconds = Histogram(
+    "evidence_upload_duration_seconds",
+    "Duración del guardado de cada archivo de evidencia en segundos.",
+    ("outcome",),
+    registry=metrics_registry,
+)
+evidence_upload_bytes_total = Counter(
+    "evidence_upload_bytes_total",
+    "Bytes de evidencia recibidos (incluidos los duplicados no escritos).",
+    registry=metrics_registry,
+)
+evidence_upload_throughput_bytes = Histogram(
+    "evidence_upload_throughput_bytes_per_second",
+    "Velocidad de guardado (copia y SHA-256) de cada archivo de evidencia.",
+    buckets=(1e6, 5e6, 10e6, 25e6, 50e6, 100e6, 250e6, 500e6, 1e9),
+    registry=metrics_registry,
+)
+evidence_preview_duration_seconds = Histogram(
+    "evidence_preview_duration_seconds",
+    "Duración de la generación de miniaturas y vistas previas de una evidencia en segundos.",
+    ("kind", "outcome"),
+    registry=metrics_registry,
+)
+report_pdf_render_duration_seconds = Histogram(
+    "report_pdf_render_duration_seconds",
+    "Duración de la conversión de un informe de incidente a PDF en segundos.",
+    ("outcome",),
+    registry=metrics_registry,
+)
+evidence_upload_deduplicated_total = Counter(
+    "evidence_upload_deduplicated_total",
+    "Archivos de evidencia cuyo contenido ya estaba almacenado (sin escritura).",
+    registry=metrics_registry,
+)
+
+
+# --- Peticiones en curso ---
+
+UNMATCHED_ROUTE = "unmatched"
+
+_in_flight: Dict[int, Dict[str, Any]] = {}
+
+
+def route_template(scope: Dict[str, Any]) -> str:
+    """Devuelve la ruta con parámetros (p. ej. /api/v1/users/{user_id}) que atendió la petición."""
+    route = scope.get("route")
+    path = getattr(route, "path_format", None) or getattr(route, "path", None)
+    return path or UNMATCHED_ROUTE
+
+
+def request_started(scope: Dict[str, Any]) -> int:
+    """Registra una petición en curso; la ruta se resuelve al exportar, cuando el router ya la asignó."""
+    token = id(scope)
+    _in_flight[token] = scope
+    return token
+
+
+def request_finished(token: int, scope: Dict[str, Any], status_code: int, duration: float) -> None:
+    """Registra una petición completada."""
+    _in_flight.pop(token, None)
+    route = route_template(scope)
+    method = scope.get("method", "")
+    http_requests_total.labels(method=method, route=route, status=str(status_code)).inc()
+    http_request_duration_seconds.labels(method=method, route=route).observe(duration)
+
+
+class _InFlightCollector(Collector):
+    """Gauge de peticiones en curso por método y plantilla de ruta."""
+
+    def collect(self) -> Iterator[GaugeMetricFamily]:
+        counts: Dict[Tuple[str, str], int] = {}
+        for scope in list(_in_flight.values()):
+            key = (scope.get("method", ""), route_template(scope))
+            counts[key] = counts.get(key, 0) + 1
+        family = GaugeMetricFamily(
+            "http_requests_in_progress", "Peticiones HTTP en curso.", labels=("method", "route")
+        )
+        for (method, route), count in counts.items():
+            family.add_metric((method, route), count)
+        yield family
+
+
+metrics_registry.register(_InFlightCollector())
+
+
+class _StatsCollector(Collector):
+    """Expone cada valor numérico de `stats()` como gauge `<prefix>_<clave>`."""
+
+    def __init__(self, prefix: str, documentation: str, stats: Callable[[], Dict[str, Any]]):
+        self._prefix = prefix
+        self._documentation = documentation
+        self._stats = stats
+
+    def collect(self) -> Iterator[GaugeMetricFamily]:
+        try:
+            stats = self._stats()
+        except Exception as e:
+            # Un collector roto no debe impedir exportar el resto
+            logger.error("Metrics collector '%s' failed: %s", self._prefix, e)
+            return
+        for key, value in stats.items():
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                continue
+            yield GaugeMetricFamily(f"{self._prefix}_{key}", f"{self._documentation}: {key}.", value=value)
+
+
+def stats_collector(prefix: str, documentation: str, stats: Callable[[], Dict[str, Any]]) -> Collector:
+    """
+    Crea un collector que expone cada valor numérico de `stats()` como gauge `<prefix>_<clave>`.
+
+    Se registra con `metrics_registry.register(...)`.
+    """
+    return _StatsCollector(prefix, documentation, stats)
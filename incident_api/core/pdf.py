@@ -0,0 +1,38 @@
+"""
+Conversión de informes HTML a PDF con xhtml2pdf.
+
+Es un módulo ligero a propósito: los procesos del pool de exportación de
+informes importan solo esto, no la aplicación. La conversión nunca accede a la
+red; las URL remotas se sustituyen por recursos vacíos.
+"""
+
+import io
+import mimetypes
+
+# Sustitutos vacíos de los recursos remotos; un valor falso haría que xhtml2pdf usara la URL original
+_EMPTY_IMAGE = "data:image/gif;base64,R0lGODlhAQABAIAAAAAAAP///yH5BAEAAAAALAAAAAABAAEAAAIBRAA7"
+_EMPTY_STYLESHEET = "data:text/css;base64,IA=="
+
+
+def _local_resources_only(uri: str, rel: str) -> str:
+    """`link_callback` de xhtml2pdf: deja pasar las rutas locales y sustituye las URL remotas."""
+    if "://" in uri or uri.startswith("//"):
+        media_type, _ = mimetypes.guess_type(uri.split("?", 1)[0])
+        return _EMPTY_IMAGE if media_type and media_type.startswith("image/") else _EMPTY_STYLESHEET
+    return uri
+
+
+def render_pdf(html: str) -> bytes:
+    """
+    Convierte un informe HTML en PDF.
+
+    Raises:
+        RuntimeError: Si el renderizador informa de errores.
+    """
+    from xhtml2pdf import pisa
+
+    output = io.BytesIO()
+    status = pisa.CreatePDF(html, dest=output, encoding="utf-8", link_callback=_local_resources_only)
+    if status.err:
+        raise RuntimeError(f"Error al generar el PDF ({status.err} error(es)).")
+    return output.getvalue()
@@ -2,14 +2,16 @@
 
 import logging
 from datetime import datetime, timedelta, timezone
-from typing import Optional, Any, Dict
+from typing import Optional, Any, Dict, Tuple
 
+import anyio
 from fastapi import HTTPException
 from jose import jwt, JWTError
 from sqlalchemy.orm import Session
 
 from incident_api.core.config import settings
-from incident_api.core.hashing import Hasher
+from incident_api.core.hashing import Hasher, password_hashing_pool
+from incident_api.core.auth_cache import authenticated_user_cache
 from incident_api import crud, models
 
 
@@ -27,55 +29,47 @@ def create_access_token(
         El token JWT codificado como una cadena.
     """
     to_encode = data.copy()
+    issued_at = datetime.now(timezone.utc)
     if expires_delta:
-        expire = datetime.now(timezone.utc) + expires_delta
+        expire = issued_at + expires_delta
     else:
-        expire = datetime.now(timezone.utc) + timedelta(
+        expire = issued_at + timedelta(
             minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES
         )
-    to_encode.update({"exp": expire})
+    to_encode.update({"exp": expire, "iat": issued_at})
     encoded_jwt = jwt.encode(
         to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM
     )
     return encoded_jwt
 
 
-def authenticate_user(db: Session, email: str, password: str) -> Optional[models.User]:
+def _login_candidate(db: Session, email: str) -> Tuple[Optional[models.User], str]:
     """
-    Autentica a un usuario de forma segura, mitigando ataques de enumeración de usuarios.
-
-    Verifica las credenciales y si el usuario está activo. El tiempo de ejecución es
-    constante para evitar ataques de temporización.
+    Devuelve el usuario que puede iniciar sesión con ese email (o None) y el hash contra el que verificar.
 
-    Args:
-        db: La sesión de la base de datos.
-        email: El correo electrónico del usuario.
-        password: La contraseña en texto plano proporcionada por el usuario.
-
-    Returns:
-        El objeto User si la autenticación es exitosa, de lo contrario None.
+    Si el usuario no existe o no está activo, se verifica contra un hash falso
+    precalculado: la verificación bcrypt se ejecuta siempre y el tiempo de
+    respuesta es similar al de un login fallido normal.
     """
-    logger = logging.getLogger(__name__)
-
     user = crud.user.get_by_email(db, email=email)
-
-    # Si el usuario no existe o no está activo, usamos un hash falso para la verificación.
-    # Esto asegura que la función de verificación de hash se ejecute siempre,
-    # haciendo que el tiempo de respuesta sea similar al de un login fallido normal.
     if not user or not user.is_active:
-        # Hash de una contraseña conocida imposible para asegurar que la verificación falle.
-        dummy_hash = Hasher.get_password_hash("invalid_password_for_timing_attack_mitigation")
-        Hasher.verify_password(password, dummy_hash)
-        
+        logger = logging.getLogger(__name__)
         if settings.DEBUG or logger.isEnabledFor(logging.DEBUG):
             if not user:
                 logger.debug(f"Authentication failed: User not found - {email}")
-            else: # User is inactive
+            else:  # User is inactive
                 logger.debug(f"Authentication failed: Inactive user - {email}")
+        return None, Hasher.get_dummy_hash()
+    return user, user.hashed_password
+
+
+def _authentication_result(user: Optional[models.User], verified: bool, email: str) -> Optional[models.User]:
+    """Devuelve el usuario si existe, está activo y la contraseña es correcta."""
+    if user is None:
         return None
 
-    # Verificar la contraseña real
-    if not Hasher.verify_password(password, user.hashed_password):
+    logger = logging.getLogger(__name__)
+    if not verified:
         if settings.DEBUG or logger.isEnabledFor(logging.DEBUG):
             logger.debug(f"Authentication failed: Invalid password for user - {email}")
         return None
@@ -83,14 +77,57 @@ def authenticate_user(db: Session, email: str, password: str) -> Optional[models
     # Usuario autenticado exitosamente
     if settings.DEBUG or logger.isEnabledFor(logging.DEBUG):
         logger.debug(f"User authenticated successfully: {email} (ID: {user.user_id})")
-
     return user
 
 
+def authenticate_user(db: Session, email: str, password: str) -> Optional[models.User]:
+    """
+    Autentica a un usuario de forma segura, mitigando ataques de enumeración de usuarios.
+
+    Verifica las credenciales y si el usuario está activo. El tiempo de ejecución es
+    constante para evitar ataques de temporización. La verificación bcrypt se
+    ejecuta en `password_hashing_pool` y bloquea el hilo actual; los endpoints
+    asíncronos usan `aauthenticate_user`.
+
+    Args:
+        db: La sesión de la base de datos.
+        email: El correo electrónico del usuario.
+        password: La contraseña en texto plano proporcionada por el usuario.
+
+    Returns:
+        El objeto User si la autenticación es exitosa, de lo contrario None.
+
+    Raises:
+        HashingPoolSaturated: Si el pool de hashing no admite más trabajo.
+    """
+    user, hashed_password = _login_candidate(db, email)
+    verified = password_hashing_pool.verify_password(password, hashed_password)
+    return _authentication_result(user, verified, email)
+
+
+async def aauthenticate_user(db: Session, email: str, password: str) -> Optional[models.User]:
+    """
+    Versión asíncrona de `authenticate_user`.
+
+    La consulta del usuario se ejecuta en un hilo de AnyIO y la verificación bcrypt
+    se espera en `password_hashing_pool` sin ocupar ningún hilo: un login en cola no
+    retiene un hilo del servidor.
+
+    Raises:
+        HashingPoolSaturated: Si el pool de hashing no admite más trabajo.
+    """
+    user, hashed_password = await anyio.to_thread.run_sync(_login_candidate, db, email)
+    verified = await password_hashing_pool.averify_password(password, hashed_password)
+    return _authentication_result(user, verified, email)
+
+
 def get_user_from_token(db: Session, token: str, credentials_exception: HTTPException) -> models.User:
     """
     Decodifica un token JWT, valida su payload y obtiene el usuario correspondiente.
 
+    El usuario se sirve desde `authenticated_user_cache` cuando es posible; solo se
+    consulta la base de datos si no está cacheado para ese token.
+
     Args:
         db: La sesión de la base de datos.
         token: El token JWT a decodificar.
@@ -109,7 +146,14 @@ def get_user_from_token(db: Session, token: str, credentials_exception: HTTPExce
     except JWTError:
         raise credentials_exception
 
+    # Los tokens emitidos antes de incluir "iat" se distinguen por su expiración
+    cache_key = (email, payload.get("iat", payload.get("exp")))
+    user = authenticated_user_cache.get(db, cache_key)
+    if user is not None:
+        return user
+
     user = crud.user.get_by_email(db, email=email)
     if user is None:
         raise credentials_exception
+    authenticated_user_cache.set(cache_key, user)
     return user
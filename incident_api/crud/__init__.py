@@ -16,6 +16,7 @@ from .crud_incident_log import incident_log
 from .crud_audit_log import audit_log
 from .crud_history import incident_history, conversation_history
 from .crud_evidence_file import evidence_file
+from .crud_evidence_blob import evidence_blob
 
 # Imports para el seeding y la nueva lógica de incidentes
 from .crud_asset_type import asset_type
@@ -30,6 +31,9 @@ from .crud_rag_settings import rag_settings
 from .crud_task import task
 from .crud_knowledge_curation import knowledge_curation
 
+# Imports de métricas materializadas
+from .crud_metrics_summary import user_metrics_summary, category_metrics_summary
+
 
 __all__ = [
     "user",
@@ -40,6 +44,7 @@ __all__ = [
     "incident_history",
     "conversation_history",
     "evidence_file",
+    "evidence_blob",
     "asset_type",
     "asset",
     "attack_vector",
@@ -50,4 +55,6 @@ __all__ = [
     "rag_settings",
     "task",
     "knowledge_curation",
+    "user_metrics_summary",
+    "category_metrics_summary",
 ]
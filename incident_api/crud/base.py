@@ -6,13 +6,15 @@ por las clases de CRUD específicas para cada modelo. Implementa las operaciones
 más comunes para reducir la duplicación de código.
 """
 
-from typing import Any, Dict, Generic, List, Optional, Type, TypeVar, Union
+from typing import Any, Dict, Generic, List, Optional, Sequence, Type, TypeVar, Union
 
 from fastapi.encoders import jsonable_encoder
 from pydantic import BaseModel
+from sqlalchemy import insert, update
 from sqlalchemy.orm import Session
 
 from incident_api.db.base import Base
+from incident_api.db.unit_of_work import commit_or_flush
 
 # Definir tipos genéricos para el modelo, esquema de creación y esquema de actualización
 ModelType = TypeVar("ModelType", bound=Base)
@@ -59,10 +61,65 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         obj_in_data = jsonable_encoder(obj_in)
         db_obj = self.model(**obj_in_data)
         db.add(db_obj)
-        db.commit()
+        commit_or_flush(db)
         db.refresh(db_obj)
         return db_obj
 
+    def create_many(
+        self,
+        db: Session,
+        *,
+        objs_in: Sequence[Union[CreateSchemaType, Dict[str, Any]]],
+        returning: bool = False,
+    ) -> Optional[List[ModelType]]:
+        """
+        Crea varios registros en una sola transacción.
+
+        Se emite un único INSERT por lotes (sin un commit y un refresh por fila).
+
+        Args:
+            db: Sesión de base de datos.
+            objs_in: Esquemas de creación o diccionarios con los valores de cada fila.
+            returning: Si es True, devuelve los objetos creados usando RETURNING.
+
+        Returns:
+            La lista de objetos creados si `returning` es True; en caso contrario, None.
+        """
+        rows = [
+            obj if isinstance(obj, dict) else obj.model_dump()
+            for obj in objs_in
+        ]
+        if not rows:
+            return [] if returning else None
+
+        if returning:
+            # Las filas devueltas siguen el orden de `objs_in`
+            created = db.scalars(
+                insert(self.model).returning(self.model, sort_by_parameter_order=True), rows
+            ).all()
+        else:
+            db.execute(insert(self.model), rows)
+            created = None
+        commit_or_flush(db)
+        return created
+
+    def update_many(
+        self, db: Session, *, objs_in: Sequence[Dict[str, Any]]
+    ) -> int:
+        """
+        Actualiza varios registros por clave primaria en una sola transacción.
+
+        Cada diccionario debe incluir la clave primaria del registro y los campos a modificar.
+
+        Returns:
+            El número de registros enviados a actualizar.
+        """
+        if not objs_in:
+            return 0
+        db.execute(update(self.model), list(objs_in))
+        commit_or_flush(db)
+        return len(objs_in)
+
     def update(
         self,
         db: Session,
@@ -82,7 +139,7 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
             setattr(db_obj, field, value)
 
         db.add(db_obj)
-        db.commit()
+        commit_or_flush(db)
         db.refresh(db_obj)
         return db_obj
 
@@ -91,5 +148,5 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         obj = self.get(db, id=id)
         if obj:
             db.delete(obj)
-            db.commit()
+            commit_or_flush(db)
         return obj
@@ -2,7 +2,9 @@
 Operaciones CRUD para el modelo AuditLog.
 """
 
-from typing import List
+import json
+from typing import Iterator, List, Sequence, Tuple
+from sqlalchemy import RowMapping, Select, func, select, tuple_
 from sqlalchemy.orm import Session
 from datetime import datetime, timedelta, timezone
 
@@ -71,7 +73,6 @@ class CRUDAuditLog(CRUDBase[AuditLog, AuditLogCreate, AuditLogUpdate]):
 
     def get_login_frequency_per_week(self, db: Session, *, user_id: int, days: int = 30) -> float | None:
         """Calculates the average logins per week for a user over the last N days."""
-        from sqlalchemy import func
         cutoff = datetime.now(timezone.utc) - timedelta(days=days)
         count = db.query(func.count(self.model.id)).filter(
             self.model.user_id == user_id,
@@ -82,42 +83,156 @@ class CRUDAuditLog(CRUDBase[AuditLog, AuditLogCreate, AuditLogUpdate]):
         weeks = days / 7.0
         return count / weeks if weeks > 0 else None
 
+    def _filtered_select(
+        self,
+        stmt: Select,
+        *,
+        user_id: int | None = None,
+        actions: Sequence[str] | None = None,
+        resource_types: Sequence[str] | None = None,
+        resource_id: int | None = None,
+        start_date: datetime | None = None,
+        end_date: datetime | None = None,
+    ) -> Select:
+        """
+        Aplica los filtros de igualdad y de rango de fechas.
+
+        Todos los filtros son exactos para que puedan usar los índices compuestos
+        (user_id, timestamp), (action, timestamp) y (resource_type, resource_id, timestamp),
+        y el rango de fechas permite podar particiones.
+        """
+        if user_id is not None:
+            stmt = stmt.where(self.model.user_id == user_id)
+        if actions:
+            stmt = stmt.where(self.model.action.in_(actions))
+        if resource_types:
+            stmt = stmt.where(self.model.resource_type.in_(resource_types))
+        if resource_id is not None:
+            stmt = stmt.where(self.model.resource_id == resource_id)
+        if start_date:
+            stmt = stmt.where(self.model.timestamp >= start_date)
+        if end_date:
+            stmt = stmt.where(self.model.timestamp <= end_date)
+        return stmt
+
     def get_multi_with_filters(
         self,
         db: Session,
         *,
         user_id: int | None = None,
-        action: str | None = None,
-        resource_type: str | None = None,
+        actions: Sequence[str] | None = None,
+        resource_types: Sequence[str] | None = None,
+        resource_id: int | None = None,
         start_date: datetime | None = None,
         end_date: datetime | None = None,
+        after: Tuple[datetime, int] | None = None,
         skip: int = 0,
         limit: int = 100,
-    ) -> tuple[list[AuditLog], int]:
-        """Obtiene múltiples registros de auditoría con filtros dinámicos y paginación."""
-        query = db.query(self.model)
+    ) -> list[AuditLog]:
+        """
+        Obtiene registros de auditoría filtrados, del más reciente al más antiguo.
 
-        if user_id is not None:
-            query = query.filter(self.model.user_id == user_id)
-        if action:
-            query = query.filter(self.model.action.ilike(f"%{action}%"))
-        if resource_type:
-            query = query.filter(self.model.resource_type.ilike(f"%{resource_type}%"))
-        if start_date:
-            query = query.filter(self.model.timestamp >= start_date)
-        if end_date:
-            query = query.filter(self.model.timestamp <= end_date)
+        Con `after` (timestamp, id) del último registro de la página anterior se usa
+        paginación por keyset, cuyo coste no crece con la profundidad de la página;
+        `skip` solo se aplica si no se indica `after`.
+        """
+        stmt = self._filtered_select(
+            select(self.model),
+            user_id=user_id,
+            actions=actions,
+            resource_types=resource_types,
+            resource_id=resource_id,
+            start_date=start_date,
+            end_date=end_date,
+        )
+        if after is not None:
+            stmt = stmt.where(tuple_(self.model.timestamp, self.model.id) < tuple_(*after))
+        elif skip:
+            stmt = stmt.offset(skip)
 
-        total = query.count()
+        stmt = stmt.order_by(self.model.timestamp.desc(), self.model.id.desc()).limit(limit)
+        return list(db.scalars(stmt))
 
-        logs = (
-            query.order_by(self.model.timestamp.desc())
-            .offset(skip)
-            .limit(limit)
-            .all()
+    def stream_with_filters(
+        self,
+        db: Session,
+        *,
+        batch_size: int = 1000,
+        user_id: int | None = None,
+        actions: Sequence[str] | None = None,
+        resource_types: Sequence[str] | None = None,
+        resource_id: int | None = None,
+        start_date: datetime | None = None,
+        end_date: datetime | None = None,
+    ) -> Iterator[RowMapping]:
+        """
+        Recorre los registros filtrados en orden cronológico con un cursor de servidor.
+
+        Las filas se leen en lotes de `batch_size` (`yield_per`) como mapeos de
+        columnas, sin construir objetos ORM, de modo que la memoria no depende del
+        tamaño del rango.
+        """
+        table = self.model.__table__
+        stmt = self._filtered_select(
+            select(table),
+            user_id=user_id,
+            actions=actions,
+            resource_types=resource_types,
+            resource_id=resource_id,
+            start_date=start_date,
+            end_date=end_date,
+        ).order_by(table.c.timestamp, table.c.id)
+        yield from db.execute(stmt.execution_options(yield_per=batch_size)).mappings()
+
+    def count_with_filters(
+        self,
+        db: Session,
+        *,
+        cap: int,
+        user_id: int | None = None,
+        actions: Sequence[str] | None = None,
+        resource_types: Sequence[str] | None = None,
+        resource_id: int | None = None,
+        start_date: datetime | None = None,
+        end_date: datetime | None = None,
+    ) -> tuple[int, bool]:
+        """
+        Cuenta los registros filtrados sin recorrer más de `cap` filas.
+
+        Si hay más de `cap` registros, devuelve la estimación del planificador en
+        PostgreSQL (o `cap` en otros motores) e indica que el total es aproximado.
+
+        Returns:
+            Una tupla (total, es_estimado).
+        """
+        filters = dict(
+            user_id=user_id,
+            actions=actions,
+            resource_types=resource_types,
+            resource_id=resource_id,
+            start_date=start_date,
+            end_date=end_date,
         )
+        capped = self._filtered_select(select(self.model.id), **filters).limit(cap + 1).subquery()
+        total = db.scalar(select(func.count()).select_from(capped))
+        if total <= cap:
+            return total, False
+
+        if db.get_bind().dialect.name == "postgresql":
+            estimate = self._planner_estimate(db, self._filtered_select(select(self.model.id), **filters))
+            return max(estimate, cap + 1), True
+        return cap, True
 
-        return logs, total
+    @staticmethod
+    def _planner_estimate(db: Session, stmt: Select) -> int:
+        """Devuelve el número de filas estimado por el planificador de PostgreSQL."""
+        connection = db.connection()
+        # Los filtros IN son parámetros "expanding": sin render_postcompile quedaría __[POSTCOMPILE_...]
+        compiled = stmt.compile(dialect=connection.dialect, compile_kwargs={"render_postcompile": True})
+        plan = connection.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {compiled}", compiled.params).scalar()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]["Plan"]["Plan Rows"])
 
 
 audit_log = CRUDAuditLog(AuditLog)
\ No newline at end of file
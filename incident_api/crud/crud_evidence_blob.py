@@ -0,0 +1,80 @@
+"""Operaciones CRUD para el modelo EvidenceBlob (contenido de evidencias con recuento de referencias)."""
+
+from collections import Counter
+from typing import List, Sequence
+
+from sqlalchemy import Connection, delete, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from incident_api.crud.base import CRUDBase
+from incident_api.db.unit_of_work import commit_or_flush
+from incident_api.models.evidence_blob import EvidenceBlob
+from incident_api.schemas.evidence_file import EvidenceBlobCreate
+
+
+class CRUDEvidenceBlob(CRUDBase[EvidenceBlob, EvidenceBlobCreate, EvidenceBlobCreate]):
+    """
+    Clase CRUD para el modelo EvidenceBlob.
+
+    Los recuentos se actualizan con sentencias atómicas en la base de datos, de
+    modo que varias peticiones pueden referenciar el mismo contenido a la vez.
+    """
+
+    _INSERTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+    def acquire(self, db: Session, *, blobs: Sequence[EvidenceBlobCreate]) -> None:
+        """
+        Suma una referencia por cada elemento de `blobs`, creando las filas que no existan.
+
+        Se emite un único `INSERT ... ON CONFLICT DO UPDATE` para todos los hashes.
+        """
+        if not blobs:
+            return
+        counts = Counter(blob.sha256 for blob in blobs)
+        rows = {blob.sha256: {**blob.model_dump(), "ref_count": counts[blob.sha256]} for blob in blobs}
+
+        dialect = db.get_bind().dialect.name
+        if dialect not in self._INSERTS:
+            raise NotImplementedError(f"Almacén de evidencias no soportado para '{dialect}'.")
+        stmt = self._INSERTS[dialect](EvidenceBlob).values(list(rows.values()))
+        db.execute(stmt.on_conflict_do_update(
+            index_elements=[EvidenceBlob.sha256],
+            set_={"ref_count": EvidenceBlob.ref_count + stmt.excluded.ref_count},
+        ))
+        commit_or_flush(db)
+
+    @staticmethod
+    def release_on(connection: Connection, *, hashes: Sequence[str]) -> List[str]:
+        """
+        Resta una referencia por cada hash y elimina las filas que quedan sin referencias.
+
+        No confirma nada: se ejecuta en la conexión de la transacción en curso
+        (p. ej. desde el evento `after_delete` de `EvidenceFile`).
+
+        Returns:
+            List[str]: Rutas de los contenidos que ya no se usan.
+        """
+        counts = Counter(h for h in hashes if h)
+        if not counts:
+            return []
+        for sha256, count in counts.items():
+            connection.execute(
+                update(EvidenceBlob)
+                .where(EvidenceBlob.sha256 == sha256)
+                .values(ref_count=EvidenceBlob.ref_count - count)
+            )
+        return list(connection.scalars(
+            delete(EvidenceBlob)
+            .where(EvidenceBlob.sha256.in_(list(counts)), EvidenceBlob.ref_count <= 0)
+            .returning(EvidenceBlob.file_path)
+        ))
+
+    def get_existing_hashes(self, db: Session, *, hashes: Sequence[str]) -> set:
+        """Devuelve cuáles de los hashes tienen fila en la tabla."""
+        if not hashes:
+            return set()
+        return set(db.scalars(select(EvidenceBlob.sha256).where(EvidenceBlob.sha256.in_(list(hashes)))))
+
+
+evidence_blob = CRUDEvidenceBlob(EvidenceBlob)
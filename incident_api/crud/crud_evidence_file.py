@@ -1,17 +1,60 @@
 """Operaciones CRUD para el modelo EvidenceFile."""
 
-from sqlalchemy.orm import Session
-from typing import List
+import os
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+from typing import List, Sequence
 
 from incident_api.crud.base import CRUDBase
+from incident_api.crud.crud_evidence_blob import evidence_blob
+from incident_api.db.unit_of_work import commit_or_flush
 from incident_api.models.evidence_file import EvidenceFile
-from incident_api.schemas.evidence_file import EvidenceFileCreate
+from incident_api.schemas.evidence_file import EvidenceBlobCreate, EvidenceFileCreate
+
+# Rutas de contenidos que han quedado sin referencias en la transacción en curso;
+# file_storage_service las elimina del disco cuando se confirma
+ORPHANED_BLOBS_KEY = "orphaned_evidence_blobs"
+
+
+@event.listens_for(EvidenceFile, "after_delete")
+def _release_blob(mapper, connection, target: EvidenceFile) -> None:
+    """
+    Libera la referencia al contenido de cada evidencia eliminada.
+
+    Como evento del mapper cubre también los borrados en cascada (p. ej. al
+    eliminar el incidente), no solo `remove_many`.
+
+    Las evidencias anteriores al almacén direccionado por contenido conservan su
+    ruta `uploads/{id}_{uuid}` y no tienen `EvidenceBlob`: no liberan nada, aunque
+    una subida posterior del mismo contenido haya creado la fila de su hash.
+    """
+    # Los contenidos del almacén se guardan en un archivo con el nombre de su hash
+    if not target.file_hash or os.path.basename(target.file_path or "") != target.file_hash:
+        return
+    orphaned = evidence_blob.release_on(connection, hashes=[target.file_hash])
+    session = object_session(target)
+    if orphaned and session is not None:
+        session.info.setdefault(ORPHANED_BLOBS_KEY, []).extend(orphaned)
 
 
 class CRUDEvidenceFile(
     CRUDBase[EvidenceFile, EvidenceFileCreate, EvidenceFileCreate]
 ):  # No update schema
-    """Clase CRUD para el modelo EvidenceFile."""
+    """
+    Clase CRUD para el modelo EvidenceFile.
+
+    Crear o eliminar archivos de evidencia actualiza el recuento de referencias
+    de su contenido (`EvidenceBlob`) en la misma transacción.
+    """
+
+    @staticmethod
+    def _blob_refs(objs_in: Sequence[EvidenceFileCreate], file_paths: Sequence[str]) -> List[EvidenceBlobCreate]:
+        return [
+            EvidenceBlobCreate(sha256=obj_in.file_hash, file_path=file_path, file_size_bytes=obj_in.file_size_bytes)
+            for obj_in, file_path in zip(objs_in, file_paths)
+            if obj_in.file_hash
+        ]
 
     def create_with_incident_and_uploader(
         self,
@@ -23,6 +66,7 @@ class CRUDEvidenceFile(
         file_path: str
     ) -> EvidenceFile:
         """Crea un nuevo registro de archivo de evidencia."""
+        evidence_blob.acquire(db, blobs=self._blob_refs([obj_in], [file_path]))
         obj_in_data = obj_in.dict()
         db_obj = self.model(
             **obj_in_data,
@@ -31,10 +75,52 @@ class CRUDEvidenceFile(
             file_path=file_path
         )
         db.add(db_obj)
-        db.commit()
+        commit_or_flush(db)
         db.refresh(db_obj)
         return db_obj
 
+    def create_many_with_incident_and_uploader(
+        self,
+        db: Session,
+        *,
+        objs_in: Sequence[EvidenceFileCreate],
+        file_paths: Sequence[str],
+        incident_id: int,
+        uploader_id: int,
+    ) -> List[EvidenceFile]:
+        """Crea varios registros de archivos de evidencia con un único INSERT."""
+        if len(objs_in) != len(file_paths):
+            raise ValueError("Cada archivo de evidencia debe tener su ruta correspondiente.")
+        evidence_blob.acquire(db, blobs=self._blob_refs(objs_in, file_paths))
+        return self.create_many(
+            db,
+            objs_in=[
+                {
+                    **obj_in.model_dump(),
+                    "incident_id": incident_id,
+                    "uploaded_by_id": uploader_id,
+                    "file_path": file_path,
+                }
+                for obj_in, file_path in zip(objs_in, file_paths)
+            ],
+            returning=True,
+        )
+
+    def remove_many(self, db: Session, *, db_objs: Sequence[EvidenceFile]) -> List[str]:
+        """
+        Elimina varios archivos de evidencia; `_release_blob` libera sus referencias.
+
+        Returns:
+            List[str]: Rutas de los contenidos que han quedado sin referencias.
+        """
+        already_orphaned = len(db.info.get(ORPHANED_BLOBS_KEY, []))
+        for db_obj in db_objs:
+            db.delete(db_obj)
+        db.flush()
+        orphaned = db.info.get(ORPHANED_BLOBS_KEY, [])[already_orphaned:]
+        commit_or_flush(db)
+        return orphaned
+
     def get_by_incident(self, db: Session, *, incident_id: int) -> List[EvidenceFile]:
         """Obtiene todos los archivos de evidencia para un incidente específico."""
         return db.query(self.model).filter(self.model.incident_id == incident_id).all()
@@ -6,6 +6,7 @@ from sqlalchemy.orm import Session
 from typing import List, Optional
 
 from incident_api.crud.base import CRUDBase
+from incident_api.db.unit_of_work import commit_or_flush
 from incident_api.models.history import IncidentHistory, ConversationHistory
 from incident_api.schemas.incident_history import IncidentHistoryCreate
 from incident_api.schemas.chatbot import ConversationHistoryCreate
@@ -33,7 +34,7 @@ class CRUDIncidentHistory(
         """
         db_obj = self.model(**obj_in.dict(), incident_id=incident_id, user_id=user_id)
         db.add(db_obj)
-        db.commit()
+        commit_or_flush(db)
         db.refresh(db_obj)
         return db_obj
 
@@ -66,7 +67,7 @@ class CRUDConversationHistory(
         """
         db_obj = self.model(**obj_in.dict(), user_id=user_id)
         db.add(db_obj)
-        db.commit()
+        commit_or_flush(db)
         db.refresh(db_obj)
         return db_obj
 
@@ -1,9 +1,10 @@
 """Operaciones CRUD para el modelo IncidentLog."""
 
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Sequence
 
 from incident_api.crud.base import CRUDBase
+from incident_api.db.unit_of_work import commit_or_flush
 from incident_api.models.incident_log import IncidentLog
 from incident_api.schemas.incident_log import IncidentLogCreate
 
@@ -22,10 +23,29 @@ class CRUDIncidentLog(
         obj_in_data = obj_in.model_dump()
         db_obj = self.model(**obj_in_data, incident_id=incident_id, user_id=user_id)
         db.add(db_obj)
-        db.commit()
+        commit_or_flush(db)
         db.refresh(db_obj)
         return db_obj
 
+    def create_many_with_incident_and_user(
+        self,
+        db: Session,
+        *,
+        objs_in: Sequence[IncidentLogCreate],
+        incident_id: int,
+        user_id: int,
+    ) -> None:
+        """
+        Crea varios registros de log de un incidente y un usuario con un único INSERT.
+        """
+        self.create_many(
+            db,
+            objs_in=[
+                {**obj_in.model_dump(), "incident_id": incident_id, "user_id": user_id}
+                for obj_in in objs_in
+            ],
+        )
+
     def get_by_incident(self, db: Session, *, incident_id: int) -> List[IncidentLog]:
         """
         Obtiene todos los registros de log para un incidente específico.
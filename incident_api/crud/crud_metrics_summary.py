@@ -0,0 +1,105 @@
+"""
+Operaciones CRUD para las tablas de métricas materializadas.
+"""
+
+from typing import Any, Dict, Iterable, List, Optional
+
+from sqlalchemy import case
+from sqlalchemy.orm import Session
+
+from incident_api.crud.base import CRUDBase, ModelType, UpdateSchemaType
+from incident_api.db.unit_of_work import commit_or_flush
+from incident_api.models.metrics_summary import UserMetricsSummary, CategoryMetricsSummary
+from incident_api.schemas.metrics_summary import (
+    UserMetricsSummaryUpdate,
+    CategoryMetricsSummaryUpdate,
+)
+
+
+class CRUDMetricsSummary(CRUDBase[ModelType, UpdateSchemaType, UpdateSchemaType]):
+    """
+    Clase CRUD común para las filas de métricas indexadas por una única clave primaria.
+    """
+
+    @property
+    def _pk(self):
+        return list(self.model.__table__.primary_key.columns)[0]
+
+    def upsert(self, db: Session, *, obj_in: UpdateSchemaType, stale_version: Optional[int] = None) -> ModelType:
+        """
+        Crea o reemplaza la fila de métricas.
+
+        La fila solo se marca como vigente si `stale_version` coincide con el valor
+        leído antes de calcular los agregados: si un `mark_stale` concurrente la
+        invalidó durante el recálculo, sigue obsoleta. La comparación se hace en el
+        propio UPDATE, así que no depende de la copia de la fila en la sesión.
+        `stale_version=None` indica que la fila no existía al empezar.
+        """
+        data = obj_in.model_dump(exclude={"is_stale"})
+        db_obj = db.get(self.model, data[self._pk.name])
+        if db_obj is None:
+            db_obj = self.model(**data, is_stale=False)
+            db.add(db_obj)
+        else:
+            for field, value in data.items():
+                setattr(db_obj, field, value)
+            if stale_version is not None:
+                db_obj.is_stale = case(
+                    (self.model.stale_version == stale_version, False), else_=self.model.is_stale
+                )
+        commit_or_flush(db)
+        db.refresh(db_obj)
+        return db_obj
+
+    def mark_stale(self, db: Session, *, ids: Iterable[Any]) -> int:
+        """
+        Marca como obsoletas las filas indicadas con un único UPDATE.
+
+        Incrementa `stale_version` también en las filas ya obsoletas: un recálculo
+        en curso las leyó antes de este cambio y no debe darlas por vigentes. Las
+        claves sin fila no necesitan marcarse: se calcularán en la primera lectura.
+        """
+        ids = {i for i in ids if i is not None}
+        if not ids:
+            return 0
+        updated = (
+            db.query(self.model)
+            .filter(self._pk.in_(ids))
+            .update(
+                {self.model.is_stale: True, self.model.stale_version: self.model.stale_version + 1},
+                synchronize_session=False,
+            )
+        )
+        commit_or_flush(db)
+        return updated
+
+    def get_stale_versions(self, db: Session, *, ids: Iterable[Any]) -> Dict[Any, int]:
+        """Lee de la BD (no de la sesión) el `stale_version` actual de las filas indicadas."""
+        ids = list(ids)
+        if not ids:
+            return {}
+        return dict(db.query(self._pk, self.model.stale_version).filter(self._pk.in_(ids)).all())
+
+    def get_stale_ids(self, db: Session) -> List[Any]:
+        """Devuelve las claves de las filas pendientes de recálculo."""
+        return [pk for (pk,) in db.query(self._pk).filter(self.model.is_stale.is_(True)).all()]
+
+
+class CRUDUserMetricsSummary(
+    CRUDMetricsSummary[UserMetricsSummary, UserMetricsSummaryUpdate]
+):
+    """Clase CRUD para el modelo UserMetricsSummary."""
+
+
+class CRUDCategoryMetricsSummary(
+    CRUDMetricsSummary[CategoryMetricsSummary, CategoryMetricsSummaryUpdate]
+):
+    """Clase CRUD para el modelo CategoryMetricsSummary."""
+
+    def get_all(self, db: Session) -> List[CategoryMetricsSummary]:
+        """Obtiene las métricas de todas las categorías."""
+        return db.query(self.model).order_by(self.model.incident_category_id).all()
+
+
+user_metrics_summary = CRUDUserMetricsSummary(UserMetricsSummary)
+category_metrics_summary = CRUDCategoryMetricsSummary(CategoryMetricsSummary)
@@ -1,7 +1,9 @@
 """
 Operaciones CRUD para el modelo Task.
 """
-from typing import Optional
+from datetime import datetime
+from typing import List, Optional
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 from incident_api.crud.base import CRUDBase
 from incident_api.models.task import Task
@@ -14,5 +16,9 @@ class CRUDTask(CRUDBase[Task, TaskCreate, TaskUpdate]):
     def get_by_task_id(self, db: Session, *, task_id: str) -> Optional[Task]:
         return db.query(Task).filter(Task.task_id == task_id).first()
 
+    def get_updated_before(self, db: Session, *, cutoff: datetime) -> List[Task]:
+        """Tareas cuya última actualización es anterior a `cutoff`."""
+        return list(db.scalars(select(Task).where(Task.updated_at < cutoff)))
+
 
 task = CRUDTask(Task)
@@ -2,12 +2,15 @@
 Operaciones CRUD para el modelo User.
 """
 
-from typing import Any, Dict, Optional, Union
+from typing import Any, Dict, Iterator, Optional, Union
 from fastapi import HTTPException, status
+from sqlalchemy import RowMapping, select
 from sqlalchemy.orm import Session, joinedload
 
 from incident_api.core.hashing import Hasher
 from incident_api.crud.base import CRUDBase
+from incident_api.db.unit_of_work import commit_or_flush
+from incident_api.models.group import Group
 from incident_api.models.user import User
 from incident_api.schemas.user import UserCreate, UserUpdate
 
@@ -62,7 +65,7 @@ class CRUDUser(CRUDBase[User, UserCreate, UserUpdate]):
         db_obj = self.model(**obj_in_data)
 
         db.add(db_obj)
-        db.commit()
+        commit_or_flush(db)
         db.refresh(db_obj)
         return db_obj
 
@@ -87,7 +90,7 @@ class CRUDUser(CRUDBase[User, UserCreate, UserUpdate]):
         """Desactiva un usuario estableciendo is_active a False."""
         db_obj.is_active = False
         db.add(db_obj)
-        db.commit()
+        commit_or_flush(db)
         db.refresh(db_obj)
         return db_obj
 
@@ -95,7 +98,7 @@ class CRUDUser(CRUDBase[User, UserCreate, UserUpdate]):
         """Activa un usuario estableciendo is_active a True."""
         db_obj.is_active = True
         db.add(db_obj)
-        db.commit()
+        commit_or_flush(db)
         db.refresh(db_obj)
         return db_obj
 
@@ -120,12 +123,9 @@ class CRUDUser(CRUDBase[User, UserCreate, UserUpdate]):
             .all()
         )
 
-    def get_multi_with_filters(
-        self, db: Session, *, status: str = None, role: str = None, skip: int = 0, limit: int = 1000
-    ) -> list[User]:
-        """Obtiene múltiples usuarios con filtros opcionales de estado y rol."""
-        query = db.query(User).options(joinedload(User.group))
-
+    @staticmethod
+    def _apply_filters(query, *, status: str = None, role: str = None):
+        """Aplica los filtros de estado y rol a una consulta o a un `select`."""
         if status == "active":
             query = query.filter(User.is_active == True)
         elif status == "inactive":
@@ -133,8 +133,45 @@ class CRUDUser(CRUDBase[User, UserCreate, UserUpdate]):
 
         if role:
             query = query.filter(User.role == role)
+        return query
 
+    def get_multi_with_filters(
+        self, db: Session, *, status: str = None, role: str = None, skip: int = 0, limit: int = 1000
+    ) -> list[User]:
+        """Obtiene múltiples usuarios con filtros opcionales de estado y rol."""
+        query = db.query(User).options(joinedload(User.group))
+        query = self._apply_filters(query, status=status, role=role)
         return query.offset(skip).limit(limit).all()
 
+    def stream_with_filters(
+        self, db: Session, *, status: str = None, role: str = None, batch_size: int = 1000
+    ) -> Iterator[RowMapping]:
+        """
+        Recorre los usuarios filtrados, ordenados por ID, con un cursor de servidor.
+
+        Las filas se leen en lotes de `batch_size` (`yield_per`) como mapeos de
+        columnas, sin construir objetos ORM ni cargar `hashed_password`. El grupo
+        se incluye mediante un outer join en las columnas `group_name` y
+        `group_description`.
+        """
+        stmt = (
+            select(
+                User.user_id,
+                User.email,
+                User.full_name,
+                User.role,
+                User.position,
+                User.city,
+                User.is_active,
+                User.group_id,
+                User.created_at,
+                Group.name.label("group_name"),
+                Group.description.label("group_description"),
+            )
+            .outerjoin(Group, User.group_id == Group.id)
+            .order_by(User.user_id)
+        )
+        stmt = self._apply_filters(stmt, status=status, role=role)
+        yield from db.execute(stmt.execution_options(yield_per=batch_size)).mappings()
 
 user = CRUDUser(User)
\ No newline at end of file
@@ -0,0 +1,70 @@
+"""
+Unidad de trabajo (unit of work) con alcance de petición.
+
+Dentro de `unit_of_work(db)` las operaciones CRUD solo hacen `flush` (asignan
+claves y detectan errores de integridad) y la transacción se confirma una única
+vez al salir del bloque. Si se produce una excepción, se revierte todo el
+trabajo, de modo que una operación compuesta (p. ej. crear un incidente con sus
+evidencias, bitácora e historial) es atómica.
+
+Fuera de una unidad de trabajo, `commit_or_flush` mantiene el comportamiento
+tradicional de confirmar en cada operación.
+"""
+
+from contextlib import contextmanager
+from typing import Iterator
+
+from sqlalchemy.orm import Session
+
+_UNIT_OF_WORK_KEY = "unit_of_work"
+
+
+def in_unit_of_work(db: Session) -> bool:
+    """Indica si la sesión está dentro de una unidad de trabajo activa."""
+    return db.info.get(_UNIT_OF_WORK_KEY) is True
+
+
+def commit_or_flush(db: Session) -> None:
+    """Confirma la transacción, o solo hace flush si hay una unidad de trabajo activa."""
+    if in_unit_of_work(db):
+        db.flush()
+    else:
+        db.commit()
+
+
+@contextmanager
+def unit_of_work(db: Session) -> Iterator[Session]:
+    """
+    Agrupa todas las escrituras del bloque en una sola transacción.
+
+    Las unidades de trabajo anidadas se integran en la exterior.
+    """
+    if in_unit_of_work(db):
+        yield db
+        return
+
+    db.info[_UNIT_OF_WORK_KEY] = True
+    try:
+        yield db
+        db.commit()
+    except BaseException:
+        db.rollback()
+        raise
+    finally:
+        db.info.pop(_UNIT_OF_WORK_KEY, None)
+
+
+@contextmanager
+def suspend_unit_of_work(db: Session) -> Iterator[Session]:
+    """
+    Suspende temporalmente la unidad de trabajo para que las escrituras se confirmen de inmediato.
+
+    Útil para registros que deben persistir aunque la petición falle (p. ej. la
+    auditoría de un error), después de haber revertido el trabajo pendiente.
+    """
+    active = db.info.pop(_UNIT_OF_WORK_KEY, None)
+    try:
+        yield db
+    finally:
+        if active:
+            db.info[_UNIT_OF_WORK_KEY] = active
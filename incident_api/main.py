@@ -2,17 +2,28 @@
 import traceback
 import logging
 import os
+import secrets
+import time
 
 logger = logging.getLogger(__name__)
 from fastapi import FastAPI, Request, Depends
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 from fastapi.middleware.cors import CORSMiddleware
-from starlette.middleware.base import BaseHTTPMiddleware
+from prometheus_client import CONTENT_TYPE_PLAIN_0_0_4, generate_latest
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 from starlette.middleware.sessions import SessionMiddleware
 
 from incident_api.core.logging_config import setup_logging
 from incident_api.api.api import api_router
 from incident_api.core.config import settings
+from incident_api.core.metrics import metrics_registry, request_finished, request_started, stats_collector
+from incident_api.core.auth_cache import authenticated_user_cache
+from incident_api.core.hashing import Hasher, password_hashing_pool
+from incident_api.services.alerting_service import alerting_service
+from incident_api.services.audit_writer import audit_log_writer
+from incident_api.services.evidence_preview_service import evidence_preview_service
+from incident_api.services.report_service import report_cache
 
 
 # Setup logging
@@ -31,19 +42,52 @@ app = FastAPI(
 
 # Registra la función en el evento 'startup'
 app.add_event_handler("startup", create_upload_dir)
+# Precalcula el hash falso de los logins fallidos para no pagarlo en cada petición
+app.add_event_handler("startup", Hasher.get_dummy_hash)
+app.add_event_handler("shutdown", password_hashing_pool.shutdown)
+# Vacía la cola de auditoría pendiente antes de terminar
+app.add_event_handler("shutdown", audit_log_writer.stop)
+# Envía las alertas agrupadas pendientes antes de terminar
+app.add_event_handler("shutdown", alerting_service.stop)
+app.add_event_handler("shutdown", evidence_preview_service.stop)
 
 
 # --- Middlewares ---
 # El orden es importante. El primer middleware añadido es el más externo.
 
-class ErrorHandlingMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):
+class ErrorHandlingMiddleware:
+    """
+    Middleware ASGI que convierte las excepciones no controladas en una respuesta 500 JSON.
+
+    No envuelve ni almacena el cuerpo de la respuesta: solo observa si la respuesta
+    ya empezó a enviarse, en cuyo caso no se puede sustituir y la excepción se propaga.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        response_started = False
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
         try:
-            return await call_next(request)
+            await self.app(scope, receive, send_wrapper)
         except Exception as exc:
+            request = Request(scope)
             logging.error(f"Unhandled exception for request {request.method} {request.url}: {exc}", exc_info=True)
+            if response_started:
+                raise
             if settings.DEBUG:
-                return JSONResponse(
+                response = JSONResponse(
                     status_code=500,
                     content={
                         "error": "Internal Server Error",
@@ -51,27 +95,68 @@ class ErrorHandlingMiddleware(BaseHTTPMiddleware):
                         "message": str(exc),
                     },
                 )
-            return JSONResponse(
-                status_code=500,
-                content={"error": "Internal Server Error"},
-            )
-
-class RequestLoggingMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):
-        import time
-        start_time = time.time()
-        client_ip = request.client.host if request.client else "unknown"
-        logger.info(f"REQUEST - {request.method} {request.url.path} - IP: {client_ip}")
+            else:
+                response = JSONResponse(
+                    status_code=500,
+                    content={"error": "Internal Server Error"},
+                )
+            await response(scope, receive, send)
+
+
+class RequestLoggingMiddleware:
+    """
+    Middleware ASGI que añade la cabecera X-Process-Time, registra una línea por petición
+    y actualiza las métricas HTTP (por ruta con parámetros, no por URL).
+
+    La cabecera mide el tiempo hasta el inicio de la respuesta; la línea de log se
+    escribe al terminar de enviar el cuerpo, por lo que en respuestas en streaming
+    incluye la duración completa.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start_time = time.perf_counter()
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = MutableHeaders(scope=message)
+                headers.append("X-Process-Time", str(time.perf_counter() - start_time))
+            await send(message)
+
+        method, path = scope["method"], scope["path"]
+        client = scope.get("client")
+        client_ip = client[0] if client else "unknown"
+        metrics_token = request_started(scope)
         try:
-            response = await call_next(request)
-            process_time = time.time() - start_time
-            response.headers["X-Process-Time"] = str(process_time)
-            logger.info(f"RESPONSE - {request.method} {request.url.path} - Status: {response.status_code}, Time: {process_time:.2f}s")
-            return response
+            await self.app(scope, receive, send_wrapper)
         except Exception as exc:
-            process_time = time.time() - start_time
-            logger.error(f"ERROR during request - {request.method} {request.url.path} - Time: {process_time:.2f}s, Error: {str(exc)}")
-            raise exc
+            process_time = time.perf_counter() - start_time
+            request_finished(metrics_token, scope, 500, process_time)
+            logger.error(f"ERROR during request - {method} {path} - Time: {process_time:.2f}s, Error: {str(exc)}")
+            raise
+
+        process_time = time.perf_counter() - start_time
+        request_finished(metrics_token, scope, status_code, process_time)
+        # Una sola línea por petición, con los campos estructurados para el formato JSON
+        logger.info(
+            f"{method} {path} - Status: {status_code}, Time: {process_time:.2f}s - IP: {client_ip}",
+            extra={
+                "method": method,
+                "path": path,
+                "status_code": status_code,
+                "duration_ms": round(process_time * 1000, 2),
+                "client_ip": client_ip,
+            },
+        )
 
 # 1. Middleware de manejo de errores (más externo)
 app.add_middleware(ErrorHandlingMiddleware)
@@ -105,6 +190,45 @@ async def read_root():
     return {"message": "Bienvenido a la API de Gestión de Incidentes ISIRT"}
 
 
+def _database_pool_stats() -> dict:
+    from incident_api.db.database import engine
+
+    pool = engine.pool
+    stats = {}
+    for name in ("size", "checkedin", "checkedout", "overflow"):
+        method = getattr(pool, name, None)
+        if callable(method):
+            stats[name] = method()
+    return stats
+
+
+metrics_registry.register(stats_collector("db_pool", "Estado del pool de conexiones", _database_pool_stats))
+metrics_registry.register(stats_collector("auth_user_cache", "Caché de usuarios autenticados", authenticated_user_cache.stats))
+metrics_registry.register(stats_collector("password_hashing", "Pool de hashing de contraseñas", password_hashing_pool.stats))
+metrics_registry.register(stats_collector("audit_writer", "Escritor asíncrono de auditoría", audit_log_writer.stats))
+metrics_registry.register(stats_collector("alerting", "Pipeline de alertas", alerting_service.stats))
+metrics_registry.register(stats_collector("report_cache", "Caché de informes HTML renderizados", report_cache.stats))
+metrics_registry.register(stats_collector("evidence_previews", "Generación de vistas previas de evidencias", evidence_preview_service.stats))
+
+
+@app.get("/metrics", tags=["Health"], include_in_schema=False)
+async def metrics(request: Request):
+    """
+    Expone las métricas de la aplicación en el formato de texto de Prometheus.
+
+    Desactivado por defecto (`METRICS_ENABLED`); con `METRICS_TOKEN` exige un token Bearer.
+    """
+    if not settings.METRICS_ENABLED:
+        return JSONResponse(status_code=404, content={"detail": "Not Found"})
+    if settings.METRICS_TOKEN:
+        scheme, _, token = request.headers.get("authorization", "").partition(" ")
+        if scheme.lower() != "bearer" or not secrets.compare_digest(token.encode(), settings.METRICS_TOKEN.encode()):
+            return JSONResponse(
+                status_code=401, content={"detail": "Not authenticated"}, headers={"WWW-Authenticate": "Bearer"}
+            )
+    return Response(generate_latest(metrics_registry), media_type=CONTENT_TYPE_PLAIN_0_0_4)
+
+
 @app.get("/health", tags=["Health"])
 async def health_check():
     """Endpoint de chequeo de salud. Devuelve un estado de 'ok'."""
@@ -17,6 +17,7 @@ from .incident import Incident, IncidentStatus, IncidentSeverity
 from .incident_log import IncidentLog
 from .audit_log import AuditLog
 from .evidence_file import EvidenceFile
+from .evidence_blob import EvidenceBlob
 from .asset_type import AssetType
 from .asset import Asset
 from .incident_category import IncidentCategory
@@ -30,6 +31,8 @@ from .ai import AIModelSettings, AvailableAIModel, RAGSettings
 from .history import IncidentHistory, ConversationHistory
 from .task import Task
 from .knowledge_curation import KnowledgeCuration
+from .metrics_summary import UserMetricsSummary, CategoryMetricsSummary
+from .rate_limit import RateLimitBucket
 
 
 __all__ = [
@@ -43,6 +46,7 @@ __all__ = [
     "IncidentLog",
     "AuditLog",
     "EvidenceFile",
+    "EvidenceBlob",
     "AssetType",
     "Asset",
     "IncidentCategory",
@@ -57,4 +61,7 @@ __all__ = [
     "ConversationHistory",
     "Task",
     "KnowledgeCuration",
+    "UserMetricsSummary",
+    "CategoryMetricsSummary",
+    "RateLimitBucket",
 ]
\ No newline at end of file
@@ -5,7 +5,7 @@ Este módulo define el modelo `AuditLog`, que registra todas las acciones
 de los usuarios para trazabilidad y auditorías.
 """
 
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Boolean, func, JSON
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Boolean, func, JSON, Index
 from sqlalchemy.orm import relationship
 from incident_api.db.base import Base
 
@@ -34,6 +34,13 @@ class AuditLog(Base):
     """
 
     __tablename__ = "audit_log"
+    # Índices compuestos para los filtros exactos de la consulta de auditoría, ordenados
+    # por fecha; cubren también las búsquedas por user_id, action y resource_type solos.
+    __table_args__ = (
+        Index("ix_audit_log_user_id_timestamp", "user_id", "timestamp"),
+        Index("ix_audit_log_action_timestamp", "action", "timestamp"),
+        Index("ix_audit_log_resource_timestamp", "resource_type", "resource_id", "timestamp"),
+    )
 
     id = Column(
         Integer,
@@ -45,19 +52,16 @@ class AuditLog(Base):
         Integer,
         ForeignKey("Users.user_id"),
         nullable=True,
-        index=True,
         doc="ID del usuario que realizó la acción.",
     )
     action = Column(
         String(100),
         nullable=False,
-        index=True,
         doc="Tipo de acción realizada.",
     )
     resource_type = Column(
         String(50),
         nullable=False,
-        index=True,
         doc="Tipo de recurso afectado.",
     )
     resource_id = Column(
@@ -84,8 +88,9 @@ class AuditLog(Base):
     timestamp = Column(
         DateTime,
         server_default=func.now(),
+        nullable=False,
         index=True,
-        doc="Fecha y hora del registro de la acción.",
+        doc="Fecha y hora del registro de la acción. En PostgreSQL es la clave de partición mensual.",
     )
     success = Column(
         Boolean,
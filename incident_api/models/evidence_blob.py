@@ -0,0 +1,25 @@
+"""
+Modelo de la base de datos para el contenido de los archivos de evidencia.
+"""
+
+from sqlalchemy import Column, DateTime, Integer, String, func
+from incident_api.db.base import Base
+
+
+class EvidenceBlob(Base):
+    """
+    Modelo ORM para la tabla `EvidenceBlobs`.
+
+    Cada fila es un contenido único, identificado por su SHA-256 y guardado una
+    sola vez en `uploads/sha256/ab/cd/<hash>`. `ref_count` es el número de filas
+    de `EvidenceFiles` que apuntan a él; cuando llega a cero, la fila y el
+    archivo se eliminan.
+    """
+
+    __tablename__ = "EvidenceBlobs"
+
+    sha256 = Column(String(64), primary_key=True, doc="SHA-256 del contenido en hexadecimal.")
+    file_path = Column(String(512), nullable=False, doc="Ruta de almacenamiento del contenido.")
+    file_size_bytes = Column(Integer, nullable=False, doc="Tamaño del contenido en bytes.")
+    ref_count = Column(Integer, nullable=False, default=0, doc="Archivos de evidencia que lo referencian.")
+    created_at = Column(DateTime, server_default=func.now(), doc="Fecha y hora en que se guardó por primera vez.")
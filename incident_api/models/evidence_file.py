@@ -23,7 +23,8 @@ class EvidenceFile(Base):
         incident_id (int): ID del incidente al que está asociado el archivo.
         uploaded_by_id (int): ID del usuario que subió el archivo.
         file_name (str): Nombre original del archivo.
-        file_path (str): Ruta de almacenamiento del archivo en el servidor.
+        file_path (str): Ruta de almacenamiento del contenido (compartida por los
+            archivos con el mismo hash, ver `EvidenceBlob`).
         file_type (str): Tipo MIME del archivo (e.g., 'image/png').
         file_size_bytes (int): Tamaño del archivo en bytes.
         uploaded_at (datetime): Fecha y hora en que se subió el archivo.
@@ -65,7 +66,12 @@ class EvidenceFile(Base):
     uploaded_at = Column(
         DateTime, server_default=func.now(), doc="Fecha y hora de carga del archivo."
     )
-    file_hash = Column(String(256), nullable=True, doc="Hash del contenido del archivo para verificación de integridad.")
+    file_hash = Column(
+        String(256),
+        nullable=True,
+        index=True,
+        doc="SHA-256 del contenido; identifica su EvidenceBlob y permite verificar la integridad.",
+    )
 
     # Relaciones con las tablas Incident y User
     incident = relationship("Incident", back_populates="evidence_files")
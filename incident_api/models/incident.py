@@ -16,6 +16,7 @@ from sqlalchemy import (
     ForeignKey,
     DateTime,
     Boolean,
+    Float,
     func,
     JSON,
 )
@@ -66,8 +67,8 @@ class Incident(Base):
     ticket_id = Column(String(20), unique=True, nullable=True, index=True)
 
     # --- Clasificación y Asignación ---
-    reported_by_id = Column(Integer, ForeignKey("Users.user_id"), nullable=False)
-    assigned_to_id = Column(Integer, ForeignKey("Users.user_id"), nullable=True)
+    reported_by_id = Column(Integer, ForeignKey("Users.user_id"), nullable=False, index=True)
+    assigned_to_id = Column(Integer, ForeignKey("Users.user_id"), nullable=True, index=True)
     assigned_to_group_id = Column(Integer, ForeignKey('groups.id'), nullable=True)
     
     asset_id = Column(Integer, ForeignKey("Assets.asset_id"), nullable=True)
@@ -76,6 +77,10 @@ class Incident(Base):
     attack_vector_id = Column(Integer, ForeignKey("AttackVectors.attack_vector_id"), nullable=True)
     other_asset_location = Column(String(512), nullable=True)
 
+    # --- Detección de Duplicados ---
+    parent_incident_id = Column(Integer, ForeignKey("Incidents.incident_id"), nullable=True, index=True)
+    duplicate_score = Column(Float, nullable=True, doc="Similitud estimada con el incidente padre.")
+
     # --- Estado y Severidad ---
     status = Column(SQLAlchemyEnum(IncidentStatus), nullable=False, default=IncidentStatus.NUEVO)
     is_active = Column(Boolean, default=True, doc="Indica si el incidente está activo en el sistema.")
@@ -119,9 +124,12 @@ class Incident(Base):
     incident_category = relationship("IncidentCategory")
     incident_type = relationship("IncidentType")
     attack_vector = relationship("AttackVector")
+    parent_incident = relationship("Incident", remote_side=[incident_id], foreign_keys=[parent_incident_id])
 
     logs = relationship("IncidentLog", back_populates="incident", cascade="all, delete-orphan")
-    evidence_files = relationship("EvidenceFile", back_populates="incident", cascade="all, delete-orphan")
+    evidence_files = relationship(
+        "EvidenceFile", back_populates="incident", cascade="all, delete-orphan", order_by="EvidenceFile.file_id"
+    )
     history = relationship("IncidentHistory", back_populates="incident", cascade="all, delete-orphan")
 
     def __repr__(self):
@@ -0,0 +1,86 @@
+"""
+Modelos de la base de datos para las métricas materializadas.
+
+Estas tablas guardan agregados precalculados (contadores y tiempos de resolución)
+por usuario y por categoría de incidente, de modo que las vistas de auditoría y
+los tableros lean una sola fila en lugar de recalcular los agregados en cada
+petición. Las filas se marcan como obsoletas cuando cambia un incidente
+relacionado y se recalculan bajo demanda o de forma periódica.
+"""
+
+from sqlalchemy import Column, Integer, Float, Boolean, DateTime, ForeignKey, JSON, func
+from incident_api.db.base import Base
+
+
+class UserMetricsSummary(Base):
+    """
+    Modelo ORM para la tabla `user_metrics_summary`.
+
+    Atributos:
+        user_id (int): ID del usuario al que pertenecen las métricas.
+        total_incidents_created (int): Incidentes reportados por el usuario.
+        total_incidents_resolved (int): Incidentes asignados al usuario resueltos o cerrados.
+        total_incidents_assigned (int): Incidentes asignados al usuario.
+        average_resolution_time_hours (float, opcional): Tiempo medio de resolución en horas.
+        incidents_by_status (JSON): Conteo de incidentes relacionados por estado.
+        top_incident_types (JSON): Nombres de los tipos de incidente más frecuentes.
+        total_comments_made (int): Entradas de bitácora con comentarios.
+        total_files_uploaded (int): Archivos de evidencia subidos.
+        is_stale (bool): Indica si la fila debe recalcularse antes de usarse.
+        stale_version (int): Contador de invalidaciones; un recálculo solo limpia `is_stale` si no ha cambiado.
+        refreshed_at (datetime): Fecha del último recálculo.
+    """
+
+    __tablename__ = "user_metrics_summary"
+
+    user_id = Column(Integer, ForeignKey("Users.user_id", ondelete="CASCADE"), primary_key=True)
+    total_incidents_created = Column(Integer, nullable=False, default=0)
+    total_incidents_resolved = Column(Integer, nullable=False, default=0)
+    total_incidents_assigned = Column(Integer, nullable=False, default=0)
+    average_resolution_time_hours = Column(Float, nullable=True)
+    incidents_by_status = Column(JSON, nullable=False, default=dict)
+    top_incident_types = Column(JSON, nullable=False, default=list)
+    total_comments_made = Column(Integer, nullable=False, default=0)
+    total_files_uploaded = Column(Integer, nullable=False, default=0)
+    is_stale = Column(Boolean, nullable=False, default=False, index=True)
+    stale_version = Column(Integer, nullable=False, default=0)
+    refreshed_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
+
+    def __repr__(self):
+        return f"<UserMetricsSummary(user_id={self.user_id}, is_stale={self.is_stale})>"
+
+
+class CategoryMetricsSummary(Base):
+    """
+    Modelo ORM para la tabla `category_metrics_summary`.
+
+    Atributos:
+        incident_category_id (int): ID de la categoría de incidente.
+        total_incidents (int): Incidentes activos de la categoría.
+        open_incidents (int): Incidentes que aún no están resueltos ni cerrados.
+        resolved_incidents (int): Incidentes resueltos o cerrados.
+        average_resolution_time_hours (float, opcional): Tiempo medio de resolución en horas.
+        incidents_by_status (JSON): Conteo de incidentes por estado.
+        is_stale (bool): Indica si la fila debe recalcularse antes de usarse.
+        stale_version (int): Contador de invalidaciones; un recálculo solo limpia `is_stale` si no ha cambiado.
+        refreshed_at (datetime): Fecha del último recálculo.
+    """
+
+    __tablename__ = "category_metrics_summary"
+
+    incident_category_id = Column(
+        Integer,
+        ForeignKey("IncidentCategories.incident_category_id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    total_incidents = Column(Integer, nullable=False, default=0)
+    open_incidents = Column(Integer, nullable=False, default=0)
+    resolved_incidents = Column(Integer, nullable=False, default=0)
+    average_resolution_time_hours = Column(Float, nullable=True)
+    incidents_by_status = Column(JSON, nullable=False, default=dict)
+    is_stale = Column(Boolean, nullable=False, default=False, index=True)
+    stale_version = Column(Integer, nullable=False, default=0)
+    refreshed_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
+
+    def __repr__(self):
+        return f"<CategoryMetricsSummary(incident_category_id={self.incident_category_id}, is_stale={self.is_stale})>"
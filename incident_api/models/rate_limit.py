@@ -0,0 +1,21 @@
+"""
+Modelo de la base de datos para los contadores compartidos del rate limiting.
+"""
+
+from sqlalchemy import Column, Float, Integer, String
+from incident_api.db.base import Base
+
+
+class RateLimitBucket(Base):
+    """
+    Modelo ORM para la tabla `rate_limit_buckets`.
+
+    Cada fila es un contador (una ventana de tiempo o un bloqueo) de una clave
+    de rate limiting, compartido por todos los workers de la aplicación.
+    """
+
+    __tablename__ = "rate_limit_buckets"
+
+    bucket_key = Column(String(255), primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+    expires_at = Column(Float, nullable=False, index=True)
@@ -2,7 +2,7 @@
 Modelo de la base de datos para las tareas en segundo plano.
 """
 
-from sqlalchemy import Column, Integer, String, JSON
+from sqlalchemy import Column, DateTime, Integer, String, JSON, func
 from incident_api.db.base import Base
 
 
@@ -17,3 +17,5 @@ class Task(Base):
     task_id = Column(String, unique=True, index=True, nullable=False)
     status = Column(String, nullable=False)
     result = Column(JSON)
+    created_at = Column(DateTime, server_default=func.now())
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now(), index=True)
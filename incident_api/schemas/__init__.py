@@ -20,7 +20,7 @@ class TokenPayload(BaseModel):
 
 # --- Nuevos Esquemas Refactorizados ---
 from .user import UserBase, UserCreate, UserUpdate, UserInDB
-from .evidence_file import EvidenceFileBase, EvidenceFileCreate, EvidenceFileInDB
+from .evidence_file import EvidenceFileBase, EvidenceFileCreate, EvidenceFileInDB, EvidenceBlobCreate
 from .incident_log import (
     IncidentLogBase,
     IncidentLogCreate,
@@ -28,7 +28,14 @@ from .incident_log import (
     ManualLogEntryCreate,
 )
 from .audit_log import AuditLogBase, AuditLogCreate, AuditLogUpdate, AuditLogInDB
-from .incident import IncidentBase, IncidentCreate, IncidentUpdate, IncidentInDB, IncidentCreateFromString
+from .incident import (
+    IncidentBase,
+    IncidentCreate,
+    IncidentUpdate,
+    IncidentInDB,
+    IncidentCreateFromString,
+    IncidentFilters,
+)
 
 # --- Esquemas para la nueva lógica de incidentes ---
 from .asset_type import AssetTypeBase, AssetTypeCreate, AssetTypeInDB
@@ -72,6 +79,12 @@ from .dialogue_summary import DialogueSummaryRequest, DialogueSummaryResponse
 from .task import AsyncTaskResponse, AsyncTaskStatus, TaskBase, TaskCreate, TaskUpdate, TaskInDB
 from .ai_analysis import TriageAnalysis, ResponseRecommendations, IncidentEnrichmentResponse, ISIRTAnalysisRequest, SourceFragment, RAGSuggestion
 from .knowledge_curation import KnowledgeCuration, KnowledgeCurationCreate, KnowledgeCurationUpdate
+from .metrics_summary import (
+    UserMetricsSummaryUpdate,
+    UserMetricsSummaryInDB,
+    CategoryMetricsSummaryUpdate,
+    CategoryMetricsSummaryInDB,
+)
 
 
 __all__ = [
@@ -84,6 +97,7 @@ __all__ = [
     "EvidenceFileBase",
     "EvidenceFileCreate",
     "EvidenceFileInDB",
+    "EvidenceBlobCreate",
     # IncidentLog
     "IncidentLogBase",
     "IncidentLogCreate",
@@ -100,6 +114,7 @@ __all__ = [
     "IncidentUpdate",
     "IncidentInDB",
     "IncidentCreateFromString",
+    "IncidentFilters",
     # AssetType
     "AssetTypeBase",
     "AssetTypeCreate",
@@ -178,4 +193,9 @@ __all__ = [
     "KnowledgeCuration",
     "KnowledgeCurationCreate",
     "KnowledgeCurationUpdate",
+    # Metrics Summary
+    "UserMetricsSummaryUpdate",
+    "UserMetricsSummaryInDB",
+    "CategoryMetricsSummaryUpdate",
+    "CategoryMetricsSummaryInDB",
 ]
\ No newline at end of file
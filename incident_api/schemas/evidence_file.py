@@ -27,6 +27,14 @@ class EvidenceFileCreate(EvidenceFileBase):
     file_hash: str
 
 
+class EvidenceBlobCreate(BaseModel):
+    """Esquema para registrar una referencia a un contenido almacenado."""
+
+    sha256: str = Field(..., min_length=64, max_length=64, description="SHA-256 del contenido.")
+    file_path: str = Field(..., max_length=512, description="Ruta de almacenamiento del contenido.")
+    file_size_bytes: int = Field(..., ge=0, description="Tamaño del contenido en bytes.")
+
+
 class EvidenceFileInDB(EvidenceFileBase):
     """Esquema para devolver la información de un archivo desde la API."""
 
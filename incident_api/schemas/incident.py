@@ -97,6 +97,9 @@ class IncidentUpdate(BaseModel):
     corrective_actions: Optional[str] = None
     recommendations: Optional[str] = None
     resolved_at: Optional[datetime] = None
+    parent_incident_id: Optional[int] = Field(
+        None, description="ID del incidente padre si este incidente es un duplicado."
+    )
 
     # --- Impacto ---
     impact_confidentiality: Optional[int] = Field(None, ge=0, le=10)
@@ -106,6 +109,21 @@ class IncidentUpdate(BaseModel):
     
 
 
+class IncidentFilters(BaseModel):
+    """Filtros comunes del listado y de la exportación de incidentes."""
+
+    status: Optional[IncidentStatus] = Field(None, description="Filtra por estado.")
+    severity: Optional[IncidentSeverity] = Field(None, description="Filtra por severidad.")
+    is_active: Optional[bool] = Field(None, description="Filtra por incidentes activos o desactivados.")
+    incident_category_id: Optional[int] = Field(None, description="Filtra por categoría.")
+    incident_type_id: Optional[int] = Field(None, description="Filtra por tipo de incidente.")
+    reported_by_id: Optional[int] = Field(None, description="Filtra por usuario que reportó.")
+    assigned_to_id: Optional[int] = Field(None, description="Filtra por usuario asignado.")
+    assigned_to_group_id: Optional[int] = Field(None, description="Filtra por grupo asignado.")
+    start_date: Optional[datetime] = Field(None, description="Incidentes creados desde esta fecha.")
+    end_date: Optional[datetime] = Field(None, description="Incidentes creados hasta esta fecha.")
+
+
 class IncidentInDB(IncidentBase):
     """
     Esquema completo para devolver un incidente desde la API.
@@ -122,6 +140,10 @@ class IncidentInDB(IncidentBase):
     updated_at: datetime
     resolved_at: Optional[datetime] = None
 
+    # --- Detección de Duplicados ---
+    parent_incident_id: Optional[int] = None
+    duplicate_score: Optional[float] = None
+
     # --- Impacto ---
     impact_confidentiality: Optional[int] = 0
     impact_integrity: Optional[int] = 0
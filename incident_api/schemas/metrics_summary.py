@@ -0,0 +1,63 @@
+"""
+Esquemas de Pydantic para las métricas materializadas por usuario y por categoría.
+"""
+
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from pydantic import BaseModel
+
+
+class UserMetricsSummaryBase(BaseModel):
+    """Esquema base con los agregados precalculados de un usuario."""
+
+    total_incidents_created: int = 0
+    total_incidents_resolved: int = 0
+    total_incidents_assigned: int = 0
+    average_resolution_time_hours: Optional[float] = None
+    incidents_by_status: Dict[str, int] = {}
+    top_incident_types: List[str] = []
+    total_comments_made: int = 0
+    total_files_uploaded: int = 0
+
+
+class UserMetricsSummaryUpdate(UserMetricsSummaryBase):
+    """Esquema para recalcular la fila de métricas de un usuario."""
+
+    user_id: int
+    is_stale: bool = False
+
+
+class UserMetricsSummaryInDB(UserMetricsSummaryUpdate):
+    """Esquema de la fila de métricas de un usuario tal como se guarda en la BD."""
+
+    refreshed_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
+class CategoryMetricsSummaryBase(BaseModel):
+    """Esquema base con los agregados precalculados de una categoría."""
+
+    total_incidents: int = 0
+    open_incidents: int = 0
+    resolved_incidents: int = 0
+    average_resolution_time_hours: Optional[float] = None
+    incidents_by_status: Dict[str, int] = {}
+
+
+class CategoryMetricsSummaryUpdate(CategoryMetricsSummaryBase):
+    """Esquema para recalcular la fila de métricas de una categoría."""
+
+    incident_category_id: int
+    is_stale: bool = False
+
+
+class CategoryMetricsSummaryInDB(CategoryMetricsSummaryUpdate):
+    """Esquema de respuesta con las métricas de una categoría."""
+
+    refreshed_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
@@ -23,7 +23,7 @@ def get_active_settings(db: Session) -> models.AIModelSettings:
             status_code=status.HTTP_404_NOT_FOUND,
             detail="La configuración del modelo de IA no ha sido establecida."
         )
-    logger.info(f"Configuración de IA obtenida: {settings.model_provider} - {settings.model_name}")
+    logger.debug(f"Configuración de IA obtenida: {settings.model_provider} - {settings.model_name}")
     return settings
 
 def update_settings(
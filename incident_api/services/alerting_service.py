@@ -2,56 +2,435 @@
 Servicio para la generación de alertas de seguridad.
 
 Este módulo centraliza la lógica para disparar alertas basadas en eventos críticos
-del sistema, registrándolas en un archivo dedicado para monitoreo.
+del sistema. La petición solo encola la alerta mediante un `QueueHandler`; un
+`QueueListener` la entrega a un `AlertDispatcher`, que agrupa las alertas repetidas
+(misma clave y nivel) durante `ALERT_FLUSH_INTERVAL_SECONDS` y envía el resultado
+por lotes a los sinks configurados en `ALERT_SINKS`: archivo, syslog, webhook o
+base de datos. Así, un ataque de fuerza bruta con cientos de intentos fallidos
+desde una IP produce una alerta con su contador por intervalo, no una escritura
+en disco por intento.
 """
 
 import logging
 import os
-from logging.handlers import RotatingFileHandler
-from functools import lru_cache
+import queue
+import threading
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler, SysLogHandler
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
 
 from incident_api.core.config import settings
 
-# Usar lru_cache para asegurar que la configuración del logger se ejecute solo una vez
-@lru_cache(maxsize=None)
-def get_alert_logger():
-    """Configura y devuelve un logger para alertas de seguridad."""
-    LOG_DIR = settings.LOGS_DIR
-    ALERT_LOG_FILE = os.path.join(LOG_DIR, "security_alerts.log")
+logger = logging.getLogger(__name__)
+
+ALERT_LOGGER_NAME = "security_alerts"
+
 
-    os.makedirs(LOG_DIR, exist_ok=True)
+@dataclass
+class Alert:
+    """Alerta agregada: la primera ocurrencia de una clave y cuántas veces se repitió."""
 
-    logger = logging.getLogger("security_alerts")
-    logger.setLevel(logging.WARNING)
-    logger.propagate = False
+    key: str
+    level: str
+    message: str
+    first_seen: datetime
+    last_seen: datetime
+    count: int = 1
 
-    if not logger.handlers:
-        handler = RotatingFileHandler(ALERT_LOG_FILE, maxBytes=5*1024*1024, backupCount=5)
-        formatter = logging.Formatter(
-            "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+    def render(self) -> str:
+        if self.count == 1:
+            return self.message
+        return (
+            f"{self.message} (repeated {self.count} times between "
+            f"{self.first_seen.isoformat()} and {self.last_seen.isoformat()})"
         )
-        handler.setFormatter(formatter)
-        logger.addHandler(handler)
-    
-    return logger
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "key": self.key,
+            "level": self.level,
+            "message": self.message,
+            "count": self.count,
+            "first_seen": self.first_seen.isoformat(),
+            "last_seen": self.last_seen.isoformat(),
+        }
+
+
+# --- Sinks ---
+
+
+class AlertSink:
+    """Destino de las alertas. `send` recibe un lote y se ejecuta fuera de la petición."""
+
+    name = "base"
+
+    def send(self, alerts: List[Alert]) -> None:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+
+class FileAlertSink(AlertSink):
+    """Escribe cada lote en el archivo de alertas rotativo con una sola escritura."""
+
+    name = "file"
+
+    def __init__(self, path: str, max_bytes: int = 5 * 1024 * 1024, backup_count: int = 5):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._handler = RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backup_count)
+        self._handler.setFormatter(logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s"))
+
+    def send(self, alerts: List[Alert]) -> None:
+        records = [_to_log_record(alert) for alert in alerts]
+        text = "".join(self._handler.format(record) + "\n" for record in records)
+        with self._handler.lock:
+            if self._handler.shouldRollover(records[0]):
+                self._handler.doRollover()
+            self._handler.stream.write(text)
+            self._handler.stream.flush()
+
+    def close(self) -> None:
+        self._handler.close()
+
+
+class SyslogAlertSink(AlertSink):
+    """Envía las alertas a syslog (socket local o `host:puerto` UDP)."""
+
+    name = "syslog"
+
+    def __init__(self, address: str = "/dev/log"):
+        if ":" in address:
+            host, port = address.rsplit(":", 1)
+            target: Any = (host, int(port))
+        else:
+            target = address
+        self._handler = SysLogHandler(address=target)
+        self._handler.setFormatter(logging.Formatter("%(name)s: %(levelname)s %(message)s"))
+
+    def send(self, alerts: List[Alert]) -> None:
+        for alert in alerts:
+            self._handler.handle(_to_log_record(alert))
+
+    def close(self) -> None:
+        self._handler.close()
+
+
+class WebhookAlertSink(AlertSink):
+    """Publica cada lote como JSON (`{"alerts": [...]}`) en una URL."""
+
+    name = "webhook"
+
+    def __init__(self, url: str, timeout: float = 5.0, client: Optional[Any] = None):
+        self.url = url
+        self.timeout = timeout
+        self._client = client
+
+    @property
+    def client(self) -> Any:
+        if self._client is None:
+            import httpx
+
+            self._client = httpx.Client(timeout=self.timeout)
+        return self._client
+
+    def send(self, alerts: List[Alert]) -> None:
+        response = self.client.post(self.url, json={"alerts": [alert.to_dict() for alert in alerts]})
+        response.raise_for_status()
+
+    def close(self) -> None:
+        if self._client is not None:
+            self._client.close()
+
+
+class DatabaseAlertSink(AlertSink):
+    """Guarda las alertas en el log de auditoría (acción SECURITY_ALERT) con un único INSERT."""
+
+    name = "database"
+
+    def __init__(self, session_factory: Optional[Callable[[], Session]] = None):
+        self._session_factory = session_factory
+
+    @property
+    def session_factory(self) -> Callable[[], Session]:
+        if self._session_factory is None:
+            from incident_api.db.database import SessionLocal
+
+            self._session_factory = SessionLocal
+        return self._session_factory
+
+    def send(self, alerts: List[Alert]) -> None:
+        from incident_api import crud
+
+        rows = [
+            {
+                "action": "SECURITY_ALERT",
+                "resource_type": "ALERT",
+                "success": False,
+                "timestamp": alert.last_seen.replace(tzinfo=None),
+                "details": alert.to_dict(),
+            }
+            for alert in alerts
+        ]
+        with self.session_factory() as db:
+            crud.audit_log.create_many(db, objs_in=rows)
+
+
+def _to_log_record(alert: Alert) -> logging.LogRecord:
+    level = getattr(logging, alert.level.upper(), logging.WARNING)
+    record = logging.LogRecord(ALERT_LOGGER_NAME, level, __file__, 0, alert.render(), None, None)
+    record.created = alert.last_seen.timestamp()
+    return record
+
+
+def build_alert_sinks(names: Optional[str] = None) -> List[AlertSink]:
+    """
+    Crea los sinks configurados en `ALERT_SINKS` (separados por comas).
+    """
+    sinks: List[AlertSink] = []
+    for name in (names if names is not None else settings.ALERT_SINKS).split(","):
+        name = name.strip().lower()
+        if not name:
+            continue
+        if name == "file":
+            sinks.append(FileAlertSink(os.path.join(settings.LOGS_DIR, "security_alerts.log")))
+        elif name == "syslog":
+            sinks.append(SyslogAlertSink(settings.ALERT_SYSLOG_ADDRESS))
+        elif name == "webhook":
+            if not settings.ALERT_WEBHOOK_URL:
+                raise ValueError("ALERT_WEBHOOK_URL es obligatorio con el sink de alertas 'webhook'.")
+            sinks.append(WebhookAlertSink(settings.ALERT_WEBHOOK_URL, settings.ALERT_WEBHOOK_TIMEOUT_SECONDS))
+        elif name == "database":
+            sinks.append(DatabaseAlertSink())
+        else:
+            raise ValueError(f"Sink de alertas desconocido: '{name}'.")
+    return sinks
+
+
+# --- Agregación y envío ---
+
+
+class AlertDispatcher(logging.Handler):
+    """
+    Handler que agrupa las alertas por (clave, nivel) y las envía por lotes a los sinks.
+
+    `emit` se ejecuta en el hilo del QueueListener y solo actualiza un diccionario;
+    el envío a los sinks ocurre en un hilo propio cada `flush_interval` segundos, o
+    antes si se acumulan `batch_size` claves distintas.
+    """
+
+    def __init__(
+        self,
+        sinks: List[AlertSink],
+        flush_interval: float = 5.0,
+        batch_size: int = 100,
+        max_pending: int = 10000,
+    ):
+        super().__init__()
+        self.sinks = sinks
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.max_pending = max_pending
+        self._pending: Dict[Tuple[str, str], Alert] = {}
+        self._pending_lock = threading.Lock()
+        self._send_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.received = 0
+        self.sent = 0
+        self.dropped = 0
+        self.failed_batches = 0
+
+    def start(self) -> None:
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="alert-dispatcher", daemon=True)
+            self._thread.start()
+
+    def emit(self, record: logging.LogRecord) -> None:
+        message = record.getMessage()
+        key = getattr(record, "alert_key", None) or message
+        level = record.levelname.lower()
+        seen = datetime.fromtimestamp(record.created, tz=timezone.utc)
+        with self._pending_lock:
+            self.received += 1
+            alert = self._pending.get((key, level))
+            if alert is not None:
+                alert.count += 1
+                alert.last_seen = seen
+                return
+            if len(self._pending) >= self.max_pending:
+                self.dropped += 1
+                return
+            self._pending[(key, level)] = Alert(
+                key=key, level=level, message=message, first_seen=seen, last_seen=seen
+            )
+            if len(self._pending) >= self.batch_size:
+                self._wakeup.set()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+
+    def flush(self) -> None:
+        """Envía a los sinks todas las alertas agrupadas hasta ahora."""
+        with self._pending_lock:
+            alerts = list(self._pending.values())
+            self._pending = {}
+        if not alerts:
+            return
+        with self._send_lock:
+            for start in range(0, len(alerts), self.batch_size):
+                batch = alerts[start:start + self.batch_size]
+                for sink in self.sinks:
+                    try:
+                        sink.send(batch)
+                    except Exception as e:
+                        self.failed_batches += 1
+                        logger.error("Alert sink '%s' failed to deliver %d alert(s): %s", sink.name, len(batch), e)
+                self.sent += len(batch)
+
+    def close(self) -> None:
+        self._stop.set()
+        self._wakeup.set()
+        thread = self._thread
+        if thread is not None:
+            thread.join(timeout=5.0)
+        self.flush()
+        for sink in self.sinks:
+            try:
+                sink.close()
+            except Exception as e:
+                logger.error("Alert sink '%s' failed to close: %s", sink.name, e)
+        super().close()
+
+    def pending(self) -> int:
+        with self._pending_lock:
+            return len(self._pending)
+
+
+class _DroppingQueueHandler(QueueHandler):
+    """QueueHandler que descarta (y cuenta) las alertas si la cola está llena, sin bloquear."""
+
+    def __init__(self, alert_queue: "queue.Queue[logging.LogRecord]"):
+        super().__init__(alert_queue)
+        self.dropped = 0
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
 
 class AlertingService:
     """
     Servicio para disparar y registrar alertas de seguridad.
     """
 
-    def trigger_alert(self, message: str, level: str = "warning") -> None:
+    def __init__(
+        self,
+        sinks_factory: Callable[[], List[AlertSink]] = build_alert_sinks,
+        flush_interval: float = 5.0,
+        batch_size: int = 100,
+        max_queue_size: int = 10000,
+    ):
+        self._sinks_factory = sinks_factory
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.max_queue_size = max_queue_size
+        self._start_lock = threading.Lock()
+        self._logger: Optional[logging.Logger] = None
+        self._queue_handler: Optional[_DroppingQueueHandler] = None
+        self._listener: Optional[QueueListener] = None
+        self._dispatcher: Optional[AlertDispatcher] = None
+
+    def _ensure_started(self) -> logging.Logger:
+        if self._logger is not None:
+            return self._logger
+        with self._start_lock:
+            if self._logger is None:
+                alert_queue: "queue.Queue[logging.LogRecord]" = queue.Queue(maxsize=self.max_queue_size)
+                dispatcher = AlertDispatcher(
+                    self._sinks_factory(),
+                    flush_interval=self.flush_interval,
+                    batch_size=self.batch_size,
+                    max_pending=self.max_queue_size,
+                )
+                dispatcher.start()
+                listener = QueueListener(alert_queue, dispatcher)
+                listener.start()
+
+                queue_handler = _DroppingQueueHandler(alert_queue)
+                alert_logger = logging.getLogger(ALERT_LOGGER_NAME)
+                alert_logger.setLevel(logging.WARNING)
+                alert_logger.propagate = False
+                for handler in list(alert_logger.handlers):
+                    alert_logger.removeHandler(handler)
+                alert_logger.addHandler(queue_handler)
+
+                self._dispatcher, self._listener, self._queue_handler = dispatcher, listener, queue_handler
+                self._logger = alert_logger
+        return self._logger
+
+    def trigger_alert(self, message: str, level: str = "warning", key: Optional[str] = None) -> None:
         """
-        Registra una alerta en el log de seguridad dedicado.
+        Encola una alerta para su envío a los sinks configurados.
 
         Args:
             message (str): El mensaje de la alerta a registrar.
             level (str): El nivel de severidad de la alerta ('warning', 'error', 'critical').
+            key (str, optional): Clave de agrupación; las alertas con la misma clave y nivel
+                dentro de un intervalo se envían como una sola con su contador. Por defecto, el mensaje.
         """
-        alert_logger = get_alert_logger()
+        alert_logger = self._ensure_started()
         log_level = getattr(logging, level.upper(), logging.WARNING)
-        alert_logger.log(log_level, message)
+        alert_logger.log(log_level, message, extra={"alert_key": key})
+
+    def flush(self) -> None:
+        """Procesa las alertas encoladas y las envía de inmediato."""
+        if self._listener is None or self._dispatcher is None:
+            return
+        # Detener el listener vacía la cola; se vuelve a arrancar a continuación
+        self._listener.stop()
+        self._dispatcher.flush()
+        self._listener.start()
+
+    def stop(self) -> None:
+        """Vacía la cola, envía las alertas pendientes y cierra los sinks."""
+        with self._start_lock:
+            if self._logger is None:
+                return
+            self._listener.stop()
+            self._dispatcher.close()
+            self._logger.removeHandler(self._queue_handler)
+            self._logger = self._listener = self._dispatcher = self._queue_handler = None
+
+    def stats(self) -> Dict[str, int]:
+        """Devuelve el estado de la cola y los contadores de envío."""
+        if self._dispatcher is None or self._queue_handler is None:
+            return {"queue_size": 0, "pending": 0, "received": 0, "sent": 0, "dropped": 0, "failed_batches": 0}
+        return {
+            "queue_size": self._queue_handler.queue.qsize(),
+            "pending": self._dispatcher.pending(),
+            "received": self._dispatcher.received,
+            "sent": self._dispatcher.sent,
+            "dropped": self._queue_handler.dropped + self._dispatcher.dropped,
+            "failed_batches": self._dispatcher.failed_batches,
+        }
 
 
 # Instancia única del servicio para ser usada en la aplicación
-alerting_service = AlertingService()
+alerting_service = AlertingService(
+    flush_interval=settings.ALERT_FLUSH_INTERVAL_SECONDS,
+    batch_size=settings.ALERT_BATCH_SIZE,
+    max_queue_size=settings.ALERT_QUEUE_MAX_SIZE,
+)
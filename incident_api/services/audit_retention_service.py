@@ -0,0 +1,254 @@
+"""
+Servicio de retención y archivado del log de auditoría.
+
+En PostgreSQL `audit_log` está particionada por mes sobre `timestamp`. Este
+servicio crea por adelantado las particiones de los próximos meses y archiva
+los meses que superan el periodo de retención: los exporta a un archivo JSONL
+comprimido con gzip y después desvincula y elimina la partición completa (sin
+borrar filas una a una, lo que además impediría el trigger de protección).
+
+Las filas de un mes sin partición propia caen en la partición DEFAULT. Al crear
+la partición de ese mes, sus filas se trasladan desde DEFAULT; y si se archiva
+un mes que solo está en DEFAULT, sus filas se borran de ella. En ambos casos el
+trigger de protección se desactiva únicamente dentro de esa transacción.
+
+En otros motores (p. ej. SQLite en desarrollo) no hay particiones: los meses
+archivados se eliminan con un DELETE por rango de fechas.
+"""
+
+import gzip
+import json
+import logging
+import os
+from contextlib import contextmanager
+from datetime import date, datetime, timezone
+from typing import Any, Dict, Iterator, List, Optional
+
+from sqlalchemy import delete, func, select, text
+from sqlalchemy.orm import Session
+
+from incident_api import models
+from incident_api.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+PARTITION_PREFIX = "audit_log_p"
+PROTECTION_TRIGGER = "protect_audit_log_trigger"
+
+
+def _add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _month_of(value: datetime) -> date:
+    return value.date().replace(day=1)
+
+
+def _as_datetime(month: date) -> datetime:
+    return datetime(month.year, month.month, 1)
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return str(value)
+
+
+class AuditRetentionService:
+    """
+    Servicio para gestionar las particiones mensuales y el archivado de la auditoría.
+    """
+
+    def _is_partitioned(self, db: Session) -> bool:
+        return db.get_bind().dialect.name == "postgresql"
+
+    def partition_name(self, month: date) -> str:
+        """Devuelve el nombre de la partición de un mes (p. ej. audit_log_p2024_01)."""
+        return f"{PARTITION_PREFIX}{month:%Y_%m}"
+
+    def ensure_partitions(self, db: Session, *, months_ahead: int = 3, today: Optional[date] = None) -> List[str]:
+        """
+        Crea las particiones del mes actual y de los `months_ahead` siguientes si no existen.
+
+        Returns:
+            Los nombres de las particiones creadas.
+        """
+        if not self._is_partitioned(db):
+            return []
+
+        month = (today or datetime.now(timezone.utc).date()).replace(day=1)
+        existing = set(self._list_partitions(db))
+        default = self._default_partition(db)
+        created = []
+        for offset in range(months_ahead + 1):
+            start = _add_months(month, offset)
+            name = self.partition_name(start)
+            if name in existing:
+                continue
+            if default is None:
+                db.execute(text(f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF audit_log FOR VALUES {self._bounds(start)}"))
+            else:
+                self._create_from_default(db, name, start, default)
+            created.append(name)
+        db.commit()
+        if created:
+            logger.info(f"Created audit log partitions: {', '.join(created)}")
+        return created
+
+    @staticmethod
+    def _bounds(start: date) -> str:
+        return f"FROM ('{start.isoformat()}') TO ('{_add_months(start, 1).isoformat()}')"
+
+    @staticmethod
+    def _range_condition(start: date) -> str:
+        return f"\"timestamp\" >= '{start.isoformat()}' AND \"timestamp\" < '{_add_months(start, 1).isoformat()}'"
+
+    def _create_from_default(self, db: Session, name: str, start: date, default: str) -> None:
+        """
+        Crea la partición de un mes trasladando antes sus filas desde la partición DEFAULT.
+
+        `CREATE TABLE ... PARTITION OF` falla si DEFAULT ya tiene filas de ese rango,
+        así que la partición se crea como tabla independiente, se copian las filas,
+        se borran de DEFAULT y después se vincula con `ATTACH PARTITION`.
+        """
+        condition = self._range_condition(start)
+        # Nadie puede añadir filas del rango a DEFAULT entre el traslado y el ATTACH
+        db.execute(text(f"LOCK TABLE {default} IN SHARE ROW EXCLUSIVE MODE"))
+        db.execute(text(f"CREATE TABLE {name} (LIKE audit_log INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"))
+        # Con el CHECK equivalente al rango, ATTACH no necesita recorrer la tabla nueva
+        db.execute(text(f"ALTER TABLE {name} ADD CONSTRAINT {name}_bounds CHECK ({condition})"))
+        moved = db.execute(text(f"INSERT INTO {name} SELECT * FROM {default} WHERE {condition}")).rowcount
+        if moved:
+            with self._protection_disabled(db, default):
+                db.execute(text(f"DELETE FROM {default} WHERE {condition}"))
+            logger.info(f"Moved {moved} audit records for {start:%Y-%m} from {default} to {name}")
+        db.execute(text(f"ALTER TABLE audit_log ATTACH PARTITION {name} FOR VALUES {self._bounds(start)}"))
+        db.execute(text(f"ALTER TABLE {name} DROP CONSTRAINT {name}_bounds"))
+
+    @contextmanager
+    def _protection_disabled(self, db: Session, table: str) -> Iterator[None]:
+        """
+        Desactiva el trigger de protección de `table` dentro de la transacción actual.
+
+        El cambio de catálogo no es visible para otras sesiones hasta el commit, y
+        para entonces el trigger ya se ha reactivado; si algo falla, el rollback
+        también lo deshace.
+        """
+        db.execute(text(f"ALTER TABLE {table} DISABLE TRIGGER {PROTECTION_TRIGGER}"))
+        yield
+        db.execute(text(f"ALTER TABLE {table} ENABLE TRIGGER {PROTECTION_TRIGGER}"))
+
+    def _list_partitions(self, db: Session) -> List[str]:
+        rows = db.execute(text(
+            "SELECT c.relname FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid "
+            "JOIN pg_class p ON p.oid = i.inhparent "
+            "WHERE p.relname = 'audit_log'"
+        ))
+        return [name for (name,) in rows if name.startswith(PARTITION_PREFIX)]
+
+    def _default_partition(self, db: Session) -> Optional[str]:
+        return db.scalar(text(
+            "SELECT c.relname FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid "
+            "JOIN pg_class p ON p.oid = i.inhparent "
+            "WHERE p.relname = 'audit_log' AND pg_get_expr(c.relpartbound, c.oid) = 'DEFAULT'"
+        ))
+
+    def archive_old_records(
+        self,
+        db: Session,
+        *,
+        retention_months: Optional[int] = None,
+        archive_dir: Optional[str] = None,
+        today: Optional[date] = None,
+        batch_size: int = 1000,
+    ) -> List[Dict[str, Any]]:
+        """
+        Archiva y elimina de la base de datos los meses anteriores al periodo de retención.
+
+        Args:
+            db: Sesión de base de datos.
+            retention_months: Meses completos que se conservan, además del mes actual.
+            archive_dir: Directorio de destino de los archivos.
+            today: Fecha de referencia (por defecto, hoy en UTC).
+            batch_size: Filas leídas por lote al exportar.
+
+        Returns:
+            Una entrada por mes archivado con el mes, el número de filas y la ruta del archivo.
+        """
+        retention_months = settings.AUDIT_RETENTION_MONTHS if retention_months is None else retention_months
+        archive_dir = archive_dir or settings.AUDIT_ARCHIVE_DIR or os.path.join(settings.LOGS_DIR, "audit_archive")
+        current_month = (today or datetime.now(timezone.utc).date()).replace(day=1)
+        cutoff = _add_months(current_month, -retention_months)
+
+        oldest = db.scalar(
+            select(func.min(models.AuditLog.timestamp)).where(models.AuditLog.timestamp < _as_datetime(cutoff))
+        )
+        if oldest is None:
+            return []
+
+        os.makedirs(archive_dir, exist_ok=True)
+        archived = []
+        month = _month_of(oldest)
+        while month < cutoff:
+            next_month = _add_months(month, 1)
+            path = os.path.join(archive_dir, f"audit_log_{month:%Y_%m}.jsonl.gz")
+            rows = self._export_month(db, month, next_month, path, batch_size)
+            if rows:
+                self._drop_month(db, month, next_month)
+                archived.append({"month": month.isoformat(), "rows": rows, "file": path})
+                logger.info(f"Archived {rows} audit records for {month:%Y-%m} to {path}")
+            month = next_month
+        return archived
+
+    def _export_month(self, db: Session, start: date, end: date, path: str, batch_size: int) -> int:
+        """Exporta las filas del mes a un JSONL comprimido; el archivo solo aparece completo."""
+        table = models.AuditLog.__table__
+        stmt = (
+            select(table)
+            .where(table.c.timestamp >= _as_datetime(start), table.c.timestamp < _as_datetime(end))
+            .order_by(table.c.id)
+            .execution_options(yield_per=batch_size)
+        )
+        rows = 0
+        tmp_path = path + ".tmp"
+        with gzip.open(tmp_path, "wt", encoding="utf-8") as archive:
+            for row in db.execute(stmt).mappings():
+                archive.write(json.dumps(dict(row), default=_json_default) + "\n")
+                rows += 1
+        if rows:
+            os.replace(tmp_path, path)
+        else:
+            os.remove(tmp_path)
+        return rows
+
+    def _drop_month(self, db: Session, start: date, end: date) -> None:
+        """
+        Elimina de la base de datos las filas ya archivadas del mes.
+
+        En PostgreSQL se elimina la partición del mes; si el mes no tiene partición
+        propia, sus filas están en DEFAULT y se borran de ella con el trigger de
+        protección desactivado en esta transacción.
+        """
+        if self._is_partitioned(db):
+            name = self.partition_name(start)
+            if name in self._list_partitions(db):
+                db.execute(text(f"ALTER TABLE audit_log DETACH PARTITION {name}"))
+                db.execute(text(f"DROP TABLE {name}"))
+            else:
+                default = self._default_partition(db)
+                with self._protection_disabled(db, default):
+                    db.execute(text(f"DELETE FROM {default} WHERE {self._range_condition(start)}"))
+        else:
+            db.execute(
+                delete(models.AuditLog).where(
+                    models.AuditLog.timestamp >= _as_datetime(start),
+                    models.AuditLog.timestamp < _as_datetime(end),
+                )
+            )
+        db.commit()
+
+
+audit_retention_service = AuditRetentionService()
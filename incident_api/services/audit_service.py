@@ -5,12 +5,30 @@ Este módulo proporciona funcionalidades para registrar y consultar
 acciones de usuarios para trazabilidad y auditorías.
 """
 
-from typing import List, Optional, Dict, Any
+import base64
+from typing import List, Optional, Dict, Any, Sequence, Tuple
 from sqlalchemy.orm import Session
 from fastapi import Request
+from fastapi.responses import StreamingResponse
 from datetime import datetime, timezone
 
 from incident_api import crud, models
+from incident_api.core.config import settings
+from incident_api.services.audit_writer import audit_log_writer
+from incident_api.services.export_service import export_service
+
+AUDIT_EXPORT_COLUMNS = (
+    "id",
+    "timestamp",
+    "user_id",
+    "action",
+    "resource_type",
+    "resource_id",
+    "success",
+    "ip_address",
+    "user_agent",
+    "details",
+)
 
 
 class AuditService:
@@ -28,10 +46,14 @@ class AuditService:
         details: Optional[Dict[str, Any]] = None,
         request: Optional[Request] = None,
         success: bool = True,
-    ) -> models.AuditLog:
+    ) -> Optional[models.AuditLog]:
         """
         Registra una acción de usuario en el log de auditoría.
 
+        Con `AUDIT_ASYNC_WRITES` activo el registro solo se encola en
+        `audit_log_writer`, que lo inserta por lotes fuera de la petición; en
+        ese caso `db` no se usa y no se devuelve nada.
+
         Args:
             db: Sesión de base de datos
             action: Tipo de acción (e.g., 'LOGIN', 'CREATE_INCIDENT')
@@ -43,7 +65,7 @@ class AuditService:
             success: Indica si la acción fue exitosa
 
         Returns:
-            El registro de auditoría creado
+            El registro de auditoría creado, o None si se encoló
         """
         # Extraer información de la request si está disponible
         ip_address = None
@@ -65,6 +87,10 @@ class AuditService:
             "success": success,
         }
 
+        if audit_log_writer.enabled:
+            audit_log_writer.enqueue(audit_data)
+            return None
+
         return crud.audit_log.create(db, obj_in=audit_data)
 
     def get_user_audit_logs(
@@ -115,39 +141,125 @@ class AuditService:
         db: Session,
         *,
         user_id: int | None = None,
-        action: str | None = None,
-        resource_type: str | None = None,
+        actions: Sequence[str] | None = None,
+        resource_types: Sequence[str] | None = None,
+        resource_id: int | None = None,
         start_date: datetime | None = None,
         end_date: datetime | None = None,
+        cursor: str | None = None,
         skip: int = 0,
         limit: int = 100,
-    ) -> tuple[list[models.AuditLog], int]:
+        include_total: bool = True,
+    ) -> Dict[str, Any]:
         """
-        Obtiene una lista paginada de logs de auditoría con filtros avanzados.
+        Obtiene una página de logs de auditoría con filtros exactos.
 
         Args:
             db: Sesión de base de datos.
             user_id: Filtrar por ID de usuario.
-            action: Filtrar por tipo de acción.
-            resource_type: Filtrar por tipo de recurso.
+            actions: Filtrar por uno o varios tipos de acción exactos.
+            resource_types: Filtrar por uno o varios tipos de recurso exactos.
+            resource_id: Filtrar por ID del recurso.
             start_date: Fecha de inicio del filtro.
             end_date: Fecha de fin del filtro.
-            skip: Número de registros a omitir.
+            cursor: `next_cursor` de la página anterior (paginación por keyset).
+            skip: Número de registros a omitir (solo sin cursor).
             limit: Número máximo de registros a devolver.
+            include_total: Si es False no se calcula el total (p. ej. en páginas siguientes).
 
         Returns:
-            Una tupla conteniendo la lista de logs y el conteo total.
+            Un diccionario con `logs`, `total` (acotado a AUDIT_COUNT_CAP o estimado),
+            `total_is_estimate` y `next_cursor`.
+
+        Raises:
+            ValueError: Si el cursor no es válido.
         """
-        return crud.audit_log.get_multi_with_filters(
-            db=db,
+        filters = dict(
             user_id=user_id,
-            action=action,
-            resource_type=resource_type,
+            actions=actions,
+            resource_types=resource_types,
+            resource_id=resource_id,
             start_date=start_date,
             end_date=end_date,
+        )
+        logs = crud.audit_log.get_multi_with_filters(
+            db=db,
+            after=self.decode_cursor(cursor) if cursor else None,
             skip=skip,
             limit=limit,
+            **filters,
+        )
+
+        total, total_is_estimate = None, False
+        if include_total:
+            total, total_is_estimate = crud.audit_log.count_with_filters(
+                db, cap=settings.AUDIT_COUNT_CAP, **filters
+            )
+
+        return {
+            "logs": logs,
+            "total": total,
+            "total_is_estimate": total_is_estimate,
+            "next_cursor": self.encode_cursor(logs[-1]) if len(logs) == limit else None,
+        }
+
+    def export_audit_logs(
+        self,
+        db: Session,
+        *,
+        fmt: str = "csv",
+        compress: bool = False,
+        user_id: int | None = None,
+        actions: Sequence[str] | None = None,
+        resource_types: Sequence[str] | None = None,
+        resource_id: int | None = None,
+        start_date: datetime | None = None,
+        end_date: datetime | None = None,
+    ) -> StreamingResponse:
+        """
+        Exporta en streaming los logs de auditoría filtrados (CSV o JSONL, con gzip opcional).
+
+        Acepta los mismos filtros que `get_paged_audit_logs`. Las filas se leen con un
+        cursor de servidor y se escriben a medida que llegan, por lo que la memoria
+        no depende del rango exportado.
+
+        Raises:
+            ValueError: Si el formato no es soportado.
+        """
+        rows = crud.audit_log.stream_with_filters(
+            db,
+            user_id=user_id,
+            actions=actions,
+            resource_types=resource_types,
+            resource_id=resource_id,
+            start_date=start_date,
+            end_date=end_date,
         )
+        # La respuesta se envía después de que la dependencia cierre la sesión; la
+        # sesión se reabre al consumir el cursor y se cierra de nuevo al terminar.
+        return export_service.streaming_response(
+            rows,
+            columns=AUDIT_EXPORT_COLUMNS,
+            fmt=fmt,
+            filename=f"audit_logs_{datetime.now(timezone.utc):%Y%m%dT%H%M%SZ}",
+            compress=compress,
+            on_close=db.close,
+        )
+
+    @staticmethod
+    def encode_cursor(log: models.AuditLog) -> str:
+        """Codifica la posición (timestamp, id) de un registro como cursor opaco."""
+        raw = f"{log.timestamp.isoformat()}|{log.id}"
+        return base64.urlsafe_b64encode(raw.encode()).decode()
+
+    @staticmethod
+    def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+        """Decodifica un cursor generado por `encode_cursor`."""
+        try:
+            timestamp, log_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+            return datetime.fromisoformat(timestamp), int(log_id)
+        except (ValueError, UnicodeDecodeError) as e:
+            raise ValueError("Cursor de paginación no válido.") from e
 
     def _get_client_ip(self, request: Request) -> str:
         """
@@ -0,0 +1,338 @@
+"""
+Escritor asíncrono y por lotes del log de auditoría.
+
+La petición solo encola el registro (`enqueue`); un hilo en segundo plano agrupa
+los registros y los inserta con un único INSERT multi-fila cada
+`AUDIT_FLUSH_INTERVAL_MS` milisegundos o cada `AUDIT_BATCH_SIZE` registros, en su
+propia sesión y transacción.
+
+Si la base de datos no está disponible (errores de conexión) o la cola está
+llena, los registros se añaden a un archivo spool local en formato JSON Lines con
+`fsync`, y se reinsertan en cuanto una escritura vuelve a tener éxito o al
+arrancar el proceso. El spool se reinserta entero en una sola transacción, así
+que un fallo a mitad no deja parte de él insertada.
+
+Si la base de datos rechaza un lote por sus datos, reintentarlo no sirve: se
+prueba cada registro por separado, se insertan los válidos y los rechazados se
+apartan en un archivo de cuarentena (`AUDIT_DEAD_LETTER_PATH`) con el error.
+
+La entrega es "al menos una vez": si el proceso muere justo después de
+confirmar un spool y antes de borrarlo, esos registros pueden duplicarse.
+"""
+
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import insert
+from sqlalchemy.exc import DisconnectionError, InterfaceError, OperationalError
+from sqlalchemy.orm import Session
+
+from incident_api import crud, models
+from incident_api.core.config import settings
+from incident_api.db.unit_of_work import unit_of_work
+
+logger = logging.getLogger(__name__)
+
+# Errores de conexión: el lote se guarda en el spool y se reintenta más tarde
+_TRANSIENT_ERRORS = (OperationalError, DisconnectionError, InterfaceError)
+
+
+class AuditLogWriter:
+    """
+    Cola en proceso que persiste los registros de auditoría por lotes.
+    """
+
+    def __init__(
+        self,
+        session_factory: Optional[Callable[[], Session]] = None,
+        batch_size: int = 200,
+        flush_interval: float = 0.25,
+        spool_path: str = "audit_spool.jsonl",
+        dead_letter_path: Optional[str] = None,
+        max_queue_size: int = 10000,
+        enabled: bool = True,
+    ):
+        self._session_factory = session_factory
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.spool_path = spool_path
+        self.dead_letter_path = dead_letter_path or f"{os.path.splitext(spool_path)[0]}.dead.jsonl"
+        self.enabled = enabled
+        self._queue: "queue.Queue[Dict[str, Any]]" = queue.Queue(maxsize=max_queue_size)
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._start_lock = threading.Lock()
+        self._spool_lock = threading.Lock()
+        self.written = 0
+        self.spooled = 0
+        self.failed_batches = 0
+        self.dead_lettered = 0
+
+    @property
+    def session_factory(self) -> Callable[[], Session]:
+        if self._session_factory is None:
+            from incident_api.db.database import SessionLocal
+
+            self._session_factory = SessionLocal
+        return self._session_factory
+
+    # --- Ruta de la petición ---
+
+    def enqueue(self, record: Dict[str, Any]) -> None:
+        """
+        Encola un registro de auditoría. No accede a la base de datos.
+
+        El instante de la acción se fija aquí, no al insertar el lote.
+        """
+        record = dict(record)
+        record.setdefault("timestamp", datetime.now(timezone.utc).replace(tzinfo=None))
+        self._ensure_started()
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            logger.warning("Audit queue full; spooling record to %s", self.spool_path)
+            self._spool([record])
+
+    # --- Hilo de escritura ---
+
+    def _ensure_started(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        self.replay_spool()
+        while not self._stop.is_set():
+            batch = self._collect_batch()
+            if batch:
+                self._write(batch)
+        self.flush()
+
+    def _collect_batch(self) -> List[Dict[str, Any]]:
+        """Espera al primer registro y agrupa los siguientes hasta llenar el lote o agotar el intervalo."""
+        try:
+            batch = [self._queue.get(timeout=self.flush_interval)]
+        except queue.Empty:
+            return []
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _insert(self, records: List[Dict[str, Any]]) -> None:
+        """Inserta los registros en una sola transacción, con un INSERT por cada `batch_size`."""
+        with self.session_factory() as db, unit_of_work(db):
+            for start in range(0, len(records), self.batch_size):
+                crud.audit_log.create_many(db, objs_in=records[start:start + self.batch_size])
+
+    def _rejected(self, records: List[Dict[str, Any]]) -> List[Tuple[Dict[str, Any], Exception]]:
+        """
+        Prueba cada registro en una transacción que se revierte y devuelve los que se rechazan.
+
+        Raises:
+            OperationalError: (u otro error de conexión) si se pierde la base de datos.
+        """
+        rejected = []
+        with self.session_factory() as db:
+            for record in records:
+                try:
+                    db.execute(insert(models.AuditLog), [record])
+                except _TRANSIENT_ERRORS:
+                    raise
+                except Exception as e:
+                    rejected.append((record, e))
+                finally:
+                    db.rollback()
+        return rejected
+
+    def _persist(self, records: List[Dict[str, Any]]) -> int:
+        """
+        Inserta los registros y aparta en cuarentena los que la base de datos rechaza.
+
+        No inserta nada parcialmente: o se confirman todos los registros aceptados,
+        o ninguno. Devuelve cuántos se insertaron.
+
+        Raises:
+            OperationalError: (u otro error de conexión) si la base de datos no está disponible.
+        """
+        try:
+            self._insert(records)
+            return len(records)
+        except _TRANSIENT_ERRORS:
+            raise
+        except Exception as e:
+            logger.warning("Audit batch of %d records rejected, checking records one by one: %s", len(records), e)
+
+        rejected = self._rejected(records)
+        rejected_ids = {id(record) for record, _ in rejected}
+        accepted = [record for record in records if id(record) not in rejected_ids]
+        try:
+            self._insert(accepted)
+        except _TRANSIENT_ERRORS:
+            raise
+        except Exception as e:
+            # Ningún registro falla por sí solo: se aparta el lote entero para no bloquear la cola
+            rejected += [(record, e) for record in accepted]
+            accepted = []
+        self._dead_letter(rejected)
+        return len(accepted)
+
+    def _write(self, batch: List[Dict[str, Any]]) -> bool:
+        """Inserta un lote; si la base de datos no está disponible, lo envía al spool. Devuelve True si se insertó."""
+        try:
+            written = self._persist(batch)
+        except _TRANSIENT_ERRORS as e:
+            self.failed_batches += 1
+            logger.error("Audit batch of %d records could not be written, spooling: %s", len(batch), e)
+            self._spool(batch)
+            return False
+        self.written += written
+        if os.path.exists(self.spool_path) or os.path.exists(self.spool_path + ".replaying"):
+            self.replay_spool()
+        return True
+
+    def flush(self) -> None:
+        """Escribe de inmediato todos los registros encolados."""
+        while True:
+            batch: List[Dict[str, Any]] = []
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            if not batch:
+                return
+            self._write(batch)
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """
+        Detiene el hilo de escritura tras vaciar la cola.
+
+        Si el hilo no termina a tiempo, sigue siendo él quien vacía la cola: vaciarla
+        también desde aquí escribiría en paralelo con el mismo spool.
+        """
+        self._stop.set()
+        thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+            if thread.is_alive():
+                logger.warning("Audit writer did not stop within %.1fs; %d records still queued", timeout, self._queue.qsize())
+                return
+        self.flush()
+
+    # --- Spool local ---
+
+    def _spool(self, records: List[Dict[str, Any]]) -> None:
+        with self._spool_lock:
+            self._append(self.spool_path, records)
+            self.spooled += len(records)
+
+    def _dead_letter(self, rejected: List[Tuple[Dict[str, Any], Exception]]) -> None:
+        """Aparta los registros rechazados, junto con el error, en el archivo de cuarentena."""
+        if not rejected:
+            return
+        logger.error("%d audit records rejected by the database, moved to %s", len(rejected), self.dead_letter_path)
+        with self._spool_lock:
+            self._append(
+                self.dead_letter_path,
+                [{**record, "_error": str(error).splitlines()[0]} for record, error in rejected],
+            )
+            self.dead_lettered += len(rejected)
+
+    def _append(self, path: str, records: List[Dict[str, Any]]) -> None:
+        lines = "".join(json.dumps(record, default=self._encode) + "\n" for record in records)
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(lines)
+            f.flush()
+            os.fsync(f.fileno())
+
+    @staticmethod
+    def _encode(value: Any) -> Any:
+        if isinstance(value, datetime):
+            return value.isoformat()
+        return str(value)
+
+    def replay_spool(self) -> int:
+        """
+        Reinserta los registros del spool. Devuelve cuántos se insertaron.
+
+        El spool se renombra antes de leerlo, de modo que los registros que se
+        añadan mientras tanto van a un archivo nuevo, y se inserta entero en una
+        sola transacción: si la base de datos vuelve a caer o el proceso muere a
+        mitad, no queda nada insertado y el archivo renombrado se reintenta más
+        tarde sin duplicar registros. Los registros rechazados van a cuarentena.
+        """
+        replaying = self.spool_path + ".replaying"
+        replayed = 0
+        while True:
+            with self._spool_lock:
+                if not os.path.exists(replaying):
+                    if not os.path.exists(self.spool_path):
+                        return replayed
+                    os.replace(self.spool_path, replaying)
+
+            records = self._read_spool(replaying)
+            try:
+                written = self._persist(records)
+            except _TRANSIENT_ERRORS as e:
+                logger.error("Audit spool replay failed, will retry later: %s", e)
+                return replayed
+            os.remove(replaying)
+            self.written += written
+            replayed += written
+            logger.info("Replayed %d audit records from spool", written)
+
+    @staticmethod
+    def _read_spool(path: str) -> List[Dict[str, Any]]:
+        records = []
+        with open(path, encoding="utf-8") as spool:
+            for line in spool:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # Línea incompleta de una escritura interrumpida
+                    logger.warning("Skipping malformed audit spool line")
+                    continue
+                if record.get("timestamp"):
+                    record["timestamp"] = datetime.fromisoformat(record["timestamp"])
+                records.append(record)
+        return records
+
+    def stats(self) -> Dict[str, int]:
+        """Devuelve el tamaño de la cola y los contadores de escritura."""
+        return {
+            "queue_size": self._queue.qsize(),
+            "written": self.written,
+            "spooled": self.spooled,
+            "failed_batches": self.failed_batches,
+            "dead_lettered": self.dead_lettered,
+        }
+
+
+audit_log_writer = AuditLogWriter(
+    batch_size=settings.AUDIT_BATCH_SIZE,
+    flush_interval=settings.AUDIT_FLUSH_INTERVAL_MS / 1000,
+    spool_path=settings.AUDIT_SPOOL_PATH or os.path.join(settings.LOGS_DIR, "audit_spool.jsonl"),
+    dead_letter_path=settings.AUDIT_DEAD_LETTER_PATH or os.path.join(settings.LOGS_DIR, "audit_dead_letter.jsonl"),
+    max_queue_size=settings.AUDIT_QUEUE_MAX_SIZE,
+    enabled=settings.AUDIT_ASYNC_WRITES,
+)
@@ -24,7 +24,10 @@ class ChangeLoggingService:
     ):
         """
         Compara los cambios y crea una entrada en la bitácora para cada uno.
+
+        Todas las entradas se insertan juntas en una única transacción.
         """
+        log_entries = []
         for field, new_value in updates.items():
             old_value = getattr(original_incident, field)
             if field == 'impact_scores':
@@ -35,19 +38,22 @@ class ChangeLoggingService:
             elif old_value == new_value:
                 continue
 
-            log_entry = schemas.IncidentLogCreate(
-                action="Actualización de Campo",
-                field_modified=field,
-                old_value=str(old_value),
-                new_value=str(new_value),
-                comments=f"El campo '{field}' fue actualizado por {user.email}.",
+            log_entries.append(
+                schemas.IncidentLogCreate(
+                    action="Actualización de Campo",
+                    field_modified=field,
+                    old_value=str(old_value),
+                    new_value=str(new_value),
+                    comments=f"El campo '{field}' fue actualizado por {user.email}.",
+                )
             )
-            crud.incident_log.create_with_incident_and_user(
+
+        if log_entries:
+            crud.incident_log.create_many_with_incident_and_user(
                 db,
-                obj_in=log_entry,
+                objs_in=log_entries,
                 incident_id=original_incident.incident_id,
                 user_id=user.user_id,
             )
 
-
 change_logging_service = ChangeLoggingService()
\ No newline at end of file
@@ -0,0 +1,252 @@
+"""
+Servicio para la detección de incidentes duplicados o casi duplicados.
+
+Mantiene en memoria un índice MinHash/LSH sobre el resumen y la descripción de
+los incidentes recientes. Al crear un incidente se consulta el índice para
+encontrar un posible incidente padre; si la similitud estimada supera el umbral
+configurado, el nuevo incidente se vincula al padre y puede reutilizar su
+enriquecimiento de IA.
+"""
+
+import hashlib
+import logging
+import re
+import threading
+import unicodedata
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Set, Tuple
+
+from sqlalchemy.orm import Session
+
+from incident_api import models
+from incident_api.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Primo de Mersenne 2^61 - 1 para las permutaciones universales de MinHash
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+
+def _normalize(text: str) -> str:
+    """Normaliza un texto: minúsculas, sin acentos y sin signos de puntuación."""
+    text = unicodedata.normalize("NFKD", text.lower())
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    return re.sub(r"[^a-z0-9]+", " ", text).strip()
+
+
+def _shingles(text: str, size: int = 3) -> Set[int]:
+    """Devuelve el conjunto de shingles de palabras del texto, codificados como enteros."""
+    words = _normalize(text).split()
+    if not words:
+        return set()
+    if len(words) < size:
+        grams = [" ".join(words)]
+    else:
+        grams = [" ".join(words[i:i + size]) for i in range(len(words) - size + 1)]
+    return {
+        int.from_bytes(hashlib.blake2b(g.encode("utf-8"), digest_size=4).digest(), "big")
+        for g in grams
+    }
+
+
+class MinHashLSHIndex:
+    """
+    Índice MinHash con Locality Sensitive Hashing por bandas.
+
+    Cada documento se resume en una firma de `num_perm` valores; la firma se divide
+    en `bands` bandas y cada banda se usa como clave de cubeta. Dos documentos son
+    candidatos si comparten al menos una cubeta, y la similitud de Jaccard se estima
+    como la fracción de posiciones coincidentes en sus firmas.
+    """
+
+    def __init__(self, num_perm: int = 128, bands: int = 32, seed: int = 1):
+        if num_perm % bands != 0:
+            raise ValueError("num_perm debe ser divisible por bands.")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+
+        # Coeficientes deterministas (a, b) para h(x) = (a*x + b) mod p
+        self._permutations: List[Tuple[int, int]] = []
+        for i in range(num_perm):
+            digest = hashlib.sha256(f"{seed}:{i}".encode()).digest()
+            a = int.from_bytes(digest[:8], "big") % _MERSENNE_PRIME or 1
+            b = int.from_bytes(digest[8:16], "big") % _MERSENNE_PRIME
+            self._permutations.append((a, b))
+
+        self._signatures: Dict[int, Tuple[int, ...]] = {}
+        self._created_at: Dict[int, datetime] = {}
+        self._buckets: Dict[Tuple[int, Tuple[int, ...]], Set[int]] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._signatures)
+
+    def __contains__(self, key: int) -> bool:
+        return key in self._signatures
+
+    def signature(self, text: str) -> Optional[Tuple[int, ...]]:
+        """Calcula la firma MinHash de un texto, o None si no tiene contenido útil."""
+        shingles = _shingles(text)
+        if not shingles:
+            return None
+        return tuple(
+            min(((a * s + b) % _MERSENNE_PRIME) & _MAX_HASH for s in shingles)
+            for a, b in self._permutations
+        )
+
+    def _band_keys(self, signature: Tuple[int, ...]):
+        for band in range(self.bands):
+            start = band * self.rows
+            yield band, signature[start:start + self.rows]
+
+    def add(self, key: int, text: str, created_at: Optional[datetime] = None) -> None:
+        """Añade (o reemplaza) un documento en el índice."""
+        signature = self.signature(text)
+        if signature is None:
+            return
+        with self._lock:
+            self._remove_unlocked(key)
+            self._signatures[key] = signature
+            self._created_at[key] = created_at or datetime.now(timezone.utc).replace(tzinfo=None)
+            for band_key in self._band_keys(signature):
+                self._buckets.setdefault(band_key, set()).add(key)
+
+    def remove(self, key: int) -> None:
+        """Elimina un documento del índice si existe."""
+        with self._lock:
+            self._remove_unlocked(key)
+
+    def _remove_unlocked(self, key: int) -> None:
+        signature = self._signatures.pop(key, None)
+        self._created_at.pop(key, None)
+        if signature is None:
+            return
+        for band_key in self._band_keys(signature):
+            bucket = self._buckets.get(band_key)
+            if bucket is not None:
+                bucket.discard(key)
+                if not bucket:
+                    del self._buckets[band_key]
+
+    def prune(self, older_than: datetime) -> int:
+        """Elimina los documentos creados antes de `older_than`. Devuelve cuántos se eliminaron."""
+        with self._lock:
+            stale = [k for k, ts in self._created_at.items() if ts < older_than]
+            for key in stale:
+                self._remove_unlocked(key)
+        return len(stale)
+
+    def query(self, text: str, threshold: float) -> List[Tuple[int, float]]:
+        """
+        Busca documentos similares al texto dado.
+
+        Returns:
+            Lista de tuplas (clave, similitud estimada) con similitud >= threshold,
+            ordenada de mayor a menor similitud.
+        """
+        signature = self.signature(text)
+        if signature is None:
+            return []
+        with self._lock:
+            candidates: Set[int] = set()
+            for band_key in self._band_keys(signature):
+                candidates |= self._buckets.get(band_key, set())
+            results = []
+            for key in candidates:
+                other = self._signatures[key]
+                score = sum(1 for x, y in zip(signature, other) if x == y) / self.num_perm
+                if score >= threshold:
+                    results.append((key, score))
+        return sorted(results, key=lambda item: item[1], reverse=True)
+
+
+class DuplicateDetectionService:
+    """
+    Servicio para detectar si un incidente nuevo duplica a uno reciente.
+
+    Solo los incidentes canónicos (sin padre) se indexan, de modo que un duplicado
+    siempre se vincula al incidente original y no a otro duplicado.
+    """
+
+    def __init__(self):
+        self._index = MinHashLSHIndex()
+        self._loaded = False
+        self._load_lock = threading.Lock()
+
+    @staticmethod
+    def _incident_text(summary: Optional[str], description: Optional[str]) -> str:
+        return f"{summary or ''} {description or ''}"
+
+    def _window_start(self) -> datetime:
+        return datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(days=settings.DUPLICATE_WINDOW_DAYS)
+
+    def _ensure_loaded(self, db: Session) -> None:
+        """Construye el índice a partir de la base de datos la primera vez que se usa."""
+        if self._loaded:
+            return
+        with self._load_lock:
+            if self._loaded:
+                return
+            rows = (
+                db.query(
+                    models.Incident.incident_id,
+                    models.Incident.summary,
+                    models.Incident.description,
+                    models.Incident.created_at,
+                )
+                .filter(
+                    models.Incident.parent_incident_id.is_(None),
+                    models.Incident.is_active.isnot(False),
+                    models.Incident.created_at >= self._window_start(),
+                )
+                .all()
+            )
+            for incident_id, summary, description, created_at in rows:
+                self._index.add(incident_id, self._incident_text(summary, description), created_at)
+            self._loaded = True
+            logger.info(f"Índice de duplicados inicializado con {len(rows)} incidente(s).")
+
+    def find_parent(
+        self, db: Session, incident: models.Incident
+    ) -> Optional[Tuple[models.Incident, float]]:
+        """
+        Busca el incidente padre más similar para un incidente recién creado.
+
+        Returns:
+            Tupla (incidente padre, similitud) o None si no hay un duplicado probable.
+        """
+        if not settings.DUPLICATE_DETECTION_ENABLED:
+            return None
+
+        self._ensure_loaded(db)
+        self._index.prune(self._window_start())
+
+        text = self._incident_text(incident.summary, incident.description)
+        for parent_id, score in self._index.query(text, settings.DUPLICATE_SIMILARITY_THRESHOLD):
+            if parent_id == incident.incident_id:
+                continue
+            parent = db.get(models.Incident, parent_id)
+            if parent is None or parent.is_active is False or parent.parent_incident_id is not None:
+                self._index.remove(parent_id)
+                continue
+            return parent, score
+        return None
+
+    def register(self, incident: models.Incident) -> None:
+        """Añade un incidente canónico al índice para futuras comparaciones."""
+        if not settings.DUPLICATE_DETECTION_ENABLED or incident.parent_incident_id is not None:
+            return
+        self._index.add(
+            incident.incident_id,
+            self._incident_text(incident.summary, incident.description),
+            incident.created_at,
+        )
+
+    def forget(self, incident_id: int) -> None:
+        """Elimina un incidente del índice (p. ej. al desactivarlo)."""
+        self._index.remove(incident_id)
+
+
+duplicate_detection_service = DuplicateDetectionService()
@@ -0,0 +1,304 @@
+"""
+Generación de miniaturas y vistas previas de evidencias.
+
+Tras registrar las evidencias de un incidente, `enqueue` encola su contenido y
+un hilo en segundo plano genera, para imágenes y PDF (primera página), dos
+derivados en WebP:
+
+- `thumb`: lado máximo `EVIDENCE_THUMBNAIL_SIZE`, para los listados;
+- `preview`: lado máximo `EVIDENCE_PREVIEW_SIZE`, para el visor.
+
+Los derivados dependen solo del contenido, así que se guardan por SHA-256 en
+`derived/ab/cd/<sha256>.<variante>.webp` y se comparten entre evidencias
+duplicadas. Si un derivado aún no existe cuando se pide, el endpoint lo genera
+en el momento con `ensure_asset`.
+
+Pillow y pypdfium2 se importan al generar; sin ellos no hay vistas previas y las
+evidencias se siguen pudiendo descargar.
+"""
+
+import importlib
+import logging
+import os
+import queue
+import threading
+import time
+import uuid
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from incident_api import crud, models
+from incident_api.core.config import settings
+from incident_api.core.metrics import evidence_preview_duration_seconds
+
+logger = logging.getLogger(__name__)
+
+# incident_api.services reexporta la instancia con el nombre del módulo
+file_storage_module = importlib.import_module("incident_api.services.file_storage_service")
+
+PREVIEW_VARIANTS = ("thumb", "preview")
+PREVIEW_MEDIA_TYPE = "image/webp"
+# SVG puede contener scripts y Pillow no lo rasteriza; se sirve el original
+_UNSUPPORTED_IMAGE_TYPES = {"image/svg+xml"}
+# PDFium no es seguro entre hilos, ni siquiera con documentos distintos: el hilo de
+# generación y los endpoints (ensure_asset) rasterizan de uno en uno
+_PDFIUM_LOCK = threading.Lock()
+
+
+class EvidencePreviewService:
+    """
+    Cola en proceso que genera los derivados de las evidencias.
+    """
+
+    def __init__(self, max_queue_size: int = 1000, enabled: bool = True):
+        self.enabled = enabled
+        self._queue: "queue.Queue[Tuple[str, str, str]]" = queue.Queue(maxsize=max_queue_size)
+        self._pending: set = set()
+        self._pending_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._start_lock = threading.Lock()
+        self.generated = 0
+        self.failed = 0
+
+    # --- Rutas ---
+
+    @property
+    def derived_dir(self) -> str:
+        return settings.EVIDENCE_DERIVED_DIR or os.path.join(file_storage_module.UPLOADS_DIR, "derived")
+
+    def asset_path(self, sha256: str, variant: str) -> str:
+        """Ruta del derivado `variant` del contenido con el hash dado."""
+        return os.path.join(self.derived_dir, sha256[:2], sha256[2:4], f"{sha256}.{variant}.webp")
+
+    @staticmethod
+    def supports(file_type: Optional[str]) -> bool:
+        """Indica si se generan vistas previas para el tipo MIME dado."""
+        if not file_type:
+            return False
+        if file_type == "application/pdf":
+            return True
+        return file_type.startswith("image/") and file_type not in _UNSUPPORTED_IMAGE_TYPES
+
+    # --- Ruta de la petición ---
+
+    def enqueue(self, evidence_files: Iterable[models.EvidenceFile]) -> int:
+        """
+        Encola la generación de derivados de las evidencias. No bloquea.
+
+        Los contenidos repetidos o ya procesados se ignoran. Devuelve cuántos se encolaron.
+        """
+        if not self.enabled:
+            return 0
+        queued = 0
+        for evidence_file in evidence_files:
+            sha256 = evidence_file.file_hash
+            if not sha256 or not self.supports(evidence_file.file_type):
+                continue
+            if all(os.path.exists(self.asset_path(sha256, variant)) for variant in PREVIEW_VARIANTS):
+                continue
+            with self._pending_lock:
+                if sha256 in self._pending:
+                    continue
+                self._pending.add(sha256)
+            try:
+                self._queue.put_nowait((sha256, evidence_file.file_path, evidence_file.file_type))
+                queued += 1
+            except queue.Full:
+                # Se generará bajo demanda cuando se pida
+                logger.warning("Cola de vistas previas llena; se omite %s", sha256)
+                with self._pending_lock:
+                    self._pending.discard(sha256)
+        if queued:
+            self._ensure_started()
+        return queued
+
+    # --- Hilo de generación ---
+
+    def _ensure_started(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._run, name="evidence-previews", daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                sha256, source_path, file_type = self._queue.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            self._process(sha256, source_path, file_type)
+
+    def _process(self, sha256: str, source_path: str, file_type: str) -> None:
+        try:
+            self.generate(sha256, source_path, file_type)
+        except Exception as e:
+            logger.error("No se pudo generar la vista previa de %s: %s", sha256, e)
+        finally:
+            with self._pending_lock:
+                self._pending.discard(sha256)
+            self._queue.task_done()
+
+    def drain(self) -> None:
+        """Genera los derivados encolados y espera a que termine el que esté en curso."""
+        while True:
+            try:
+                sha256, source_path, file_type = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            self._process(sha256, source_path, file_type)
+        self._queue.join()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Detiene el hilo de generación."""
+        self._stop.set()
+        thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+
+    # --- Generación ---
+
+    def _render(self, source_path: str, file_type: str):
+        """Abre la imagen o rasteriza la primera página del PDF al tamaño de la vista previa."""
+        from PIL import Image, ImageOps
+
+        if file_type == "application/pdf":
+            import pypdfium2
+
+            with _PDFIUM_LOCK:
+                pdf = pypdfium2.PdfDocument(source_path)
+                try:
+                    page = pdf[0]
+                    width, height = page.get_size()
+                    # Se rasteriza directamente al tamaño final, sin pasar por la resolución completa
+                    scale = settings.EVIDENCE_PREVIEW_SIZE / max(width, height, 1)
+                    # copy(): el bitmap de PDFium se libera aquí, dentro del cerrojo
+                    image = page.render(scale=scale).to_pil().copy()
+                    page.close()
+                finally:
+                    pdf.close()
+            return image
+
+        with Image.open(source_path) as original:
+            # Decodificación reducida de JPEG: no se carga la resolución completa en memoria
+            original.draft("RGB", (settings.EVIDENCE_PREVIEW_SIZE, settings.EVIDENCE_PREVIEW_SIZE))
+            image = ImageOps.exif_transpose(original)
+            image.load()
+        return image
+
+    def _save(self, image, path: str) -> None:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        part_path = f"{path}.{uuid.uuid4().hex}.part"
+        try:
+            image.save(part_path, format="WEBP", quality=80, method=4)
+            os.replace(part_path, path)
+        except BaseException:
+            if os.path.exists(part_path):
+                os.remove(part_path)
+            raise
+
+    def generate(self, sha256: str, source_path: str, file_type: str) -> Dict[str, str]:
+        """
+        Genera los derivados que falten de un contenido. Es bloqueante.
+
+        Returns:
+            Dict[str, str]: Ruta de cada variante disponible; vacío si el tipo no
+            se admite o faltan las dependencias.
+        """
+        if not self.supports(file_type):
+            return {}
+        paths = {variant: self.asset_path(sha256, variant) for variant in PREVIEW_VARIANTS}
+        if all(os.path.exists(path) for path in paths.values()):
+            return paths
+
+        kind = "pdf" if file_type == "application/pdf" else "image"
+        start = time.perf_counter()
+        try:
+            image = self._render(source_path, file_type)
+        except ImportError as e:
+            evidence_preview_duration_seconds.labels(kind=kind, outcome="unavailable").observe(time.perf_counter() - start)
+            logger.warning("Vistas previas desactivadas: falta la dependencia %s", e.name)
+            return {}
+        except Exception:
+            evidence_preview_duration_seconds.labels(kind=kind, outcome="error").observe(time.perf_counter() - start)
+            self.failed += 1
+            raise
+
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA" if "A" in image.getbands() or "transparency" in image.info else "RGB")
+        sizes = {"preview": settings.EVIDENCE_PREVIEW_SIZE, "thumb": settings.EVIDENCE_THUMBNAIL_SIZE}
+        # De mayor a menor: la miniatura se reduce a partir de la vista previa
+        for variant in ("preview", "thumb"):
+            image.thumbnail((sizes[variant], sizes[variant]))
+            if not os.path.exists(paths[variant]):
+                self._save(image, paths[variant])
+
+        evidence_preview_duration_seconds.labels(kind=kind, outcome="success").observe(time.perf_counter() - start)
+        self.generated += 1
+        logger.debug("Vistas previas generadas para %s", sha256)
+        return paths
+
+    def ensure_asset(self, evidence_file: models.EvidenceFile, variant: str) -> Optional[str]:
+        """
+        Devuelve la ruta del derivado de una evidencia, generándolo si no existe.
+
+        Returns:
+            Optional[str]: None si no hay vista previa para este archivo.
+        """
+        if not evidence_file.file_hash or not self.supports(evidence_file.file_type):
+            return None
+        path = self.asset_path(evidence_file.file_hash, variant)
+        if os.path.exists(path):
+            return path
+        try:
+            return self.generate(evidence_file.file_hash, evidence_file.file_path, evidence_file.file_type).get(variant)
+        except Exception as e:
+            logger.error("No se pudo generar la vista previa de la evidencia %s: %s", evidence_file.file_id, e)
+            return None
+
+    # --- Mantenimiento ---
+
+    def prune_orphans(self, db: Session) -> int:
+        """
+        Elimina los derivados cuyo contenido ya no existe en `EvidenceBlob`.
+
+        Returns:
+            int: Número de archivos eliminados.
+        """
+        paths_by_hash: Dict[str, List[str]] = {}
+        for dirpath, _, filenames in os.walk(self.derived_dir):
+            for name in filenames:
+                paths_by_hash.setdefault(name.split(".", 1)[0], []).append(os.path.join(dirpath, name))
+
+        hashes = list(paths_by_hash)
+        referenced = set()
+        for i in range(0, len(hashes), 500):
+            referenced |= crud.evidence_blob.get_existing_hashes(db, hashes=hashes[i:i + 500])
+
+        removed = 0
+        for sha256, paths in paths_by_hash.items():
+            if sha256 in referenced:
+                continue
+            for path in paths:
+                try:
+                    os.remove(path)
+                    removed += 1
+                except FileNotFoundError:
+                    pass
+        logger.info(f"Vistas previas depuradas: {removed} archivo(s) huérfano(s) eliminado(s)")
+        return removed
+
+    def stats(self) -> Dict[str, int]:
+        """Devuelve el tamaño de la cola y los contadores de generación."""
+        return {
+            "queue_size": self._queue.qsize(),
+            "generated": self.generated,
+            "failed": self.failed,
+        }
+
+
+evidence_preview_service = EvidencePreviewService()
@@ -0,0 +1,220 @@
+"""
+Servicio de exportación en streaming.
+
+Convierte un iterable de filas en trozos de bytes CSV, JSON Lines, JSON (un array)
+o XML, opcionalmente comprimidos con gzip, a medida que se consumen. Combinado con una consulta con
+`yield_per` (cursor de servidor), la memoria usada no depende del número de
+filas exportadas.
+"""
+
+import csv
+import enum
+import io
+import json
+import os
+import zlib
+from datetime import date, datetime
+from typing import Any, Callable, Dict, Iterable, Iterator, Mapping, Optional, Sequence
+from xml.sax.saxutils import escape
+
+from fastapi.responses import StreamingResponse
+
+EXPORT_FORMATS = ("csv", "jsonl", "json", "xml")
+
+_MEDIA_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "jsonl": "application/x-ndjson",
+    "json": "application/json",
+    "xml": "application/xml",
+}
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, enum.Enum):
+        return value.value
+    return str(value)
+
+
+def _csv_value(value: Any) -> Any:
+    if value is None:
+        return ""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, ensure_ascii=False, default=_json_default)
+    return value
+
+
+def _xml_value(value: Any) -> str:
+    return escape(str(_csv_value(value)))
+
+
+class ExportService:
+    """
+    Servicio para serializar filas en streaming (CSV, JSONL, JSON o XML, con gzip opcional).
+    """
+
+    def __init__(self, chunk_size: int = 64 * 1024):
+        self.chunk_size = chunk_size
+
+    def iter_encoded(
+        self,
+        rows: Iterable[Mapping[str, Any]],
+        *,
+        columns: Sequence[str],
+        fmt: str,
+        xml_root: str = "rows",
+        xml_row: str = "row",
+    ) -> Iterator[bytes]:
+        """
+        Serializa las filas y emite trozos de unos `chunk_size` bytes.
+
+        En JSON se escribe un array con un objeto por línea; en XML, un elemento
+        `xml_row` por fila dentro de `xml_root`. En ambos casos la apertura y el
+        cierre se escriben por separado, sin construir el documento completo.
+
+        Raises:
+            ValueError: Si el formato no es soportado.
+        """
+        if fmt not in EXPORT_FORMATS:
+            raise ValueError(f"Formato de exportación no soportado: '{fmt}'.")
+
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        if fmt == "csv":
+            writer.writerow(columns)
+        elif fmt == "json":
+            buffer.write("[")
+        elif fmt == "xml":
+            buffer.write(f'<?xml version="1.0" encoding="utf-8"?>\n<{xml_root}>\n')
+
+        separator = "\n"
+        for row in rows:
+            if fmt == "csv":
+                writer.writerow([_csv_value(row.get(c)) for c in columns])
+            elif fmt == "xml":
+                buffer.write(f"  <{xml_row}>\n")
+                for c in columns:
+                    buffer.write(f"    <{c}>{_xml_value(row.get(c))}</{c}>\n")
+                buffer.write(f"  </{xml_row}>\n")
+            else:
+                line = json.dumps({c: row.get(c) for c in columns}, ensure_ascii=False, default=_json_default)
+                if fmt == "json":
+                    buffer.write(separator + "  " + line)
+                    separator = ",\n"
+                else:
+                    buffer.write(line + "\n")
+            if buffer.tell() >= self.chunk_size:
+                yield buffer.getvalue().encode("utf-8")
+                buffer.seek(0)
+                buffer.truncate()
+
+        if fmt == "json":
+            buffer.write("\n]\n")
+        elif fmt == "xml":
+            buffer.write(f"</{xml_root}>\n")
+        if buffer.tell():
+            yield buffer.getvalue().encode("utf-8")
+
+    @staticmethod
+    def iter_gzip(chunks: Iterable[bytes]) -> Iterator[bytes]:
+        """Comprime un flujo de trozos de bytes en formato gzip sin acumularlo en memoria."""
+        compressor = zlib.compressobj(wbits=31)
+        for chunk in chunks:
+            compressed = compressor.compress(chunk)
+            if compressed:
+                yield compressed
+        yield compressor.flush()
+
+    def write_file(
+        self,
+        rows: Iterable[Mapping[str, Any]],
+        *,
+        columns: Sequence[str],
+        fmt: str,
+        path: str,
+        compress: bool = False,
+    ) -> Dict[str, int]:
+        """
+        Escribe la exportación en `path` trozo a trozo.
+
+        El contenido se escribe primero en `path + ".part"` y se renombra al
+        terminar, de modo que nunca queda visible un archivo a medias.
+
+        Returns:
+            Dict[str, int]: Filas exportadas (`rows`) y tamaño del archivo en bytes (`size`).
+        """
+        counter = {"rows": 0}
+
+        def counted() -> Iterator[Mapping[str, Any]]:
+            for row in rows:
+                counter["rows"] += 1
+                yield row
+
+        chunks = self.iter_encoded(counted(), columns=columns, fmt=fmt)
+        partial = f"{path}.part"
+        try:
+            with open(partial, "wb") as f:
+                for chunk in self.iter_gzip(chunks) if compress else chunks:
+                    f.write(chunk)
+            os.replace(partial, path)
+        except BaseException:
+            if os.path.exists(partial):
+                os.remove(partial)
+            raise
+        return {"rows": counter["rows"], "size": os.path.getsize(path)}
+
+    @staticmethod
+    def media_type(fmt: str, compress: bool = False) -> str:
+        """Devuelve el tipo MIME de una exportación."""
+        return "application/gzip" if compress else _MEDIA_TYPES[fmt]
+
+    def streaming_response(
+        self,
+        rows: Iterable[Mapping[str, Any]],
+        *,
+        columns: Sequence[str],
+        fmt: str,
+        filename: str,
+        compress: bool = False,
+        on_close: Optional[Callable[[], None]] = None,
+        xml_root: str = "rows",
+        xml_row: str = "row",
+    ) -> StreamingResponse:
+        """
+        Crea una StreamingResponse que serializa las filas a medida que se envían.
+
+        Args:
+            rows: Filas a exportar (diccionarios o RowMapping).
+            columns: Columnas a incluir, en orden.
+            fmt: 'csv', 'jsonl', 'json' o 'xml'.
+            filename: Nombre base del archivo descargado, sin extensión.
+            compress: Si es True, el contenido se envía comprimido con gzip.
+            on_close: Función a llamar cuando termina (o se interrumpe) el envío.
+            xml_root: Elemento raíz del documento XML.
+            xml_row: Elemento de cada fila en XML.
+        """
+        if fmt not in EXPORT_FORMATS:
+            raise ValueError(f"Formato de exportación no soportado: '{fmt}'.")
+
+        def body() -> Iterator[bytes]:
+            try:
+                chunks = self.iter_encoded(rows, columns=columns, fmt=fmt, xml_root=xml_root, xml_row=xml_row)
+                yield from (self.iter_gzip(chunks) if compress else chunks)
+            finally:
+                if on_close is not None:
+                    on_close()
+
+        extension = f"{fmt}.gz" if compress else fmt
+        return StreamingResponse(
+            body(),
+            media_type=self.media_type(fmt, compress),
+            headers={"Content-Disposition": f"attachment; filename={filename}.{extension}"},
+        )
+
+
+export_service = ExportService()
@@ -0,0 +1,116 @@
+"""
+Servicio de entrega de archivos de evidencia.
+
+Construye la respuesta de descarga una vez que el endpoint ha autorizado el
+acceso:
+
+- ETag fuerte a partir del SHA-256 del contenido y respuesta 304 si coincide
+  con `If-None-Match`, de modo que una evidencia ya descargada no se reenvía;
+- peticiones `Range` (y `If-Range`) para reanudar descargas o paginar PDFs
+  grandes, resueltas por `FileResponse`;
+- si `EVIDENCE_X_ACCEL_REDIRECT_PREFIX` está definido, una respuesta vacía con
+  `X-Accel-Redirect` para que nginx envíe los bytes con sendfile (y resuelva él
+  mismo los rangos) sin pasar por Python.
+"""
+
+import hashlib
+import os
+import stat
+from typing import Optional
+from urllib.parse import quote
+
+from fastapi import HTTPException, Request, Response, status
+from fastapi.responses import FileResponse
+
+from incident_api.core.config import settings
+from incident_api.services.file_storage_service import file_storage_service
+
+
+class FileDeliveryService:
+    """
+    Servicio para responder a las descargas de archivos de evidencia.
+    """
+
+    @staticmethod
+    def _etag(stat_result: os.stat_result, content_hash: Optional[str]) -> str:
+        """ETag fuerte si se conoce el hash del contenido; si no, uno débil a partir de fecha y tamaño."""
+        if content_hash:
+            return f'"{content_hash}"'
+        base = f"{stat_result.st_mtime_ns}-{stat_result.st_size}"
+        return f'W/"{hashlib.md5(base.encode(), usedforsecurity=False).hexdigest()}"'
+
+    @staticmethod
+    def _not_modified(request: Request, etag: str) -> bool:
+        """Indica si alguna de las etiquetas de `If-None-Match` coincide (comparación débil, RFC 9110)."""
+        if_none_match = request.headers.get("if-none-match")
+        if not if_none_match:
+            return False
+        if if_none_match.strip() == "*":
+            return True
+        opaque = etag.removeprefix("W/")
+        return any(tag.strip().removeprefix("W/") == opaque for tag in if_none_match.split(","))
+
+    @staticmethod
+    def _content_disposition(disposition: str, filename: Optional[str]) -> str:
+        if not filename:
+            return disposition
+        quoted = quote(filename)
+        if quoted != filename:
+            return f"{disposition}; filename*=utf-8''{quoted}"
+        return f'{disposition}; filename="{filename}"'
+
+    def file_response(
+        self,
+        request: Request,
+        path: str,
+        *,
+        media_type: str,
+        filename: Optional[str] = None,
+        content_hash: Optional[str] = None,
+        disposition: str = "attachment",
+        cache_control: Optional[str] = None,
+    ) -> Response:
+        """
+        Devuelve la respuesta de descarga de un archivo ya autorizado.
+
+        Args:
+            request: Petición, para las cabeceras condicionales.
+            path: Ruta del archivo en disco.
+            media_type: Tipo MIME con el que se sirve.
+            filename: Nombre para `Content-Disposition`.
+            content_hash: SHA-256 del contenido, para el ETag fuerte.
+            disposition: "attachment" o "inline".
+            cache_control: Cabecera `Cache-Control`; por defecto, `EVIDENCE_CACHE_MAX_AGE`.
+
+        Raises:
+            HTTPException: 404 si el archivo no existe en disco.
+        """
+        try:
+            stat_result = os.stat(path)
+        except (FileNotFoundError, NotADirectoryError):
+            stat_result = None
+        if stat_result is None or not stat.S_ISREG(stat_result.st_mode):
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Archivo no encontrado en el sistema de archivos"
+            )
+
+        etag = self._etag(stat_result, content_hash or file_storage_service.blob_hash(path))
+        headers = {
+            "ETag": etag,
+            "Cache-Control": cache_control or f"private, max-age={settings.EVIDENCE_CACHE_MAX_AGE}",
+        }
+        if self._not_modified(request, etag):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+        headers["Content-Disposition"] = self._content_disposition(disposition, filename)
+        prefix = settings.EVIDENCE_X_ACCEL_REDIRECT_PREFIX
+        relative_path = file_storage_service.relative_path(path) if prefix else None
+        if relative_path is not None:
+            headers["X-Accel-Redirect"] = prefix.rstrip("/") + "/" + quote(relative_path)
+            return Response(media_type=media_type, headers=headers)
+
+        return FileResponse(path, media_type=media_type, headers=headers, stat_result=stat_result)
+
+
+file_delivery_service = FileDeliveryService()
@@ -1,99 +1,345 @@
 """
 Servicio para el manejo de almacenamiento de archivos.
+
+Los archivos de evidencia se copian desde el archivo temporal de la subida a un
+`.part` del almacén en trozos de `UPLOAD_CHUNK_SIZE_KB`, calculando su SHA-256 en
+la misma pasada. En la
+ruta asíncrona cada copia se ejecuta en un hilo del pool (hashlib libera el GIL
+con trozos grandes), de modo que el event loop no se bloquea y los archivos de
+una misma petición se procesan en paralelo.
+
+El almacenamiento es direccionado por contenido: cada archivo se guarda una sola
+vez en `uploads/sha256/ab/cd/<sha256>` y las evidencias que lo comparten apuntan
+a la misma ruta. Si el contenido ya estaba almacenado, el `.part` se descarta en
+lugar de renombrarse. Los recuentos de referencias viven en `EvidenceBlob` y el
+archivo se elimina cuando la última evidencia que lo usa se borra (directamente
+o en cascada con su incidente) y la transacción se confirma, salvo que una
+subida lo haya reutilizado hace menos de `REUSE_GRACE_SECONDS`; en ese caso lo
+eliminará `prune_orphan_blobs` si sigue sin referencias.
 """
 
+import asyncio
+import hashlib
+import logging
 import os
-import shutil
+import time
 import uuid
-import hashlib
-from typing import List
+from typing import Iterable, List, Optional
+
+import anyio
 from fastapi import HTTPException, status, UploadFile
+from sqlalchemy import event
+from sqlalchemy.orm import Session
 
+from incident_api import crud, models
 from incident_api.core.config import settings
-import logging
+from incident_api.core.metrics import (
+    evidence_upload_bytes_total,
+    evidence_upload_deduplicated_total,
+    evidence_upload_duration_seconds,
+    evidence_upload_throughput_bytes,
+)
+from incident_api.crud.crud_evidence_file import ORPHANED_BLOBS_KEY
 
 UPLOADS_DIR = "uploads"
+BLOBS_SUBDIR = "sha256"
+# Margen para que una subida que reutiliza un contenido confirme su `EvidenceBlob`
+REUSE_GRACE_SECONDS = 300
 logger = logging.getLogger(__name__)
 
 
+@event.listens_for(Session, "after_commit")
+def _purge_orphaned_blobs(session: Session) -> None:
+    """Elimina del disco los contenidos que la transacción confirmada dejó sin referencias."""
+    orphaned = session.info.pop(ORPHANED_BLOBS_KEY, None)
+    if not orphaned:
+        return
+    # Una subida concurrente (o un savepoint revertido) puede haber vuelto a
+    # referenciar el contenido; la sesión ya no admite SQL en after_commit
+    with Session(bind=session.get_bind()) as check_session:
+        still_used = crud.evidence_blob.get_existing_hashes(
+            check_session, hashes=[os.path.basename(path) for path in orphaned]
+        )
+    cutoff = time.time() - REUSE_GRACE_SECONDS
+    removed = 0
+    for path in orphaned:
+        if os.path.basename(path) in still_used:
+            continue
+        try:
+            if os.path.getmtime(path) >= cutoff:
+                # Reutilizado por una subida aún sin confirmar; queda para prune_orphan_blobs
+                continue
+            os.remove(path)
+            removed += 1
+        except FileNotFoundError:
+            pass
+    logger.info(f"{removed} contenido(s) de evidencia eliminado(s)")
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_orphaned_blobs(session: Session) -> None:
+    """Si la transacción se revierte, no se borra ningún archivo."""
+    session.info.pop(ORPHANED_BLOBS_KEY, None)
+
+
 class FileStorageService:
     """
     Servicio para manejar el almacenamiento de archivos de evidencia.
     """
 
+    def __init__(self, chunk_size: Optional[int] = None, concurrency: Optional[int] = None):
+        self.chunk_size = chunk_size or settings.UPLOAD_CHUNK_SIZE_KB * 1024
+        self.concurrency = concurrency or settings.UPLOAD_CONCURRENCY
+
+    @staticmethod
+    def _validate_types(files: List[UploadFile]) -> None:
+        """Rechaza la subida completa si algún archivo no tiene un tipo permitido."""
+        allowed_types = set(settings.ALLOWED_FILE_MIME_TYPES.split(','))
+        for file in files:
+            if file.content_type not in allowed_types:
+                logger.warning(f"Tipo de archivo no permitido: {file.content_type} para {file.filename}")
+                raise HTTPException(
+                    status.HTTP_400_BAD_REQUEST,
+                    f"El tipo de archivo para '{file.filename}' no es válido.",
+                )
+
+    @staticmethod
+    def blob_path(sha256: str) -> str:
+        """Ruta del contenido con el hash dado: `uploads/sha256/ab/cd/<sha256>`."""
+        return os.path.join(UPLOADS_DIR, BLOBS_SUBDIR, sha256[:2], sha256[2:4], sha256)
+
+    @staticmethod
+    def blob_hash(path: str) -> Optional[str]:
+        """Devuelve el SHA-256 si `path` es un contenido del almacén, o None en otro caso."""
+        name = os.path.basename(path)
+        if len(name) != 64 or not all(c in "0123456789abcdef" for c in name):
+            return None
+        return name if os.path.realpath(path) == os.path.realpath(FileStorageService.blob_path(name)) else None
+
+    @staticmethod
+    def relative_path(path: str) -> Optional[str]:
+        """Ruta de `path` relativa a UPLOADS_DIR (con '/'), o None si está fuera."""
+        root = os.path.realpath(UPLOADS_DIR)
+        full_path = os.path.realpath(path)
+        if os.path.commonpath([root, full_path]) != root:
+            return None
+        return os.path.relpath(full_path, root).replace(os.sep, "/")
+
+    def _copy_to_part(self, file: UploadFile) -> tuple:
+        """
+        Copia el archivo subido a un `.part` del almacén calculando su SHA-256 y tamaño en la misma pasada.
+
+        El `.part` se crea en el mismo sistema de archivos que los contenidos para
+        que el renombrado final sea atómico; si la copia falla, se elimina.
+
+        Returns:
+            tuple: (ruta del `.part`, SHA-256, tamaño en bytes).
+
+        Raises:
+            HTTPException: 413 si el archivo supera MAX_FILE_SIZE_MB.
+        """
+        max_size_bytes = settings.MAX_FILE_SIZE_MB * 1024 * 1024
+        root = os.path.join(UPLOADS_DIR, BLOBS_SUBDIR)
+        os.makedirs(root, exist_ok=True)
+        part_location = os.path.join(root, f"{uuid.uuid4().hex}.part")
+        sha256_hash = hashlib.sha256()
+        file_size = 0
+        try:
+            with open(part_location, "wb") as file_object:
+                while chunk := file.file.read(self.chunk_size):
+                    file_size += len(chunk)
+                    if file_size > max_size_bytes:
+                        logger.warning(f"Archivo demasiado grande: {file.filename}")
+                        raise HTTPException(
+                            status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                            f"El archivo '{file.filename}' excede el tamaño máximo de {settings.MAX_FILE_SIZE_MB} MB.",
+                        )
+                    sha256_hash.update(chunk)
+                    file_object.write(chunk)
+        except BaseException:
+            os.remove(part_location)
+            raise
+        return part_location, sha256_hash.hexdigest(), file_size
+
+    @staticmethod
+    def _touch_existing_blob(file_location: str) -> bool:
+        """
+        Indica si el contenido ya está almacenado y, si lo está, renueva su fecha
+        de modificación para que `prune_orphan_blobs` no lo borre mientras la
+        subida que lo reutiliza aún no ha confirmado su `EvidenceBlob`.
+        """
+        try:
+            os.utime(file_location)
+            return True
+        except FileNotFoundError:
+            return False
+
+    def _store_file(self, incident_id: Optional[int], file: UploadFile) -> dict:
+        """
+        Guarda un archivo subido en el almacén direccionado por contenido.
+
+        El archivo se copia a un `.part` mientras se calcula el SHA-256; si el
+        contenido ya estaba almacenado el `.part` se descarta y, si no, se renombra
+        a su ruta final. Es bloqueante; en la ruta asíncrona se ejecuta en un hilo
+        del pool.
+
+        Raises:
+            HTTPException: 413 si el archivo supera MAX_FILE_SIZE_MB.
+        """
+        logger.debug(f"Procesando archivo: {file.filename}, Tipo: {file.content_type}")
+        start = time.perf_counter()
+        try:
+            part_location, file_hex_hash, file_size = self._copy_to_part(file)
+            file_location = self.blob_path(file_hex_hash)
+            try:
+                deduplicated = self._touch_existing_blob(file_location)
+                if deduplicated:
+                    os.remove(part_location)
+                else:
+                    os.makedirs(os.path.dirname(file_location), exist_ok=True)
+                    # Dos subidas simultáneas del mismo contenido escriben lo mismo; gana cualquiera
+                    os.replace(part_location, file_location)
+            except BaseException:
+                if os.path.exists(part_location):
+                    os.remove(part_location)
+                raise
+        except BaseException as e:
+            rejected = isinstance(e, HTTPException)
+            evidence_upload_duration_seconds.labels(outcome="rejected" if rejected else "error").observe(
+                time.perf_counter() - start
+            )
+            if not rejected:
+                logger.error(f"Error al guardar archivo {file.filename}: {str(e)}", exc_info=True)
+            raise
+        finally:
+            file.file.close()
+
+        duration = time.perf_counter() - start
+        throughput = file_size / duration if duration > 0 else 0.0
+        evidence_upload_duration_seconds.labels(outcome="success").observe(duration)
+        evidence_upload_bytes_total.inc(file_size)
+        evidence_upload_throughput_bytes.observe(throughput)
+        if deduplicated:
+            evidence_upload_deduplicated_total.inc()
+
+        logger.info(
+            f"Archivo guardado: {file.filename} (incidente {incident_id or 'nuevo'}) -> {file_location}, "
+            f"Hash: {file_hex_hash}, Tamaño: {file_size} bytes, "
+            f"{'duplicado, sin escritura' if deduplicated else f'Velocidad: {throughput / 1e6:.1f} MB/s'}"
+        )
+        return {
+            'file_path': file_location,
+            'file_name': file.filename,
+            'file_type': file.content_type,
+            'file_size': file_size,
+            'file_hash': file_hex_hash,
+        }
+
     def save_evidence_files(
         self, incident_id: int, files: List[UploadFile]
     ) -> List[dict]:
         """
-        Guarda múltiples archivos de evidencia, calcula su hash y devuelve la información.
+        Guarda múltiples archivos de evidencia de forma secuencial y bloqueante.
+
+        Para código síncrono; desde un endpoint asíncrono usar `asave_evidence_files`.
 
         Returns:
             Lista de diccionarios con info de cada archivo:
             {'file_path', 'file_name', 'file_type', 'file_size', 'file_hash'}
         """
         logger.debug(f"Iniciando guardado de {len(files)} archivo(s) para incidente {incident_id}")
+        self._validate_types(files)
 
-        os.makedirs(UPLOADS_DIR, exist_ok=True)
-        allowed_types = set(settings.ALLOWED_FILE_MIME_TYPES.split(','))
-        max_size_bytes = settings.MAX_FILE_SIZE_MB * 1024 * 1024
+        return [self._store_file(incident_id, file) for file in files]
 
-        saved_files = []
+    async def asave_evidence_files(
+        self, incident_id: Optional[int], files: List[UploadFile]
+    ) -> List[dict]:
+        """
+        Guarda múltiples archivos de evidencia en paralelo sin bloquear el event loop.
 
-        for file in files:
-            logger.debug(f"Procesando archivo: {file.filename}, Tipo: {file.content_type}")
+        `incident_id` solo se usa en los logs; es None si los archivos se guardan
+        antes de crear el incidente.
 
-            # Validar tipo de archivo
-            if file.content_type not in allowed_types:
-                logger.warning(f"Tipo de archivo no permitido: {file.content_type} para {file.filename}")
-                raise HTTPException(
-                    status.HTTP_400_BAD_REQUEST,
-                    f"El tipo de archivo para '{file.filename}' no es válido.",
-                )
+        Cada archivo se copia y se hashea en un hilo del pool; como máximo
+        `UPLOAD_CONCURRENCY` a la vez. Si alguno falla se propaga el error (el
+        de validación, si lo hay); los contenidos ya guardados pueden estar
+        compartidos, así que no se borran aquí sino con `prune_orphan_blobs`.
 
-            # Generar nombre seguro
-            _, extension = os.path.splitext(file.filename)
-            extension = extension.lower()
-            safe_filename = f"{uuid.uuid4()}{extension}"
-            file_location = os.path.join(UPLOADS_DIR, f"{incident_id}_{safe_filename}")
+        Returns:
+            Lista de diccionarios con info de cada archivo, en el orden recibido:
+            {'file_path', 'file_name', 'file_type', 'file_size', 'file_hash'}
+        """
+        logger.debug(f"Iniciando guardado de {len(files)} archivo(s) para incidente {incident_id or 'nuevo'}")
+        self._validate_types(files)
 
-            sha256_hash = hashlib.sha256()
-            file_size = 0
+        limiter = anyio.CapacityLimiter(self.concurrency)
+        results = await asyncio.gather(
+            *(anyio.to_thread.run_sync(self._store_file, incident_id, file, limiter=limiter) for file in files),
+            return_exceptions=True,
+        )
+        errors = [result for result in results if isinstance(result, BaseException)]
+        if errors:
+            raise next((e for e in errors if isinstance(e, HTTPException)), errors[0])
+        return list(results)
 
-            try:
-                with open(file_location, "wb") as file_object:
-                    while chunk := file.file.read(4096): # Leer en chunks de 4KB
-                        if file_size + len(chunk) > max_size_bytes:
-                            os.remove(file_location) # Eliminar archivo parcial
-                            logger.warning(f"Archivo demasiado grande: {file.filename}")
-                            raise HTTPException(
-                                status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
-                                f"El archivo '{file.filename}' excede el tamaño máximo de {settings.MAX_FILE_SIZE_MB} MB.",
-                            )
-                        file_object.write(chunk)
-                        sha256_hash.update(chunk)
-                        file_size += len(chunk)
-
-                file_hex_hash = sha256_hash.hexdigest()
-                logger.info(f"Archivo guardado: {file.filename} -> {file_location}, Hash: {file_hex_hash}")
-
-                saved_files.append({
-                    'file_path': file_location,
-                    'file_name': file.filename,
-                    'file_type': file.content_type,
-                    'file_size': file_size,
-                    'file_hash': file_hex_hash
-                })
-
-            except Exception as e:
-                logger.error(f"Error al guardar archivo {file.filename}: {str(e)}", exc_info=True)
-                # Asegurarse de que el archivo parcial se elimine si hay un error
-                if os.path.exists(file_location):
-                    os.remove(file_location)
-                raise
-            finally:
-                file.file.close()
+    def delete_evidence_files(self, db: Session, evidence_files: Iterable[models.EvidenceFile]) -> List[str]:
+        """
+        Elimina registros de evidencia; los contenidos sin referencias se borran al confirmar la transacción.
+
+        Si la transacción se revierte, no se borra ningún archivo. Los borrados en
+        cascada (p. ej. al eliminar un incidente) siguen el mismo camino.
 
-        return saved_files
+        Returns:
+            List[str]: Rutas de los contenidos que se eliminarán.
+        """
+        return crud.evidence_file.remove_many(db, db_objs=list(evidence_files))
+
+    def prune_orphan_blobs(self, db: Session, min_age_seconds: int = 3600) -> int:
+        """
+        Elimina del almacén los archivos sin fila en `EvidenceBlob`.
+
+        Quedan huérfanos los contenidos de subidas cuya transacción falló y los
+        `.part` de escrituras interrumpidas. Solo se tocan archivos sin fila y
+        con más de `min_age_seconds` de antigüedad: una subida que reutiliza un
+        contenido renueva su fecha, así que el margen debe superar lo que tarda
+        una petición en confirmar su `EvidenceBlob`. La fecha se vuelve a
+        comprobar justo antes de borrar cada archivo.
+
+        Returns:
+            int: Número de archivos eliminados.
+        """
+        root = os.path.join(UPLOADS_DIR, BLOBS_SUBDIR)
+        cutoff = time.time() - min_age_seconds
+        candidates = []
+        for dirpath, _, filenames in os.walk(root):
+            for name in filenames:
+                path = os.path.join(dirpath, name)
+                try:
+                    if os.path.getmtime(path) < cutoff:
+                        candidates.append(path)
+                except FileNotFoundError:
+                    continue
+
+        referenced = set()
+        hashes = [os.path.basename(path) for path in candidates if not path.endswith(".part")]
+        for i in range(0, len(hashes), 500):
+            referenced |= crud.evidence_blob.get_existing_hashes(db, hashes=hashes[i:i + 500])
+
+        removed = 0
+        for path in candidates:
+            if os.path.basename(path) in referenced:
+                continue
+            try:
+                if os.path.getmtime(path) >= cutoff:
+                    # Reutilizado por una subida en curso desde que se listó
+                    continue
+                os.remove(path)
+                removed += 1
+            except FileNotFoundError:
+                pass
+        logger.info(f"Almacén de evidencias depurado: {removed} archivo(s) huérfano(s) eliminado(s)")
+        return removed
 
 
-file_storage_service = FileStorageService()
\ No newline at end of file
+file_storage_service = FileStorageService()
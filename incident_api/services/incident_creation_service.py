@@ -1,5 +1,14 @@
 """
 Servicio para la lógica de negocio relacionada con la creación de incidentes.
+
+La creación se hace en tres pasos para que ninguna transacción quede abierta
+mientras se espera a algo externo:
+
+1. Los archivos de evidencia se guardan en disco, sin transacción.
+2. El incidente, sus evidencias, la bitácora, el historial y el vínculo de
+   duplicado se insertan en una única unidad de trabajo y se confirman.
+3. El enriquecimiento con IA se espera fuera de cualquier transacción de
+   escritura y su resultado se guarda en una transacción corta propia.
 """
 
 from typing import List, Optional
@@ -10,12 +19,16 @@ from pydantic import ValidationError
 import logging
 
 from incident_api import crud, models, schemas
+from incident_api.db.unit_of_work import unit_of_work
 from incident_api.schemas import IncidentCreateFromString
 from incident_api.services.incident_analysis_service import incident_analysis_service
 from incident_api.services.ai_settings_service import get_active_settings
+from incident_api.services.evidence_preview_service import evidence_preview_service
 from incident_api.services.file_storage_service import file_storage_service
 from incident_api.services.log_service import log_service
 from incident_api.services.history_service import history_service
+from incident_api.services.duplicate_detection_service import duplicate_detection_service
+from incident_api.services.metrics_service import metrics_service
 
 logger = logging.getLogger(__name__)
 
@@ -58,28 +71,47 @@ class IncidentCreationService:
     ) -> models.Incident:
         """
         Crea un nuevo incidente coordinando las operaciones necesarias.
+
+        La sesión no debe estar dentro de una unidad de trabajo: el incidente se
+        confirma antes de llamar al LLM (ver el docstring del módulo).
         """
         logger.info(f"Iniciando creación de incidente - Usuario: {user.user_id}, Título: {incident_in.summary[:50]}...")
         start_time = datetime.now(timezone.utc)
 
         try:
-            # Crear el incidente en la base de datos
-            new_incident = self._create_incident_record(db, incident_in, user)
-            logger.info(f"Incidente creado en BD - ID: {new_incident.incident_id}, Ticket: {new_incident.ticket_id}")
-
-            # Manejar la carga de archivos de evidencia
+            # Guardar los archivos de evidencia antes de abrir la transacción
             if evidence_files:
                 logger.info(f"Procesando {len(evidence_files)} archivo(s) de evidencia")
-                self._handle_evidence_upload(
-                    db, incident=new_incident, files=evidence_files, uploader=user
-                )
-                logger.info("Archivos de evidencia procesados exitosamente")
+                saved_files = await file_storage_service.asave_evidence_files(None, evidence_files)
             else:
                 logger.debug("No se proporcionaron archivos de evidencia")
+                saved_files = []
+
+            with unit_of_work(db):
+                # Crear el incidente en la base de datos
+                new_incident = self._create_incident_record(db, incident_in, user)
+                logger.info(f"Incidente creado en BD - ID: {new_incident.incident_id}, Ticket: {new_incident.ticket_id}")
 
-            # Registrar la creación en la bitácora y el historial
-            self._log_incident_creation(db, new_incident, user)
-            logger.debug("Entrada de bitácora y historial creados para el incidente")
+                evidence = []
+                if saved_files:
+                    evidence = self._create_evidence_records(
+                        db, incident=new_incident, saved_files=saved_files, uploader=user
+                    )
+                    logger.info("Archivos de evidencia procesados exitosamente")
+
+                # Registrar la creación en la bitácora y el historial
+                self._log_incident_creation(db, new_incident, user)
+                logger.debug("Entrada de bitácora y historial creados para el incidente")
+
+                # Vincular a un incidente padre si es un duplicado probable
+                self._link_duplicate(db, new_incident, user)
+
+                # Invalidar las métricas materializadas del reportante, asignado y categoría
+                metrics_service.mark_incident_changed(db, new_incident, extra_user_ids=[user.user_id])
+
+            # Miniaturas y vistas previas en segundo plano, ya con las evidencias confirmadas
+            if evidence:
+                evidence_preview_service.enqueue(evidence)
 
             # Enriquecer el incidente con IA
             await self._enrich_incident_with_ai(db, new_incident)
@@ -127,10 +159,58 @@ class IncidentCreationService:
             )
         )
 
+    def _link_duplicate(
+        self, db: Session, incident: models.Incident, user: models.User
+    ):
+        """
+        Vincula el incidente a su incidente padre si es un duplicado probable.
+
+        Si no se encuentra un padre, el incidente se registra en el índice de similitud
+        para que los reportes posteriores puedan vincularse a él.
+        """
+        try:
+            match = duplicate_detection_service.find_parent(db, incident)
+        except Exception as e:
+            logger.error(f"Fallo en la detección de duplicados para el incidente {incident.incident_id}: {e}")
+            return
+
+        if not match:
+            duplicate_detection_service.register(incident)
+            return
+
+        parent, score = match
+        crud.incident.update(
+            db,
+            db_obj=incident,
+            obj_in={"parent_incident_id": parent.incident_id, "duplicate_score": round(score, 4)},
+        )
+        log_service.create_incident_log(
+            db, incident.incident_id, user.user_id,
+            "Posible Duplicado",
+            f"Incidente vinculado a {parent.ticket_id} (similitud estimada {score:.0%}).",
+        )
+        logger.info(
+            f"Incidente {incident.incident_id} marcado como duplicado de {parent.incident_id} (similitud {score:.2f})"
+        )
+
     async def _enrich_incident_with_ai(self, db: Session, incident: models.Incident):
         """
         Enriquecer el incidente con datos de IA.
+
+        Si el incidente es un duplicado y su padre ya fue enriquecido, se reutiliza
+        ese resultado en lugar de invocar de nuevo al LLM.
+
+        Se llama con el incidente ya confirmado; el resultado se guarda con su
+        propio commit y, si algo falla, el incidente se queda sin enriquecer.
         """
+        parent = incident.parent_incident if incident.parent_incident_id else None
+        if parent is not None and parent.ai_recommendations:
+            crud.incident.update(db, db_obj=incident, obj_in={"ai_recommendations": parent.ai_recommendations})
+            logger.info(
+                f"Incidente {incident.incident_id} reutiliza el enriquecimiento de IA del incidente {parent.incident_id}."
+            )
+            return
+
         try:
             ai_settings = get_active_settings(db)
             enrichment_data = await incident_analysis_service.get_incident_enrichment(
@@ -140,35 +220,36 @@ class IncidentCreationService:
                 crud.incident.update(db, db_obj=incident, obj_in={"ai_recommendations": enrichment_data})
                 logger.info(f"Incidente {incident.incident_id} enriquecido exitosamente por la IA.")
         except Exception as e:
+            # Si falló el commit del resultado, la sesión queda pendiente de rollback
+            if not db.is_active:
+                db.rollback()
             logger.error(f"Fallo en el enriquecimiento por IA para el incidente {incident.incident_id}: {e}")
 
-    def _handle_evidence_upload(
+    def _create_evidence_records(
         self,
         db: Session,
         incident: models.Incident,
-        files: List[UploadFile],
+        saved_files: List[dict],
         uploader: models.User,
-    ):
-        """Maneja de forma segura la validación y guardado de archivos de evidencia."""
-        logger.debug(f"Iniciando procesamiento de {len(files)} archivo(s) para incidente {incident.incident_id}")
-
-        saved_files = file_storage_service.save_evidence_files(incident.incident_id, files)
-
-        for file_info in saved_files:
-            evidence_in = schemas.EvidenceFileCreate(
+    ) -> List[models.EvidenceFile]:
+        """Crea los registros de evidencia de los archivos ya guardados por `file_storage_service`."""
+        evidence_in = [
+            schemas.EvidenceFileCreate(
                 file_name=file_info['file_name'],
                 file_type=file_info['file_type'],
                 file_size_bytes=file_info['file_size'],
                 file_hash=file_info['file_hash'],
             )
-            crud.evidence_file.create_with_incident_and_uploader(
-                db,
-                obj_in=evidence_in,
-                incident_id=incident.incident_id,
-                uploader_id=uploader.user_id,
-                file_path=file_info['file_path'],
-            )
-            logger.debug(f"Registro de evidencia creado en BD para archivo: {file_info['file_name']}")
-
+            for file_info in saved_files
+        ]
+        evidence = crud.evidence_file.create_many_with_incident_and_uploader(
+            db,
+            objs_in=evidence_in,
+            file_paths=[file_info['file_path'] for file_info in saved_files],
+            incident_id=incident.incident_id,
+            uploader_id=uploader.user_id,
+        )
+        logger.debug(f"{len(evidence_in)} registro(s) de evidencia creados en BD para incidente {incident.incident_id}")
+        return evidence
 
 incident_creation_service = IncidentCreationService()
@@ -2,21 +2,58 @@
 Servicio para la lógica de negocio relacionada con los incidentes.
 """
 
-from typing import List, Optional, Dict, Any
+from typing import Callable, List, Optional, Dict, Any, Tuple
 from sqlalchemy.orm import Session
 from fastapi import HTTPException, status, UploadFile
-from datetime import datetime, timezone
+from fastapi.responses import StreamingResponse
+from datetime import datetime, timedelta, timezone
+import os
+import uuid
 
 from incident_api import crud, models, schemas
-from incident_api.models import User, Incident, IncidentStatus
+from incident_api.core.config import settings
+from incident_api.db.unit_of_work import commit_or_flush
+from incident_api.models import User, Incident, IncidentStatus, UserRole
 from incident_api.services.change_logging_service import change_logging_service
 from incident_api.services.audit_service import audit_service
+from incident_api.services.duplicate_detection_service import duplicate_detection_service
+from incident_api.services.metrics_service import metrics_service
+from incident_api.services.export_service import export_service
+from incident_api.services.task_service import task_service
 from incident_api.api.dependencies import validate_status_change_permission
 from incident_api.schemas.graph import GraphNode, GraphEdge
 import logging
 
 logger = logging.getLogger(__name__)
 
+INCIDENT_EXPORT_COLUMNS = (
+    "incident_id",
+    "ticket_id",
+    "summary",
+    "status",
+    "severity",
+    "is_active",
+    "category",
+    "incident_type",
+    "attack_vector",
+    "asset",
+    "other_asset_location",
+    "reported_by",
+    "assigned_to",
+    "assigned_group",
+    "parent_incident_id",
+    "total_impact",
+    "discovery_time",
+    "created_at",
+    "updated_at",
+    "resolved_at",
+)
+
+INCIDENT_EXPORT_KIND = "incident_export"
+CLOSURE_EXPORT_KIND = "closure_reports"
+# Trabajos cuyo archivo se deja en EXPORTS_DIR y caduca con EXPORT_RETENTION_DAYS
+EXPORT_JOB_KINDS = (INCIDENT_EXPORT_KIND, CLOSURE_EXPORT_KIND)
+
 
 class IncidentService:
     """
@@ -30,9 +67,11 @@ class IncidentService:
         return crud.incident.get(db, id=incident_id)
 
     def get_all_incidents(
-        self, db: Session, skip: int = 0, limit: int = 100
+        self, db: Session, skip: int = 0, limit: int = 100, filters: Optional[schemas.IncidentFilters] = None
     ) -> List[models.Incident]:
-        """Obtiene una lista de todos los incidentes con paginación."""
+        """Obtiene una lista de incidentes, opcionalmente filtrada, con paginación."""
+        if filters is not None and filters.model_dump(exclude_none=True):
+            return crud.incident.get_multi_with_filters(db, filters=filters, skip=skip, limit=limit)
         return crud.incident.get_multi(db, skip=skip, limit=limit)
 
     def update_incident(
@@ -57,6 +96,12 @@ class IncidentService:
             total_impact = (conf or 0) + (integ or 0) + (avail or 0)
             update_data['total_impact'] = total_impact
 
+        if "parent_incident_id" in update_data:
+            self._validate_parent(db, incident, update_data["parent_incident_id"])
+            if update_data["parent_incident_id"] != incident.parent_incident_id:
+                # La puntuación solo describe el vínculo detectado automáticamente
+                update_data["duplicate_score"] = None
+
         if "status" in update_data:
             validate_status_change_permission(
                 user, incident, update_data["status"]
@@ -71,8 +116,49 @@ class IncidentService:
             db, original_incident=incident, updates=update_data, user=user
         )
 
-        return crud.incident.update(db, db_obj=incident, obj_in=update_data)
+        previous_assignee_id = incident.assigned_to_id
+        previous_category_id = incident.incident_category_id
+        updated_incident = crud.incident.update(db, db_obj=incident, obj_in=update_data)
+        metrics_service.mark_incident_changed(
+            db,
+            updated_incident,
+            previous_assignee_id=previous_assignee_id,
+            previous_category_id=previous_category_id,
+            extra_user_ids=[user.user_id],
+        )
+        return updated_incident
+
 
+    @staticmethod
+    def _validate_parent(db: Session, incident: models.Incident, parent_id: Optional[int]) -> None:
+        """
+        Comprueba que `parent_id` puede ser el incidente padre de `incident`.
+
+        Raises:
+            HTTPException: 400 si el padre no existe, es el propio incidente o
+            uno de sus descendientes (el vínculo formaría un ciclo).
+        """
+        if parent_id is None:
+            return
+        if parent_id == incident.incident_id:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Un incidente no puede ser su propio incidente padre.",
+            )
+        ancestor = crud.incident.get(db, id=parent_id)
+        if ancestor is None:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="El incidente padre no existe.")
+        seen = {parent_id}
+        while ancestor.parent_incident_id is not None and ancestor.parent_incident_id not in seen:
+            if ancestor.parent_incident_id == incident.incident_id:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="El incidente padre no puede ser un descendiente de este incidente.",
+                )
+            seen.add(ancestor.parent_incident_id)
+            ancestor = crud.incident.get(db, id=ancestor.parent_incident_id)
+            if ancestor is None:
+                break
 
     def add_manual_log_entry(
         self,
@@ -86,12 +172,14 @@ class IncidentService:
         log_entry = schemas.IncidentLogCreate(
             action="Entrada Manual", comments=log_in.comments
         )
-        return crud.incident_log.create_with_incident_and_user(
+        log = crud.incident_log.create_with_incident_and_user(
             db,
             obj_in=log_entry,
             incident_id=incident.incident_id,
             user_id=user.user_id,
         )
+        metrics_service.mark_user_changed(db, user.user_id)
+        return log
 
     def deactivate_incident(self, db: Session, incident_id: int, performed_by: Optional[models.User] = None) -> Optional[models.Incident]:
         """Desactiva un incidente (soft delete)."""
@@ -100,6 +188,8 @@ class IncidentService:
             return None
 
         deactivated_incident = crud.incident.deactivate(db, db_obj=incident)
+        duplicate_detection_service.forget(incident_id)
+        metrics_service.mark_incident_changed(db, deactivated_incident)
 
         return deactivated_incident
 
@@ -108,7 +198,9 @@ class IncidentService:
         incident = crud.incident.get(db, id=incident_id)
         if not incident:
             return None
-        return crud.incident.activate(db, db_obj=incident)
+        activated_incident = crud.incident.activate(db, db_obj=incident)
+        metrics_service.mark_incident_changed(db, activated_incident)
+        return activated_incident
 
     def get_related_entities(self, db: Session, incident_id: int) -> Dict[str, List[Any]]:
         """Obtiene entidades relacionadas a un incidente para expansión del grafo."""
@@ -148,5 +240,190 @@ class IncidentService:
 
         return {"nodes": nodes, "edges": edges}
 
+    # --- Exportación ---
+
+    @staticmethod
+    def _export_basename() -> str:
+        return f"incidents_{datetime.now(timezone.utc):%Y%m%dT%H%M%SZ}"
+
+    @staticmethod
+    def _exports_dir() -> str:
+        return settings.EXPORTS_DIR or os.path.join(settings.LOGS_DIR, "exports")
+
+    def export_incidents(
+        self, db: Session, *, fmt: str, compress: bool = False, filters: Optional[schemas.IncidentFilters] = None
+    ) -> StreamingResponse:
+        """
+        Exporta los incidentes filtrados como CSV o JSON Lines en streaming.
+
+        Raises:
+            ValueError: Si el formato no es soportado.
+        """
+        rows = crud.incident.stream_for_export(db, filters=filters)
+        # La sesión se reabre al consumir el cursor, después de que la dependencia la cierre
+        return export_service.streaming_response(
+            rows,
+            columns=INCIDENT_EXPORT_COLUMNS,
+            fmt=fmt,
+            filename=self._export_basename(),
+            compress=compress,
+            on_close=db.close,
+        )
+
+    def create_export_job(
+        self,
+        db: Session,
+        *,
+        fmt: str,
+        compress: bool,
+        filters: schemas.IncidentFilters,
+        requested_by: models.User,
+    ) -> models.Task:
+        """Registra un trabajo de exportación pendiente; `run_export_job` lo ejecuta."""
+        return task_service.create_task(
+            db,
+            task_id=str(uuid.uuid4()),
+            result={
+                "kind": INCIDENT_EXPORT_KIND,
+                "format": fmt,
+                "compressed": compress,
+                "filters": filters.model_dump(mode="json", exclude_none=True),
+                "requested_by": requested_by.user_id,
+            },
+        )
+
+    def run_export_job(
+        self,
+        task_id: str,
+        *,
+        fmt: str,
+        compress: bool,
+        filters: schemas.IncidentFilters,
+        session_factory: Optional[Callable[[], Session]] = None,
+    ) -> None:
+        """
+        Genera el archivo de un trabajo de exportación en `EXPORTS_DIR`.
+
+        Se ejecuta en segundo plano con su propia sesión, porque la de la petición
+        ya está cerrada. El resultado de la tarea conserva los datos con los que se
+        creó y añade el nombre del archivo, las filas y el tamaño, o el error.
+        """
+        if session_factory is None:
+            from incident_api.db.database import SessionLocal
+            session_factory = SessionLocal
+
+        db = session_factory()
+        try:
+            task = task_service.get_task_by_task_id(db, task_id=task_id)
+            result = dict(task.result or {})
+            task_service.update_task(db, task=task, status="running", result=result)
+            extension = f"{fmt}.gz" if compress else fmt
+            filename = f"{task_id}_{self._export_basename()}.{extension}"
+            try:
+                os.makedirs(self._exports_dir(), exist_ok=True)
+                stats = export_service.write_file(
+                    crud.incident.stream_for_export(db, filters=filters),
+                    columns=INCIDENT_EXPORT_COLUMNS,
+                    fmt=fmt,
+                    path=os.path.join(self._exports_dir(), filename),
+                    compress=compress,
+                )
+            except Exception as e:
+                logger.error("Incident export job %s failed: %s", task_id, e, exc_info=True)
+                db.rollback()
+                task_service.update_task(db, task=task, status="failed", result={**result, "error": str(e)})
+                return
+            task_service.update_task(db, task=task, status="completed", result={**result, "file": filename, **stats})
+            logger.info("Incident export job %s completed - Rows: %s, Size: %s bytes", task_id, stats["rows"], stats["size"])
+        finally:
+            db.close()
+
+    def prune_expired_exports(self, db: Session, retention_days: Optional[int] = None) -> Dict[str, int]:
+        """
+        Elimina los archivos de exportación y las tareas de exportación caducados.
+
+        Se borran las tareas de `EXPORT_JOB_KINDS` sin actualizar desde hace más de
+        `retention_days` (por defecto, EXPORT_RETENTION_DAYS) junto con su archivo,
+        y cualquier archivo de EXPORTS_DIR de esa antigüedad (incluidos los `.part`
+        de trabajos interrumpidos).
+
+        Returns:
+            Dict[str, int]: Número de tareas y de archivos eliminados.
+        """
+        days = settings.EXPORT_RETENTION_DAYS if retention_days is None else retention_days
+        cutoff = datetime.now(timezone.utc) - timedelta(days=days)
+        exports_dir = self._exports_dir()
+
+        removed_files = 0
+        expired = [
+            task for task in crud.task.get_updated_before(db, cutoff=cutoff.replace(tzinfo=None))
+            if isinstance(task.result, dict) and task.result.get("kind") in EXPORT_JOB_KINDS
+        ]
+        for task in expired:
+            filename = task.result.get("file")
+            if filename:
+                try:
+                    os.remove(os.path.join(exports_dir, os.path.basename(filename)))
+                    removed_files += 1
+                except FileNotFoundError:
+                    pass
+            db.delete(task)
+        commit_or_flush(db)
+
+        if os.path.isdir(exports_dir):
+            for entry in os.scandir(exports_dir):
+                try:
+                    if entry.is_file() and entry.stat().st_mtime < cutoff.timestamp():
+                        os.remove(entry.path)
+                        removed_files += 1
+                except FileNotFoundError:
+                    continue
+
+        logger.info(f"Exportaciones caducadas eliminadas: {len(expired)} tarea(s), {removed_files} archivo(s)")
+        return {"tasks": len(expired), "files": removed_files}
+
+    def get_export_job(
+        self, db: Session, task_id: str, user: models.User, kind: str = INCIDENT_EXPORT_KIND
+    ) -> models.Task:
+        """
+        Obtiene un trabajo de exportación del tipo `kind` visible para el usuario.
+
+        Solo quien lo solicitó o un administrador pueden consultarlo.
+
+        Raises:
+            HTTPException: 404 si no existe o no pertenece al usuario.
+        """
+        task = task_service.get_task_by_task_id(db, task_id=task_id)
+        result = task.result if task is not None and isinstance(task.result, dict) else {}
+        is_owner = result.get("requested_by") == user.user_id
+        is_admin = user.role in (UserRole.ADMINISTRADOR, UserRole.SUPER_ADMIN)
+        if result.get("kind") != kind or not (is_owner or is_admin):
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Exportación no encontrada.")
+        return task
+
+    def get_export_file(
+        self, db: Session, task_id: str, user: models.User, kind: str = INCIDENT_EXPORT_KIND
+    ) -> Tuple[str, str, str]:
+        """
+        Devuelve la ruta, el nombre y el tipo MIME del archivo de un trabajo completado.
+
+        Raises:
+            HTTPException: 404 si el trabajo no existe; 409 si aún no ha terminado.
+        """
+        task = self.get_export_job(db, task_id, user, kind=kind)
+        if task.status != "completed":
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=f"La exportación no está disponible (estado: {task.status}).",
+            )
+        filename = task.result["file"]
+        path = os.path.join(self._exports_dir(), filename)
+        if not os.path.exists(path):
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="El archivo de la exportación ya no existe.")
+        media_type = task.result.get("media_type") or export_service.media_type(
+            task.result["format"], task.result["compressed"]
+        )
+        return path, filename.split("_", 1)[1], media_type
+
 
 incident_service = IncidentService()
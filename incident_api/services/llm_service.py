@@ -4,11 +4,13 @@ Servicio para la invocación de modelos de lenguaje (LLM).
 
 import logging
 import json
+import time
 from fastapi import HTTPException, status
 from typing import Dict, Any
 
 from incident_api import models
 from incident_api.ai.llm_factory import get_llm
+from incident_api.core.metrics import llm_request_duration_seconds, llm_tokens_total
 
 logger = logging.getLogger(__name__)
 
@@ -18,6 +20,28 @@ class LLMService:
     Servicio para manejar la comunicación con modelos de lenguaje.
     """
 
+    async def _ainvoke(self, messages: list, settings: models.AIModelSettings) -> Any:
+        """Invoca al LLM registrando su latencia y los tokens consumidos por proveedor y modelo."""
+        provider, model = settings.model_provider, settings.model_name
+        start = time.perf_counter()
+        try:
+            llm = get_llm(provider=provider, model_name=model, parameters=settings.parameters)
+            response = await llm.ainvoke(messages)
+        except Exception:
+            llm_request_duration_seconds.labels(provider=provider, model=model, outcome="error").observe(
+                time.perf_counter() - start
+            )
+            raise
+        llm_request_duration_seconds.labels(provider=provider, model=model, outcome="success").observe(
+            time.perf_counter() - start
+        )
+        usage = getattr(response, "usage_metadata", None) or {}
+        for token_type in ("input", "output"):
+            tokens = usage.get(f"{token_type}_tokens")
+            if tokens:
+                llm_tokens_total.labels(provider=provider, model=model, type=token_type).inc(tokens)
+        return response
+
     async def invoke(
         self,
         messages: list,
@@ -25,8 +49,7 @@ class LLMService:
     ) -> str:
         """Invoca al LLM y devuelve la respuesta como string."""
         try:
-            llm = get_llm(provider=settings.model_provider, model_name=settings.model_name, parameters=settings.parameters)
-            ai_response_message = await llm.ainvoke(messages)
+            ai_response_message = await self._ainvoke(messages, settings)
             ai_response = ai_response_message.content if hasattr(ai_response_message, 'content') else ai_response_message
             return ai_response
         except Exception as e:
@@ -40,8 +63,7 @@ class LLMService:
     ) -> Dict[str, Any]:
         """Invoca al LLM y parsea la respuesta JSON a un diccionario."""
         try:
-            llm = get_llm(provider=settings.model_provider, model_name=settings.model_name, parameters=settings.parameters)
-            ai_response = await llm.ainvoke(messages)
+            ai_response = await self._ainvoke(messages, settings)
             content = ai_response.content.strip()
 
             if content.startswith("```json"):
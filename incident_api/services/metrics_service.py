@@ -0,0 +1,205 @@
+"""
+Servicio para las métricas materializadas por usuario y por categoría.
+
+Los agregados que antes se calculaban en cada vista de auditoría (conteos de
+incidentes, tiempos de resolución, tipos más frecuentes, etc.) se guardan en
+las tablas `user_metrics_summary` y `category_metrics_summary`. Cuando un
+incidente cambia, solo se marcan como obsoletas las filas afectadas; la fila se
+recalcula en la siguiente lectura o en el refresco periódico (`manage.py
+refresh-metrics`), de modo que las lecturas habituales consultan una sola fila.
+"""
+
+import logging
+from contextlib import nullcontext
+from typing import Iterable, List, Optional
+
+from sqlalchemy.orm import Session
+
+from incident_api import crud, models
+from incident_api.db.unit_of_work import in_unit_of_work
+from incident_api.models import IncidentStatus
+from incident_api.schemas.metrics_summary import (
+    UserMetricsSummaryUpdate,
+    CategoryMetricsSummaryUpdate,
+)
+
+logger = logging.getLogger(__name__)
+
+RESOLVED_STATUSES = {IncidentStatus.RESUELTO.value, IncidentStatus.CERRADO.value}
+
+
+class MetricsService:
+    """
+    Clase de servicio para mantener y consultar las métricas materializadas.
+    """
+
+    # --- Invalidación ---
+
+    @staticmethod
+    def _savepoint(db: Session):
+        """
+        Dentro de una unidad de trabajo, aísla la invalidación en un SAVEPOINT para que
+        un fallo no arrastre el resto de la transacción de la petición.
+        """
+        return db.begin_nested() if in_unit_of_work(db) else nullcontext()
+
+    @staticmethod
+    def _discard(db: Session) -> None:
+        # Dentro de una unidad de trabajo el SAVEPOINT ya se revirtió
+        if not in_unit_of_work(db):
+            db.rollback()
+
+    def mark_incident_changed(
+        self,
+        db: Session,
+        incident: models.Incident,
+        *,
+        previous_assignee_id: Optional[int] = None,
+        previous_category_id: Optional[int] = None,
+        extra_user_ids: Iterable[Optional[int]] = (),
+    ) -> None:
+        """
+        Marca como obsoletas las métricas de los usuarios y categorías afectados por un incidente.
+
+        Un fallo aquí nunca debe interrumpir la operación principal; el refresco
+        periódico corrige cualquier fila que no se haya podido marcar.
+        """
+        user_ids = {
+            incident.reported_by_id,
+            incident.assigned_to_id,
+            previous_assignee_id,
+            *extra_user_ids,
+        }
+        category_ids = {incident.incident_category_id, previous_category_id}
+        try:
+            with self._savepoint(db):
+                crud.user_metrics_summary.mark_stale(db, ids=user_ids)
+                crud.category_metrics_summary.mark_stale(db, ids=category_ids)
+        except Exception as e:
+            self._discard(db)
+            logger.error(f"No se pudieron invalidar las métricas del incidente {incident.incident_id}: {e}")
+
+    def mark_user_changed(self, db: Session, user_id: int) -> None:
+        """Marca como obsoletas las métricas de un usuario (p. ej. tras un comentario)."""
+        try:
+            with self._savepoint(db):
+                crud.user_metrics_summary.mark_stale(db, ids=[user_id])
+        except Exception as e:
+            self._discard(db)
+            logger.error(f"No se pudieron invalidar las métricas del usuario {user_id}: {e}")
+
+    # --- Métricas por usuario ---
+
+    def refresh_user_metrics(self, db: Session, user_id: int) -> models.UserMetricsSummary:
+        """Recalcula y guarda la fila de métricas de un usuario."""
+        # Se lee antes de calcular para no dar por vigente un cambio hecho durante el recálculo
+        stale_version = crud.user_metrics_summary.get_stale_versions(db, ids=[user_id]).get(user_id)
+        summary_in = UserMetricsSummaryUpdate(
+            user_id=user_id,
+            total_incidents_created=crud.incident.count_by_reporter(db, user_id=user_id),
+            total_incidents_resolved=crud.incident.count_resolved_by_assignee(db, user_id=user_id),
+            total_incidents_assigned=crud.incident.count_assigned_to_user(db, user_id=user_id),
+            average_resolution_time_hours=crud.incident.get_average_resolution_time_by_assignee(
+                db, user_id=user_id
+            ),
+            incidents_by_status=crud.incident.get_incidents_by_status_for_user(db, user_id=user_id),
+            top_incident_types=[
+                str(t) for t in crud.incident.get_top_incident_types_by_user(db, user_id=user_id)
+            ],
+            total_comments_made=crud.incident_log.count_comments_by_user(db, user_id=user_id),
+            total_files_uploaded=crud.evidence_file.count_by_uploader(db, user_id=user_id),
+        )
+        return crud.user_metrics_summary.upsert(db, obj_in=summary_in, stale_version=stale_version)
+
+    def get_user_metrics(self, db: Session, user_id: int) -> models.UserMetricsSummary:
+        """Devuelve la fila de métricas de un usuario, recalculándola solo si falta o está obsoleta."""
+        summary = crud.user_metrics_summary.get(db, id=user_id)
+        if summary is None or summary.is_stale:
+            summary = self.refresh_user_metrics(db, user_id)
+        return summary
+
+    # --- Métricas por categoría ---
+
+    @staticmethod
+    def _all_category_ids(db: Session) -> List[int]:
+        return [
+            category_id
+            for (category_id,) in db.query(models.IncidentCategory.incident_category_id).all()
+        ]
+
+    def refresh_category_metrics(
+        self, db: Session, category_ids: Optional[List[int]] = None
+    ) -> List[models.CategoryMetricsSummary]:
+        """
+        Recalcula las métricas de las categorías indicadas (o de todas) con dos consultas agrupadas.
+        """
+        if category_ids is None:
+            category_ids = self._all_category_ids(db)
+        if not category_ids:
+            return []
+
+        stale_versions = crud.category_metrics_summary.get_stale_versions(db, ids=category_ids)
+        status_counts = crud.incident.get_status_counts_by_category(db, category_ids=category_ids)
+        resolution_times = crud.incident.get_average_resolution_time_by_category(
+            db, category_ids=category_ids
+        )
+
+        summaries = []
+        for category_id in category_ids:
+            by_status = status_counts.get(category_id, {})
+            resolved = sum(count for status, count in by_status.items() if status in RESOLVED_STATUSES)
+            total = sum(by_status.values())
+            summary_in = CategoryMetricsSummaryUpdate(
+                incident_category_id=category_id,
+                total_incidents=total,
+                open_incidents=total - resolved,
+                resolved_incidents=resolved,
+                average_resolution_time_hours=resolution_times.get(category_id),
+                incidents_by_status=by_status,
+            )
+            summaries.append(crud.category_metrics_summary.upsert(
+                db, obj_in=summary_in, stale_version=stale_versions.get(category_id)
+            ))
+        return summaries
+
+    def get_category_metrics(self, db: Session) -> List[models.CategoryMetricsSummary]:
+        """Devuelve las métricas de todas las categorías, recalculando solo las obsoletas o ausentes."""
+        summaries = crud.category_metrics_summary.get_all(db)
+        known_ids = {s.incident_category_id for s in summaries}
+        pending = [s.incident_category_id for s in summaries if s.is_stale]
+        pending += [c for c in self._all_category_ids(db) if c not in known_ids]
+        if pending:
+            self.refresh_category_metrics(db, category_ids=pending)
+            summaries = crud.category_metrics_summary.get_all(db)
+        return summaries
+
+    # --- Refresco periódico ---
+
+    def refresh_all(self, db: Session, only_stale: bool = False) -> dict:
+        """
+        Recalcula las métricas de todos los usuarios y categorías.
+
+        Args:
+            only_stale: Si es True, solo se recalculan las filas marcadas como obsoletas.
+
+        Returns:
+            Diccionario con el número de usuarios y categorías recalculados.
+        """
+        if only_stale:
+            user_ids = crud.user_metrics_summary.get_stale_ids(db)
+            category_ids = crud.category_metrics_summary.get_stale_ids(db)
+        else:
+            user_ids = [user_id for (user_id,) in db.query(models.User.user_id).all()]
+            category_ids = None
+
+        for user_id in user_ids:
+            self.refresh_user_metrics(db, user_id)
+        categories = self.refresh_category_metrics(db, category_ids=category_ids)
+
+        logger.info(
+            f"Métricas recalculadas: {len(user_ids)} usuario(s), {len(categories)} categoría(s)."
+        )
+        return {"users": len(user_ids), "categories": len(categories)}
+
+
+metrics_service = MetricsService()
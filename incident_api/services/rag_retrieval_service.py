@@ -3,11 +3,13 @@ Servicio para la recuperación de contexto usando RAG.
 """
 
 import logging
+import time
 from typing import List, Dict, Any
 from sqlalchemy.orm import Session
 
 from incident_api import crud
 from incident_api.ai.rag_processor import RAGProcessor
+from incident_api.core.metrics import rag_retrieval_duration_seconds
 
 logger = logging.getLogger(__name__)
 
@@ -21,6 +23,8 @@ class RAGRetrievalService:
         Obtiene contexto de los playbooks usando RAG, incluyendo puntuaciones y 
         filtrando por el estado de curación.
         """
+        start = time.perf_counter()
+        outcome = "error"
         try:
             rag_processor = RAGProcessor()
             # Usamos un umbral de score bajo para recuperar más docs y luego filtrar
@@ -53,13 +57,17 @@ class RAGRetrievalService:
                 
                 curated_docs.append(item)
 
+            outcome = "success"
             return curated_docs
 
         except FileNotFoundError:
+            outcome = "no_index"
             logger.warning("Índice FAISS no encontrado. El chatbot responderá sin contexto de playbooks.")
         except Exception:
             logger.error("Error no esperado al obtener el contexto RAG. El chatbot responderá sin contexto.", exc_info=True)
-        
+        finally:
+            rag_retrieval_duration_seconds.labels(outcome=outcome).observe(time.perf_counter() - start)
+
         return []
 
 rag_retrieval_service = RAGRetrievalService()
\ No newline at end of file
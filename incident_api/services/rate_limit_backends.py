@@ -0,0 +1,219 @@
+"""
+Backends de almacenamiento para el rate limiting.
+
+Un backend solo guarda contadores con expiración (`incr`, `get`, `set`) y sabe
+eliminar los expirados (`evict`). El algoritmo de ventana deslizante vive en
+`RateLimitingService`, de modo que el mismo límite se aplica igual con
+cualquier backend:
+
+- `MemoryRateLimitBackend`: diccionario en proceso (por defecto).
+- `DatabaseRateLimitBackend`: tabla `rate_limit_buckets` compartida por todos
+  los workers (SQLite o PostgreSQL).
+- `RedisRateLimitBackend`: cualquier cliente con la interfaz de redis-py.
+"""
+
+import math
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy import delete, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from incident_api.core.config import settings
+from incident_api.models.rate_limit import RateLimitBucket
+
+
+class RateLimitBackend:
+    """
+    Interfaz de los backends de rate limiting.
+    """
+
+    def incr(self, key: str, ttl_seconds: float) -> int:
+        """Incrementa el contador y devuelve el nuevo valor; lo crea con el TTL dado si no existe."""
+        raise NotImplementedError
+
+    def get(self, key: str) -> int:
+        """Devuelve el valor del contador, o 0 si no existe o expiró."""
+        raise NotImplementedError
+
+    def set(self, key: str, value: int, ttl_seconds: float) -> None:
+        """Fija el valor del contador y su expiración."""
+        raise NotImplementedError
+
+    def evict(self) -> int:
+        """Elimina los contadores expirados y devuelve cuántos se eliminaron."""
+        return 0
+
+    def clear(self) -> None:
+        """Elimina todos los contadores."""
+        raise NotImplementedError
+
+
+class MemoryRateLimitBackend(RateLimitBackend):
+    """
+    Backend en memoria. Los límites son por proceso.
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.time):
+        self._clock = clock
+        self._buckets: Dict[str, List[float]] = {}
+        self._lock = threading.Lock()
+
+    def incr(self, key: str, ttl_seconds: float) -> int:
+        now = self._clock()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None or bucket[1] <= now:
+                bucket = self._buckets[key] = [0, now + ttl_seconds]
+            bucket[0] += 1
+            return int(bucket[0])
+
+    def get(self, key: str) -> int:
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None or bucket[1] <= self._clock():
+                return 0
+            return int(bucket[0])
+
+    def set(self, key: str, value: int, ttl_seconds: float) -> None:
+        with self._lock:
+            self._buckets[key] = [value, self._clock() + ttl_seconds]
+
+    def evict(self) -> int:
+        now = self._clock()
+        with self._lock:
+            expired = [key for key, bucket in self._buckets.items() if bucket[1] <= now]
+            for key in expired:
+                del self._buckets[key]
+        return len(expired)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._buckets.clear()
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+
+class DatabaseRateLimitBackend(RateLimitBackend):
+    """
+    Backend sobre la tabla `rate_limit_buckets`.
+
+    Cada operación usa su propia sesión y transacción corta, independiente de la
+    sesión de la petición. El incremento es un único `INSERT ... ON CONFLICT DO
+    UPDATE ... RETURNING`, atómico entre workers.
+    """
+
+    _INSERTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+    def __init__(self, session_factory: Callable[[], Session], clock: Callable[[], float] = time.time):
+        self._session_factory = session_factory
+        self._clock = clock
+
+    def _upsert(self, db: Session, key: str, values: Dict[str, Any], on_conflict: Dict[str, Any]):
+        dialect = db.get_bind().dialect.name
+        if dialect not in self._INSERTS:
+            raise NotImplementedError(f"Rate limiting en base de datos no soportado para '{dialect}'.")
+        stmt = self._INSERTS[dialect](RateLimitBucket).values(bucket_key=key, **values)
+        return stmt.on_conflict_do_update(index_elements=[RateLimitBucket.bucket_key], set_=on_conflict)
+
+    def incr(self, key: str, ttl_seconds: float) -> int:
+        now = self._clock()
+        with self._session_factory() as db:
+            stmt = self._upsert(
+                db,
+                key,
+                {"count": 1, "expires_at": now + ttl_seconds},
+                {"count": RateLimitBucket.count + 1},
+            ).returning(RateLimitBucket.count)
+            count = db.execute(stmt).scalar_one()
+            db.commit()
+        return count
+
+    def get(self, key: str) -> int:
+        with self._session_factory() as db:
+            count = db.scalar(
+                select(RateLimitBucket.count).where(
+                    RateLimitBucket.bucket_key == key, RateLimitBucket.expires_at > self._clock()
+                )
+            )
+        return count or 0
+
+    def set(self, key: str, value: int, ttl_seconds: float) -> None:
+        values = {"count": value, "expires_at": self._clock() + ttl_seconds}
+        with self._session_factory() as db:
+            db.execute(self._upsert(db, key, values, values))
+            db.commit()
+
+    def evict(self) -> int:
+        with self._session_factory() as db:
+            result = db.execute(delete(RateLimitBucket).where(RateLimitBucket.expires_at <= self._clock()))
+            db.commit()
+        return result.rowcount
+
+    def clear(self) -> None:
+        with self._session_factory() as db:
+            db.execute(delete(RateLimitBucket))
+            db.commit()
+
+
+class RedisRateLimitBackend(RateLimitBackend):
+    """
+    Backend sobre Redis. La expiración la gestiona Redis, por lo que `evict` no hace nada.
+
+    Acepta cualquier cliente con la interfaz de redis-py (`pipeline`, `get`, `set`,
+    `scan_iter`, `delete`). `incr` usa `EXPIRE ... NX`, disponible desde Redis 7.0.
+    """
+
+    def __init__(self, client: Any, prefix: str = "rate_limit:"):
+        self._client = client
+        self._prefix = prefix
+
+    @classmethod
+    def from_url(cls, url: str) -> "RedisRateLimitBackend":
+        """Crea el backend a partir de una URL de Redis (requiere el paquete `redis`)."""
+        try:
+            import redis
+        except ImportError as e:
+            raise RuntimeError("El backend de rate limiting 'redis' requiere el paquete 'redis'.") from e
+        return cls(redis.Redis.from_url(url))
+
+    def incr(self, key: str, ttl_seconds: float) -> int:
+        name = self._prefix + key
+        # MULTI/EXEC: si el proceso cae entre ambos comandos la clave no queda sin caducidad
+        with self._client.pipeline(transaction=True) as pipe:
+            pipe.incr(name)
+            pipe.expire(name, math.ceil(ttl_seconds), nx=True)
+            count, _ = pipe.execute()
+        return int(count)
+
+    def get(self, key: str) -> int:
+        value = self._client.get(self._prefix + key)
+        return int(value) if value is not None else 0
+
+    def set(self, key: str, value: int, ttl_seconds: float) -> None:
+        self._client.set(self._prefix + key, value, ex=math.ceil(ttl_seconds))
+
+    def clear(self) -> None:
+        for name in self._client.scan_iter(match=self._prefix + "*"):
+            self._client.delete(name)
+
+
+def build_rate_limit_backend(name: Optional[str] = None) -> RateLimitBackend:
+    """
+    Crea el backend configurado en `RATE_LIMIT_BACKEND`.
+    """
+    name = (name or settings.RATE_LIMIT_BACKEND).lower()
+    if name == "memory":
+        return MemoryRateLimitBackend()
+    if name == "database":
+        from incident_api.db.database import SessionLocal
+
+        return DatabaseRateLimitBackend(SessionLocal)
+    if name == "redis":
+        if not settings.RATE_LIMIT_REDIS_URL:
+            raise ValueError("RATE_LIMIT_REDIS_URL es obligatorio con RATE_LIMIT_BACKEND=redis.")
+        return RedisRateLimitBackend.from_url(settings.RATE_LIMIT_REDIS_URL)
+    raise ValueError(f"Backend de rate limiting desconocido: '{name}'.")
@@ -2,59 +2,75 @@
 Servicio de rate limiting para proteger contra ataques de fuerza bruta.
 
 Implementa diferentes estrategias de rate limiting para diferentes endpoints.
+
+Usa un contador de ventana deslizante: por cada clave se guardan solo el
+contador de la ventana fija actual y el de la anterior, y el número de
+intentos se estima ponderando la anterior por la fracción que aún se solapa
+con la ventana deslizante. Cada comprobación es O(1) y los contadores se
+guardan en un backend intercambiable (ver `rate_limit_backends`), de modo que
+el límite puede compartirse entre workers.
 """
 
+import math
 import time
 import logging
-from collections import defaultdict
-from typing import Dict, Tuple
+from typing import Callable, Optional
 from fastapi import HTTPException, Request, status
 
 from incident_api.core.config import settings
+from incident_api.core.metrics import rate_limit_rejections_total
+from incident_api.services.rate_limit_backends import RateLimitBackend, build_rate_limit_backend
 
 logger = logging.getLogger(__name__)
 
 
 class RateLimitExceeded(Exception):
     """Excepción lanzada cuando se excede el límite de rate."""
-    pass
+
+    def __init__(self, message: str, retry_after: int = 0):
+        super().__init__(message)
+        self.retry_after = retry_after
 
 
 class RateLimitingService:
     """
-    Servicio para implementar rate limiting basado en memoria.
+    Servicio para implementar rate limiting con un contador de ventana deslizante.
 
-    En producción, considera usar Redis u otra solución distribuida.
+    Los contadores se guardan en el backend configurado (`RATE_LIMIT_BACKEND`); el
+    backend en memoria es por proceso, los de base de datos y Redis son compartidos.
     """
 
-    def __init__(self):
-        # Estructura: {ip_or_key: [(timestamp, count), ...]}
-        self._attempts: Dict[str, list] = defaultdict(list)
-        self._cleanup_interval = 300  # 5 minutos
-
-    def _cleanup_old_attempts(self, key: str) -> None:
-        """Limpia intentos antiguos para una clave específica."""
-        current_time = time.time()
-        cutoff_time = current_time - self._cleanup_interval
-
-        self._attempts[key] = [
-            (timestamp, count) for timestamp, count in self._attempts[key]
-            if timestamp > cutoff_time
-        ]
-
-        # Remover clave si no hay intentos
-        if not self._attempts[key]:
-            del self._attempts[key]
-
-    def _get_attempts_in_window(self, key: str, window_seconds: int) -> int:
-        """Obtiene el número de intentos en la ventana de tiempo especificada."""
-        current_time = time.time()
-        cutoff_time = current_time - window_seconds
-
-        return sum(
-            count for timestamp, count in self._attempts[key]
-            if timestamp > cutoff_time
+    def __init__(
+        self,
+        backend: Optional[RateLimitBackend] = None,
+        eviction_interval: Optional[int] = None,
+        clock: Callable[[], float] = time.time,
+    ):
+        self._backend = backend
+        self._eviction_interval = (
+            eviction_interval if eviction_interval is not None else settings.RATE_LIMIT_EVICTION_INTERVAL_SECONDS
         )
+        self._clock = clock
+        self._next_eviction = clock() + self._eviction_interval
+
+    @property
+    def backend(self) -> RateLimitBackend:
+        """Backend de contadores, creado en el primer uso a partir de la configuración."""
+        if self._backend is None:
+            self._backend = build_rate_limit_backend()
+        return self._backend
+
+    def _maybe_evict(self, now: float) -> None:
+        """Elimina periódicamente los contadores expirados de todas las claves."""
+        if now < self._next_eviction:
+            return
+        self._next_eviction = now + self._eviction_interval
+        try:
+            evicted = self.backend.evict()
+            if evicted:
+                logger.debug(f"Rate limiting: {evicted} expired counters evicted")
+        except Exception as e:
+            logger.error(f"Rate limiting eviction failed: {e}")
 
     def check_rate_limit(
         self,
@@ -64,7 +80,7 @@ class RateLimitingService:
         block_duration: int = 0
     ) -> None:
         """
-        Verifica si una clave excede el límite de rate.
+        Verifica si una clave excede el límite de rate y registra el intento.
 
         Args:
             key: Identificador único (ej. IP address)
@@ -75,33 +91,36 @@ class RateLimitingService:
         Raises:
             RateLimitExceeded: Si se excede el límite
         """
-        self._cleanup_old_attempts(key)
-
-        attempts = self._get_attempts_in_window(key, window_seconds)
-
-        if attempts >= max_attempts:
+        now = self._clock()
+        self._maybe_evict(now)
+
+        window = int(now // window_seconds)
+        elapsed = (now % window_seconds) / window_seconds
+        # Cada contador debe sobrevivir a su ventana y a la siguiente, donde actúa como "anterior"
+        current = self.backend.incr(f"{key}:{window}", ttl_seconds=2 * window_seconds)
+        previous = self.backend.get(f"{key}:{window - 1}")
+        attempts = previous * (1 - elapsed) + current
+
+        if attempts > max_attempts:
+            retry_after = math.ceil(window_seconds * (1 - elapsed))
             if block_duration > 0:
                 # Agregar bloqueo temporal
-                block_until = time.time() + block_duration
-                self._attempts[key].append((block_until, max_attempts + 1))
+                self.backend.set(f"{key}:blocked", 1, ttl_seconds=block_duration)
+                retry_after = block_duration
 
-            logger.warning(f"Rate limit exceeded for key: {key}, attempts: {attempts}")
+            logger.warning(f"Rate limit exceeded for key: {key}, attempts: {attempts:.1f}")
             raise RateLimitExceeded(
-                f"Demasiados intentos. Máximo {max_attempts} por {window_seconds} segundos."
+                f"Demasiados intentos. Máximo {max_attempts} por {window_seconds} segundos.",
+                retry_after=retry_after,
             )
 
-        # Registrar el intento
-        self._attempts[key].append((time.time(), 1))
-
     def is_blocked(self, key: str) -> bool:
         """Verifica si una clave está bloqueada temporalmente."""
-        current_time = time.time()
-        self._cleanup_old_attempts(key)
+        return self.backend.get(f"{key}:blocked") > 0
 
-        for timestamp, count in self._attempts[key]:
-            if timestamp > current_time and count > 0:
-                return True
-        return False
+    def reset(self) -> None:
+        """Elimina todos los contadores y bloqueos."""
+        self.backend.clear()
 
 
 # Instancia global del servicio
@@ -123,6 +142,7 @@ def check_login_rate_limit(request: Request) -> None:
     # Verificar si está bloqueado
     if rate_limiter.is_blocked(client_ip):
         logger.warning(f"Blocked IP attempting login: {client_ip}")
+        rate_limit_rejections_total.labels(scope="login").inc()
         raise HTTPException(
             status_code=status.HTTP_429_TOO_MANY_REQUESTS,
             detail="Cuenta temporalmente bloqueada por demasiados intentos fallidos.",
@@ -137,6 +157,7 @@ def check_login_rate_limit(request: Request) -> None:
             block_duration=settings.LOGIN_LOCKOUT_MINUTES * 60
         )
     except RateLimitExceeded as e:
+        rate_limit_rejections_total.labels(scope="login").inc()
         raise HTTPException(
             status_code=status.HTTP_429_TOO_MANY_REQUESTS,
             detail=str(e),
@@ -166,6 +187,7 @@ def check_oauth_rate_limit(request: Request) -> None:
         )
     except RateLimitExceeded as e:
         logger.warning(f"OAuth rate limit exceeded for IP: {client_ip}")
+        rate_limit_rejections_total.labels(scope="oauth").inc()
         raise HTTPException(
             status_code=status.HTTP_429_TOO_MANY_REQUESTS,
             detail="Demasiados intentos de autenticación OAuth. Intente más tarde.",
@@ -195,8 +217,63 @@ def check_audit_rate_limit(request: Request) -> None:
         )
     except RateLimitExceeded as e:
         logger.warning(f"Audit rate limit exceeded for IP: {client_ip}")
+        rate_limit_rejections_total.labels(scope="audit").inc()
         raise HTTPException(
             status_code=status.HTTP_429_TOO_MANY_REQUESTS,
             detail="Demasiadas consultas de auditoría. Intente más tarde.",
             headers={"Retry-After": "1800"}
-        )
\ No newline at end of file
+        )
+
+def enforce_rate_limit(
+    request: Request,
+    scope: str,
+    max_attempts: int,
+    window_seconds: int,
+    block_duration: int = 0,
+    key_func: Optional[Callable[[Request], str]] = None,
+    detail: str = "Demasiadas solicitudes. Intente más tarde.",
+) -> None:
+    """
+    Aplica un límite genérico a una petición.
+
+    Args:
+        request: Objeto de solicitud FastAPI
+        scope: Prefijo que separa los contadores de este límite de los demás
+        max_attempts: Número máximo de peticiones permitidas
+        window_seconds: Ventana de tiempo en segundos
+        block_duration: Duración del bloqueo en segundos (0 = no bloquear)
+        key_func: Función que obtiene la clave de la petición (por defecto, la IP)
+        detail: Mensaje devuelto al cliente
+
+    Raises:
+        HTTPException: Si se excede el límite o la clave está bloqueada
+    """
+    if key_func is not None:
+        client_key = key_func(request)
+    else:
+        client_key = request.client.host if request.client else "unknown"
+    key = f"{scope}_{client_key}"
+
+    if block_duration > 0 and rate_limiter.is_blocked(key):
+        rate_limit_rejections_total.labels(scope=scope).inc()
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=detail,
+            headers={"Retry-After": str(block_duration)}
+        )
+
+    try:
+        rate_limiter.check_rate_limit(
+            key=key,
+            max_attempts=max_attempts,
+            window_seconds=window_seconds,
+            block_duration=block_duration
+        )
+    except RateLimitExceeded as e:
+        logger.warning(f"Rate limit '{scope}' exceeded for key: {client_key}")
+        rate_limit_rejections_total.labels(scope=scope).inc()
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=detail,
+            headers={"Retry-After": str(e.retry_after)}
+        )
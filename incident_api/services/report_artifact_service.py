@@ -0,0 +1,275 @@
+"""
+Almacén de informes PDF de incidentes cerrados.
+
+Un incidente `CERRADO` ya no cambia, así que su informe se convierte a PDF una
+sola vez y se guarda en `REPORTS_DIR/<incident_id>/<versión>.pdf`. La versión es
+un resumen de `crud.incident.get_report_version`: si el incidente se reabre y se
+modifica, la clave cambia, el PDF se regenera y la versión anterior se elimina.
+
+- Al cerrar un incidente, `render_closure_report` genera el PDF en segundo plano.
+- El endpoint del informe sirve el archivo guardado (y lo genera si falta).
+- La exportación de los informes de cierre de un trimestre es un trabajo en
+  segundo plano que reutiliza los PDF guardados, convierte los que faltan en un
+  pool de `REPORT_PDF_WORKERS` procesos y los empaqueta en un ZIP.
+
+La conversión se hace con xhtml2pdf, sin red (ver `incident_api.core.pdf.render_pdf`).
+"""
+
+import hashlib
+import logging
+import multiprocessing
+import os
+import re
+import time
+import uuid
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from incident_api import crud, models
+from incident_api.core import pdf as pdf_renderer
+from incident_api.core.config import settings
+from incident_api.core.metrics import report_pdf_render_duration_seconds
+from incident_api.models import IncidentStatus
+from incident_api.services import report_service
+from incident_api.services.incident_service import CLOSURE_EXPORT_KIND, incident_service
+from incident_api.services.task_service import task_service
+
+logger = logging.getLogger(__name__)
+
+PDF_MEDIA_TYPE = "application/pdf"
+_QUARTER_PATTERN = re.compile(r"^(\d{4})-Q([1-4])$")
+
+
+def quarter_range(quarter: str) -> Tuple[datetime, datetime]:
+    """
+    Devuelve el intervalo [inicio, fin) de un trimestre con formato `AAAA-Qn`.
+
+    Raises:
+        ValueError: Si el formato no es válido.
+    """
+    match = _QUARTER_PATTERN.match(quarter)
+    if match is None:
+        raise ValueError(f"Trimestre no válido: '{quarter}'. Formato esperado: AAAA-Qn (p. ej. 2025-Q3).")
+    year, index = int(match.group(1)), int(match.group(2))
+    start = datetime(year, 3 * index - 2, 1)
+    end = datetime(year + 1, 1, 1) if index == 4 else datetime(year, 3 * index + 1, 1)
+    return start, end
+
+
+class ReportArtifactService:
+    """
+    Servicio para generar, guardar y exportar los informes PDF de incidentes cerrados.
+    """
+
+    # --- Almacén ---
+
+    @property
+    def reports_dir(self) -> str:
+        return settings.REPORTS_DIR or os.path.join(settings.LOGS_DIR, "reports")
+
+    @staticmethod
+    def version_key(version: tuple) -> str:
+        """Clave corta y estable de una versión de `crud.incident.get_report_version`."""
+        return hashlib.sha256(repr(version).encode()).hexdigest()[:16]
+
+    def artifact_path(self, incident_id: int, key: str) -> str:
+        return os.path.join(self.reports_dir, str(incident_id), f"{key}.pdf")
+
+    def _store(self, path: str, pdf: bytes) -> None:
+        """Escribe el PDF a través de un `.part` y elimina las versiones anteriores del incidente."""
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        part_path = f"{path}.{uuid.uuid4().hex}.part"
+        try:
+            with open(part_path, "wb") as f:
+                f.write(pdf)
+            os.replace(part_path, path)
+        except BaseException:
+            if os.path.exists(part_path):
+                os.remove(part_path)
+            raise
+        for name in os.listdir(directory):
+            stale = os.path.join(directory, name)
+            if stale != path and name.endswith(".pdf"):
+                try:
+                    os.remove(stale)
+                except FileNotFoundError:
+                    pass
+
+    @staticmethod
+    def _render(html: str) -> bytes:
+        start = time.perf_counter()
+        try:
+            pdf = pdf_renderer.render_pdf(html)
+        except Exception:
+            report_pdf_render_duration_seconds.labels(outcome="error").observe(time.perf_counter() - start)
+            raise
+        report_pdf_render_duration_seconds.labels(outcome="success").observe(time.perf_counter() - start)
+        return pdf
+
+    def get_or_render_pdf(self, db: Session, incident_id: int) -> Optional[Tuple[str, str]]:
+        """
+        Devuelve la ruta y la clave de versión del PDF del incidente, generándolo si falta.
+
+        No comprueba el estado: quien llama decide si el incidente admite PDF.
+
+        Returns:
+            Optional[Tuple[str, str]]: (ruta, clave), o None si el incidente no existe.
+        """
+        version = crud.incident.get_report_version(db, incident_id=incident_id)
+        if version is None:
+            return None
+        key = self.version_key(version)
+        path = self.artifact_path(incident_id, key)
+        if os.path.exists(path):
+            return path, key
+
+        html = report_service.get_incident_report_html(db, incident_id)
+        if html is None:
+            return None
+        self._store(path, self._render(html))
+        logger.info(f"Informe PDF generado para el incidente {incident_id} (versión {key})")
+        return path, key
+
+    def render_closure_report(
+        self, incident_id: int, session_factory: Optional[Callable[[], Session]] = None
+    ) -> None:
+        """
+        Genera el PDF de un incidente recién cerrado. Se ejecuta en segundo plano.
+
+        Si el incidente se ha reabierto entretanto, no hace nada.
+        """
+        if session_factory is None:
+            from incident_api.db.database import SessionLocal
+            session_factory = SessionLocal
+
+        db = session_factory()
+        try:
+            incident = crud.incident.get(db, id=incident_id)
+            if incident is None or incident.status != IncidentStatus.CERRADO:
+                return
+            self.get_or_render_pdf(db, incident_id)
+        except Exception as e:
+            # Se regenerará bajo demanda cuando se pida
+            logger.error(f"No se pudo generar el informe PDF del incidente {incident_id}: {e}", exc_info=True)
+        finally:
+            db.close()
+
+    # --- Exportación de informes de cierre ---
+
+    def create_closure_export_job(self, db: Session, *, quarter: str, requested_by: models.User) -> models.Task:
+        """
+        Registra un trabajo de exportación de los informes de cierre de un trimestre.
+
+        Raises:
+            ValueError: Si el trimestre no es válido.
+        """
+        quarter_range(quarter)
+        return task_service.create_task(
+            db,
+            task_id=str(uuid.uuid4()),
+            result={
+                "kind": CLOSURE_EXPORT_KIND,
+                "format": "zip",
+                "media_type": "application/zip",
+                "quarter": quarter,
+                "requested_by": requested_by.user_id,
+            },
+        )
+
+    def _closure_pdfs(self, db: Session, incident_ids: List[int]) -> Iterator[Tuple[models.Incident, str]]:
+        """
+        Produce (incidente, ruta del PDF) para cada incidente, en orden.
+
+        Los PDF que faltan se convierten por lotes en un pool de procesos; el HTML
+        se renderiza en este hilo, que es el que tiene la sesión.
+        """
+        workers = max(1, settings.REPORT_PDF_WORKERS)
+        batch_size = workers * 4
+        executor = None
+        if workers > 1:
+            # spawn: los procesos no heredan hilos ni conexiones de la aplicación
+            executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+        try:
+            for i in range(0, len(incident_ids), batch_size):
+                pending: List[Tuple[models.Incident, str, str]] = []
+                for incident_id in incident_ids[i:i + batch_size]:
+                    incident = crud.incident.get_for_report(db, incident_id=incident_id)
+                    version = crud.incident.get_report_version(db, incident_id=incident_id)
+                    if incident is None or version is None:
+                        continue
+                    path = self.artifact_path(incident_id, self.version_key(version))
+                    html = None if os.path.exists(path) else report_service.generate_incident_report_html(incident)
+                    pending.append((incident, path, html))
+
+                missing = [(path, html) for _, path, html in pending if html is not None]
+                htmls = [html for _, html in missing]
+                pdfs = executor.map(pdf_renderer.render_pdf, htmls) if executor else map(self._render, htmls)
+                for (path, _), pdf in zip(missing, pdfs):
+                    self._store(path, pdf)
+                for incident, path, _ in pending:
+                    yield incident, path
+        finally:
+            if executor is not None:
+                executor.shutdown()
+
+    def _write_zip(self, path: str, entries: Iterable[Tuple[models.Incident, str]]) -> int:
+        """Escribe el ZIP a través de un `.part`. Los PDF ya van comprimidos: se guardan sin comprimir."""
+        part_path = f"{path}.part"
+        count = 0
+        try:
+            with zipfile.ZipFile(part_path, "w", compression=zipfile.ZIP_STORED) as archive:
+                for incident, pdf_path in entries:
+                    archive.write(pdf_path, arcname=f"{incident.ticket_id or f'incident-{incident.incident_id}'}.pdf")
+                    count += 1
+            os.replace(part_path, path)
+        except BaseException:
+            if os.path.exists(part_path):
+                os.remove(part_path)
+            raise
+        return count
+
+    def run_closure_export_job(
+        self, task_id: str, *, quarter: str, session_factory: Optional[Callable[[], Session]] = None
+    ) -> None:
+        """
+        Genera el ZIP con los informes PDF de los incidentes cerrados en el trimestre.
+
+        Se ejecuta en segundo plano con su propia sesión. El archivo se deja en
+        `EXPORTS_DIR` y se descarga como cualquier otra exportación.
+        """
+        if session_factory is None:
+            from incident_api.db.database import SessionLocal
+            session_factory = SessionLocal
+
+        db = session_factory()
+        try:
+            task = task_service.get_task_by_task_id(db, task_id=task_id)
+            result = dict(task.result or {})
+            task_service.update_task(db, task=task, status="running", result=result)
+            filename = f"{task_id}_closure_reports_{quarter}.zip"
+            path = os.path.join(incident_service._exports_dir(), filename)
+            try:
+                start, end = quarter_range(quarter)
+                incident_ids = crud.incident.get_closed_ids(db, start=start, end=end)
+                os.makedirs(incident_service._exports_dir(), exist_ok=True)
+                count = self._write_zip(path, self._closure_pdfs(db, incident_ids))
+            except Exception as e:
+                logger.error("Closure report export job %s failed: %s", task_id, e, exc_info=True)
+                db.rollback()
+                task_service.update_task(db, task=task, status="failed", result={**result, "error": str(e)})
+                return
+            size = os.path.getsize(path)
+            task_service.update_task(
+                db, task=task, status="completed", result={**result, "file": filename, "count": count, "size": size}
+            )
+            logger.info("Closure report export job %s completed - Reports: %s, Size: %s bytes", task_id, count, size)
+        finally:
+            db.close()
+
+
+report_artifact_service = ReportArtifactService()
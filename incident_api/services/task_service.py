@@ -19,11 +19,11 @@ class TaskService:
         """
         return crud.task.get_by_task_id(db, task_id=task_id)
 
-    def create_task(self, db: Session, task_id: str) -> models.Task:
+    def create_task(self, db: Session, task_id: str, result: Optional[dict] = None) -> models.Task:
         """
-        Crea una nueva tarea.
+        Crea una nueva tarea pendiente, opcionalmente con datos iniciales en `result`.
         """
-        task_in = schemas.TaskCreate(task_id=task_id, status="pending")
+        task_in = schemas.TaskCreate(task_id=task_id, status="pending", result=result)
         return crud.task.create(db, obj_in=task_in)
 
     def update_task(self, db: Session, task: models.Task, status: str, result: Optional[dict] = None) -> models.Task:
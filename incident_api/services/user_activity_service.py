@@ -9,8 +9,8 @@ from incident_api.crud import (
     crud_audit_log,
     crud_incident_log,
     crud_history,
-    crud_evidence_file,
 )
+from incident_api.services.metrics_service import metrics_service
 from incident_api.schemas.user_activity import UserCrossReferenceResponse, UserActivityMetrics, IncidentRelationship
 from incident_api.schemas.incident import IncidentInDB
 
@@ -23,16 +23,11 @@ def get_cross_reference_for_user(db: Session, user_id: int, activity_log_limit:
         raise ValueError("User not found")
 
     # 1. Fetch all raw data
-    total_created = crud_incident.incident.count_by_reporter(db, user_id=user_id)
-    total_resolved = crud_incident.incident.count_resolved_by_assignee(db, user_id=user_id)
-    total_assigned = crud_incident.incident.count_assigned_to_user(db, user_id=user_id)
+    # Incident, comment and file aggregates come from the materialised summary row;
+    # login metrics depend on the current time, so they are still computed live.
+    summary = metrics_service.get_user_metrics(db, user_id)
     last_login_log = crud_audit_log.audit_log.get_last_login_by_user(db, user_id=user_id)
-    top_incident_types = crud_incident.incident.get_top_incident_types_by_user(db, user_id=user_id)
-    avg_resolution_time = crud_incident.incident.get_average_resolution_time_by_assignee(db, user_id=user_id)
-    incidents_by_status_counts = crud_incident.incident.get_incidents_by_status_for_user(db, user_id=user_id)
     login_frequency = crud_audit_log.audit_log.get_login_frequency_per_week(db, user_id=user_id)
-    total_comments = crud_incident_log.incident_log.count_comments_by_user(db, user_id=user_id)
-    total_files = crud_evidence_file.evidence_file.count_by_uploader(db, user_id=user_id)
     
     associated_incidents = crud_incident.incident.get_multi_by_user_association(db, user_id=user_id)
 
@@ -46,16 +41,16 @@ def get_cross_reference_for_user(db: Session, user_id: int, activity_log_limit:
         email=user.email,
         role=user.role,
         is_active=user.is_active,
-        total_incidents_created=total_created,
-        total_incidents_resolved=total_resolved,
-        total_incidents_assigned=total_assigned,
+        total_incidents_created=summary.total_incidents_created,
+        total_incidents_resolved=summary.total_incidents_resolved,
+        total_incidents_assigned=summary.total_incidents_assigned,
         last_login=last_login_log.timestamp if last_login_log else None,
-        top_incident_types=[str(t) for t in top_incident_types],
-        average_resolution_time_hours=avg_resolution_time,
-        incidents_by_status=incidents_by_status_counts,
+        top_incident_types=summary.top_incident_types,
+        average_resolution_time_hours=summary.average_resolution_time_hours,
+        incidents_by_status=summary.incidents_by_status,
         login_frequency_per_week=login_frequency,
-        total_comments_made=total_comments,
-        total_files_uploaded=total_files,
+        total_comments_made=summary.total_comments_made,
+        total_files_uploaded=summary.total_files_uploaded,
     )
 
     # 3. Assemble the incidents list with relationship type
@@ -5,20 +5,21 @@ Este módulo encapsula la lógica de negocio para las operaciones de usuarios,
 actuando como intermediario entre los endpoints de la API y la capa de acceso a datos (CRUD).
 """
 
-from typing import List, Optional
+from typing import Any, Dict, Iterator, List, Optional
 from sqlalchemy.orm import Session
 from fastapi import HTTPException, status
 from fastapi.responses import StreamingResponse
-import io
-import csv
-import json
-import xml.etree.ElementTree as ET
-import xml.dom.minidom
 
 from incident_api import crud, models, schemas
-from incident_api.core.hashing import Hasher
+from incident_api.core.hashing import HashingPoolSaturated, password_hashing_pool
+from incident_api.core.auth_cache import authenticated_user_cache
 from incident_api.models import UserRole
 from incident_api.services.audit_service import audit_service
+from incident_api.services.export_service import export_service
+
+USER_EXPORT_COLUMNS = (
+    "user_id", "email", "full_name", "role", "position", "city", "is_active", "group_id", "created_at",
+)
 
 
 class UserService:
@@ -26,6 +27,23 @@ class UserService:
     Clase de servicio para gestionar la lógica de negocio de los usuarios.
     """
 
+    @staticmethod
+    def _hash_password(password: str) -> str:
+        """
+        Calcula el hash bcrypt en `password_hashing_pool`, igual que el login.
+
+        Raises:
+            HTTPException: 503 si el pool de hashing está saturado.
+        """
+        try:
+            return password_hashing_pool.get_password_hash(password)
+        except HashingPoolSaturated:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="El servicio de autenticación está saturado. Inténtalo de nuevo en unos segundos.",
+                headers={"Retry-After": "1"},
+            )
+
     def get_user_by_id(self, db: Session, user_id: int) -> Optional[models.User]:
         """
         Obtiene un usuario por su ID, incluyendo la relación de grupo.
@@ -69,7 +87,7 @@ class UserService:
         Hashea la contraseña antes de guardarla.
         """
         # Hash the password
-        hashed_password = Hasher.get_password_hash(user_in.password)
+        hashed_password = self._hash_password(user_in.password)
         # Create user data dict with hashed_password instead of password
         user_data = user_in.model_dump(exclude={'password'})
         user_data['hashed_password'] = hashed_password
@@ -122,14 +140,18 @@ class UserService:
 
         if user_in.password:
             # Hash the new password
-            hashed_password = Hasher.get_password_hash(user_in.password)
+            hashed_password = self._hash_password(user_in.password)
             # Create update data dict with hashed_password
             update_data = user_in.model_dump(exclude_unset=True)
             update_data['hashed_password'] = hashed_password
             del update_data['password']
-            return crud.user.update(db, db_obj=user, obj_in=update_data)
+            updated_user = crud.user.update(db, db_obj=user, obj_in=update_data)
         else:
-            return crud.user.update(db, db_obj=user, obj_in=user_in)
+            updated_user = crud.user.update(db, db_obj=user, obj_in=user_in)
+
+        # Cualquier cambio (rol, grupo, estado, contraseña...) invalida la caché de autenticación
+        authenticated_user_cache.invalidate_user(updated_user.user_id)
+        return updated_user
 
     def deactivate_user(self, db: Session, user_id: int, performed_by: Optional[models.User] = None) -> Optional[models.User]:
         """
@@ -140,6 +162,7 @@ class UserService:
             return None
 
         deactivated_user = crud.user.deactivate(db, db_obj=user_to_deactivate)
+        authenticated_user_cache.invalidate_user(user_id)
 
         # Registrar en auditoría
         audit_service.log_action(
@@ -161,13 +184,17 @@ class UserService:
         user_to_activate = crud.user.get(db, id=user_id)
         if not user_to_activate:
             return None
-        return crud.user.activate(db, db_obj=user_to_activate)
+        activated_user = crud.user.activate(db, db_obj=user_to_activate)
+        authenticated_user_cache.invalidate_user(user_id)
+        return activated_user
 
     def delete_user(self, db: Session, user_id: int) -> Optional[models.User]:
         """
         Elimina un usuario de la base de datos.
         """
-        return crud.user.remove(db, id=user_id)
+        removed_user = crud.user.remove(db, id=user_id)
+        authenticated_user_cache.invalidate_user(user_id)
+        return removed_user
 
     def get_irt_members(self, db: Session) -> List[models.User]:
         """
@@ -177,47 +204,43 @@ class UserService:
             db, roles=[models.UserRole.MIEMBRO_IRT, models.UserRole.LIDER_IRT]
         )
 
-    def export_users(self, db: Session, format: str, status: str = None, role: str = None):
-        """
-        Exporta una lista de todos los usuarios a un archivo CSV, JSON o XML.
-        """
-        users = self.get_all_users_with_filters(db, status=status, role=role)
-
-        if format == "csv":
-            output = io.StringIO()
-            writer = csv.writer(output)
-            writer.writerow(["user_id", "email", "full_name", "role", "position", "city", "is_active", "group_id", "created_at"])
-            for user in users:
-                writer.writerow([user.user_id, user.email, user.full_name, user.role, user.position, user.city, user.is_active, user.group_id, user.created_at])
-            output.seek(0)
-            return StreamingResponse(output, media_type="text/csv", headers={"Content-Disposition": "attachment; filename=users.csv"})
-        elif format == "xml":
-            root = ET.Element("users")
-            for user in users:
-                user_elem = ET.SubElement(root, "user")
-                ET.SubElement(user_elem, "user_id").text = str(user.user_id)
-                ET.SubElement(user_elem, "email").text = user.email
-                ET.SubElement(user_elem, "full_name").text = user.full_name
-                ET.SubElement(user_elem, "role").text = user.role
-                ET.SubElement(user_elem, "position").text = user.position or ""
-                ET.SubElement(user_elem, "city").text = user.city or ""
-                ET.SubElement(user_elem, "is_active").text = str(user.is_active)
-                ET.SubElement(user_elem, "group_id").text = str(user.group_id) if user.group_id else ""
-                ET.SubElement(user_elem, "created_at").text = str(user.created_at)
-
-            # Pretty print the XML
-            rough_string = ET.tostring(root, encoding='utf-8')
-            reparsed = xml.dom.minidom.parseString(rough_string)
-            pretty_xml = reparsed.toprettyxml(indent="  ", encoding='utf-8')
-
-            output = io.BytesIO(pretty_xml)
-            output.seek(0)
-            return StreamingResponse(output, media_type="application/xml", headers={"Content-Disposition": "attachment; filename=users.xml"})
-        else: # json
-            users_dict = [schemas.UserInDB.from_orm(user).model_dump() for user in users]
-            json_data = json.dumps(users_dict, indent=2, ensure_ascii=False, default=str)
-            return StreamingResponse(io.BytesIO(json_data.encode('utf-8')), media_type="application/json", headers={"Content-Disposition": "attachment; filename=users.json"})
+    @staticmethod
+    def _export_rows(rows, with_group: bool) -> Iterator[Dict[str, Any]]:
+        """Adapta las filas del cursor; en JSON el grupo se anida como en `UserInDB`."""
+        for row in rows:
+            item = dict(row)
+            name = item.pop("group_name")
+            description = item.pop("group_description")
+            if with_group:
+                item["group"] = (
+                    {"id": item["group_id"], "name": name, "description": description}
+                    if item["group_id"] is not None else None
+                )
+            yield item
+
+    def export_users(self, db: Session, format: str, status: str = None, role: str = None) -> StreamingResponse:
+        """
+        Exporta los usuarios filtrados a un archivo CSV, JSON o XML.
 
+        Los usuarios se leen con un cursor de servidor y se serializan a medida
+        que se envía la respuesta, sin límite de filas y con memoria constante.
+        Cualquier formato desconocido se exporta como JSON.
+        """
+        fmt = format if format in ("csv", "xml") else "json"
+        columns = USER_EXPORT_COLUMNS + (("group",) if fmt == "json" else ())
+        rows = self._export_rows(
+            crud.user.stream_with_filters(db, status=status, role=role), with_group=fmt == "json"
+        )
+        # La sesión se reabre al consumir el cursor, después de que la dependencia la cierre
+        return export_service.streaming_response(
+            rows,
+            columns=columns,
+            fmt=fmt,
+            filename="users",
+            on_close=db.close,
+            xml_root="users",
+            xml_row="user",
+        )
 
 # Crear una instancia del servicio para ser usada en la aplicación
 user_service = UserService()
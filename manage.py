@@ -451,6 +451,134 @@ def ingest_playbooks():
         typer.secho(f"Error during playbook ingestion: {e}", fg=typer.colors.RED)
         raise typer.Exit(code=1)
 
+@app.command()
+def refresh_metrics(
+    only_stale: bool = typer.Option(False, "--only-stale", help="Recalcula solo las filas marcadas como obsoletas."),
+):
+    """
+    Recalcula las métricas materializadas por usuario y por categoría.
+
+    Pensado para ejecutarse periódicamente (p. ej. desde cron).
+    """
+    from incident_api.services.metrics_service import metrics_service
+
+    db: Session = SessionLocal()
+    try:
+        typer.secho("Refreshing materialised metrics...", fg=typer.colors.YELLOW)
+        result = metrics_service.refresh_all(db, only_stale=only_stale)
+        typer.secho(
+            f"Metrics refreshed: {result['users']} user(s), {result['categories']} category(ies).",
+            fg=typer.colors.GREEN,
+        )
+    finally:
+        db.close()
+
+@app.command()
+def archive_audit_logs(
+    retention_months: int = typer.Option(None, "--retention-months", help="Meses completos que se conservan (por defecto, AUDIT_RETENTION_MONTHS)."),
+    archive_dir: str = typer.Option(None, "--archive-dir", help="Directorio de destino (por defecto, AUDIT_ARCHIVE_DIR)."),
+):
+    """
+    Crea las próximas particiones mensuales de auditoría y archiva los meses antiguos.
+
+    Pensado para ejecutarse periódicamente (p. ej. desde cron, una vez al día).
+    """
+    from incident_api.services.audit_retention_service import audit_retention_service
+
+    db: Session = SessionLocal()
+    try:
+        created = audit_retention_service.ensure_partitions(db)
+        if created:
+            typer.secho(f"Partitions created: {', '.join(created)}", fg=typer.colors.GREEN)
+        archived = audit_retention_service.archive_old_records(
+            db, retention_months=retention_months, archive_dir=archive_dir
+        )
+        for entry in archived:
+            typer.echo(f"  - {entry['month'][:7]}: {entry['rows']} record(s) -> {entry['file']}")
+        typer.secho(f"Audit retention done: {len(archived)} month(s) archived.", fg=typer.colors.GREEN)
+    finally:
+        db.close()
+
+@app.command()
+def prune_evidence_blobs(
+    min_age_hours: int = typer.Option(1, "--min-age-hours", help="Antigüedad mínima de los archivos a eliminar."),
+):
+    """
+    Elimina del almacén de evidencias (uploads/sha256) los archivos sin referencias.
+
+    Limpia el contenido de subidas cuya transacción falló, los `.part` de
+    escrituras interrumpidas y las vistas previas de contenido eliminado.
+    Pensado para ejecutarse periódicamente.
+    """
+    from incident_api.services.evidence_preview_service import evidence_preview_service
+    from incident_api.services.file_storage_service import file_storage_service
+
+    db: Session = SessionLocal()
+    try:
+        removed = file_storage_service.prune_orphan_blobs(db, min_age_seconds=min_age_hours * 3600)
+        removed_previews = evidence_preview_service.prune_orphans(db)
+        typer.secho(
+            f"Evidence store pruned: {removed} orphaned file(s) and {removed_previews} preview(s) removed.",
+            fg=typer.colors.GREEN,
+        )
+    finally:
+        db.close()
+
+@app.command()
+def prune_exports(
+    retention_days: int = typer.Option(None, "--retention-days", help="Días que se conservan (por defecto, EXPORT_RETENTION_DAYS)."),
+):
+    """
+    Elimina los archivos de exportación (incidentes e informes de cierre) y sus tareas caducados.
+
+    Pensado para ejecutarse periódicamente (p. ej. desde cron, una vez al día).
+    """
+    from incident_api.services.incident_service import incident_service
+
+    db: Session = SessionLocal()
+    try:
+        removed = incident_service.prune_expired_exports(db, retention_days=retention_days)
+        typer.secho(
+            f"Exports pruned: {removed['tasks']} task(s) and {removed['files']} file(s) removed.",
+            fg=typer.colors.GREEN,
+        )
+    finally:
+        db.close()
+
+@app.command()
+def alert_webhook_stub(
+    host: str = typer.Option("127.0.0.1", "--host", help="Dirección en la que escuchar."),
+    port: int = typer.Option(8765, "--port", help="Puerto en el que escuchar."),
+):
+    """
+    Arranca un receptor local de alertas para probar el sink 'webhook'.
+
+    Imprime cada lote recibido. Usar con ALERT_SINKS=webhook y
+    ALERT_WEBHOOK_URL=http://127.0.0.1:8765/alerts.
+    """
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+
+    class AlertStubHandler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length", 0))
+            payload = json.loads(self.rfile.read(length) or b"{}")
+            for alert in payload.get("alerts", []):
+                typer.echo(f"[{alert['level'].upper()}] x{alert['count']} {alert['message']}")
+            self.send_response(204)
+            self.end_headers()
+
+        def log_message(self, format, *args):
+            pass
+
+    typer.secho(f"Alert webhook stub listening on http://{host}:{port}/alerts", fg=typer.colors.GREEN)
+    server = HTTPServer((host, port), AlertStubHandler)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
 @app.command()
 def initial_setup():
     """
@@ -22,11 +22,11 @@ const FilterControls = ({ onFilterChange }: FilterControlsProps) => {
         onChange={(e) => onFilterChange({ user_id: e.target.value ? Number(e.target.value) : undefined })}
       />
       <TextInput
-        placeholder="Filter by Action..."
+        placeholder="Exact action (e.g. LOGIN_SUCCESS)..."
         onChange={(e) => onFilterChange({ action: e.target.value })}
       />
       <TextInput
-        placeholder="Filter by Resource Type..."
+        placeholder="Exact resource type (e.g. USER)..."
         onChange={(e) => onFilterChange({ resource_type: e.target.value })}
       />
       <DateRangePicker
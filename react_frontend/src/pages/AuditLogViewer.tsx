@@ -52,7 +52,7 @@ const AuditLogViewer = () => {
         <FilterControls onFilterChange={handleFilterChange} />
         <AuditLogTable
           logs={data.logs}
-          totalRecords={data.total}
+          totalRecords={data.total ?? 0}
           filters={filters}
           onPageChange={handlePageChange}
           isLoading={isLoading}
@@ -12,7 +12,9 @@ export interface AuditLogInDB {
 }
 
 export interface PaginatedAuditLogs {
-  total: number;
+  total: number | null; // exact up to a server-side cap, estimated above it
+  total_is_estimate?: boolean;
+  next_cursor?: string | null;
   logs: AuditLogInDB[];
 }
 
@@ -20,8 +22,11 @@ export interface AuditLogFilters {
   skip?: number;
   limit?: number;
   user_id?: number;
-  action?: string;
-  resource_type?: string;
+  action?: string; // exact match
+  resource_type?: string; // exact match
+  resource_id?: number;
+  cursor?: string; // next_cursor of the previous page
+  include_total?: boolean;
   start_date?: string; // ISO 8601 format
   end_date?: string; // ISO 8601 format
 }
@@ -16,6 +16,9 @@ from incident_api import crud
 from incident_api.schemas import UserCreate
 from incident_api.models import UserRole
 from incident_api.core.config import settings
+from incident_api.core.auth_cache import authenticated_user_cache
+from incident_api.services.audit_writer import audit_log_writer
+from incident_api.services.report_service import report_cache
 from tests.utils.common import random_lower_string
 
 # URL de la base de datos de prueba (SQLite en memoria)
@@ -37,11 +40,25 @@ def setup_test_db():
     """
     # Crear todas las tablas
     Base.metadata.create_all(bind=engine)
+    # La auditoría se escribe en la sesión de la prueba, no en el hilo en segundo plano
+    audit_log_writer.enabled = False
     yield
     # Destruir todas las tablas
     Base.metadata.drop_all(bind=engine)
 
 
+@pytest.fixture(autouse=True)
+def clear_in_memory_caches():
+    """
+    Vacía las cachés de usuarios autenticados y de informes: cada prueba revierte sus datos.
+    """
+    authenticated_user_cache.clear()
+    report_cache.clear()
+    yield
+    authenticated_user_cache.clear()
+    report_cache.clear()
+
+
 @pytest.fixture(scope="function")
 def db_session_override() -> Generator[Session, None, None]:
     """
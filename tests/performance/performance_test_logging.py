@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Script de prueba de rendimiento del logging de peticiones.
+
+Mide el throughput de la aplicación (peticiones por segundo a `/health`, con el
+middleware de logging activo) con varias configuraciones de logging:
+
+- síncrona en texto: los handlers de consola y archivo escriben en el event loop;
+- con cola en JSON: los loggers solo encolan y un hilo escribe;
+- con cola en JSON y muestreo del 10 % de las líneas INFO de peticiones.
+
+La consola se redirige a /dev/null y el archivo de log se escribe en un
+directorio temporal, de modo que se mide el coste real de formatear y escribir.
+Con BENCH_IO_DELAY_MS > 0 cada escritura en el archivo espera ese tiempo, para
+simular un disco lento o saturado (el caso en el que el logging síncrono bloquea
+el event loop).
+
+Uso:
+    python tests/performance/performance_test_logging.py
+    BENCH_REQUESTS=5000 BENCH_CONCURRENCY=50 python tests/performance/performance_test_logging.py
+    BENCH_IO_DELAY_MS=1 python tests/performance/performance_test_logging.py
+"""
+
+import asyncio
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+LOGS_DIR = tempfile.mkdtemp(prefix="bench_logs_")
+os.environ["LOGS_DIR"] = LOGS_DIR
+
+import httpx  # noqa: E402
+from logging.handlers import RotatingFileHandler  # noqa: E402
+
+from incident_api.core.logging_config import setup_logging, stop_logging  # noqa: E402
+from incident_api.main import app  # noqa: E402
+
+# Configuración
+NUM_REQUESTS = int(os.getenv("BENCH_REQUESTS", "3000"))
+CONCURRENCY = int(os.getenv("BENCH_CONCURRENCY", "20"))
+IO_DELAY = float(os.getenv("BENCH_IO_DELAY_MS", "0")) / 1000
+REPETITIONS = 3
+
+CONFIGURATIONS = [
+    ("síncrono, texto", {"log_format": "text", "use_queue": False, "sampling": ""}),
+    ("cola, texto", {"log_format": "text", "use_queue": True, "sampling": ""}),
+    ("cola, JSON", {"log_format": "json", "use_queue": True, "sampling": ""}),
+    ("cola, JSON, muestreo 10%", {"log_format": "json", "use_queue": True, "sampling": "incident_api.main=0.1"}),
+]
+
+
+async def run_requests() -> float:
+    """Lanza NUM_REQUESTS peticiones con CONCURRENCY clientes y devuelve peticiones/segundo."""
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        remaining = iter(range(NUM_REQUESTS))
+
+        async def worker():
+            for _ in remaining:
+                response = await client.get("/health")
+                assert response.status_code == 200
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(CONCURRENCY)))
+        return NUM_REQUESTS / (time.perf_counter() - start)
+
+
+def measure(label: str, options: dict) -> float:
+    real_stdout = sys.stdout
+    with open(os.devnull, "w") as devnull:
+        sys.stdout = devnull
+        try:
+            setup_logging(**options)
+            # El cliente de prueba también registra cada petición; no forma parte de la medida
+            logging.getLogger("httpx").setLevel(logging.WARNING)
+            results = [asyncio.run(run_requests()) for _ in range(REPETITIONS)]
+            stop_logging()
+        finally:
+            sys.stdout = real_stdout
+    best = max(results)
+    print(f"  {label:<28} {best:8.0f} req/s (mediana {statistics.median(results):.0f})")
+    return best
+
+
+def slow_emit(emit):
+    def wrapper(self, record):
+        time.sleep(IO_DELAY)
+        emit(self, record)
+    return wrapper
+
+
+def main():
+    if IO_DELAY:
+        RotatingFileHandler.emit = slow_emit(RotatingFileHandler.emit)
+    print(
+        f"Peticiones: {NUM_REQUESTS}, concurrencia: {CONCURRENCY}, "
+        f"retardo de E/S: {IO_DELAY * 1000:.1f} ms, logs en {LOGS_DIR}\n"
+    )
+    results = {label: measure(label, options) for label, options in CONFIGURATIONS}
+
+    baseline = results[CONFIGURATIONS[0][0]]
+    print("\nResumen de rendimiento (respecto a síncrono):")
+    for label, value in results.items():
+        print(f"  {label:<28} x{value / baseline:.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark del coste por petición de los middlewares de la aplicación.
+
+Compara, sobre un endpoint trivial y sin E/S de logging:
+
+- sin middlewares (referencia);
+- la implementación anterior: `ErrorHandlingMiddleware` y `RequestLoggingMiddleware`
+  como subclases de `BaseHTTPMiddleware`;
+- la implementación actual: los mismos middlewares como ASGI puro.
+
+También mide una respuesta en streaming, donde `BaseHTTPMiddleware` reenvía
+cada trozo del cuerpo a través de un stream de memoria intermedio.
+
+Uso:
+    python tests/performance/performance_test_middleware.py
+    BENCH_REQUESTS=20000 python tests/performance/performance_test_middleware.py
+"""
+
+import asyncio
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+os.environ.setdefault("LOGS_DIR", tempfile.mkdtemp(prefix="bench_logs_"))
+
+import httpx  # noqa: E402
+from fastapi import FastAPI, Request  # noqa: E402
+from fastapi.responses import JSONResponse, StreamingResponse  # noqa: E402
+from starlette.middleware.base import BaseHTTPMiddleware  # noqa: E402
+
+from incident_api.main import ErrorHandlingMiddleware, RequestLoggingMiddleware  # noqa: E402
+
+# Configuración
+NUM_REQUESTS = int(os.getenv("BENCH_REQUESTS", "5000"))
+STREAM_CHUNKS = 100
+REPETITIONS = 5
+
+logger = logging.getLogger("bench.middleware")
+
+
+# --- Implementación anterior (referencia) ---
+
+class LegacyErrorHandlingMiddleware(BaseHTTPMiddleware):
+    async def dispatch(self, request: Request, call_next):
+        try:
+            return await call_next(request)
+        except Exception as exc:
+            logging.error(f"Unhandled exception for request {request.method} {request.url}: {exc}", exc_info=True)
+            return JSONResponse(status_code=500, content={"error": "Internal Server Error"})
+
+
+class LegacyRequestLoggingMiddleware(BaseHTTPMiddleware):
+    async def dispatch(self, request: Request, call_next):
+        import time
+        start_time = time.time()
+        client_ip = request.client.host if request.client else "unknown"
+        logger.info(f"REQUEST - {request.method} {request.url.path} - IP: {client_ip}")
+        response = await call_next(request)
+        process_time = time.time() - start_time
+        response.headers["X-Process-Time"] = str(process_time)
+        logger.info(f"RESPONSE - {request.method} {request.url.path} - Status: {response.status_code}, Time: {process_time:.2f}s")
+        return response
+
+
+def build_app(error_middleware=None, logging_middleware=None) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/ping")
+    async def ping():
+        return {"ok": True}
+
+    @app.get("/stream")
+    async def stream():
+        return StreamingResponse((b"x" * 1024 for _ in range(STREAM_CHUNKS)), media_type="application/octet-stream")
+
+    # Mismo orden que en main.py
+    if error_middleware:
+        app.add_middleware(error_middleware)
+    if logging_middleware:
+        app.add_middleware(logging_middleware)
+    return app
+
+
+async def run_requests(app: FastAPI, path: str, count: int) -> float:
+    """Devuelve los microsegundos por petición de `count` peticiones secuenciales."""
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        start = time.perf_counter()
+        for _ in range(count):
+            response = await client.get(path)
+            assert response.status_code == 200
+        return (time.perf_counter() - start) / count * 1e6
+
+
+def measure(label: str, app: FastAPI, path: str, count: int) -> float:
+    asyncio.run(run_requests(app, path, min(count, 200)))  # calentamiento
+    results = [asyncio.run(run_requests(app, path, count)) for _ in range(REPETITIONS)]
+    best = min(results)
+    print(f"  {label:<32} {best:8.1f} µs/petición (mediana {statistics.median(results):.1f})")
+    return best
+
+
+def main():
+    # Se mide el coste del middleware, no el de escribir los logs
+    logging.disable(logging.CRITICAL)
+    apps = {
+        "sin middlewares": build_app(),
+        "BaseHTTPMiddleware (anterior)": build_app(LegacyErrorHandlingMiddleware, LegacyRequestLoggingMiddleware),
+        "ASGI puro (actual)": build_app(ErrorHandlingMiddleware, RequestLoggingMiddleware),
+    }
+
+    for path, count in (("/ping", NUM_REQUESTS), ("/stream", NUM_REQUESTS // 5)):
+        print(f"\n{path} ({count} peticiones):")
+        results = {label: measure(label, app, path, count) for label, app in apps.items()}
+        base = results["sin middlewares"]
+        legacy = results["BaseHTTPMiddleware (anterior)"] - base
+        current = results["ASGI puro (actual)"] - base
+        print(f"  Sobrecarga de los middlewares: anterior {legacy:.1f} µs, actual {current:.1f} µs")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark del guardado de archivos de evidencia.
+
+Compara, para varios archivos subidos en la misma petición:
+
+- la implementación anterior: copia síncrona en trozos de 4 KB dentro del event loop;
+- la implementación actual: `FileStorageService.asave_evidence_files`, con trozos
+  grandes y los archivos copiados y hasheados en paralelo en el pool de hilos.
+
+Además del tiempo total, mide el retardo máximo del event loop mientras se
+guardan los archivos (lo que tardaría en atenderse otra petición).
+
+Uso:
+    python tests/performance/performance_test_upload.py
+    BENCH_FILES=8 BENCH_FILE_MB=50 python tests/performance/performance_test_upload.py
+"""
+
+import asyncio
+import hashlib
+import importlib
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+os.environ.setdefault("LOGS_DIR", tempfile.mkdtemp(prefix="bench_logs_"))
+
+from fastapi import UploadFile  # noqa: E402
+from starlette.datastructures import Headers  # noqa: E402
+
+from incident_api.core.config import settings  # noqa: E402
+from incident_api.services.file_storage_service import FileStorageService  # noqa: E402
+
+storage_module = importlib.import_module("incident_api.services.file_storage_service")
+
+# Configuración
+NUM_FILES = int(os.getenv("BENCH_FILES", "4"))
+FILE_MB = int(os.getenv("BENCH_FILE_MB", "20"))
+
+
+def make_uploads(source_dir: str):
+    """Crea archivos temporales en disco, como los que deja el parser multipart."""
+    uploads = []
+    for i in range(NUM_FILES):
+        path = os.path.join(source_dir, f"source{i}.pdf")
+        if not os.path.exists(path):
+            with open(path, "wb") as f:
+                f.write(os.urandom(FILE_MB * 1024 * 1024))
+        uploads.append(UploadFile(
+            file=open(path, "rb"), filename=f"evidence{i}.pdf", headers=Headers({"content-type": "application/pdf"})
+        ))
+    return uploads
+
+
+def legacy_save(target_dir: str, files) -> None:
+    """Implementación anterior: trozos de 4 KB, secuencial y bloqueante."""
+    for i, file in enumerate(files):
+        sha256_hash = hashlib.sha256()
+        with open(os.path.join(target_dir, f"legacy{i}.pdf"), "wb") as out:
+            while chunk := file.file.read(4096):
+                out.write(chunk)
+                sha256_hash.update(chunk)
+        file.file.close()
+
+
+async def measure(label: str, save) -> None:
+    """Ejecuta `save()` mientras un latido mide el retardo máximo del event loop."""
+    lag = {"max": 0.0}
+    done = asyncio.Event()
+
+    async def heartbeat():
+        while not done.is_set():
+            start = time.perf_counter()
+            await asyncio.sleep(0.005)
+            lag["max"] = max(lag["max"], time.perf_counter() - start - 0.005)
+
+    beat = asyncio.create_task(heartbeat())
+    await asyncio.sleep(0)
+    start = time.perf_counter()
+    await save()
+    elapsed = time.perf_counter() - start
+    done.set()
+    await beat
+
+    total_mb = NUM_FILES * FILE_MB
+    print(f"  {label:<34} {elapsed:7.3f} s  {total_mb / elapsed:8.1f} MB/s  retardo máx. del loop {lag['max'] * 1000:8.1f} ms")
+
+
+async def run(source_dir: str, target_dir: str) -> None:
+    async def legacy():
+        legacy_save(target_dir, make_uploads(source_dir))
+
+    async def current():
+        await FileStorageService().asave_evidence_files(1, make_uploads(source_dir))
+
+    make_uploads(source_dir)  # genera los archivos de origen
+    await measure("síncrono, 4 KB (anterior)", legacy)
+    await measure(f"asíncrono, {settings.UPLOAD_CHUNK_SIZE_KB} KB, x{settings.UPLOAD_CONCURRENCY} (actual)", current)
+
+
+def main():
+    # Se mide la copia y el hash, no la escritura de los logs
+    settings.MAX_FILE_SIZE_MB = FILE_MB + 1
+    with tempfile.TemporaryDirectory() as source_dir, tempfile.TemporaryDirectory() as target_dir:
+        storage_module.UPLOADS_DIR = target_dir
+        print(f"{NUM_FILES} archivos de {FILE_MB} MB:")
+        asyncio.run(run(source_dir, target_dir))
+
+
+if __name__ == "__main__":
+    main()
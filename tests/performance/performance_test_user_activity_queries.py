@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""
+Script de prueba de rendimiento para las consultas de actividad de usuario.
+
+Compara, sobre una base de datos sembrada con 100.000 incidentes:
+
+- el estado anterior: sin índices en `reported_by_id`/`assigned_to_id` y con
+  `get_top_incident_types_by_user` implementado con tres consultas y fusión en Python;
+- el estado actual: con ambos índices y una sola consulta CTE/UNION ALL para los
+  tipos más frecuentes. `get_incidents_by_status_for_user` ya era una sola consulta;
+  se mide también su variante UNION ALL como referencia.
+
+Uso:
+    python tests/performance/performance_test_user_activity_queries.py
+    BENCH_DATABASE_URL=postgresql://... BENCH_INCIDENTS=100000 python tests/performance/...
+
+Por defecto se usa un archivo SQLite temporal. Con PostgreSQL, usar una base de
+datos vacía y dedicada: el script crea y borra sus propias tablas.
+"""
+
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import case, create_engine, func, insert, select, union_all
+from sqlalchemy.orm import sessionmaker
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from incident_api.crud.crud_incident import incident as crud_incident  # noqa: E402
+from incident_api.db.base import Base  # noqa: E402
+from incident_api.models import (  # noqa: E402
+    Incident,
+    IncidentCategory,
+    IncidentStatus,
+    IncidentType,
+    User,
+    UserRole,
+)
+
+# Configuración
+NUM_INCIDENTS = int(os.getenv("BENCH_INCIDENTS", "100000"))
+NUM_USERS = int(os.getenv("BENCH_USERS", "200"))
+NUM_TYPES = 40
+NUM_SAMPLED_USERS = 50
+REPETITIONS = 5
+BATCH_SIZE = 5000
+
+
+# --- Implementación anterior (referencia) ---
+
+def legacy_incidents_by_status_for_user(db, user_id):
+    results = db.query(
+        Incident.status,
+        func.count(Incident.incident_id)
+    ).filter(
+        (Incident.reported_by_id == user_id) | (Incident.assigned_to_id == user_id)
+    ).group_by(Incident.status).all()
+    return {status.value: count for status, count in results}
+
+
+def legacy_top_incident_types_by_user(db, user_id, limit=3):
+    reported = (
+        db.query(Incident.incident_type_id, func.count(Incident.incident_id).label('count'))
+        .filter(Incident.reported_by_id == user_id)
+        .group_by(Incident.incident_type_id)
+    )
+    assigned = (
+        db.query(Incident.incident_type_id, func.count(Incident.incident_id).label('count'))
+        .filter(Incident.assigned_to_id == user_id)
+        .group_by(Incident.incident_type_id)
+    )
+    type_counts = {}
+    for type_id, count in reported.all() + assigned.all():
+        if type_id:
+            type_counts[type_id] = type_counts.get(type_id, 0) + count
+    top_type_ids = sorted(type_counts, key=type_counts.get, reverse=True)[:limit]
+    if not top_type_ids:
+        return []
+    ordering = case(
+        {type_id: index for index, type_id in enumerate(top_type_ids)},
+        value=IncidentType.incident_type_id,
+    )
+    top_types = (
+        db.query(IncidentType.name)
+        .filter(IncidentType.incident_type_id.in_(top_type_ids))
+        .order_by(ordering)
+        .all()
+    )
+    return [name for (name,) in top_types]
+
+
+def union_all_incidents_by_status_for_user(db, user_id):
+    involvement = union_all(
+        select(Incident.status).where(Incident.reported_by_id == user_id),
+        select(Incident.status).where(
+            Incident.assigned_to_id == user_id, Incident.reported_by_id != user_id
+        ),
+    ).cte("user_incident_statuses")
+    results = db.query(involvement.c.status, func.count()).group_by(involvement.c.status).all()
+    return {status.value: count for status, count in results}
+
+
+# --- Siembra de datos ---
+
+USER_INDEXES = [
+    index for index in Incident.__table__.indexes
+    if index.name in ("ix_Incidents_reported_by_id", "ix_Incidents_assigned_to_id")
+]
+
+
+def seed(engine):
+    """Crea las tablas y las llena con datos sintéticos."""
+    print(f"Sembrando {NUM_USERS} usuarios, {NUM_TYPES} tipos y {NUM_INCIDENTS} incidentes...")
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    rng = random.Random(42)
+    statuses = list(IncidentStatus)
+    now = datetime(2025, 1, 1)
+
+    with engine.begin() as conn:
+        conn.execute(insert(IncidentCategory), [{"incident_category_id": 1, "name": "Benchmark"}])
+        conn.execute(insert(IncidentType), [
+            {"incident_type_id": i, "name": f"Tipo {i}", "incident_category_id": 1}
+            for i in range(1, NUM_TYPES + 1)
+        ])
+        conn.execute(insert(User), [
+            {"user_id": i, "email": f"bench{i}@example.com", "full_name": f"Bench {i}", "role": UserRole.EMPLEADO}
+            for i in range(1, NUM_USERS + 1)
+        ])
+        for start in range(0, NUM_INCIDENTS, BATCH_SIZE):
+            rows = []
+            for _ in range(min(BATCH_SIZE, NUM_INCIDENTS - start)):
+                discovered = now - timedelta(minutes=rng.randint(0, 500_000))
+                rows.append({
+                    "reported_by_id": rng.randint(1, NUM_USERS),
+                    "assigned_to_id": rng.choice([None, rng.randint(1, NUM_USERS)]),
+                    "incident_category_id": 1,
+                    "incident_type_id": rng.choice([None, rng.randint(1, NUM_TYPES)]),
+                    "status": rng.choice(statuses),
+                    "summary": "Incidente de benchmark",
+                    "description": "Generado por performance_test_user_activity_queries.py",
+                    "discovery_time": discovered,
+                    "created_at": discovered,
+                    "updated_at": discovered,
+                })
+            conn.execute(insert(Incident), rows)
+
+    # Partir del estado anterior: sin índices por usuario
+    for index in USER_INDEXES:
+        index.drop(bind=engine)
+
+
+# --- Medición ---
+
+def measure(label, func_, db, user_ids):
+    """Ejecuta la función para cada usuario varias veces y muestra estadísticas."""
+    timings = []
+    for _ in range(REPETITIONS):
+        start = time.perf_counter()
+        for user_id in user_ids:
+            func_(db, user_id)
+        timings.append((time.perf_counter() - start) / len(user_ids) * 1000)
+    print(f"  {label:<34} mediana {statistics.median(timings):8.3f} ms/usuario  (mín {min(timings):.3f} ms)")
+    return statistics.median(timings)
+
+
+def main():
+    url = os.getenv("BENCH_DATABASE_URL")
+    tmp_path = None
+    if not url:
+        fd, tmp_path = tempfile.mkstemp(suffix=".db")
+        os.close(fd)
+        url = f"sqlite:///{tmp_path}"
+
+    engine = create_engine(url)
+    try:
+        seed(engine)
+        db = sessionmaker(bind=engine)()
+        user_ids = random.Random(7).sample(range(1, NUM_USERS + 1), min(NUM_SAMPLED_USERS, NUM_USERS))
+
+        # Verificar que todas las implementaciones devuelven lo mismo antes de medir
+        for user_id in user_ids:
+            by_status = crud_incident.get_incidents_by_status_for_user(db, user_id=user_id)
+            assert legacy_incidents_by_status_for_user(db, user_id) == by_status
+            assert union_all_incidents_by_status_for_user(db, user_id) == by_status
+            legacy_top = legacy_top_incident_types_by_user(db, user_id)
+            new_top = crud_incident.get_top_incident_types_by_user(db, user_id=user_id)
+            assert len(legacy_top) == len(new_top)
+
+        print("\nAntes (sin índices por usuario):")
+        before_status = measure("estado: OR + GROUP BY", legacy_incidents_by_status_for_user, db, user_ids)
+        before_top = measure("tipos: 3 consultas + Python", legacy_top_incident_types_by_user, db, user_ids)
+
+        for index in USER_INDEXES:
+            index.create(bind=engine)
+
+        print("\nDespués (con índices):")
+        after_status = measure("estado: OR + GROUP BY",
+                               lambda s, u: crud_incident.get_incidents_by_status_for_user(s, user_id=u),
+                               db, user_ids)
+        measure("estado: UNION ALL (referencia)", union_all_incidents_by_status_for_user, db, user_ids)
+        measure("tipos: 3 consultas + Python", legacy_top_incident_types_by_user, db, user_ids)
+        after_top = measure("tipos: CTE/UNION ALL",
+                            lambda s, u: crud_incident.get_top_incident_types_by_user(s, user_id=u),
+                            db, user_ids)
+
+        print("\nResumen de rendimiento:")
+        print(f"  get_incidents_by_status_for_user: x{before_status / after_status:.2f}")
+        print(f"  get_top_incident_types_by_user:   x{before_top / after_top:.2f}")
+
+        db.close()
+    finally:
+        Base.metadata.drop_all(bind=engine)
+        engine.dispose()
+        if tmp_path:
+            os.remove(tmp_path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""
+Unit tests for the asynchronous alert pipeline.
+"""
+
+from datetime import datetime, timezone
+from typing import List
+
+from incident_api.services.alerting_service import (
+    Alert,
+    AlertingService,
+    AlertSink,
+    FileAlertSink,
+    WebhookAlertSink,
+)
+
+
+class RecordingSink(AlertSink):
+    name = "recording"
+
+    def __init__(self):
+        self.batches: List[List[Alert]] = []
+
+    def send(self, alerts: List[Alert]) -> None:
+        self.batches.append(list(alerts))
+
+
+class FailingSink(AlertSink):
+    name = "failing"
+
+    def send(self, alerts: List[Alert]) -> None:
+        raise ConnectionError("sink down")
+
+
+def _service(*sinks: AlertSink, batch_size: int = 100) -> AlertingService:
+    # A long flush interval so that only explicit flushes deliver alerts
+    return AlertingService(sinks_factory=lambda: list(sinks), flush_interval=60, batch_size=batch_size)
+
+
+class TestAlertingService:
+    """Test queueing, aggregation and delivery of alerts."""
+
+    def test_repeated_alerts_are_collapsed_with_a_count(self):
+        """500 failed logins from one IP become a single alert per flush."""
+        sink = RecordingSink()
+        service = _service(sink)
+        try:
+            for i in range(500):
+                service.trigger_alert(f"Failed login for user{i}", level="error", key="failed_login:10.0.0.1")
+            service.trigger_alert("Failed login for other", level="error", key="failed_login:10.0.0.2")
+            service.flush()
+        finally:
+            service.stop()
+
+        alerts = {alert.key: alert for batch in sink.batches for alert in batch}
+        assert alerts["failed_login:10.0.0.1"].count == 500
+        assert alerts["failed_login:10.0.0.1"].message == "Failed login for user0"
+        assert alerts["failed_login:10.0.0.2"].count == 1
+
+    def test_alerts_are_sent_in_batches(self):
+        """Distinct alerts are split into batches of batch_size."""
+        sink = RecordingSink()
+        service = _service(sink, batch_size=2)
+        try:
+            for i in range(5):
+                service.trigger_alert(f"alert {i}")
+            service.flush()
+            stats = service.stats()
+        finally:
+            service.stop()
+
+        assert [len(batch) for batch in sink.batches] == [2, 2, 1]
+        assert (stats["received"], stats["sent"]) == (5, 5)
+
+    def test_failing_sink_does_not_block_others(self):
+        """A sink error is counted and the remaining sinks still receive the alert."""
+        sink = RecordingSink()
+        service = _service(FailingSink(), sink)
+        try:
+            service.trigger_alert("Privilege escalation", level="critical")
+            service.flush()
+            stats = service.stats()
+        finally:
+            service.stop()
+
+        assert stats["failed_batches"] == 1
+        assert [alert.level for alert in sink.batches[0]] == ["critical"]
+
+    def test_stop_delivers_pending_alerts(self):
+        """Alerts still queued when the service stops are delivered."""
+        sink = RecordingSink()
+        service = _service(sink)
+        service.trigger_alert("pending")
+        service.stop()
+
+        assert [alert.message for batch in sink.batches for alert in batch] == ["pending"]
+
+
+class TestAlertSinks:
+    """Test the built-in sinks."""
+
+    def _alert(self, count: int = 1) -> Alert:
+        seen = datetime(2024, 1, 1, tzinfo=timezone.utc)
+        return Alert(key="k", level="error", message="Failed login", first_seen=seen, last_seen=seen, count=count)
+
+    def test_file_sink_writes_one_line_per_alert(self, tmp_path):
+        path = tmp_path / "alerts" / "security_alerts.log"
+        sink = FileAlertSink(str(path))
+        sink.send([self._alert(), self._alert(count=3)])
+        sink.close()
+
+        lines = path.read_text().splitlines()
+        assert len(lines) == 2
+        assert " - ERROR - Failed login" in lines[0]
+        assert "repeated 3 times" in lines[1]
+
+    def test_webhook_sink_posts_the_batch(self):
+        posted = []
+
+        class FakeResponse:
+            def raise_for_status(self):
+                pass
+
+        class FakeClient:
+            def post(self, url, json):
+                posted.append((url, json))
+                return FakeResponse()
+
+        WebhookAlertSink("http://stub/alerts", client=FakeClient()).send([self._alert(count=2)])
+
+        assert posted[0][0] == "http://stub/alerts"
+        assert posted[0][1]["alerts"][0]["count"] == 2
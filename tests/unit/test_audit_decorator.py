@@ -0,0 +1,115 @@
+"""
+Unit tests for the change capture done by the audit_action decorator.
+"""
+
+import asyncio
+from unittest.mock import patch
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from starlette.requests import Request
+
+from incident_api import crud, models
+from incident_api.api.decorators import audit_action
+from incident_api.models.user import UserRole
+from incident_api.schemas.user import UserCreate
+
+
+def _request() -> Request:
+    return Request({"type": "http", "method": "PUT", "path": "/", "headers": [], "client": ("127.0.0.1", 1234)})
+
+
+def _create_users(db: Session) -> tuple:
+    users = [
+        crud.user.create(
+            db, obj_in=UserCreate(email=email, password="a-long-password", full_name="Test User", role=role)
+        )
+        for email, role in (("actor@test.com", UserRole.ADMINISTRADOR), ("target@test.com", UserRole.EMPLEADO))
+    ]
+    # Endpoint dependencies load the current user and the resource before the handler runs
+    for user in users:
+        db.refresh(user)
+    return tuple(users)
+
+
+@audit_action(action="UPDATE_USER", resource_type="USER", resource_id_param="user_id", get_resource_func=crud.user.get)
+def update_user(*, db: Session, current_user: models.User, request: Request, user_id: int, **values):
+    user = db.get(models.User, user_id)
+    for key, value in values.items():
+        setattr(user, key, value)
+    db.flush()
+    return user
+
+
+class TestAuditActionChangeCapture:
+    """Test that audit_action records only the changed attributes of an already-loaded resource."""
+
+    def _last_details(self, db: Session) -> dict:
+        log = db.query(models.AuditLog).order_by(models.AuditLog.id.desc()).first()
+        return log.details
+
+    def test_records_only_changed_fields_without_refetching(self, db_session_override: Session):
+        """The loaded instance is reused and sensitive fields are never logged."""
+        actor, target = _create_users(db_session_override)
+        user_selects = []
+
+        def count_selects(conn, cursor, statement, parameters, context, executemany):
+            if statement.lstrip().upper().startswith("SELECT") and 'from "users"' in statement.lower():
+                user_selects.append(statement)
+
+        bind = db_session_override.get_bind()
+        event.listen(bind, "before_cursor_execute", count_selects)
+        try:
+            asyncio.run(update_user(
+                db=db_session_override, current_user=actor, request=_request(), user_id=target.user_id,
+                full_name="Renamed", hashed_password="not-logged",
+            ))
+        finally:
+            event.remove(bind, "before_cursor_execute", count_selects)
+
+        assert user_selects == []
+        assert self._last_details(db_session_override) == {
+            "changes": {"old_values": {"full_name": "Test User"}, "new_values": {"full_name": "Renamed"}}
+        }
+
+    def test_changes_across_several_flushes_are_merged(self, db_session_override: Session):
+        """The first old value and the last new value are kept when the handler flushes more than once."""
+        actor, target = _create_users(db_session_override)
+
+        @audit_action(action="UPDATE_USER", resource_type="USER", resource_id_param="user_id", get_resource_func=crud.user.get)
+        def rename_twice(*, db: Session, current_user: models.User, request: Request, user_id: int):
+            user = db.get(models.User, user_id)
+            user.full_name = "First"
+            db.flush()
+            user.full_name = "Second"
+            db.flush()
+            return user
+
+        asyncio.run(rename_twice(db=db_session_override, current_user=actor, request=_request(), user_id=target.user_id))
+
+        assert self._last_details(db_session_override)["changes"] == {
+            "old_values": {"full_name": "Test User"}, "new_values": {"full_name": "Second"}
+        }
+
+    def test_privilege_escalation_alert_uses_captured_history(self, db_session_override: Session):
+        """Promoting a user to an admin role still triggers the security alert."""
+        actor, target = _create_users(db_session_override)
+
+        with patch("incident_api.api.decorators.alerting_service") as mock_alerting:
+            asyncio.run(update_user(
+                db=db_session_override, current_user=actor, request=_request(), user_id=target.user_id,
+                role=UserRole.ADMINISTRADOR,
+            ))
+
+        mock_alerting.trigger_alert.assert_called_once()
+        assert "Privilege escalation" in mock_alerting.trigger_alert.call_args.args[0]
+
+    def test_unchanged_resource(self, db_session_override: Session):
+        """Without modifications the log says no data changed."""
+        actor, target = _create_users(db_session_override)
+
+        asyncio.run(update_user(db=db_session_override, current_user=actor, request=_request(), user_id=target.user_id))
+
+        assert self._last_details(db_session_override) == {
+            "response": "Action completed successfully (no data changed)."
+        }
@@ -0,0 +1,92 @@
+"""
+Unit tests for audit-log filtering, keyset pagination and capped counts.
+"""
+
+from datetime import datetime, timedelta
+from unittest.mock import Mock, patch
+
+import pytest
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import Session
+
+from incident_api import crud, models
+from incident_api.services.audit_service import AuditService
+
+
+@pytest.fixture
+def logs(db_session_override: Session):
+    base = datetime(2024, 5, 1, 12, 0)
+    for i in range(7):
+        db_session_override.add(models.AuditLog(
+            action="LOGIN_SUCCESS" if i % 2 else "UPDATE_USER",
+            resource_type="USER",
+            resource_id=i,
+            timestamp=base + timedelta(minutes=i // 2),  # pares de registros con el mismo timestamp
+        ))
+    db_session_override.commit()
+
+
+class TestAuditLogQueries:
+    """Test CRUDAuditLog filters and AuditService.get_paged_audit_logs."""
+
+    def test_exact_action_filter(self, db_session_override: Session, logs):
+        """Filters match whole values only."""
+        found = crud.audit_log.get_multi_with_filters(db_session_override, actions=["LOGIN_SUCCESS"])
+        partial = crud.audit_log.get_multi_with_filters(db_session_override, actions=["LOGIN"])
+
+        assert {log.action for log in found} == {"LOGIN_SUCCESS"}
+        assert len(found) == 3
+        assert partial == []
+
+    def test_keyset_pagination_walks_all_rows_once(self, db_session_override: Session, logs):
+        """Following next_cursor returns every row exactly once, newest first, even with equal timestamps."""
+        service = AuditService()
+        page = service.get_paged_audit_logs(db_session_override, limit=3)
+        seen = [log.id for log in page["logs"]]
+        while page["next_cursor"]:
+            page = service.get_paged_audit_logs(
+                db_session_override, cursor=page["next_cursor"], limit=3, include_total=False
+            )
+            assert page["total"] is None
+            seen.extend(log.id for log in page["logs"])
+
+        ordered = [
+            log.id for log in sorted(
+                db_session_override.query(models.AuditLog), key=lambda entry: (entry.timestamp, entry.id), reverse=True
+            )
+        ]
+        assert seen == ordered
+
+    def test_total_is_capped(self, db_session_override: Session, logs):
+        """Above the cap the total is reported as an estimate."""
+        with patch("incident_api.services.audit_service.settings") as mock_settings:
+            mock_settings.AUDIT_COUNT_CAP = 5
+            capped = AuditService().get_paged_audit_logs(db_session_override, limit=2)
+            mock_settings.AUDIT_COUNT_CAP = 100
+            exact = AuditService().get_paged_audit_logs(db_session_override, limit=2)
+
+        assert (capped["total"], capped["total_is_estimate"]) == (5, True)
+        assert (exact["total"], exact["total_is_estimate"]) == (7, False)
+
+    def test_filtered_total_above_cap_uses_valid_explain_sql(self, db_session_override: Session, logs):
+        """On PostgreSQL the IN filters are rendered into the EXPLAIN statement, not left as POSTCOMPILE markers."""
+        connection = Mock(dialect=postgresql.psycopg2.dialect())
+        connection.exec_driver_sql.return_value.scalar.return_value = [{"Plan": {"Plan Rows": 40}}]
+        dialect = db_session_override.get_bind().dialect
+
+        with patch.object(dialect, "name", "postgresql"), \
+                patch.object(db_session_override, "connection", return_value=connection):
+            total = crud.audit_log.count_with_filters(
+                db_session_override, cap=2, actions=["LOGIN_SUCCESS", "UPDATE_USER"], resource_types=["USER"]
+            )
+
+        assert total == (40, True)
+        sql, params = connection.exec_driver_sql.call_args.args
+        assert sql.startswith("EXPLAIN (FORMAT JSON) ")
+        assert "POSTCOMPILE" not in sql
+        assert sorted(params.values(), key=str) == ["LOGIN_SUCCESS", "UPDATE_USER", "USER"]
+
+    def test_invalid_cursor(self, db_session_override: Session):
+        """A malformed cursor raises ValueError."""
+        with pytest.raises(ValueError):
+            AuditService().get_paged_audit_logs(db_session_override, cursor="not-a-cursor")
@@ -0,0 +1,141 @@
+"""
+Unit tests for the audit-log retention and archival job.
+"""
+
+import gzip
+import json
+from datetime import date, datetime
+from types import SimpleNamespace
+
+from sqlalchemy.orm import Session
+
+from incident_api import models
+from incident_api.services.audit_retention_service import audit_retention_service
+
+
+def _add_log(db: Session, action: str, timestamp: datetime) -> None:
+    db.add(models.AuditLog(action=action, resource_type="TEST", timestamp=timestamp, details={"a": 1}))
+
+
+class TestAuditRetentionService:
+    """Test AuditRetentionService.archive_old_records on a non-partitioned database."""
+
+    def test_archives_months_older_than_retention(self, db_session_override: Session, tmp_path):
+        """Old months are exported to one gzip JSONL file each and removed; recent ones stay."""
+        _add_log(db_session_override, "OLD_1", datetime(2024, 1, 5, 10, 0))
+        _add_log(db_session_override, "OLD_2", datetime(2024, 1, 31, 23, 59))
+        _add_log(db_session_override, "OLD_3", datetime(2024, 3, 1, 0, 0))
+        _add_log(db_session_override, "KEPT", datetime(2024, 6, 1, 0, 0))
+        db_session_override.commit()
+
+        archived = audit_retention_service.archive_old_records(
+            db_session_override, retention_months=3, archive_dir=str(tmp_path), today=date(2024, 9, 15)
+        )
+
+        assert [(entry["month"], entry["rows"]) for entry in archived] == [
+            ("2024-01-01", 2),
+            ("2024-03-01", 1),
+        ]
+        with gzip.open(tmp_path / "audit_log_2024_01.jsonl.gz", "rt") as archive:
+            records = [json.loads(line) for line in archive]
+        assert [r["action"] for r in records] == ["OLD_1", "OLD_2"]
+        assert records[0]["details"] == {"a": 1}
+
+        remaining = {log.action for log in db_session_override.query(models.AuditLog)}
+        assert remaining == {"KEPT"}
+
+    def test_nothing_to_archive(self, db_session_override: Session, tmp_path):
+        """Without old records no files are written."""
+        archived = audit_retention_service.archive_old_records(
+            db_session_override, retention_months=12, archive_dir=str(tmp_path), today=date(2024, 9, 15)
+        )
+
+        assert archived == []
+        assert list(tmp_path.iterdir()) == []
+
+    def test_ensure_partitions_is_a_no_op_without_postgres(self, db_session_override: Session):
+        """Partitions are only managed on PostgreSQL."""
+        assert audit_retention_service.ensure_partitions(db_session_override) == []
+
+
+class _FakePostgresSession:
+    """Records the SQL sent by the service as if it were talking to a partitioned PostgreSQL table."""
+
+    def __init__(self, partitions=(), default="audit_log_default", rowcount=0):
+        self.partitions = list(partitions)
+        self.default = default
+        self.rowcount = rowcount
+        self.statements = []
+
+    def get_bind(self):
+        return SimpleNamespace(dialect=SimpleNamespace(name="postgresql"))
+
+    def execute(self, statement, *args):
+        sql = " ".join(str(statement).split())
+        if "pg_inherits" in sql:
+            return [(name,) for name in self.partitions]
+        self.statements.append(sql)
+        return SimpleNamespace(rowcount=self.rowcount)
+
+    def scalar(self, statement):
+        return self.default
+
+    def commit(self):
+        self.statements.append("COMMIT")
+
+
+class TestAuditPartitions:
+    """Test the PostgreSQL partition maintenance statements."""
+
+    def test_new_partition_takes_over_rows_from_default(self):
+        """Rows already in DEFAULT are moved before the partition is attached."""
+        db = _FakePostgresSession(rowcount=2)
+
+        created = audit_retention_service.ensure_partitions(db, months_ahead=0, today=date(2025, 1, 15))
+
+        assert created == ["audit_log_p2025_01"]
+        assert [sql.split(" (")[0].split(" WHERE")[0] for sql in db.statements] == [
+            "LOCK TABLE audit_log_default IN SHARE ROW EXCLUSIVE MODE",
+            "CREATE TABLE audit_log_p2025_01",
+            "ALTER TABLE audit_log_p2025_01 ADD CONSTRAINT audit_log_p2025_01_bounds CHECK",
+            "INSERT INTO audit_log_p2025_01 SELECT * FROM audit_log_default",
+            "ALTER TABLE audit_log_default DISABLE TRIGGER protect_audit_log_trigger",
+            "DELETE FROM audit_log_default",
+            "ALTER TABLE audit_log_default ENABLE TRIGGER protect_audit_log_trigger",
+            "ALTER TABLE audit_log ATTACH PARTITION audit_log_p2025_01 FOR VALUES FROM",
+            "ALTER TABLE audit_log_p2025_01 DROP CONSTRAINT audit_log_p2025_01_bounds",
+            "COMMIT",
+        ]
+        assert "FROM ('2025-01-01') TO ('2025-02-01')" in db.statements[-3]
+
+    def test_empty_default_leaves_the_trigger_alone(self):
+        db = _FakePostgresSession(partitions=["audit_log_p2025_01"], rowcount=0)
+
+        created = audit_retention_service.ensure_partitions(db, months_ahead=1, today=date(2025, 1, 15))
+
+        assert created == ["audit_log_p2025_02"]
+        assert not any("TRIGGER" in sql or sql.startswith("DELETE") for sql in db.statements)
+
+    def test_month_left_in_default_is_deleted_with_the_trigger_disabled(self):
+        """Archiving a month without its own partition never deletes through the protected parent table."""
+        db = _FakePostgresSession(partitions=["audit_log_p2025_01"])
+
+        audit_retention_service._drop_month(db, date(2024, 12, 1), date(2025, 1, 1))
+
+        assert db.statements == [
+            "ALTER TABLE audit_log_default DISABLE TRIGGER protect_audit_log_trigger",
+            "DELETE FROM audit_log_default WHERE \"timestamp\" >= '2024-12-01' AND \"timestamp\" < '2025-01-01'",
+            "ALTER TABLE audit_log_default ENABLE TRIGGER protect_audit_log_trigger",
+            "COMMIT",
+        ]
+
+    def test_month_with_partition_is_detached_and_dropped(self):
+        db = _FakePostgresSession(partitions=["audit_log_p2024_12"])
+
+        audit_retention_service._drop_month(db, date(2024, 12, 1), date(2025, 1, 1))
+
+        assert db.statements == [
+            "ALTER TABLE audit_log DETACH PARTITION audit_log_p2024_12",
+            "DROP TABLE audit_log_p2024_12",
+            "COMMIT",
+        ]
@@ -0,0 +1,182 @@
+"""
+Unit tests for the asynchronous, batched audit-log writer.
+"""
+
+import json
+import threading
+import time
+from unittest.mock import patch
+
+import pytest
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from incident_api import crud, models
+from incident_api.db.base import Base
+from incident_api.services.audit_service import AuditService
+from incident_api.services.audit_writer import AuditLogWriter
+
+
+def _record(action: str = "TEST_ACTION") -> dict:
+    return {
+        "user_id": None,
+        "action": action,
+        "resource_type": "TEST",
+        "resource_id": None,
+        "details": {"ok": True},
+        "ip_address": None,
+        "user_agent": None,
+        "success": True,
+    }
+
+
+@pytest.fixture
+def session_factory(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'audit.db'}")
+    Base.metadata.create_all(bind=engine)
+    yield sessionmaker(bind=engine)
+    engine.dispose()
+
+
+def _db_down() -> OperationalError:
+    return OperationalError("INSERT INTO audit_log", {}, Exception("db down"))
+
+
+def _count(session_factory) -> int:
+    with session_factory() as db:
+        return db.scalar(select(func.count(models.AuditLog.id)))
+
+
+class TestAuditLogWriter:
+    """Test AuditLogWriter batching and spooling."""
+
+    def test_background_thread_writes_in_batches(self, session_factory, tmp_path):
+        """Enqueued records are inserted by the writer thread with one INSERT per batch."""
+        writer = AuditLogWriter(
+            session_factory=session_factory, batch_size=10, flush_interval=0.05,
+            spool_path=str(tmp_path / "spool.jsonl"),
+        )
+        with patch.object(writer, "_insert", wraps=writer._insert) as mock_insert:
+            for i in range(25):
+                writer.enqueue(_record(f"ACTION_{i}"))
+            deadline = time.monotonic() + 5
+            while writer.stats()["written"] < 25 and time.monotonic() < deadline:
+                time.sleep(0.01)
+            writer.stop()
+
+        assert _count(session_factory) == 25
+        assert all(len(call.args[0]) <= 10 for call in mock_insert.call_args_list)
+        assert mock_insert.call_count < 25
+
+    def test_spools_when_database_is_unavailable_and_replays(self, session_factory, tmp_path):
+        """A failed batch goes to the spool file and is inserted on the next successful write."""
+        spool = tmp_path / "spool.jsonl"
+        writer = AuditLogWriter(session_factory=session_factory, spool_path=str(spool))
+        writer._ensure_started = lambda: None
+
+        with patch.object(writer, "_insert", side_effect=_db_down()):
+            writer.enqueue(_record("FIRST"))
+            writer.flush()
+        assert spool.exists()
+        assert writer.stats()["spooled"] == 1
+        assert _count(session_factory) == 0
+
+        writer.enqueue(_record("SECOND"))
+        writer.flush()
+
+        assert not spool.exists()
+        with session_factory() as db:
+            actions = set(db.scalars(select(models.AuditLog.action)))
+        assert actions == {"FIRST", "SECOND"}
+
+    def test_replay_skips_truncated_line(self, session_factory, tmp_path):
+        """A partially written trailing line (crash mid-write) is ignored."""
+        spool = tmp_path / "spool.jsonl"
+        writer = AuditLogWriter(session_factory=session_factory, spool_path=str(spool))
+        writer._spool([_record("KEPT")])
+        with open(spool, "a") as f:
+            f.write('{"action": "TRUNC')
+
+        assert writer.replay_spool() == 1
+        assert _count(session_factory) == 1
+
+    def test_rejected_records_go_to_dead_letter_file(self, session_factory, tmp_path):
+        """A record the database rejects is quarantined; the rest of its batch is written, nothing is spooled."""
+        spool = tmp_path / "spool.jsonl"
+        writer = AuditLogWriter(session_factory=session_factory, spool_path=str(spool))
+        writer._ensure_started = lambda: None
+
+        writer.enqueue(_record("GOOD"))
+        writer.enqueue(_record(None))
+        writer.flush()
+
+        assert not spool.exists()
+        assert _count(session_factory) == 1
+        assert writer.stats()["dead_lettered"] == 1
+        with open(writer.dead_letter_path) as f:
+            quarantined = [json.loads(line) for line in f]
+        assert len(quarantined) == 1
+        assert quarantined[0]["action"] is None
+        assert quarantined[0]["_error"]
+
+    def test_replay_is_one_transaction(self, session_factory, tmp_path):
+        """If the database drops mid-replay nothing is committed, so the retry does not duplicate records."""
+        spool = tmp_path / "spool.jsonl"
+        writer = AuditLogWriter(session_factory=session_factory, batch_size=1, spool_path=str(spool))
+        writer._spool([_record(f"SPOOLED_{i}") for i in range(3)])
+        create_many = crud.audit_log.create_many
+        calls = []
+
+        def fail_on_second_batch(db, *, objs_in):
+            calls.append(objs_in)
+            if len(calls) == 2:
+                raise _db_down()
+            return create_many(db, objs_in=objs_in)
+
+        with patch.object(crud.audit_log, "create_many", side_effect=fail_on_second_batch):
+            assert writer.replay_spool() == 0
+        assert _count(session_factory) == 0
+
+        assert writer.replay_spool() == 3
+        assert _count(session_factory) == 3
+        assert not (tmp_path / "spool.jsonl.replaying").exists()
+
+    def test_replay_quarantines_rejected_records(self, session_factory, tmp_path):
+        """A bad record in the spool does not block the replay of the others."""
+        spool = tmp_path / "spool.jsonl"
+        writer = AuditLogWriter(session_factory=session_factory, spool_path=str(spool))
+        writer._spool([_record("KEPT"), _record(None)])
+
+        assert writer.replay_spool() == 1
+        assert _count(session_factory) == 1
+        assert writer.stats()["dead_lettered"] == 1
+        assert not (tmp_path / "spool.jsonl.replaying").exists()
+
+    def test_stop_does_not_flush_when_the_thread_is_still_running(self, session_factory, tmp_path):
+        """If join times out, the writer thread keeps draining the queue on its own."""
+        writer = AuditLogWriter(session_factory=session_factory, spool_path=str(tmp_path / "spool.jsonl"))
+        release = threading.Event()
+        writer._thread = threading.Thread(target=release.wait, daemon=True)
+        writer._thread.start()
+
+        with patch.object(writer, "flush") as flush:
+            writer.stop(timeout=0.01)
+        flush.assert_not_called()
+
+        release.set()
+        writer._thread.join()
+        with patch.object(writer, "flush") as flush:
+            writer.stop(timeout=0.01)
+        flush.assert_called_once()
+
+    def test_log_action_only_enqueues(self):
+        """With the writer enabled, AuditService does not touch the request session."""
+        with patch("incident_api.services.audit_service.audit_log_writer") as mock_writer, \
+                patch("incident_api.services.audit_service.crud") as mock_crud:
+            mock_writer.enabled = True
+            result = AuditService().log_action(db=None, action="LOGIN_SUCCESS", resource_type="USER_AUTH")
+
+        assert result is None
+        mock_writer.enqueue.assert_called_once()
+        mock_crud.audit_log.create.assert_not_called()
@@ -0,0 +1,101 @@
+"""
+Unit tests for the authenticated-user cache.
+"""
+
+from unittest.mock import patch
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy.orm import Session
+
+from incident_api import models
+from incident_api.core import security
+from incident_api.core.auth_cache import AuthenticatedUserCache
+from incident_api.models import UserRole
+
+
+@pytest.fixture
+def cache():
+    """A fresh cache instance replacing the module singleton in security."""
+    cache = AuthenticatedUserCache(ttl_seconds=30, max_size=2)
+    with patch.object(security, "authenticated_user_cache", cache):
+        yield cache
+
+
+@pytest.fixture
+def user(db_session_override: Session) -> models.User:
+    user = models.User(
+        email="cached@example.com", full_name="Cached User", role=UserRole.EMPLEADO, is_active=True
+    )
+    db_session_override.add(user)
+    db_session_override.commit()
+    return user
+
+
+class TestAuthenticatedUserCache:
+    """Test AuthenticatedUserCache and its use in get_user_from_token."""
+
+    credentials_exception = HTTPException(status_code=401)
+
+    def test_second_request_is_served_from_cache(self, cache, user, db_session_override):
+        """Only the first lookup for a token hits the database."""
+        token = security.create_access_token({"sub": user.email})
+
+        with patch("incident_api.crud.user.get_by_email", wraps=security.crud.user.get_by_email) as mock_get:
+            first = security.get_user_from_token(db_session_override, token, self.credentials_exception)
+            second = security.get_user_from_token(db_session_override, token, self.credentials_exception)
+
+        assert mock_get.call_count == 1
+        assert second.user_id == first.user_id
+        assert second in db_session_override
+        assert cache.stats()["hit_rate"] == 0.5
+
+    def test_cached_user_is_attached_to_a_new_session(self, cache, user, db_session_override):
+        """A cached user is merged into the caller's session without a SELECT."""
+        cache.set(("cached@example.com", 1), user)
+        other_session = Session(bind=db_session_override.connection())
+
+        cached = cache.get(other_session, ("cached@example.com", 1))
+
+        assert cached is not user
+        assert cached in other_session
+        assert (cached.email, cached.role) == (user.email, user.role)
+        other_session.close()
+
+    def test_invalidate_user(self, cache, user, db_session_override):
+        """Invalidation removes every token entry of the user."""
+        cache.set(("cached@example.com", 1), user)
+        cache.set(("cached@example.com", 2), user)
+
+        cache.invalidate_user(user.user_id)
+
+        assert cache.get(db_session_override, ("cached@example.com", 1)) is None
+        assert cache.stats()["size"] == 0
+
+    def test_expired_and_evicted_entries(self, user, db_session_override):
+        """Entries expire after the TTL and the least recently used one is evicted."""
+        cache = AuthenticatedUserCache(ttl_seconds=30, max_size=2)
+        with patch("incident_api.core.auth_cache.time.monotonic", return_value=0):
+            cache.set("a", user)
+            cache.set("b", user)
+            cache.get(db_session_override, "a")
+            cache.set("c", user)
+        assert cache.stats()["size"] == 2
+
+        with patch("incident_api.core.auth_cache.time.monotonic", return_value=10):
+            assert cache.get(db_session_override, "b") is None
+            assert cache.get(db_session_override, "a") is not None
+
+        with patch("incident_api.core.auth_cache.time.monotonic", return_value=31):
+            assert cache.get(db_session_override, "c") is None
+
+    @patch("incident_api.services.user_service.crud")
+    def test_deactivate_user_invalidates_cache(self, mock_crud):
+        """UserService.deactivate_user drops the user from the cache."""
+        from incident_api.services.user_service import user_service
+
+        with patch("incident_api.services.user_service.authenticated_user_cache") as mock_cache, \
+                patch("incident_api.services.user_service.audit_service"):
+            user_service.deactivate_user(db=None, user_id=7)
+
+        mock_cache.invalidate_user.assert_called_once_with(7)
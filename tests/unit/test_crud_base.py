@@ -0,0 +1,66 @@
+"""
+Unit tests for the bulk write helpers of CRUDBase.
+"""
+
+from sqlalchemy.orm import Session
+
+from incident_api import crud, models
+from incident_api.schemas.task import TaskCreate
+
+
+class TestCRUDBaseBulk:
+    """Test CRUDBase.create_many and CRUDBase.update_many."""
+
+    def test_create_many_with_returning(self, db_session_override: Session):
+        """All rows are inserted in one call and returned with their primary keys."""
+        created = crud.task.create_many(
+            db_session_override,
+            objs_in=[
+                TaskCreate(task_id="bulk-1", status="PENDING"),
+                {"task_id": "bulk-2", "status": "PENDING"},
+            ],
+            returning=True,
+        )
+
+        assert [t.task_id for t in created] == ["bulk-1", "bulk-2"]
+        assert all(t.id is not None for t in created)
+
+    def test_create_many_without_returning(self, db_session_override: Session):
+        """Without RETURNING nothing is returned but the rows are stored."""
+        result = crud.task.create_many(
+            db_session_override,
+            objs_in=[TaskCreate(task_id="bulk-3", status="PENDING")],
+        )
+
+        assert result is None
+        assert crud.task.get_by_task_id(db_session_override, task_id="bulk-3") is not None
+
+    def test_create_many_empty(self, db_session_override: Session):
+        """An empty input does not touch the database."""
+        assert crud.task.create_many(db_session_override, objs_in=[], returning=True) == []
+
+    def test_update_many(self, db_session_override: Session):
+        """Rows are updated by primary key in a single transaction."""
+        created = crud.task.create_many(
+            db_session_override,
+            objs_in=[
+                TaskCreate(task_id="bulk-4", status="PENDING"),
+                TaskCreate(task_id="bulk-5", status="PENDING"),
+            ],
+            returning=True,
+        )
+
+        updated = crud.task.update_many(
+            db_session_override,
+            objs_in=[{"id": t.id, "status": "SUCCESS"} for t in created],
+        )
+        db_session_override.expire_all()
+
+        assert updated == 2
+        statuses = {
+            t.status
+            for t in db_session_override.query(models.Task).filter(
+                models.Task.task_id.in_(["bulk-4", "bulk-5"])
+            )
+        }
+        assert statuses == {"SUCCESS"}
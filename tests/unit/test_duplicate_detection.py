@@ -0,0 +1,162 @@
+"""
+Unit tests for the duplicate incident detection service.
+"""
+
+from datetime import datetime, timedelta
+from unittest.mock import Mock, patch
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy.orm import Session
+
+from incident_api import models, schemas
+from incident_api.services.duplicate_detection_service import (
+    DuplicateDetectionService,
+    MinHashLSHIndex,
+)
+from incident_api.services.incident_service import incident_service
+from tests.utils.incident import create_random_incident
+from tests.utils.user import create_random_user
+
+PHISHING_TEXT = (
+    "Correo de phishing recibido en la oficina de contabilidad. "
+    "El mensaje suplanta al banco y solicita actualizar credenciales en un enlace externo."
+)
+
+
+class TestMinHashLSHIndex:
+    """Test the in-memory MinHash/LSH index."""
+
+    def setup_method(self):
+        """Set up test fixtures."""
+        self.index = MinHashLSHIndex()
+
+    def test_identical_text_is_found(self):
+        """Identical descriptions must be reported with full similarity."""
+        self.index.add(1, PHISHING_TEXT)
+
+        results = self.index.query(PHISHING_TEXT, threshold=0.8)
+
+        assert results == [(1, 1.0)]
+
+    def test_near_duplicate_is_found(self):
+        """Small edits (case, punctuation, one extra word) still match."""
+        self.index.add(1, PHISHING_TEXT)
+
+        variant = PHISHING_TEXT.upper().replace(".", "!") + " Urgente"
+        results = self.index.query(variant, threshold=0.6)
+
+        assert results and results[0][0] == 1
+
+    def test_unrelated_text_is_not_found(self):
+        """Different incidents must not be reported as duplicates."""
+        self.index.add(1, PHISHING_TEXT)
+
+        results = self.index.query(
+            "Caída del servidor de base de datos por falla de disco en el centro de datos.",
+            threshold=0.5,
+        )
+
+        assert results == []
+
+    def test_remove_and_prune(self):
+        """Removed or expired entries are no longer returned."""
+        old = datetime(2020, 1, 1)
+        self.index.add(1, PHISHING_TEXT, created_at=old)
+        self.index.add(2, PHISHING_TEXT)
+
+        self.index.remove(2)
+        assert 2 not in self.index
+
+        pruned = self.index.prune(old + timedelta(days=1))
+        assert pruned == 1
+        assert len(self.index) == 0
+        assert self.index.query(PHISHING_TEXT, threshold=0.5) == []
+
+    def test_empty_text_is_ignored(self):
+        """Texts without words produce no signature and are not indexed."""
+        self.index.add(1, "  ... !!! ")
+
+        assert len(self.index) == 0
+
+
+class TestDuplicateDetectionService:
+    """Test DuplicateDetectionService methods."""
+
+    def setup_method(self):
+        """Set up test fixtures."""
+        self.service = DuplicateDetectionService()
+        self.service._loaded = True  # Evitar la carga inicial desde la BD
+        self.mock_db = Mock(spec=Session)
+
+    def _incident(self, incident_id, parent_id=None):
+        incident = Mock(spec=models.Incident)
+        incident.incident_id = incident_id
+        incident.summary = "Phishing suplantando al banco"
+        incident.description = PHISHING_TEXT
+        incident.parent_incident_id = parent_id
+        incident.is_active = True
+        incident.created_at = datetime.now()
+        return incident
+
+    def test_find_parent_returns_registered_incident(self):
+        """A new incident matching a registered one is linked to it."""
+        parent = self._incident(1)
+        self.service.register(parent)
+        self.mock_db.get.return_value = parent
+
+        match = self.service.find_parent(self.mock_db, self._incident(2))
+
+        assert match is not None
+        assert match[0] is parent
+        assert match[1] >= 0.99
+
+    def test_duplicates_are_not_registered(self):
+        """Incidents that already have a parent are not indexed."""
+        self.service.register(self._incident(2, parent_id=1))
+
+        assert self.service.find_parent(self.mock_db, self._incident(3)) is None
+
+    @patch("incident_api.services.duplicate_detection_service.settings")
+    def test_disabled_detection(self, mock_settings):
+        """No lookup is performed when detection is disabled."""
+        mock_settings.DUPLICATE_DETECTION_ENABLED = False
+
+        assert self.service.find_parent(self.mock_db, self._incident(2)) is None
+        self.mock_db.get.assert_not_called()
+
+
+class TestManualParentLink:
+    """Test parent_incident_id validation in incident_service.update_incident."""
+
+    def _set_parent(self, db: Session, incident: models.Incident, parent_id):
+        user = create_random_user(db, role=models.UserRole.LIDER_IRT)
+        return incident_service.update_incident(
+            db, incident=incident, incident_in=schemas.IncidentUpdate(parent_incident_id=parent_id), user=user
+        )
+
+    @pytest.mark.parametrize("target", ["self", "missing", "descendant"])
+    def test_invalid_parent_is_rejected(self, db_session_override: Session, target):
+        root = create_random_incident(db_session_override)
+        child = create_random_incident(db_session_override)
+        grandchild = create_random_incident(db_session_override)
+        self._set_parent(db_session_override, child, root.incident_id)
+        self._set_parent(db_session_override, grandchild, child.incident_id)
+        parent_id = {"self": root.incident_id, "missing": 999999, "descendant": grandchild.incident_id}[target]
+
+        with pytest.raises(HTTPException) as exc_info:
+            self._set_parent(db_session_override, root, parent_id)
+
+        assert exc_info.value.status_code == 400
+        assert root.parent_incident_id is None
+
+    def test_manual_unlink_clears_the_score(self, db_session_override: Session):
+        parent = create_random_incident(db_session_override)
+        duplicate = create_random_incident(db_session_override)
+        duplicate.parent_incident_id, duplicate.duplicate_score = parent.incident_id, 0.93
+        db_session_override.commit()
+
+        updated = self._set_parent(db_session_override, duplicate, None)
+
+        assert updated.parent_incident_id is None
+        assert updated.duplicate_score is None
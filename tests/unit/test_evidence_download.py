@@ -0,0 +1,82 @@
+"""
+Unit tests for evidence downloads (ETag, Range and X-Accel-Redirect).
+"""
+
+import importlib
+import os
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from incident_api import models
+from incident_api.core import security
+from incident_api.core.config import settings
+from incident_api.services.file_storage_service import FileStorageService
+from tests.utils.evidence import attach_evidence, make_upload
+from tests.utils.incident import create_random_incident
+from tests.utils.user import create_random_user
+
+storage_module = importlib.import_module("incident_api.services.file_storage_service")
+
+
+@pytest.fixture
+def evidence(tmp_path, monkeypatch, test_client: TestClient, db_session_override: Session):
+    """A stored PDF attached to an incident, and an authenticated client."""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(storage_module, "UPLOADS_DIR", "uploads")
+    incident = create_random_incident(db_session_override)
+    content = os.urandom(200_000)
+    saved = FileStorageService().save_evidence_files(incident.incident_id, [make_upload("report final.pdf", content)])
+    evidence_file = attach_evidence(db_session_override, incident, saved)[0]
+    # Sign the token directly: repeated logins across the suite trip the login rate limit
+    irt_member = create_random_user(db_session_override, role=models.UserRole.MIEMBRO_IRT)
+    test_client.cookies.set("access_token", security.create_access_token(data={"sub": irt_member.email}))
+    return {
+        "url": f"{settings.API_V1_STR}/incidents/{incident.incident_id}/evidence/{evidence_file.file_id}/download",
+        "content": content,
+        "hash": saved[0]["file_hash"],
+        "path": saved[0]["file_path"],
+    }
+
+
+class TestEvidenceDownload:
+    """Test GET /incidents/{id}/evidence/{file_id}/download."""
+
+    def test_strong_etag_and_conditional_request(self, test_client: TestClient, evidence: dict):
+        response = test_client.get(evidence["url"])
+
+        assert response.status_code == 200
+        assert response.content == evidence["content"]
+        assert response.headers["etag"] == f'"{evidence["hash"]}"'
+        assert response.headers["accept-ranges"] == "bytes"
+        assert response.headers["content-disposition"] == "attachment; filename*=utf-8''report%20final.pdf"
+
+        cached = test_client.get(evidence["url"], headers={"If-None-Match": f'W/"other", "{evidence["hash"]}"'})
+        assert cached.status_code == 304
+        assert cached.content == b""
+        assert cached.headers["etag"] == f'"{evidence["hash"]}"'
+
+    def test_range_request_returns_partial_content(self, test_client: TestClient, evidence: dict):
+        response = test_client.get(evidence["url"], headers={"Range": "bytes=100-199"})
+
+        assert response.status_code == 206
+        assert response.content == evidence["content"][100:200]
+        assert response.headers["content-range"] == f"bytes 100-199/{len(evidence['content'])}"
+
+        # A stale If-Range validator falls back to the full file
+        stale = test_client.get(evidence["url"], headers={"Range": "bytes=0-9", "If-Range": '"stale"'})
+        assert stale.status_code == 200
+        assert len(stale.content) == len(evidence["content"])
+
+    def test_x_accel_redirect_hands_the_file_to_nginx(self, test_client: TestClient, evidence: dict, monkeypatch):
+        monkeypatch.setattr(settings, "EVIDENCE_X_ACCEL_REDIRECT_PREFIX", "/_protected_uploads/")
+
+        response = test_client.get(evidence["url"])
+
+        assert response.status_code == 200
+        assert response.content == b""
+        h = evidence["hash"]
+        assert response.headers["x-accel-redirect"] == f"/_protected_uploads/sha256/{h[:2]}/{h[2:4]}/{h}"
+        assert response.headers["content-type"] == "application/pdf"
+        assert response.headers["etag"] == f'"{h}"'
@@ -0,0 +1,156 @@
+"""
+Unit tests for evidence thumbnails and previews.
+"""
+
+import importlib
+import io
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+import pytest
+from fastapi.testclient import TestClient
+import pypdfium2
+from PIL import Image
+from pypdf import PdfWriter
+from sqlalchemy.orm import Session
+
+from incident_api import models
+from incident_api.core import security
+from incident_api.core.config import settings
+from incident_api.services.evidence_preview_service import EvidencePreviewService
+from incident_api.services.file_storage_service import FileStorageService
+from tests.utils.evidence import attach_evidence, make_upload
+from tests.utils.incident import create_random_incident
+from tests.utils.user import create_random_user
+
+storage_module = importlib.import_module("incident_api.services.file_storage_service")
+
+
+def _png(width: int, height: int) -> bytes:
+    buffer = io.BytesIO()
+    Image.new("RGB", (width, height), (200, 30, 30)).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def _pdf(width: int = 612) -> bytes:
+    writer = PdfWriter()
+    writer.add_blank_page(width=width, height=792)
+    buffer = io.BytesIO()
+    writer.write(buffer)
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def stored(tmp_path, monkeypatch, db_session_override: Session):
+    """Stores uploads under a temporary uploads dir and attaches them to an incident."""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(settings, "ALLOWED_FILE_MIME_TYPES", "image/png,application/pdf,text/plain")
+    monkeypatch.setattr(storage_module, "UPLOADS_DIR", "uploads")
+    incident = create_random_incident(db_session_override)
+
+    def store(*uploads):
+        saved = FileStorageService().save_evidence_files(incident.incident_id, list(uploads))
+        return attach_evidence(db_session_override, incident, saved)
+
+    store.incident = incident
+    return store
+
+
+class TestEvidencePreviewService:
+    """Test EvidencePreviewService generation and queueing."""
+
+    def test_image_variants_are_scaled_webp(self, stored):
+        service = EvidencePreviewService()
+        evidence = stored(make_upload("screenshot.png", _png(3000, 1500), "image/png"))[0]
+
+        paths = service.generate(evidence.file_hash, evidence.file_path, evidence.file_type)
+
+        with Image.open(paths["thumb"]) as thumb, Image.open(paths["preview"]) as preview:
+            assert thumb.format == preview.format == "WEBP"
+            assert thumb.size == (settings.EVIDENCE_THUMBNAIL_SIZE, settings.EVIDENCE_THUMBNAIL_SIZE // 2)
+            assert preview.size == (settings.EVIDENCE_PREVIEW_SIZE, settings.EVIDENCE_PREVIEW_SIZE // 2)
+        assert paths["thumb"] == service.asset_path(evidence.file_hash, "thumb")
+
+    def test_pdf_preview_renders_the_first_page(self, stored):
+        service = EvidencePreviewService()
+        evidence = stored(make_upload("report.pdf", _pdf()))[0]
+
+        paths = service.generate(evidence.file_hash, evidence.file_path, evidence.file_type)
+
+        with Image.open(paths["preview"]) as preview:
+            assert max(preview.size) == settings.EVIDENCE_PREVIEW_SIZE
+            assert preview.getpixel((10, 10))[:3] == (255, 255, 255)
+
+    def test_pdf_rendering_is_serialised(self, stored):
+        service = EvidencePreviewService()
+        evidence = stored(*(make_upload(f"report{i}.pdf", _pdf(width=600 + i)) for i in range(4)))
+        original = pypdfium2.PdfDocument
+        state = {"active": 0, "max": 0}
+        lock = threading.Lock()
+
+        def tracking_document(*args, **kwargs):
+            with lock:
+                state["active"] += 1
+                state["max"] = max(state["max"], state["active"])
+            time.sleep(0.02)
+            document = original(*args, **kwargs)
+            with lock:
+                state["active"] -= 1
+            return document
+
+        with patch.object(pypdfium2, "PdfDocument", side_effect=tracking_document):
+            with ThreadPoolExecutor(max_workers=4) as pool:
+                results = list(pool.map(lambda e: service.generate(e.file_hash, e.file_path, e.file_type), evidence))
+
+        assert all(result["preview"] for result in results)
+        assert state["max"] == 1
+
+    def test_duplicates_are_queued_once_and_unsupported_types_skipped(self, stored):
+        service = EvidencePreviewService()
+        image = _png(40, 40)
+        evidence = stored(
+            make_upload("a.png", image, "image/png"),
+            make_upload("b.png", image, "image/png"),
+            make_upload("notes.txt", b"text", "text/plain"),
+        )
+
+        assert service.enqueue(evidence) == 1
+        service.drain()
+
+        assert service.stats()["generated"] == 1
+        # Already generated content is not queued again
+        assert service.enqueue(evidence) == 0
+
+
+class TestEvidencePreviewEndpoint:
+    """Test GET /incidents/{id}/evidence/{file_id}/preview."""
+
+    def _login(self, test_client: TestClient, db: Session):
+        # Sign the token directly: repeated logins across the suite trip the login rate limit
+        user = create_random_user(db, role=models.UserRole.MIEMBRO_IRT)
+        test_client.cookies.set("access_token", security.create_access_token(data={"sub": user.email}))
+
+    def test_preview_is_generated_on_demand_and_cached(
+        self, stored, test_client: TestClient, db_session_override: Session
+    ):
+        image, notes = stored(
+            make_upload("photo.png", _png(800, 600), "image/png"), make_upload("notes.txt", b"text", "text/plain")
+        )
+        base = f"{settings.API_V1_STR}/incidents/{stored.incident.incident_id}/evidence"
+        image_url = f"{base}/{image.file_id}/preview"
+        notes_url = f"{base}/{notes.file_id}/preview"
+        self._login(test_client, db_session_override)
+
+        response = test_client.get(image_url, params={"size": "thumb"})
+
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "image/webp"
+        assert "immutable" in response.headers["cache-control"]
+        assert response.headers["content-disposition"] == "inline"
+        assert Image.open(io.BytesIO(response.content)).size == (256, 192)
+        assert test_client.get(
+            image_url, headers={"If-None-Match": response.headers["etag"]}
+        ).status_code == 304
+        assert test_client.get(notes_url).status_code == 404
@@ -0,0 +1,244 @@
+"""
+Unit tests for FileStorageService (chunked copy, SHA-256, async parallel upload
+and the content-addressed, reference-counted blob store).
+"""
+
+import asyncio
+import hashlib
+import importlib
+import os
+import time
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy.orm import Session
+
+from incident_api import models
+from incident_api.core.config import settings
+from incident_api.core.metrics import metrics_registry
+from incident_api.db.unit_of_work import unit_of_work
+from incident_api.services.file_storage_service import FileStorageService
+from tests.utils.evidence import attach_evidence, make_upload
+from tests.utils.incident import create_random_incident
+
+# incident_api.services re-exports the service instance under the module's name
+storage_module = importlib.import_module("incident_api.services.file_storage_service")
+
+
+def _sample(name: str, **labels: str) -> float:
+    return metrics_registry.get_sample_value(name, labels) or 0
+
+
+@pytest.fixture
+def uploads_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(storage_module, "UPLOADS_DIR", str(tmp_path))
+    return tmp_path
+
+
+class TestAsyncEvidenceUpload:
+    """Test asave_evidence_files."""
+
+    def test_files_are_copied_and_hashed_in_order(self, uploads_dir):
+        service = FileStorageService(chunk_size=1024, concurrency=2)
+        payloads = [os.urandom(5000), os.urandom(10), b""]
+        files = [make_upload(f"evidence{i}.PDF", data) for i, data in enumerate(payloads)]
+        before = _sample("evidence_upload_duration_seconds_count", outcome="success")
+
+        saved = asyncio.run(service.asave_evidence_files(7, files))
+
+        assert [info["file_name"] for info in saved] == ["evidence0.PDF", "evidence1.PDF", "evidence2.PDF"]
+        for info, data in zip(saved, payloads):
+            assert info["file_hash"] == hashlib.sha256(data).hexdigest()
+            assert info["file_size"] == len(data)
+            assert info["file_path"] == FileStorageService.blob_path(info["file_hash"])
+            with open(info["file_path"], "rb") as f:
+                assert f.read() == data
+        assert _sample("evidence_upload_duration_seconds_count", outcome="success") == before + 3
+
+    def test_oversized_file_is_never_written(self, uploads_dir, monkeypatch):
+        monkeypatch.setattr(settings, "MAX_FILE_SIZE_MB", 1)
+        service = FileStorageService(chunk_size=64 * 1024)
+        files = [make_upload("small.pdf", b"ok"), make_upload("big.pdf", b"x" * (1024 * 1024 + 1))]
+
+        with pytest.raises(HTTPException) as exc_info:
+            asyncio.run(service.asave_evidence_files(7, files))
+
+        assert exc_info.value.status_code == 413
+        # The size is checked while copying and the partial file is discarded; the
+        # small blob may be shared, so it is left for prune_orphan_blobs
+        stored = [name for _, _, names in os.walk(uploads_dir) for name in names]
+        assert stored == [hashlib.sha256(b"ok").hexdigest()]
+
+    def test_invalid_type_is_rejected_before_writing(self, uploads_dir):
+        service = FileStorageService()
+        files = [make_upload("ok.pdf", b"ok"), make_upload("script.sh", b"#!/bin/sh", content_type="text/x-shellscript")]
+
+        with pytest.raises(HTTPException) as exc_info:
+            asyncio.run(service.asave_evidence_files(7, files))
+
+        assert exc_info.value.status_code == 400
+        assert os.listdir(uploads_dir) == []
+
+
+def _age(*paths: str) -> None:
+    """Move the mtime past REUSE_GRACE_SECONDS so the after-commit purge may remove the files."""
+    old = time.time() - storage_module.REUSE_GRACE_SECONDS - 60
+    for path in paths:
+        os.utime(path, (old, old))
+
+
+class TestContentAddressedStore:
+    """Test deduplication, reference counting and pruning of evidence blobs."""
+
+    def test_duplicate_content_is_stored_once(self, uploads_dir, db_session_override: Session):
+        service = FileStorageService()
+        incident = create_random_incident(db_session_override)
+        screenshot = os.urandom(2048)
+        before = _sample("evidence_upload_deduplicated_total")
+
+        first = service.save_evidence_files(incident.incident_id, [make_upload("a.png", screenshot, "image/png")])
+        inode = os.stat(first[0]["file_path"]).st_ino
+        os.utime(first[0]["file_path"], (0, 0))
+        second = service.save_evidence_files(incident.incident_id, [
+            make_upload("b.png", screenshot, "image/png"), make_upload("c.png", screenshot, "image/png")
+        ])
+        attach_evidence(db_session_override, incident, first + second)
+
+        paths = {info["file_path"] for info in first + second}
+        assert len(paths) == 1
+        path = paths.pop()
+        # The second and third uploads did not rewrite the stored file, only refreshed its mtime
+        assert os.stat(path).st_ino == inode
+        assert os.path.getmtime(path) > 0
+        assert _sample("evidence_upload_deduplicated_total") == before + 2
+        blob = db_session_override.get(models.EvidenceBlob, first[0]["file_hash"])
+        assert blob.ref_count == 3
+        assert blob.file_size_bytes == len(screenshot)
+
+    def test_blob_is_deleted_after_commit_when_last_reference_goes(self, uploads_dir, db_session_override: Session):
+        service = FileStorageService()
+        incident = create_random_incident(db_session_override)
+        saved = service.save_evidence_files(incident.incident_id, [
+            make_upload("a.pdf", b"shared"), make_upload("b.pdf", b"shared"), make_upload("c.pdf", b"unique")
+        ])
+        evidence = attach_evidence(db_session_override, incident, saved)
+        shared_path, unique_path = saved[0]["file_path"], saved[2]["file_path"]
+        _age(shared_path, unique_path)
+
+        with unit_of_work(db_session_override):
+            service.delete_evidence_files(db_session_override, [evidence[0], evidence[2]])
+            # Nothing is removed until the transaction commits
+            assert os.path.exists(unique_path)
+
+        assert os.path.exists(shared_path)
+        assert not os.path.exists(unique_path)
+        assert db_session_override.get(models.EvidenceBlob, saved[0]["file_hash"]).ref_count == 1
+        assert db_session_override.get(models.EvidenceBlob, saved[2]["file_hash"]) is None
+
+    def test_deleting_the_incident_releases_its_blobs(self, uploads_dir, db_session_override: Session):
+        service = FileStorageService()
+        incident = create_random_incident(db_session_override)
+        other = create_random_incident(db_session_override)
+        shared, unique = service.save_evidence_files(incident.incident_id, [
+            make_upload("a.pdf", b"shared"), make_upload("b.pdf", b"only here")
+        ])
+        attach_evidence(db_session_override, incident, [shared, unique])
+        attach_evidence(db_session_override, other, [shared])
+        _age(shared["file_path"], unique["file_path"])
+
+        # The ORM cascade removes the evidence rows without going through remove_many
+        db_session_override.delete(incident)
+        db_session_override.commit()
+
+        assert db_session_override.get(models.EvidenceBlob, shared["file_hash"]).ref_count == 1
+        assert db_session_override.get(models.EvidenceBlob, unique["file_hash"]) is None
+        assert os.path.exists(shared["file_path"])
+        assert not os.path.exists(unique["file_path"])
+
+    def test_recently_reused_blob_is_left_for_prune(self, uploads_dir, db_session_override: Session):
+        service = FileStorageService()
+        incident = create_random_incident(db_session_override)
+        saved = service.save_evidence_files(incident.incident_id, [make_upload("a.pdf", b"reused")])
+        evidence = attach_evidence(db_session_override, incident, saved)
+        _age(saved[0]["file_path"])
+        # Another request reuses the content but has not committed its EvidenceBlob yet
+        service.save_evidence_files(incident.incident_id, [make_upload("b.pdf", b"reused")])
+
+        with unit_of_work(db_session_override):
+            service.delete_evidence_files(db_session_override, evidence)
+
+        assert db_session_override.get(models.EvidenceBlob, saved[0]["file_hash"]) is None
+        assert os.path.exists(saved[0]["file_path"])
+
+    def test_deleting_a_legacy_evidence_keeps_the_blob(self, uploads_dir, db_session_override: Session):
+        service = FileStorageService()
+        incident = create_random_incident(db_session_override)
+        saved = service.save_evidence_files(incident.incident_id, [make_upload("a.pdf", b"legacy content")])
+        attach_evidence(db_session_override, incident, saved)
+        _age(saved[0]["file_path"])
+        # Evidence stored before the content-addressed store: same hash, own path, no EvidenceBlob reference
+        legacy = models.EvidenceFile(
+            incident_id=incident.incident_id, uploaded_by_id=incident.reported_by_id,
+            file_name="a.pdf", file_path=os.path.join(str(uploads_dir), f"{incident.incident_id}_legacy.pdf"),
+            file_type="application/pdf", file_size_bytes=14, file_hash=saved[0]["file_hash"],
+        )
+        db_session_override.add(legacy)
+        db_session_override.commit()
+
+        with unit_of_work(db_session_override):
+            service.delete_evidence_files(db_session_override, [legacy])
+
+        assert db_session_override.get(models.EvidenceBlob, saved[0]["file_hash"]).ref_count == 1
+        assert os.path.exists(saved[0]["file_path"])
+
+    def test_rolled_back_delete_keeps_the_file(self, uploads_dir, db_session_override: Session):
+        service = FileStorageService()
+        incident = create_random_incident(db_session_override)
+        saved = service.save_evidence_files(incident.incident_id, [make_upload("a.pdf", b"kept")])
+        evidence = attach_evidence(db_session_override, incident, saved)
+
+        with pytest.raises(RuntimeError):
+            with unit_of_work(db_session_override):
+                service.delete_evidence_files(db_session_override, evidence)
+                raise RuntimeError("abort")
+
+        # A later commit on the same session must not run the cancelled purge
+        db_session_override.commit()
+        assert os.path.exists(saved[0]["file_path"])
+
+    def test_prune_removes_only_old_unreferenced_files(self, uploads_dir, db_session_override: Session):
+        service = FileStorageService()
+        incident = create_random_incident(db_session_override)
+        kept = service.save_evidence_files(incident.incident_id, [make_upload("kept.pdf", b"referenced")])
+        attach_evidence(db_session_override, incident, kept)
+        orphan, recent = service.save_evidence_files(incident.incident_id, [
+            make_upload("orphan.pdf", b"failed upload"), make_upload("recent.pdf", b"upload in progress")
+        ])
+        stale_part = orphan["file_path"] + ".abc.part"
+        open(stale_part, "wb").close()
+        old = time.time() - 7200
+        for path in (kept[0]["file_path"], orphan["file_path"], stale_part):
+            os.utime(path, (old, old))
+
+        removed = service.prune_orphan_blobs(db_session_override, min_age_seconds=3600)
+
+        assert removed == 2
+        assert os.path.exists(kept[0]["file_path"])
+        assert os.path.exists(recent["file_path"])
+        assert not os.path.exists(orphan["file_path"])
+        assert not os.path.exists(stale_part)
+
+    def test_prune_keeps_an_old_orphan_reused_by_an_upload_in_flight(self, uploads_dir, db_session_override: Session):
+        service = FileStorageService()
+        incident = create_random_incident(db_session_override)
+        orphan = service.save_evidence_files(incident.incident_id, [make_upload("a.pdf", b"failed transaction")])[0]
+        old = time.time() - 7200
+        os.utime(orphan["file_path"], (old, old))
+
+        # A new upload of the same content reuses the file; its EvidenceBlob row is not committed yet
+        reused = service.save_evidence_files(incident.incident_id, [make_upload("b.pdf", b"failed transaction")])[0]
+        removed = service.prune_orphan_blobs(db_session_override, min_age_seconds=3600)
+        attach_evidence(db_session_override, incident, [reused])
+
+        assert removed == 0
+        assert os.path.exists(reused["file_path"])
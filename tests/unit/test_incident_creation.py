@@ -0,0 +1,75 @@
+"""
+Unit tests for the transaction boundaries of incident creation.
+"""
+
+import asyncio
+import importlib
+from datetime import datetime
+from unittest.mock import patch
+
+import pytest
+from sqlalchemy.orm import Session
+
+from incident_api import crud, schemas
+from incident_api.db.unit_of_work import in_unit_of_work
+from incident_api.services import incident_creation_service as creation_module
+from incident_api.services.incident_creation_service import incident_creation_service
+from tests.utils.evidence import make_upload
+from tests.utils.user import create_random_user
+
+storage_module = importlib.import_module("incident_api.services.file_storage_service")
+
+
+@pytest.fixture
+def uploads_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(storage_module, "UPLOADS_DIR", str(tmp_path))
+    return tmp_path
+
+
+def test_incident_and_evidence_are_committed_before_the_llm_call(uploads_dir, db_session_override: Session):
+    user = create_random_user(db_session_override)
+    incident_in = schemas.IncidentCreate(
+        summary="Ransomware", description="Encrypted shares", discovery_time=datetime(2024, 1, 1)
+    )
+    seen = {}
+
+    async def enrichment(db, *, incident, settings):
+        seen["in_unit_of_work"] = in_unit_of_work(db)
+        seen["pending"] = bool(db.new or db.dirty)
+        seen["commits"] = commit.call_count
+        seen["evidence"] = len(crud.evidence_file.get_by_incident(db, incident_id=incident.incident_id))
+        return {"enrichment": {"executive_summary": "ok"}}
+
+    with patch.object(db_session_override, "commit", wraps=db_session_override.commit) as commit, \
+            patch.object(creation_module, "get_active_settings"), \
+            patch.object(creation_module.incident_analysis_service, "get_incident_enrichment", side_effect=enrichment):
+        incident = asyncio.run(incident_creation_service.create_incident(
+            db_session_override, incident_in=incident_in, user=user,
+            evidence_files=[make_upload("note.pdf", b"ransom note")],
+        ))
+        enrichment_commits = commit.call_count - seen["commits"]
+
+    assert seen["in_unit_of_work"] is False
+    assert seen["pending"] is False
+    assert seen["commits"] >= 1
+    assert seen["evidence"] == 1
+    # The enrichment result is saved in its own short transaction
+    assert enrichment_commits == 1
+    assert incident.ai_recommendations == {"enrichment": {"executive_summary": "ok"}}
+
+
+def test_llm_failure_keeps_the_committed_incident(uploads_dir, db_session_override: Session):
+    user = create_random_user(db_session_override)
+    incident_in = schemas.IncidentCreate(
+        summary="Lost laptop", description="Left on a train", discovery_time=datetime(2024, 1, 1)
+    )
+
+    with patch.object(creation_module, "get_active_settings"), \
+            patch.object(creation_module.incident_analysis_service, "get_incident_enrichment",
+                         side_effect=RuntimeError("LLM timeout")):
+        incident = asyncio.run(incident_creation_service.create_incident(
+            db_session_override, incident_in=incident_in, user=user
+        ))
+
+    assert crud.incident.get(db_session_override, id=incident.incident_id) is not None
+    assert incident.ai_recommendations is None
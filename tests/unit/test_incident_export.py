@@ -0,0 +1,162 @@
+"""
+Unit tests for the incident export (streaming endpoint and background job).
+"""
+
+import csv
+import gzip
+import io
+import json
+import os
+from datetime import datetime
+from unittest.mock import patch
+
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from incident_api import crud, models, schemas
+from incident_api.core.config import settings
+from incident_api.services.incident_service import incident_service
+from tests.utils.incident_category import create_random_incident_category
+from tests.utils.incident_type import create_random_incident_type
+from tests.utils.user import create_random_user
+
+
+def _create_incidents(db: Session) -> dict:
+    category = create_random_incident_category(db)
+    incident_type = create_random_incident_type(db, category_id=category.incident_category_id)
+    reporter = create_random_user(db)
+    for i, status in enumerate([models.IncidentStatus.NUEVO, models.IncidentStatus.RESUELTO] * 3):
+        db.add(models.Incident(
+            summary=f"Incident {i}",
+            description="Export test",
+            discovery_time=datetime(2024, 1, 1),
+            reported_by_id=reporter.user_id,
+            incident_category_id=category.incident_category_id,
+            incident_type_id=incident_type.incident_type_id,
+            status=status,
+        ))
+    db.commit()
+    return {
+        "category": category.name,
+        "type": incident_type.name,
+        "reporter_id": reporter.user_id,
+        "reporter": reporter.email,
+    }
+
+
+class TestStreamForExport:
+    """Test crud.incident.stream_for_export."""
+
+    def test_classification_names_come_from_a_single_query(self, db_session_override: Session):
+        data = _create_incidents(db_session_override)
+        filters = schemas.IncidentFilters(reported_by_id=data["reporter_id"], status=models.IncidentStatus.NUEVO)
+        statements = []
+        listener = lambda *args: statements.append(args[2])  # noqa: E731
+        event.listen(db_session_override.get_bind(), "before_cursor_execute", listener)
+        try:
+            rows = list(crud.incident.stream_for_export(db_session_override, filters=filters))
+        finally:
+            event.remove(db_session_override.get_bind(), "before_cursor_execute", listener)
+
+        assert len(statements) == 1
+        assert [row["summary"] for row in rows] == ["Incident 0", "Incident 2", "Incident 4"]
+        assert {(row["category"], row["incident_type"], row["reported_by"]) for row in rows} == {
+            (data["category"], data["type"], data["reporter"])
+        }
+
+
+class TestIncidentExportEndpoints:
+    """Test GET /incidents/export and the export job endpoints."""
+
+    def test_streaming_csv_uses_list_filters(
+        self, test_client: TestClient, admin_user_token_headers: dict, db_session_override: Session
+    ):
+        data = _create_incidents(db_session_override)
+        test_client.cookies.set("access_token", admin_user_token_headers["Authorization"].split()[1])
+
+        response = test_client.get(
+            f"{settings.API_V1_STR}/incidents/export",
+            params={"format": "csv", "status": "Resuelto", "reported_by_id": data["reporter_id"]},
+        )
+
+        assert response.status_code == 200
+        assert "text/csv" in response.headers["content-type"]
+        rows = list(csv.DictReader(io.StringIO(response.text)))
+        assert [row["summary"] for row in rows] == ["Incident 1", "Incident 3", "Incident 5"]
+        assert rows[0]["category"] == data["category"]
+
+    def test_background_job_produces_downloadable_file(
+        self, test_client: TestClient, admin_user_token_headers: dict, db_session_override: Session,
+        tmp_path, monkeypatch
+    ):
+        data = _create_incidents(db_session_override)
+        monkeypatch.setattr(settings, "EXPORTS_DIR", str(tmp_path))
+        test_client.cookies.set("access_token", admin_user_token_headers["Authorization"].split()[1])
+
+        # The job opens its own session; point it at the test database
+        with patch("incident_api.db.database.SessionLocal", return_value=db_session_override):
+            response = test_client.post(
+                f"{settings.API_V1_STR}/incidents/export/jobs",
+                params={"format": "jsonl", "reported_by_id": data["reporter_id"]},
+            )
+        assert response.status_code == 202
+        task_id = response.json()["task_id"]
+
+        job = test_client.get(f"{settings.API_V1_STR}/incidents/export/jobs/{task_id}").json()
+        assert job["status"] == "completed"
+        assert job["result"]["rows"] == 6
+
+        download = test_client.get(f"{settings.API_V1_STR}/incidents/export/jobs/{task_id}/download")
+        assert download.status_code == 200
+        assert download.headers["content-type"] == "application/gzip"
+        records = [json.loads(line) for line in gzip.decompress(download.content).decode().splitlines()]
+        assert len(records) == 6
+        assert {r["reported_by"] for r in records} == {data["reporter"]}
+
+    def test_jobs_are_only_visible_to_their_owner(self, db_session_override: Session):
+        owner = create_random_user(db_session_override, role=models.UserRole.MIEMBRO_IRT)
+        other = create_random_user(db_session_override, role=models.UserRole.MIEMBRO_IRT)
+        task = incident_service.create_export_job(
+            db_session_override, fmt="csv", compress=False, filters=schemas.IncidentFilters(), requested_by=owner
+        )
+
+        assert incident_service.get_export_job(db_session_override, task.task_id, owner) is task
+        with pytest.raises(HTTPException) as exc_info:
+            incident_service.get_export_job(db_session_override, task.task_id, other)
+        assert exc_info.value.status_code == 404
+
+
+class TestExportRetention:
+    """Test incident_service.prune_expired_exports."""
+
+    def test_expired_jobs_and_files_are_removed(self, db_session_override: Session, tmp_path, monkeypatch):
+        monkeypatch.setattr(settings, "EXPORTS_DIR", str(tmp_path))
+        owner = create_random_user(db_session_override, role=models.UserRole.MIEMBRO_IRT)
+        old, recent = (
+            incident_service.create_export_job(
+                db_session_override, fmt="csv", compress=False, filters=schemas.IncidentFilters(), requested_by=owner
+            )
+            for _ in range(2)
+        )
+        for task in (old, recent):
+            task.result = {**task.result, "file": f"{task.task_id}_incidents.csv"}
+            (tmp_path / task.result["file"]).write_text("incident_id\n")
+        old.updated_at = datetime(2020, 1, 1)
+        other_task = models.Task(task_id="analysis-1", status="completed", result={}, updated_at=datetime(2020, 1, 1))
+        db_session_override.add(other_task)
+        db_session_override.commit()
+        stale_part = tmp_path / "interrupted.zip.part"
+        stale_part.write_bytes(b"")
+        os.utime(stale_part, (0, 0))
+
+        removed = incident_service.prune_expired_exports(db_session_override, retention_days=7)
+
+        assert removed == {"tasks": 1, "files": 2}
+        assert sorted(os.listdir(tmp_path)) == [recent.result["file"]]
+        assert crud.task.get_by_task_id(db_session_override, task_id=old.task_id) is None
+        assert crud.task.get_by_task_id(db_session_override, task_id=recent.task_id) is not None
+        # Tasks of other kinds are left alone
+        assert crud.task.get_by_task_id(db_session_override, task_id="analysis-1") is not None
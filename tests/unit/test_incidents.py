@@ -235,7 +235,7 @@ class TestIncidentService:
 
         assert exc_info.value.status_code == 403
 
-    @patch('incident_api.crud.incident_log.create_with_incident_and_user')
+    @patch('incident_api.crud.incident_log.create_many_with_incident_and_user')
     def test_log_changes_field_modified(self, mock_create_log):
         """Test logging of field changes."""
         mock_incident = Mock(spec=models.Incident)
@@ -251,17 +251,18 @@ class TestIncidentService:
 
         change_logging_service.log_changes(self.mock_db, original_incident=mock_incident, updates=updates, user=mock_user)
 
-        # Should create log entries for each changed field
-        assert mock_create_log.call_count == 2
+        # Should create one log entry per changed field in a single bulk insert
+        mock_create_log.assert_called_once()
+        log_entries = mock_create_log.call_args[1]['objs_in']
+        assert len(log_entries) == 2
 
-        # Check first call (summary change)
-        first_call = mock_create_log.call_args_list[0]
-        log_data = first_call[1]['obj_in']
+        # Check first entry (summary change)
+        log_data = log_entries[0]
         assert log_data.action == "Actualización de Campo"
         assert log_data.field_modified == "summary"
         assert "New summary" in log_data.new_value
 
-    @patch('incident_api.crud.incident_log.create_with_incident_and_user')
+    @patch('incident_api.crud.incident_log.create_many_with_incident_and_user')
     def test_log_changes_no_changes(self, mock_create_log):
         """Test that no log is created when no changes are made."""
         mock_incident = Mock(spec=models.Incident)
@@ -0,0 +1,89 @@
+"""
+Unit tests for the structured, queue-based logging setup.
+"""
+
+import json
+import logging
+import queue
+import sys
+
+from incident_api.core.logging_config import (
+    JsonFormatter,
+    NonBlockingQueueHandler,
+    SamplingFilter,
+    parse_sampling,
+)
+
+
+def _record(name: str = "incident_api.main", level: int = logging.INFO, msg: str = "hello %s", args=("world",)):
+    return logging.LogRecord(name, level, __file__, 10, msg, args, None)
+
+
+class TestJsonFormatter:
+    """Test JSON output."""
+
+    def test_includes_message_and_extra_fields(self):
+        record = _record()
+        record.status_code = 200
+
+        entry = json.loads(JsonFormatter().format(record))
+
+        assert entry["message"] == "hello world"
+        assert entry["level"] == "INFO"
+        assert entry["logger"] == "incident_api.main"
+        assert entry["status_code"] == 200
+
+    def test_includes_exception(self):
+        try:
+            raise ValueError("boom")
+        except ValueError:
+            record = logging.LogRecord("x", logging.ERROR, __file__, 1, "failed", None, sys.exc_info())
+
+        entry = json.loads(JsonFormatter().format(record))
+
+        assert "ValueError: boom" in entry["exception"]
+
+
+class TestSamplingFilter:
+    """Test per-logger sampling."""
+
+    def test_keeps_one_in_n_info_records_of_matching_loggers(self):
+        sampler = SamplingFilter(parse_sampling("incident_api.main=0.1, uvicorn.access=0"))
+
+        kept = sum(sampler.filter(_record()) for _ in range(100))
+
+        assert kept == 10
+        assert not sampler.filter(_record(name="uvicorn.access"))
+        assert all(sampler.filter(_record(name="incident_api.services.x")) for _ in range(5))
+
+    def test_never_drops_warnings(self):
+        sampler = SamplingFilter({"incident_api": 0})
+
+        assert sampler.filter(_record(level=logging.WARNING))
+        assert not sampler.filter(_record(level=logging.INFO))
+
+
+class TestNonBlockingQueueHandler:
+    """Test the queue handler used by the application loggers."""
+
+    def test_drops_records_when_the_queue_is_full(self):
+        handler = NonBlockingQueueHandler(queue.Queue(maxsize=1))
+
+        handler.handle(_record())
+        handler.handle(_record())
+
+        assert handler.queue.qsize() == 1
+        assert handler.dropped == 1
+
+    def test_prepared_record_keeps_message_and_traceback_text(self):
+        handler = NonBlockingQueueHandler(queue.Queue())
+        try:
+            raise RuntimeError("bad")
+        except RuntimeError:
+            record = logging.LogRecord("x", logging.ERROR, __file__, 1, "failed %d", (3,), sys.exc_info())
+
+        prepared = handler.prepare(record)
+
+        assert prepared.getMessage() == "failed 3"
+        assert prepared.exc_info is None
+        assert "RuntimeError: bad" in prepared.exc_text
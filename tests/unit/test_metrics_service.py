@@ -0,0 +1,130 @@
+"""
+Unit tests for the materialised metrics service.
+"""
+
+from unittest.mock import Mock, patch
+
+from sqlalchemy.orm import Session
+
+from incident_api import crud, models
+from incident_api.services.metrics_service import MetricsService, metrics_service
+from tests.utils.user import create_random_user
+
+
+class TestMetricsService:
+    """Test MetricsService methods."""
+
+    def setup_method(self):
+        """Set up test fixtures."""
+        self.service = MetricsService()
+        self.mock_db = Mock(spec=Session)
+
+    @patch("incident_api.services.metrics_service.crud")
+    def test_get_user_metrics_reads_fresh_row(self, mock_crud):
+        """A fresh summary row is returned without recomputing any aggregate."""
+        summary = Mock(spec=models.UserMetricsSummary)
+        summary.is_stale = False
+        mock_crud.user_metrics_summary.get.return_value = summary
+
+        result = self.service.get_user_metrics(self.mock_db, user_id=1)
+
+        assert result is summary
+        mock_crud.incident.count_by_reporter.assert_not_called()
+        mock_crud.user_metrics_summary.upsert.assert_not_called()
+
+    @patch("incident_api.services.metrics_service.crud")
+    def test_get_user_metrics_refreshes_stale_row(self, mock_crud):
+        """A stale (or missing) row is recomputed and stored."""
+        mock_crud.user_metrics_summary.get.return_value = None
+        mock_crud.incident.count_by_reporter.return_value = 3
+        mock_crud.incident.count_resolved_by_assignee.return_value = 1
+        mock_crud.incident.count_assigned_to_user.return_value = 2
+        mock_crud.incident.get_average_resolution_time_by_assignee.return_value = 4.5
+        mock_crud.incident.get_incidents_by_status_for_user.return_value = {"Nuevo": 3}
+        mock_crud.incident.get_top_incident_types_by_user.return_value = ["Phishing"]
+        mock_crud.incident_log.count_comments_by_user.return_value = 7
+        mock_crud.evidence_file.count_by_uploader.return_value = 0
+
+        self.service.get_user_metrics(self.mock_db, user_id=1)
+
+        summary_in = mock_crud.user_metrics_summary.upsert.call_args.kwargs["obj_in"]
+        assert summary_in.user_id == 1
+        assert summary_in.total_incidents_created == 3
+        assert summary_in.top_incident_types == ["Phishing"]
+        assert summary_in.total_comments_made == 7
+        assert summary_in.is_stale is False
+
+    @patch("incident_api.services.metrics_service.crud")
+    def test_mark_incident_changed_marks_all_affected_rows(self, mock_crud):
+        """Reporter, current and previous assignee and both categories are invalidated."""
+        incident = Mock(spec=models.Incident)
+        incident.incident_id = 10
+        incident.reported_by_id = 1
+        incident.assigned_to_id = 2
+        incident.incident_category_id = 5
+
+        self.service.mark_incident_changed(
+            self.mock_db, incident, previous_assignee_id=3, previous_category_id=6
+        )
+
+        user_ids = mock_crud.user_metrics_summary.mark_stale.call_args.kwargs["ids"]
+        category_ids = mock_crud.category_metrics_summary.mark_stale.call_args.kwargs["ids"]
+        assert {1, 2, 3} <= set(user_ids)
+        assert {5, 6} <= set(category_ids)
+
+    @patch("incident_api.services.metrics_service.crud")
+    def test_mark_incident_changed_never_raises(self, mock_crud):
+        """Invalidation errors are logged and rolled back, not propagated."""
+        mock_crud.user_metrics_summary.mark_stale.side_effect = Exception("DB down")
+        incident = Mock(spec=models.Incident)
+        incident.incident_id = 10
+
+        self.service.mark_incident_changed(self.mock_db, incident)
+
+        self.mock_db.rollback.assert_called_once()
+
+    @patch("incident_api.services.metrics_service.crud")
+    def test_refresh_category_metrics(self, mock_crud):
+        """Category rows are built from the grouped status counts."""
+        mock_crud.incident.get_status_counts_by_category.return_value = {
+            5: {"Nuevo": 2, "Resuelto": 1, "Cerrado": 1},
+        }
+        mock_crud.incident.get_average_resolution_time_by_category.return_value = {5: 12.0}
+
+        self.service.refresh_category_metrics(self.mock_db, category_ids=[5, 6])
+
+        upserts = [c.kwargs["obj_in"] for c in mock_crud.category_metrics_summary.upsert.call_args_list]
+        assert [u.incident_category_id for u in upserts] == [5, 6]
+        assert (upserts[0].total_incidents, upserts[0].open_incidents, upserts[0].resolved_incidents) == (4, 2, 2)
+        assert upserts[0].average_resolution_time_hours == 12.0
+        assert upserts[1].total_incidents == 0
+
+
+class TestStaleFlag:
+    """Test that a refresh never hides a change made while it was computing."""
+
+    def test_refresh_clears_the_flag(self, db_session_override: Session):
+        user = create_random_user(db_session_override)
+        metrics_service.refresh_user_metrics(db_session_override, user.user_id)
+        crud.user_metrics_summary.mark_stale(db_session_override, ids=[user.user_id])
+
+        summary = metrics_service.refresh_user_metrics(db_session_override, user.user_id)
+
+        assert summary.is_stale is False
+
+    def test_change_during_refresh_keeps_the_row_stale(self, db_session_override: Session):
+        user = create_random_user(db_session_override)
+        metrics_service.refresh_user_metrics(db_session_override, user.user_id)
+        crud.user_metrics_summary.mark_stale(db_session_override, ids=[user.user_id])
+        count_by_reporter = crud.incident.count_by_reporter
+
+        def changed_meanwhile(db, *, user_id):
+            # An incident update lands after the refresh read the version
+            crud.user_metrics_summary.mark_stale(db, ids=[user_id])
+            return count_by_reporter(db, user_id=user_id)
+
+        with patch.object(crud.incident, "count_by_reporter", side_effect=changed_meanwhile):
+            summary = metrics_service.refresh_user_metrics(db_session_override, user.user_id)
+
+        assert summary.is_stale is True
+        assert crud.user_metrics_summary.get_stale_ids(db_session_override) == [user.user_id]
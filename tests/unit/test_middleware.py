@@ -0,0 +1,81 @@
+"""
+Unit tests for the pure ASGI middlewares defined in main.py.
+"""
+
+import logging
+
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+
+from incident_api.main import ErrorHandlingMiddleware, RequestLoggingMiddleware
+
+
+def _app() -> FastAPI:
+    app = FastAPI()
+    streamed = []
+
+    @app.get("/ok")
+    async def ok():
+        return {"ok": True}
+
+    @app.get("/boom")
+    async def boom():
+        raise RuntimeError("unexpected")
+
+    @app.get("/stream")
+    async def stream():
+        def body():
+            for i in range(3):
+                streamed.append(i)
+                yield f"{i}\n".encode()
+        return StreamingResponse(body(), media_type="text/plain")
+
+    app.add_middleware(ErrorHandlingMiddleware)
+    app.add_middleware(RequestLoggingMiddleware)
+    app.state.streamed = streamed
+    return app
+
+
+class TestMiddlewares:
+    """Test X-Process-Time, error handling and streaming through the middlewares."""
+
+    def test_adds_process_time_header(self):
+        with TestClient(_app()) as client:
+            response = client.get("/ok")
+
+        assert response.status_code == 200
+        assert float(response.headers["X-Process-Time"]) >= 0
+
+    def test_unhandled_exception_becomes_json_500(self):
+        with TestClient(_app(), raise_server_exceptions=False) as client:
+            response = client.get("/boom")
+
+        assert response.status_code == 500
+        assert response.json()["error"] == "Internal Server Error"
+        assert "X-Process-Time" in response.headers
+
+    def test_streaming_response_passes_through(self):
+        app = _app()
+        with TestClient(app) as client:
+            with client.stream("GET", "/stream") as response:
+                lines = list(response.iter_lines())
+
+        assert lines == ["0", "1", "2"]
+        assert app.state.streamed == [0, 1, 2]
+
+    def test_logs_one_line_per_request(self):
+        records = []
+        handler = logging.Handler()
+        handler.emit = records.append
+        main_logger = logging.getLogger("incident_api.main")
+        # The application loggers do not propagate to root, so caplog would not see them
+        main_logger.addHandler(handler)
+        try:
+            with TestClient(_app()) as client:
+                client.get("/ok")
+        finally:
+            main_logger.removeHandler(handler)
+
+        assert len(records) == 1
+        assert (records[0].method, records[0].path, records[0].status_code) == ("GET", "/ok", 200)
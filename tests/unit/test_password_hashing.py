@@ -0,0 +1,164 @@
+"""
+Unit tests for the bounded password hashing pool.
+"""
+
+import asyncio
+import threading
+from unittest.mock import Mock, patch
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy.orm import Session
+
+from incident_api import schemas
+from incident_api.core import security
+from incident_api.core.hashing import Hasher, HashingPoolSaturated, PasswordHashingPool
+from incident_api.models import UserRole
+from incident_api.services.user_service import user_service
+
+
+class TestPasswordHashingPool:
+    """Test PasswordHashingPool and its use in authenticate_user."""
+
+    def test_verify_password_runs_in_pool(self):
+        """Verification returns the same result as Hasher and is counted."""
+        pool = PasswordHashingPool(max_workers=1, max_queue=1)
+        hashed = Hasher.get_password_hash("secret")
+
+        assert pool.verify_password("secret", hashed) is True
+        assert pool.verify_password("wrong", hashed) is False
+        assert pool.stats()["completed"] == 2
+        pool.shutdown()
+
+    def test_rejects_when_queue_is_full(self):
+        """Work beyond max_workers + max_queue is rejected without waiting."""
+        pool = PasswordHashingPool(max_workers=1, max_queue=1)
+        release = threading.Event()
+        started = threading.Event()
+
+        def blocking():
+            started.set()
+            release.wait(5)
+
+        threads = [threading.Thread(target=pool.run, args=(blocking,)) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        started.wait(5)
+        while pool.stats()["queue_depth"] < 1:
+            pass
+
+        with pytest.raises(HashingPoolSaturated):
+            pool.run(blocking)
+        stats = pool.stats()
+
+        release.set()
+        for thread in threads:
+            thread.join(5)
+        pool.shutdown()
+
+        assert stats["active"] == 1
+        assert stats["queue_depth"] == 1
+        assert stats["rejected"] == 1
+
+    @patch("incident_api.crud.user.get_by_email", return_value=None)
+    def test_unknown_user_uses_precomputed_dummy_hash(self, mock_get_by_email):
+        """A login for an unknown user does not compute a new bcrypt hash."""
+        Hasher.get_dummy_hash()
+
+        with patch.object(security.Hasher, "get_password_hash") as mock_hash:
+            result = security.authenticate_user(Mock(spec=Session), "ghost@example.com", "password")
+
+        assert result is None
+        mock_hash.assert_not_called()
+        assert Hasher.get_dummy_hash() is Hasher.get_dummy_hash()
+
+    def test_async_wait_releases_the_slot_on_cancellation(self):
+        """A cancelled async wait frees its queue slot instead of leaking it."""
+        pool = PasswordHashingPool(max_workers=1, max_queue=1)
+        release = threading.Event()
+        started = threading.Event()
+
+        def blocking():
+            started.set()
+            release.wait(5)
+
+        async def scenario():
+            running = asyncio.ensure_future(pool.arun(blocking))
+            await asyncio.get_running_loop().run_in_executor(None, started.wait, 5)
+            queued = asyncio.ensure_future(pool.arun(blocking))
+            await asyncio.sleep(0)
+            with pytest.raises(HashingPoolSaturated):
+                await pool.arun(blocking)
+
+            queued.cancel()
+            await asyncio.sleep(0)
+            depth = pool.stats()["queue_depth"]
+            release.set()
+            await running
+            return depth
+
+        assert asyncio.run(scenario()) == 0
+        assert pool.verify_password("x", Hasher.get_dummy_hash()) is False
+        pool.shutdown()
+
+    @patch("incident_api.crud.user.get_by_email")
+    def test_async_authentication_verifies_in_pool(self, mock_get_by_email):
+        """aauthenticate_user awaits the pool and returns the same result as authenticate_user."""
+        user = Mock(is_active=True, hashed_password=Hasher.get_password_hash("secret"))
+        mock_get_by_email.return_value = user
+
+        with patch.object(security.password_hashing_pool, "averify_password",
+                          wraps=security.password_hashing_pool.averify_password) as mock_verify:
+            assert asyncio.run(security.aauthenticate_user(Mock(spec=Session), "a@example.com", "secret")) is user
+            assert asyncio.run(security.aauthenticate_user(Mock(spec=Session), "a@example.com", "wrong")) is None
+
+        assert mock_verify.call_count == 2
+
+    def test_login_keeps_rate_limit_and_audit_off_the_event_loop(self):
+        """The async login runs the blocking rate limit check and audit writes in the thread pool."""
+        from incident_api.api.v1.endpoints import login
+
+        loop_thread = threading.current_thread()
+        threads = []
+        request = Mock(client=Mock(host="10.0.0.1"), headers={})
+        form = Mock(username="a@example.com", password="wrong")
+
+        async def no_user(*args):
+            return None
+
+        with patch.object(login, "check_login_rate_limit", side_effect=lambda r: threads.append(threading.current_thread())), \
+                patch.object(login.AuditService, "log_action", side_effect=lambda **kw: threads.append(threading.current_thread())), \
+                patch.object(login.security, "aauthenticate_user", side_effect=no_user), \
+                patch.object(login.alerting_service, "trigger_alert"):
+            with pytest.raises(HTTPException) as exc_info:
+                asyncio.run(login.login_for_access_token(Mock(), request, form, Mock(spec=Session)))
+
+        assert exc_info.value.status_code == 401
+        assert len(threads) == 2
+        assert loop_thread not in threads
+
+
+class TestUserPasswordHashing:
+    """Test that user creation hashes passwords in the bounded pool."""
+
+    def test_create_user_hashes_in_pool(self, db_session_override: Session):
+        user_in = schemas.UserCreate(
+            email="pooled@example.com", password="Password123!", full_name="Pooled", role=UserRole.EMPLEADO
+        )
+        with patch.object(security.password_hashing_pool, "get_password_hash",
+                          wraps=security.password_hashing_pool.get_password_hash) as mock_hash:
+            user = user_service.create_user(db_session_override, user_in=user_in)
+
+        mock_hash.assert_called_once_with("Password123!")
+        assert Hasher.verify_password("Password123!", user.hashed_password)
+
+    def test_create_user_answers_503_when_pool_is_saturated(self, db_session_override: Session):
+        user_in = schemas.UserCreate(
+            email="saturated@example.com", password="Password123!", full_name="Saturated", role=UserRole.EMPLEADO
+        )
+        with patch.object(security.password_hashing_pool, "get_password_hash", side_effect=HashingPoolSaturated()):
+            with pytest.raises(HTTPException) as exc_info:
+                user_service.create_user(db_session_override, user_in=user_in)
+
+        assert exc_info.value.status_code == 503
+        assert exc_info.value.headers == {"Retry-After": "1"}
@@ -0,0 +1,94 @@
+"""
+Unit tests for the Prometheus metrics registry and the /metrics endpoint.
+"""
+
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, Mock, patch
+
+import pytest
+from fastapi.testclient import TestClient
+from prometheus_client import CollectorRegistry, generate_latest
+
+from incident_api.core.config import settings
+from incident_api.core.metrics import metrics_registry, stats_collector
+from incident_api.services.llm_service import LLMService
+
+
+class TestCollectors:
+    """Test the export-time collectors registered on top of prometheus_client."""
+
+    def test_stats_are_read_at_export_time(self):
+        registry = CollectorRegistry()
+        state = {"depth": 1, "running": True, "name": "writer"}
+        registry.register(stats_collector("queue", "Queue", lambda: state))
+        state["depth"] = 7
+
+        text = generate_latest(registry).decode()
+
+        assert "queue_depth 7.0" in text
+        # Booleans and non-numeric values are not exported
+        assert "queue_running" not in text
+        assert "queue_name" not in text
+
+    def test_a_failing_collector_does_not_break_the_export(self):
+        registry = CollectorRegistry()
+        registry.register(stats_collector("broken", "Broken", Mock(side_effect=RuntimeError("down"))))
+        registry.register(stats_collector("queue", "Queue", lambda: {"depth": 3}))
+
+        assert "queue_depth 3.0" in generate_latest(registry).decode()
+
+
+class TestMetricsEndpoint:
+    """Test GET /metrics."""
+
+    @pytest.fixture
+    def metrics_enabled(self, monkeypatch):
+        monkeypatch.setattr(settings, "METRICS_ENABLED", True)
+        monkeypatch.setattr(settings, "METRICS_TOKEN", None)
+
+    def test_disabled_by_default(self, test_client: TestClient, monkeypatch):
+        monkeypatch.setattr(settings, "METRICS_ENABLED", False)
+
+        assert test_client.get("/metrics").status_code == 404
+
+    def test_token_is_required_when_configured(self, test_client: TestClient, metrics_enabled, monkeypatch):
+        monkeypatch.setattr(settings, "METRICS_TOKEN", "scrape-secret")
+
+        assert test_client.get("/metrics").status_code == 401
+        assert test_client.get("/metrics", headers={"Authorization": "Bearer wrong"}).status_code == 401
+        response = test_client.get("/metrics", headers={"Authorization": "Bearer scrape-secret"})
+        assert response.status_code == 200
+        assert "http_requests_total" in response.text
+
+    def test_requests_are_labelled_with_the_route_template(self, test_client: TestClient, metrics_enabled):
+        test_client.get(f"{settings.API_V1_STR}/users/12345")
+        test_client.get("/does-not-exist")
+
+        text = test_client.get("/metrics").text
+
+        assert f'http_requests_total{{method="GET",route="{settings.API_V1_STR}/users/{{user_id}}",status="401"}}' in text
+        assert 'route="/does-not-exist"' not in text
+        assert 'route="unmatched",status="404"' in text
+        assert "http_request_duration_seconds_bucket" in text
+        assert "audit_writer_queue_size" in text
+        assert "password_hashing_active" in text
+
+
+class TestLLMServiceMetrics:
+    """Test LLM latency and token accounting."""
+
+    def test_records_latency_and_tokens(self):
+        response = SimpleNamespace(content="ok", usage_metadata={"input_tokens": 12, "output_tokens": 5})
+        llm = SimpleNamespace(ainvoke=AsyncMock(return_value=response))
+        ai_settings = SimpleNamespace(model_provider="fake", model_name="fake-model", parameters={})
+        labels = {"provider": "fake", "model": "fake-model"}
+        before = metrics_registry.get_sample_value("llm_request_duration_seconds_count", {"outcome": "success", **labels}) or 0
+
+        with patch("incident_api.services.llm_service.get_llm", return_value=llm):
+            result = asyncio.run(LLMService().invoke([], ai_settings))
+
+        assert result == "ok"
+        assert metrics_registry.get_sample_value("llm_request_duration_seconds_count", {"outcome": "success", **labels}) == before + 1
+        assert metrics_registry.get_sample_value("llm_tokens_total", {"type": "input", **labels}) >= 12
+        assert metrics_registry.get_sample_value("llm_tokens_total", {"type": "output", **labels}) >= 5
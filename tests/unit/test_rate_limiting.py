@@ -0,0 +1,198 @@
+"""
+Unit tests for the sliding-window rate limiter and its backends.
+"""
+
+from unittest.mock import MagicMock, Mock
+
+import pytest
+from fastapi import HTTPException, Request
+from sqlalchemy.orm import Session
+
+from incident_api.api.decorators import rate_limit
+from incident_api.services import rate_limiting_service
+from incident_api.services.rate_limit_backends import (
+    DatabaseRateLimitBackend,
+    MemoryRateLimitBackend,
+    RedisRateLimitBackend,
+)
+from incident_api.services.rate_limiting_service import RateLimitExceeded, RateLimitingService
+
+
+class FakeClock:
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class FakeRedis:
+    """Minimal in-memory stand-in for the redis-py client."""
+
+    def __init__(self, clock: FakeClock):
+        self._clock = clock
+        self._data = {}
+
+    def _alive(self, name):
+        value = self._data.get(name)
+        if value is not None and value[1] is not None and value[1] <= self._clock():
+            del self._data[name]
+            return None
+        return value
+
+    def incr(self, name):
+        value = self._alive(name)
+        count = (int(value[0]) if value else 0) + 1
+        self._data[name] = [str(count).encode(), value[1] if value else None]
+        return count
+
+    def expire(self, name, seconds, nx=False):
+        if nx and self._data[name][1] is not None:
+            return False
+        self._data[name][1] = self._clock() + seconds
+        return True
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+    def get(self, name):
+        value = self._alive(name)
+        return value[0] if value else None
+
+    def set(self, name, value, ex=None):
+        self._data[name] = [str(value).encode(), self._clock() + ex if ex else None]
+
+    def scan_iter(self, match):
+        return [name for name in list(self._data) if name.startswith(match.rstrip("*"))]
+
+    def delete(self, name):
+        self._data.pop(name, None)
+
+
+class FakePipeline:
+    """Queues commands and runs them together on execute(), like a MULTI/EXEC pipeline."""
+
+    def __init__(self, client: FakeRedis):
+        self._client = client
+        self._commands = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self._commands = []
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: self._commands.append((name, args, kwargs))
+
+    def execute(self):
+        results = [getattr(self._client, name)(*args, **kwargs) for name, args, kwargs in self._commands]
+        self._commands = []
+        return results
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture(params=["memory", "database", "redis"])
+def backend(request, clock):
+    if request.param == "memory":
+        return MemoryRateLimitBackend(clock=clock)
+    if request.param == "redis":
+        return RedisRateLimitBackend(FakeRedis(clock))
+    db_session = request.getfixturevalue("db_session_override")
+    return DatabaseRateLimitBackend(lambda: Session(bind=db_session.connection()), clock=clock)
+
+
+class TestRateLimitingService:
+    """Test the sliding-window counter against every backend."""
+
+    def test_limit_within_window(self, backend, clock):
+        """The request after max_attempts is rejected."""
+        limiter = RateLimitingService(backend=backend, clock=clock)
+
+        for _ in range(3):
+            limiter.check_rate_limit("ip", max_attempts=3, window_seconds=60)
+        with pytest.raises(RateLimitExceeded) as exc:
+            limiter.check_rate_limit("ip", max_attempts=3, window_seconds=60)
+
+        assert 0 < exc.value.retry_after <= 60
+
+    def test_previous_window_is_weighted(self, backend, clock):
+        """Half-way through the next window, half of the previous attempts still count."""
+        limiter = RateLimitingService(backend=backend, clock=clock)
+        clock.now = 1200.0
+        for _ in range(4):
+            limiter.check_rate_limit("ip", max_attempts=4, window_seconds=60)
+
+        clock.now = 1290.0
+        limiter.check_rate_limit("ip", max_attempts=4, window_seconds=60)
+        limiter.check_rate_limit("ip", max_attempts=4, window_seconds=60)
+        with pytest.raises(RateLimitExceeded):
+            limiter.check_rate_limit("ip", max_attempts=4, window_seconds=60)
+
+    def test_block_duration(self, backend, clock):
+        """Exceeding the limit blocks the key until the block expires."""
+        limiter = RateLimitingService(backend=backend, clock=clock)
+        limiter.check_rate_limit("ip", max_attempts=1, window_seconds=60, block_duration=300)
+        with pytest.raises(RateLimitExceeded) as exc:
+            limiter.check_rate_limit("ip", max_attempts=1, window_seconds=60, block_duration=300)
+
+        assert exc.value.retry_after == 300
+        assert limiter.is_blocked("ip")
+        clock.now += 301
+        assert not limiter.is_blocked("ip")
+
+    def test_periodic_eviction(self, clock):
+        """Expired counters of every key are removed on the next sweep."""
+        backend = MemoryRateLimitBackend(clock=clock)
+        limiter = RateLimitingService(backend=backend, eviction_interval=60, clock=clock)
+        for key in ("a", "b", "c"):
+            limiter.check_rate_limit(key, max_attempts=5, window_seconds=10)
+        assert len(backend) == 3
+
+        clock.now += 61
+        limiter.check_rate_limit("d", max_attempts=5, window_seconds=10)
+
+        assert len(backend) == 1
+
+    def test_redis_incr_sets_the_ttl_in_the_same_transaction(self):
+        """INCR and EXPIRE NX go in one MULTI/EXEC pipeline, so a counter never outlives its window."""
+        client = MagicMock()
+        pipe = client.pipeline.return_value.__enter__.return_value
+        pipe.execute.return_value = [3, False]
+
+        assert RedisRateLimitBackend(client, prefix="rl:").incr("ip", 59.5) == 3
+
+        client.pipeline.assert_called_once_with(transaction=True)
+        pipe.incr.assert_called_once_with("rl:ip")
+        pipe.expire.assert_called_once_with("rl:ip", 60, nx=True)
+        client.incr.assert_not_called()
+
+
+class TestRateLimitDecorator:
+    """Test the @rate_limit decorator."""
+
+    def test_rejects_with_429(self, clock):
+        """The decorated endpoint returns normally until the limit is exceeded."""
+        limiter = RateLimitingService(backend=MemoryRateLimitBackend(clock=clock), clock=clock)
+        rate_limiting_service.rate_limiter, original = limiter, rate_limiting_service.rate_limiter
+        request = Mock(spec=Request)
+        request.client.host = "10.0.0.1"
+
+        @rate_limit(scope="test", max_attempts=2, window_seconds=60)
+        def endpoint(request: Request):
+            return "ok"
+
+        try:
+            assert endpoint(request=request) == "ok"
+            assert endpoint(request=request) == "ok"
+            with pytest.raises(HTTPException) as exc:
+                endpoint(request=request)
+        finally:
+            rate_limiting_service.rate_limiter = original
+
+        assert exc.value.status_code == 429
+        assert "Retry-After" in exc.value.headers
@@ -0,0 +1,198 @@
+"""
+Unit tests for closed-incident PDF reports (artifact store, close hook and quarterly ZIP export).
+"""
+
+import asyncio
+import io
+import os
+import zipfile
+from datetime import datetime
+from unittest.mock import patch
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from incident_api import models
+from incident_api.core import pdf as pdf_renderer
+from incident_api.core import security
+from incident_api.core.config import settings
+from incident_api.services import report_service
+from incident_api.services.report_artifact_service import quarter_range, report_artifact_service
+from tests.utils.incident import create_random_incident
+from tests.utils.user import create_random_user
+
+
+@pytest.fixture
+def report_dirs(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "REPORTS_DIR", str(tmp_path / "reports"))
+    monkeypatch.setattr(settings, "EXPORTS_DIR", str(tmp_path / "exports"))
+    # Render in-process: spawning a pool per test is slow
+    monkeypatch.setattr(settings, "REPORT_PDF_WORKERS", 1)
+    return tmp_path
+
+
+def _close(db: Session, incident: models.Incident, resolved_at: datetime) -> models.Incident:
+    incident.status = models.IncidentStatus.CERRADO
+    incident.resolved_at = resolved_at
+    db.commit()
+    return incident
+
+
+def _authenticate(test_client: TestClient, db: Session, role=models.UserRole.LIDER_IRT) -> models.User:
+    # Sign the token directly: repeated logins across the suite trip the login rate limit
+    user = create_random_user(db, role=role)
+    test_client.cookies.set("access_token", security.create_access_token(data={"sub": user.email}))
+    return user
+
+
+def test_quarter_range():
+    assert quarter_range("2025-Q3") == (datetime(2025, 7, 1), datetime(2025, 10, 1))
+    assert quarter_range("2025-Q4") == (datetime(2025, 10, 1), datetime(2026, 1, 1))
+    with pytest.raises(ValueError):
+        quarter_range("2025-Q5")
+
+
+class TestRenderPdf:
+    """Test incident_api.core.pdf.render_pdf."""
+
+    def test_remote_resources_are_never_fetched(self):
+        html = (
+            "<html><head><link rel='stylesheet' href='https://example.com/a.css'></head>"
+            "<body><p>Report</p><img src='http://example.com/logo.png'></body></html>"
+        )
+        with patch("socket.socket.connect", side_effect=AssertionError("network access")):
+            pdf = pdf_renderer.render_pdf(html)
+
+        assert pdf.startswith(b"%PDF")
+
+
+class TestReportArtifacts:
+    """Test the stored PDF of a closed incident."""
+
+    def test_pdf_is_stored_once_per_version(self, report_dirs, db_session_override: Session):
+        incident = _close(db_session_override, create_random_incident(db_session_override), datetime(2025, 8, 1))
+
+        path, key = report_artifact_service.get_or_render_pdf(db_session_override, incident.incident_id)
+        with open(path, "rb") as f:
+            assert f.read(4) == b"%PDF"
+        with patch.object(pdf_renderer, "render_pdf") as render:
+            assert report_artifact_service.get_or_render_pdf(db_session_override, incident.incident_id) == (path, key)
+        render.assert_not_called()
+
+        db_session_override.add(models.IncidentLog(
+            incident_id=incident.incident_id, user_id=incident.reported_by_id, action="Reviewed",
+            timestamp=datetime(2025, 8, 2),
+        ))
+        db_session_override.commit()
+        new_path, new_key = report_artifact_service.get_or_render_pdf(db_session_override, incident.incident_id)
+        assert new_key != key
+        assert os.listdir(os.path.dirname(new_path)) == [os.path.basename(new_path)]
+
+    def test_closing_an_incident_renders_its_pdf(
+        self, report_dirs, test_client: TestClient, db_session_override: Session
+    ):
+        incident = create_random_incident(db_session_override)
+        incident.ticket_id = f"INC-PDF-{incident.incident_id}"
+        db_session_override.commit()
+        incident_id = incident.incident_id
+        _authenticate(test_client, db_session_override)
+
+        # The background task opens its own session; point it at the test database
+        with patch("incident_api.db.database.SessionLocal", return_value=db_session_override):
+            response = test_client.put(
+                f"{settings.API_V1_STR}/incidents/{incident_id}", json={"status": "Cerrado"}
+            )
+        assert response.status_code == 200
+        stored = os.listdir(os.path.join(settings.REPORTS_DIR, str(incident_id)))
+        assert len(stored) == 1
+
+        _authenticate(test_client, db_session_override)
+        with patch.object(pdf_renderer, "render_pdf") as render:
+            pdf = test_client.get(f"{settings.API_V1_STR}/incidents/{incident_id}/report", params={"format": "pdf"})
+        render.assert_not_called()
+        assert pdf.status_code == 200
+        assert pdf.headers["content-type"] == "application/pdf"
+        assert pdf.headers["etag"] == f'"{stored[0].removesuffix(".pdf")}"'
+        assert pdf.content.startswith(b"%PDF")
+
+        cached = test_client.get(
+            f"{settings.API_V1_STR}/incidents/{incident_id}/report",
+            params={"format": "pdf"},
+            headers={"If-None-Match": pdf.headers["etag"]},
+        )
+        assert cached.status_code == 304
+
+    def test_pdf_is_only_offered_for_closed_incidents(
+        self, report_dirs, test_client: TestClient, db_session_override: Session
+    ):
+        incident_id = create_random_incident(db_session_override).incident_id
+        _authenticate(test_client, db_session_override)
+
+        response = test_client.get(f"{settings.API_V1_STR}/incidents/{incident_id}/report", params={"format": "pdf"})
+
+        assert response.status_code == 409
+
+    def test_html_report_is_rendered_off_the_event_loop(self, test_client: TestClient, db_session_override: Session):
+        incident_id = create_random_incident(db_session_override).incident_id
+        _authenticate(test_client, db_session_override)
+        render = report_service.get_incident_report_html
+        loops = []
+
+        def tracked(db, incident_id):
+            try:
+                loops.append(asyncio.get_running_loop())
+            except RuntimeError:
+                loops.append(None)
+            return render(db, incident_id)
+
+        with patch.object(report_service, "get_incident_report_html", side_effect=tracked):
+            response = test_client.get(f"{settings.API_V1_STR}/incidents/{incident_id}/report")
+
+        assert response.status_code == 200
+        assert loops == [None]
+
+
+class TestClosureReportExport:
+    """Test the quarterly closure report ZIP export."""
+
+    def test_zip_contains_the_reports_closed_in_the_quarter(
+        self, report_dirs, test_client: TestClient, db_session_override: Session
+    ):
+        in_quarter = [
+            _close(db_session_override, create_random_incident(db_session_override), resolved_at)
+            for resolved_at in (datetime(2025, 7, 1), datetime(2025, 9, 30, 23, 59))
+        ]
+        _close(db_session_override, create_random_incident(db_session_override), datetime(2025, 10, 1))
+        create_random_incident(db_session_override)
+        # One report is already stored and must be reused
+        report_artifact_service.get_or_render_pdf(db_session_override, in_quarter[0].incident_id)
+        expected = sorted(f"{incident.ticket_id or f'incident-{incident.incident_id}'}.pdf" for incident in in_quarter)
+        _authenticate(test_client, db_session_override)
+
+        with patch("incident_api.db.database.SessionLocal", return_value=db_session_override):
+            response = test_client.post(
+                f"{settings.API_V1_STR}/incidents/reports/closure-exports", params={"quarter": "2025-Q3"}
+            )
+        assert response.status_code == 202
+        task_id = response.json()["task_id"]
+
+        job = test_client.get(f"{settings.API_V1_STR}/incidents/reports/closure-exports/{task_id}").json()
+        assert job["status"] == "completed"
+        assert job["result"]["count"] == 2
+
+        download = test_client.get(f"{settings.API_V1_STR}/incidents/reports/closure-exports/{task_id}/download")
+        assert download.status_code == 200
+        assert download.headers["content-type"] == "application/zip"
+        with zipfile.ZipFile(io.BytesIO(download.content)) as archive:
+            assert sorted(archive.namelist()) == expected
+            assert all(archive.read(name).startswith(b"%PDF") for name in archive.namelist())
+
+    def test_invalid_quarter_is_rejected(self, test_client: TestClient, db_session_override: Session):
+        _authenticate(test_client, db_session_override)
+
+        response = test_client.post(
+            f"{settings.API_V1_STR}/incidents/reports/closure-exports", params={"quarter": "2025-09"}
+        )
+
+        assert response.status_code == 422
@@ -0,0 +1,77 @@
+"""
+Unit tests for the templated, cached incident report.
+"""
+
+from datetime import datetime
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from incident_api import models
+from incident_api.services import report_service
+from tests.utils.incident import create_incident_for_report
+
+
+class _StatementCounter:
+    def __init__(self, db: Session):
+        self.bind = db.get_bind()
+        self.statements = []
+
+    def __enter__(self):
+        event.listen(self.bind, "before_cursor_execute", self._record)
+        return self.statements
+
+    def __exit__(self, *exc):
+        event.remove(self.bind, "before_cursor_execute", self._record)
+
+    def _record(self, *args):
+        self.statements.append(args[2])
+
+
+class TestIncidentReport:
+    """Test report_service.get_incident_report_html."""
+
+    def test_user_content_is_escaped_and_logs_are_ordered(self, db_session_override: Session):
+        incident = create_incident_for_report(db_session_override)
+
+        html = report_service.get_incident_report_html(db_session_override, incident.incident_id)
+
+        assert "<script>" not in html
+        assert "&lt;script&gt;alert(&#39;x&#39;)&lt;/script&gt;" in html
+        assert "Phishing &amp; credential theft" in html
+        assert "mail&lt;1&gt;.eml" in html
+        assert html.index("First:") < html.index("Second:")
+        assert "status-nuevo" in html
+
+    def test_report_data_is_loaded_without_a_cartesian_join(self, db_session_override: Session):
+        incident = create_incident_for_report(db_session_override)
+        incident_id = incident.incident_id
+        db_session_override.expire_all()
+
+        with _StatementCounter(db_session_override) as statements:
+            html = report_service.get_incident_report_html(db_session_override, incident_id)
+
+        # The version lookup, the incident with its ordered log, and the evidence
+        assert len(statements) == 3
+        assert "EvidenceFiles" not in statements[1]
+        assert "Sin asignar" in html
+
+    def test_repeated_views_are_served_from_cache_until_the_incident_changes(self, db_session_override: Session):
+        incident = create_incident_for_report(db_session_override)
+        first = report_service.get_incident_report_html(db_session_override, incident.incident_id)
+
+        with _StatementCounter(db_session_override) as statements:
+            assert report_service.get_incident_report_html(db_session_override, incident.incident_id) is first
+        assert len(statements) == 1
+
+        db_session_override.add(models.IncidentLog(
+            incident_id=incident.incident_id, user_id=incident.reported_by_id, action="Third",
+            timestamp=datetime(2024, 1, 4),
+        ))
+        db_session_override.commit()
+
+        assert "Third:" in report_service.get_incident_report_html(db_session_override, incident.incident_id)
+        assert report_service.report_cache.stats()["size"] == 1
+
+    def test_missing_incident_returns_none(self, db_session_override: Session):
+        assert report_service.get_incident_report_html(db_session_override, 999999) is None
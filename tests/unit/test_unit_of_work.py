@@ -0,0 +1,84 @@
+"""
+Unit tests for the request-scoped unit of work.
+"""
+
+from unittest.mock import Mock
+
+import pytest
+from sqlalchemy.orm import Session
+
+from incident_api import crud
+from incident_api.db.unit_of_work import (
+    commit_or_flush,
+    in_unit_of_work,
+    suspend_unit_of_work,
+    unit_of_work,
+)
+from incident_api.schemas.task import TaskCreate
+
+
+class TestUnitOfWork:
+    """Test the unit_of_work helpers."""
+
+    def setup_method(self):
+        """Set up test fixtures."""
+        self.mock_db = Mock(spec=Session)
+        self.mock_db.info = {}
+
+    def test_commit_or_flush_outside_unit_of_work(self):
+        """Without a unit of work every CRUD operation commits."""
+        commit_or_flush(self.mock_db)
+
+        self.mock_db.commit.assert_called_once()
+        self.mock_db.flush.assert_not_called()
+
+    def test_single_commit_at_the_end(self):
+        """Inside a unit of work CRUD operations only flush; one commit happens on exit."""
+        with unit_of_work(self.mock_db):
+            commit_or_flush(self.mock_db)
+            commit_or_flush(self.mock_db)
+            assert in_unit_of_work(self.mock_db)
+            self.mock_db.commit.assert_not_called()
+
+        assert self.mock_db.flush.call_count == 2
+        self.mock_db.commit.assert_called_once()
+        assert not in_unit_of_work(self.mock_db)
+
+    def test_rollback_on_exception(self):
+        """An exception inside the block rolls back everything and is re-raised."""
+        with pytest.raises(ValueError):
+            with unit_of_work(self.mock_db):
+                commit_or_flush(self.mock_db)
+                raise ValueError("boom")
+
+        self.mock_db.rollback.assert_called_once()
+        self.mock_db.commit.assert_not_called()
+        assert not in_unit_of_work(self.mock_db)
+
+    def test_nested_unit_of_work_joins_outer(self):
+        """A nested unit of work does not commit on its own."""
+        with unit_of_work(self.mock_db):
+            with unit_of_work(self.mock_db):
+                commit_or_flush(self.mock_db)
+            self.mock_db.commit.assert_not_called()
+
+        self.mock_db.commit.assert_called_once()
+
+    def test_suspend_unit_of_work(self):
+        """Writes inside a suspended unit of work commit immediately."""
+        with unit_of_work(self.mock_db):
+            with suspend_unit_of_work(self.mock_db):
+                commit_or_flush(self.mock_db)
+                self.mock_db.commit.assert_called_once()
+            assert in_unit_of_work(self.mock_db)
+
+    def test_crud_flushes_inside_unit_of_work(self, db_session_override: Session):
+        """CRUD objects get their primary key from the flush before the final commit."""
+        with unit_of_work(db_session_override):
+            task = crud.task.create(
+                db_session_override, obj_in=TaskCreate(task_id="uow-1", status="PENDING")
+            )
+            assert task.id is not None
+            assert db_session_override.in_transaction()
+
+        assert crud.task.get_by_task_id(db_session_override, task_id="uow-1") is not None
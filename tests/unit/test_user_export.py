@@ -0,0 +1,96 @@
+"""
+Unit tests for the streaming user export.
+"""
+
+import json
+import xml.etree.ElementTree as ET
+
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from incident_api import crud, models
+from incident_api.core.config import settings
+from incident_api.services.export_service import ExportService
+from tests.utils.user import create_random_user
+
+
+class TestExportServiceDocuments:
+    """Test the JSON array and XML encodings."""
+
+    def test_json_array_is_streamed_in_chunks(self):
+        """The JSON array is split across chunks and decodes to every row."""
+        service = ExportService(chunk_size=32)
+        rows = ({"id": i, "name": f"user {i}"} for i in range(10))
+
+        chunks = list(service.iter_encoded(rows, columns=["id", "name"], fmt="json"))
+
+        assert len(chunks) > 1
+        assert json.loads(b"".join(chunks)) == [{"id": i, "name": f"user {i}"} for i in range(10)]
+
+    def test_empty_documents_are_valid(self):
+        service = ExportService()
+
+        assert json.loads(b"".join(service.iter_encoded([], columns=["id"], fmt="json"))) == []
+        root = ET.fromstring(b"".join(service.iter_encoded([], columns=["id"], fmt="xml", xml_root="users")))
+        assert root.tag == "users" and len(root) == 0
+
+    def test_xml_values_are_escaped(self):
+        service = ExportService(chunk_size=16)
+        rows = [{"id": 1, "name": "<Ana & Co>", "city": None}]
+
+        data = b"".join(service.iter_encoded(rows, columns=["id", "name", "city"], fmt="xml", xml_row="user"))
+
+        user = ET.fromstring(data).find("user")
+        assert user.find("name").text == "<Ana & Co>"
+        assert user.find("city").text is None
+
+
+class TestUserExportEndpoint:
+    """Test GET /users/export."""
+
+    def _export(self, test_client: TestClient, token_headers: dict, **params):
+        # The API authenticates by cookie; the login cookie is "secure", so TestClient does not resend it
+        test_client.cookies.set("access_token", token_headers["Authorization"].split()[1])
+        return test_client.get(f"{settings.API_V1_STR}/users/export", params=params)
+
+    def test_json_export_has_no_row_cap(
+        self, test_client: TestClient, admin_user_token_headers: dict, db_session_override: Session
+    ):
+        """Every user is exported, ordered by ID, with the group nested and no password hash."""
+        group = crud.group.create(db_session_override, obj_in={"name": "Export group"})
+        group_id = group.id
+        grouped_id = create_random_user(db_session_override, group_id=group_id).user_id
+        db_session_override.add_all(
+            models.User(email=f"bulk{i}@example.com", full_name=f"Bulk {i}", hashed_password="x")
+            for i in range(1005)
+        )
+        db_session_override.commit()
+        total = db_session_override.query(models.User).count()
+
+        response = self._export(test_client, admin_user_token_headers, format="json")
+
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/json"
+        assert "attachment; filename=users.json" in response.headers["content-disposition"]
+        users = response.json()
+        assert len(users) == total
+        assert [u["user_id"] for u in users] == sorted(u["user_id"] for u in users)
+        exported = next(u for u in users if u["user_id"] == grouped_id)
+        assert exported["group"] == {"id": group_id, "name": "Export group", "description": None}
+        assert all("hashed_password" not in u for u in users)
+
+    def test_xml_export_respects_filters(
+        self, test_client: TestClient, admin_user_token_headers: dict, db_session_override: Session
+    ):
+        active_id = create_random_user(db_session_override).user_id
+        inactive = create_random_user(db_session_override)
+        inactive_id = inactive.user_id
+        crud.user.deactivate(db_session_override, db_obj=inactive)
+
+        response = self._export(test_client, admin_user_token_headers, format="xml", status="inactive")
+
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/xml"
+        ids = [int(u.find("user_id").text) for u in ET.fromstring(response.content).findall("user")]
+        assert inactive_id in ids
+        assert active_id not in ids
@@ -0,0 +1,38 @@
+"""
+Utilidades para la gestión de archivos de evidencia en las pruebas.
+"""
+
+import io
+from typing import List
+
+from fastapi import UploadFile
+from sqlalchemy.orm import Session
+from starlette.datastructures import Headers
+
+from incident_api import crud, models, schemas
+
+
+def make_upload(name: str, data: bytes, content_type: str = "application/pdf") -> UploadFile:
+    """
+    Crea un `UploadFile` en memoria como el que recibiría un endpoint.
+    """
+    return UploadFile(file=io.BytesIO(data), filename=name, headers=Headers({"content-type": content_type}))
+
+
+def attach_evidence(db: Session, incident: models.Incident, saved: list) -> List[models.EvidenceFile]:
+    """
+    Registra como evidencias del incidente los archivos devueltos por `save_evidence_files`.
+    """
+    return crud.evidence_file.create_many_with_incident_and_uploader(
+        db,
+        objs_in=[
+            schemas.EvidenceFileCreate(
+                file_name=info["file_name"], file_type=info["file_type"],
+                file_size_bytes=info["file_size"], file_hash=info["file_hash"],
+            )
+            for info in saved
+        ],
+        file_paths=[info["file_path"] for info in saved],
+        incident_id=incident.incident_id,
+        uploader_id=incident.reported_by_id,
+    )
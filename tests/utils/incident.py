@@ -0,0 +1,62 @@
+"""
+Utilidades para la gestión de incidentes en las pruebas.
+"""
+
+from datetime import datetime
+
+from sqlalchemy.orm import Session
+
+from incident_api import models
+from tests.utils.incident_category import create_random_incident_category
+from tests.utils.incident_type import create_random_incident_type
+from tests.utils.user import create_random_user
+
+
+def create_random_incident(db: Session) -> models.Incident:
+    """
+    Crea un incidente con su categoría, tipo y usuario que lo reporta.
+    """
+    category = create_random_incident_category(db)
+    incident_type = create_random_incident_type(db, category_id=category.incident_category_id)
+    incident = models.Incident(
+        summary="Phishing",
+        description="Evidence store test",
+        discovery_time=datetime(2024, 1, 1),
+        reported_by_id=create_random_user(db).user_id,
+        incident_category_id=category.incident_category_id,
+        incident_type_id=incident_type.incident_type_id,
+    )
+    db.add(incident)
+    db.commit()
+    return incident
+
+
+def create_incident_for_report(db: Session) -> models.Incident:
+    """
+    Crea un incidente con contenido que debe escaparse, dos entradas de bitácora
+    desordenadas y una evidencia, para probar el informe.
+    """
+    category = create_random_incident_category(db)
+    incident_type = create_random_incident_type(db, category_id=category.incident_category_id)
+    reporter = create_random_user(db)
+    incident = models.Incident(
+        summary="<script>alert('x')</script>",
+        description="Phishing & credential theft",
+        discovery_time=datetime(2024, 1, 1),
+        reported_by_id=reporter.user_id,
+        incident_category_id=category.incident_category_id,
+        incident_type_id=incident_type.incident_type_id,
+    )
+    db.add(incident)
+    db.flush()
+    # Insertadas fuera de orden cronológico a propósito
+    for action, day in (("Second", 3), ("First", 2)):
+        db.add(models.IncidentLog(
+            incident_id=incident.incident_id, user_id=reporter.user_id, action=action, timestamp=datetime(2024, 1, day)
+        ))
+    db.add(models.EvidenceFile(
+        incident_id=incident.incident_id, uploaded_by_id=reporter.user_id,
+        file_name="mail<1>.eml", file_path="uploads/x", file_type="message/rfc822", file_size_bytes=1,
+    ))
+    db.commit()
+    return incident